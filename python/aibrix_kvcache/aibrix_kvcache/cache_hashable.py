@@ -16,7 +16,7 @@ from abc import ABC, abstractmethod
 from typing import List, Sequence, TypeAlias
 
 import numpy as np
-from farmhash import FarmHash32
+from farmhash import FarmHash128
 
 from .common import CachedPyObjectBase
 from .utils import hash_combine_128
@@ -97,6 +97,9 @@ class TokenListView(CachedPyObjectBase, KVCacheIds):
     A TokenListView is a view of a list of tokens.
     """
 
+    # Granularity of the rolling hashes cached in TokenListViewMeta.
+    HASH_BLOCK_NTOKENS = 16
+
     def __init__(
         self,
         data: Sequence[int] | np.ndarray,
@@ -206,7 +209,71 @@ class TokenListView(CachedPyObjectBase, KVCacheIds):
         return not self.__eq__(value)
 
     def __hash__(self) -> int:
-        return FarmHash32(self.memoryview())
+        return hash(self.digest())
+
+    def digest(self) -> int:
+        """Compute a 128-bit rolling hash of the tokens.
+
+        Every HASH_BLOCK_NTOKENS tokens are hashed and combined with the hash
+        of the preceding tokens. The rolling hashes are cached in the meta
+        data and shared by all views over the same data with the same start,
+        so hashing a view that extends a hashed one only costs the new tokens.
+        """
+        nblocks = len(self) // self.HASH_BLOCK_NTOKENS
+        hashes = self._rolling_hashes(nblocks)
+        digest = hashes[nblocks - 1] if nblocks > 0 else 0
+
+        tail = len(self) % self.HASH_BLOCK_NTOKENS
+        if tail > 0:
+            tail_data = self._data[self._stop - tail : self._stop]
+            tail_hash = int(FarmHash128(tail_data.data))
+            digest = hash_combine_128(digest, tail_hash)
+        return digest
+
+    def block_digests(self, block_ntokens: int, start: int = 0) -> List[int]:
+        """Compute the digests of the views ending at every block boundary
+        after start, i.e., the digests of self[:start + block_ntokens],
+        self[:start + 2 * block_ntokens], and so on.
+        """
+        nblocks = max(0, len(self) - start) // block_ntokens
+        step = self.HASH_BLOCK_NTOKENS
+        if block_ntokens % step != 0 or start % step != 0:
+            return [
+                self[: start + (i + 1) * block_ntokens].digest()
+                for i in range(nblocks)
+            ]
+        stride = block_ntokens // step
+        hashes = self._rolling_hashes((start + nblocks * block_ntokens) // step)
+        first = start // step + stride - 1
+        return hashes[first : first + nblocks * stride : stride]
+
+    def _rolling_hashes(self, nblocks: int) -> List[int]:
+        """Get the rolling hashes of the first nblocks blocks of the view."""
+        attr_name = f"{self.__class__.__name__}.rolling_hashes"
+        cache = getattr(self._meta_, attr_name, None)
+        if cache is None:
+            cache = {}
+            setattr(self._meta_, attr_name, cache)
+
+        hashes = cache.setdefault(self._start, [])
+        start = len(hashes)
+        if start >= nblocks:
+            return hashes
+
+        data = self._data.data
+        block_ntokens = self.HASH_BLOCK_NTOKENS
+        prev_hash = hashes[-1] if start > 0 else -1
+        new_hashes = []
+        for i in range(start, nblocks):
+            offset = self._start + i * block_ntokens
+            curr_hash = int(FarmHash128(data[offset : offset + block_ntokens]))
+            if i > 0:
+                curr_hash = hash_combine_128(prev_hash, curr_hash)
+            prev_hash = curr_hash
+            new_hashes.append(curr_hash)
+        # slice assignment keeps the cache consistent under concurrent updates
+        hashes[start:] = new_hashes
+        return hashes
 
     def memoryview(self) -> memoryview:
         return memoryview(self.to_numpy().data)
@@ -353,7 +420,18 @@ class TokenCacheKey(KVCacheHashable, CachedPyObjectBase):
     def __eq__(self, other) -> bool:
         if not isinstance(other, TokenCacheKey):
             return False
-        return self._all_tokens == other._all_tokens
+        this, that = self._all_tokens, other._all_tokens
+        if (
+            not isinstance(this, TokenListView)
+            or not isinstance(that, TokenListView)
+            or this._data is that._data
+            or len(this) != len(that)
+        ):
+            return this == that
+        # Compare the rolling hashes of all tokens and the query tokens, s.t.
+        # the cost does not grow with the prefix length.
+        start = len(this) - min(len(self._query), len(other._query))
+        return this.digest() == that.digest() and this[start:] == that[start:]
 
     def __len__(self) -> int:
         return len(self._all_tokens)
@@ -455,6 +533,17 @@ class KVCacheKey(KVCacheHashable):
     def query(self):
         return self._key.query
 
+    def parent(self) -> "KVCacheKey | None":
+        """Return the key of the preceding block of the same size, or None
+        if this key starts at the first block.
+        """
+        prefix = self.prefix
+        if prefix is None or len(prefix) == 0:
+            return None
+        split = len(prefix) - len(self.query)
+        assert split >= 0, "prefix is not aligned to the block size"
+        return KVCacheKey(prefix[:split], prefix[split:])
+
     def __hash__(self) -> int:
         return hash(self._key)
 
@@ -18,13 +18,24 @@ import functools
 import logging
 import threading
 from abc import ABC, abstractmethod
-from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Iterator, List, Sequence, Tuple, overload
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    cast,
+    overload,
+)
 
 import torch
 import torch.distributed as dist
 import uvloop
+from more_itertools import batched
 
 from . import envs
 from .cache_args import parse_kvcache_api_args
@@ -42,13 +53,15 @@ from .cache_hashable import (
 from .common.absl_logging import getLogger, log_every_n_seconds, log_if
 from .config import KVCacheConfig
 from .l1 import L1Cache
-from .l2 import KeyBuilder, L2Cache
+from .l2 import KeyBuilder, L2Cache, L2WriteBackQueue
 from .memory import ManagedMemoryRegion, MemoryRegion, TensorPoolAllocator
 from .meta_service import MetaService
 from .metrics import KVCacheMetrics, MeasurableBase, MetricRecorder
+from .op_recorder import OpRecorder
 from .profiling import nvtx_range
 from .spec import KVCacheBlockLayout, KVCacheBlockSpec
 from .status import Status, StatusCodes
+from .tracing import propagate, trace_section, trace_span
 from .utils import round_down, round_up
 
 logger = getLogger(__name__)
@@ -69,6 +82,40 @@ class KVCacheFeature:
     gdr_get: bool = False
 
 
+@dataclass
+class L2PrefetchTask:
+    """An inflight prefetch from L2Cache.
+    Args:
+        prefix: The prefix of the cache key passed to prefetch.
+        query: The query of the cache key passed to prefetch.
+        fetch_prefix: The prefix of the blocks being fetched.
+        fetch_query: The query of the blocks being fetched.
+        mrs: The memory regions to hold the fetched blocks.
+        future: The future of the L2Cache get operation.
+    """
+
+    prefix: KVCacheKeyTypes | None
+    query: KVCacheKeyTypes
+    fetch_prefix: KVCacheKeyTypes
+    fetch_query: KVCacheKeyTypes
+    mrs: List[MemoryRegion]
+    future: Future
+
+
+@dataclass
+class L2InflightFetch:
+    """A block being fetched from L2Cache by an acquire.
+    Args:
+        index: The index of the block among the blocks being fetched.
+        mr: The memory region to hold the block.
+        future: The future of the L2Cache get operation.
+    """
+
+    index: int
+    mr: MemoryRegion
+    future: Future
+
+
 class KVCacheManager(ABC):
     """The KV cache manager.
 
@@ -605,12 +652,26 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         self._thread: threading.Thread | None = None
         self._l2_inflight_writes: int = 0
         self._l2_inflight_quota: int = 0
+        self._l2_write_back_queue: L2WriteBackQueue | None = None
+        self._l2_write_back_flush_timeout_s: float = 0
+        self._l2_hot_ingestion: bool = False
+        self._l2_inflight_prefetches: Dict[KVCacheKey, L2PrefetchTask] = {}
+        self._l2_inflight_prefetch_blocks: int = 0
+        self._l2_prefetch_quota: int = 0
+        self._l2_inflight_fetches: Dict[KVCacheKey, L2InflightFetch] = {}
+        self._l2_single_flight: bool = (
+            envs.AIBRIX_KV_CACHE_OL_L2_CACHE_SINGLE_FLIGHT_ENABLED
+        )
         self._allocator: TensorPoolAllocator | None = None
         self._metrics: KVCacheMetrics | None = None
+        self._op_recorder: OpRecorder | None = None
         self._ms: MetaService | None = None
 
         self._lock = threading.Lock()
         self._infight_cv = threading.Condition(self._lock)
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_cv = threading.Condition(self._prefetch_lock)
+        self._fetch_lock = threading.Lock()
 
         self._double_get_threshold: Tuple[int, float] = (
             envs.AIBRIX_KV_CACHE_OL_DOUBLE_GET_THRESHOLD
@@ -695,9 +756,22 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             status.raise_if_not_ok()
             logger.info(f"Using meta service backend: {self._ms.name}")
 
+        op_recorder_dir: str = envs.AIBRIX_KV_CACHE_OL_OP_RECORDER_DIR
+        if len(op_recorder_dir) > 0:
+            self._op_recorder = OpRecorder(
+                op_recorder_dir,
+                block_ntokens=self.block_ntokens,
+                block_nbytes=self.block_nbytes,
+                chunk_nrecords=(
+                    envs.AIBRIX_KV_CACHE_OL_OP_RECORDER_CHUNK_NRECORDS
+                ),
+                max_chunks=envs.AIBRIX_KV_CACHE_OL_OP_RECORDER_MAX_CHUNKS,
+                time_measurement_enabled=enable_time_measurement,
+            )
+
         # init MeasurableBase
         assert self._metrics is not None
-        MeasurableBase.__init__(self, self._metrics.mgr)
+        MeasurableBase.__init__(self, self._metrics.mgr, self._op_recorder)
 
         # init allocator
         allocator_capacity_nbytes: int = 0
@@ -727,8 +801,15 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
                     self._l2_inflight_quota * self.block_ntokens,
                 )
 
+            self._l2_prefetch_quota = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS
+                // self.block_ntokens
+            )
+
             max_mr_nbytes = ManagedMemoryRegion.calculate_size(
-                self.block_nbytes, self.config.model_spec.max_model_len
+                self.block_nbytes,
+                self.config.model_spec.max_model_len,
+                self.block_ntokens,
             )
             nblocks_per_batch = engine_batch_ntokens // self.block_ntokens
             # more capacity for async/sync load
@@ -740,6 +821,11 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             # more capacity for get
             more_capacity_nbytes += 2 * nblocks_per_batch * max_mr_nbytes
 
+            # more capacity for prefetch if prefetched blocks are staged
+            # outside of L1Cache
+            if not enable_l1:
+                more_capacity_nbytes += self._l2_prefetch_quota * max_mr_nbytes
+
             allocator_capacity_nbytes += more_capacity_nbytes
 
         self._allocator = TensorPoolAllocator.create(
@@ -753,6 +839,10 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             eviction_policy: str = (
                 envs.AIBRIX_KV_CACHE_OL_L1_CACHE_EVICTION_POLICY
             )
+            admission_policy: str = (
+                envs.AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_POLICY
+            )
+            num_shards: int = envs.AIBRIX_KV_CACHE_OL_L1_CACHE_NUM_SHARDS
 
             self._l1_cache = L1Cache(
                 eviction_policy,
@@ -761,22 +851,43 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
                 self.block_spec,
                 metrics=self._metrics.l1,
                 multi_threaded=self.config.multi_threaded,
+                admission_policy=admission_policy,
+                num_shards=num_shards,
             )
 
         if enable_l2:
             backend_name: str = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND
             namespace: str = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_NAMESPACE
-            # compression: str = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_COMPRESSION
+            compression: str = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_COMPRESSION
+            quantization: str = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION
             ingestion_type: str = (
                 envs.AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_TYPE
             )
             op_batch: int = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH
+            write_back_batch_max_nbytes: int = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_BATCH_MAX_NBYTES
+            )
+            write_back_max_inflight_batches: int = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_MAX_INFLIGHT_BATCHES
+            )
+            write_back_timeout_ms: int = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_TIMEOUT_MS
+            )
+            write_back_flush_timeout_ms: int = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_FLUSH_TIMEOUT_MS
+            )
             self._executor = ThreadPoolExecutor(
                 envs.AIBRIX_KV_CACHE_OL_L2_CACHE_NUM_ASYNC_WORKERS,
                 thread_name_prefix="l2_cache_",
             )
 
             placement_policy = envs.AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_POLICY
+            replication_factor = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_REPLICATION_FACTOR
+            )
+            hedge_percentile = (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_HEDGE_PERCENTILE
+            )
             refresh_interval_s = (
                 envs.AIBRIX_KV_CACHE_OL_META_SERVICE_REFRESH_INTERVAL_S
             )
@@ -795,6 +906,24 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
                 metrics=self._metrics.l2,
                 meta_service=self._ms,
                 key_builder=key_builder,
+                replication_factor=replication_factor,
+                hedge_percentile=hedge_percentile,
+                compression=compression,
+                quantization=quantization,
+                quantization_granularity=(
+                    envs.AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION_GRANULARITY
+                ),
+                exists_strategy=(
+                    envs.AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_STRATEGY
+                ),
+                exists_verify=envs.AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_VERIFY,
+                filter_capacity=(
+                    envs.AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_CAPACITY
+                ),
+                filter_fp_rate=envs.AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_FP_RATE,
+                filter_refresh_interval_s=(
+                    envs.AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_REFRESH_INTERVAL_S
+                ),
             )
 
             # new an event loop to carry out L2Cache ops
@@ -820,8 +949,31 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
                     )
                     reg_status.raise_if_not_ok()
 
+            if (
+                envs.AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_ENABLED
+                and self._l2_inflight_quota > 0
+                and not self._l2_cache.feature.zero_copy
+            ):
+                assert self._metrics.l2 is not None
+                self._l2_write_back_queue = L2WriteBackQueue(
+                    self._l2_cache,
+                    self._event_loop,
+                    capacity_nblocks=self._l2_inflight_quota,
+                    max_batch_nblocks=op_batch,
+                    max_batch_nbytes=write_back_batch_max_nbytes,
+                    max_inflight_batches=write_back_max_inflight_batches,
+                    timeout_s=write_back_timeout_ms / 1000,
+                    on_done=lambda value: self._release([value]),  # type: ignore[list-item]
+                    metrics=self._metrics.l2.write_back_metrics,
+                )
+                self._l2_write_back_flush_timeout_s = (
+                    write_back_flush_timeout_ms / 1000
+                )
+                logger.info("Using %s", self._l2_write_back_queue)
+
             # register l1 cache callback
             if self._l1_cache is not None:
+                self._l2_hot_ingestion = ingestion_type == "HOT"
                 if ingestion_type == "HOT":
                     self._l1_cache.set_on_hot_access_callback(
                         self._l2_ingestion_callback  # type: ignore
@@ -891,6 +1043,13 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         # flush
         self.flush()
 
+        # drop inflight prefetches and wait for them to complete
+        self._cancel_l2_prefetches()
+        with self._prefetch_cv:
+            self._prefetch_cv.wait_for(
+                lambda: self._l2_inflight_prefetch_blocks == 0, timeout=60
+            )
+
         # terminate event loop and thread
         if self._event_loop is not None and self._event_loop.is_running():
             with contextlib.suppress(Exception):
@@ -910,6 +1069,9 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             self._l2_cache.close()
             del self._l2_cache
 
+        if self._op_recorder is not None:
+            self._op_recorder.close()
+
     def _l2_cache_has_zero_copy(self) -> bool:
         return self._l2_cache is not None and self._l2_cache.feature.zero_copy
 
@@ -926,19 +1088,33 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             The status of the ingestion operation and the number of tokens have
             been ingested or scheduled.
         """
-        return self._l2_put(key.prefix, key.query, mr)
+        # runs with the lock of an L1 cache shard held, so never wait for
+        # the write-back queue to drain
+        return self._l2_put(
+            key.prefix,
+            key.query,
+            mr,
+            hot=self._l2_hot_ingestion,
+            blocking=False,
+        )
 
     def _l2_put(
         self,
         prefix: KVCacheKeyTypes | None,
         query: KVCacheKeyTypes,
         value: MemoryRegion | KVCacheHandle,
+        hot: bool = False,
+        blocking: bool = True,
     ) -> Status:
         """Put the kv tensors to the L2Cache.
         Args:
             prefix: The prefix tokens of the kv tensors.
             query: The query tokens of the kv tensors.
             value: The kv tensors.
+            hot: Whether the kv tensors are hot, which only matters to the
+                 write-back queue.
+            blocking: Whether to wait for a full write-back queue to drain.
+                      If False, the kv tensors are dropped instead.
         Returns:
             The status of the put operation and the number of tokens have
             been put or scheduled.
@@ -946,7 +1122,16 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         assert self._l2_cache is not None, "l2_cache is not initialized."
 
         status = None
-        if self._l2_inflight_quota == 0:
+        if self._l2_write_back_queue is not None:
+            # coalesced async write
+            status = self._l2_write_back_queue.put(
+                prefix,
+                query,
+                value,
+                hot,
+                timeout_s=None if blocking else 0,
+            )
+        elif self._l2_inflight_quota == 0:
             # sync write
             status = self._l2_put_sync(prefix, query, value)
         else:
@@ -1016,7 +1201,8 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         # Async write to L2Cache
         assert self._event_loop is not None
         future = asyncio.run_coroutine_threadsafe(
-            self._l2_cache.put(prefix, query, value), self._event_loop
+            propagate(self._l2_cache.put(prefix, query, value)),
+            self._event_loop,
         )
         future.add_done_callback(functools.partial(_done_callback, value=value))
         return Status.ok(len(query))
@@ -1039,7 +1225,8 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         assert self._l2_cache is not None, "l2_cache is not initialized."
         assert self._event_loop is not None
         future = asyncio.run_coroutine_threadsafe(
-            self._l2_cache.put(prefix, query, value), self._event_loop
+            propagate(self._l2_cache.put(prefix, query, value)),
+            self._event_loop,
         )
         # wait until the write is done
         status = future.result()
@@ -1069,10 +1256,268 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         return self._l2_cache._backend.register_slabs(kvcache_bytes_views)
 
     def prefetch(self, *args, **kwargs) -> None:
-        # TODO: implement background prefetching that loads kv cache
-        # from L2Cache to L1Cache.
-        pass
+        """Prefetch the kv cache from L2Cache in the background.
+
+        Prefetched blocks are put onto L1Cache once the prefetch completes,
+        or staged in memory regions if L1Cache is not enabled. A subsequent
+        acquire or get with the same cache key waits for the inflight
+        prefetch instead of issuing a duplicated L2Cache get. Prefetches
+        exceeding the inflight quota are discarded.
+        """
+        if (
+            self._l2_prefetch_quota == 0
+            or self._l2_cache is None
+            or self._l2_cache_has_zero_copy()
+        ):
+            return
+
+        prefix, query, _ = parse_kvcache_api_args(*args, **kwargs)
+        if prefix is not None and len(prefix) % self.block_ntokens != 0:
+            return
+
+        num_blocks = len(query) // self.block_ntokens
+        if num_blocks == 0:
+            return
+        query = query[: num_blocks * self.block_ntokens]
+
+        # commit completed prefetches to release their quota
+        self._reap_l2_prefetches()
+
+        key = KVCacheKey(prefix, query)
+        with self._prefetch_lock:
+            if key in self._l2_inflight_prefetches:
+                return
+
+        num_existing_blocks = 0
+        if self._l1_cache is not None:
+            l1_status = self._l1_cache.exists(prefix, query)
+            num_existing_blocks = l1_status.get(default=0)
+            num_missing_blocks = num_blocks - num_existing_blocks
+            if num_missing_blocks == 0 or not self._use_double_get(
+                num_missing_blocks, num_blocks
+            ):
+                # acquire would not go to L2Cache for these blocks
+                return
+        else:
+            self._reap_l2_prefetches(num_blocks)
+
+        with self._prefetch_lock:
+            nblocks = min(
+                num_blocks - num_existing_blocks,
+                self._l2_prefetch_quota - self._l2_inflight_prefetch_blocks,
+            )
+            if nblocks <= 0:
+                log_every_n_seconds(
+                    logger,
+                    logging.WARNING,
+                    (
+                        "There are too many inflight prefetches, skip "
+                        "prefetching from l2_cache. inflight prefetches "
+                        "%d/quota %d"
+                    ),
+                    10,
+                    self._l2_inflight_prefetch_blocks,
+                    self._l2_prefetch_quota,
+                )
+                return
+            self._l2_inflight_prefetch_blocks += nblocks
+
+        num_existing_tokens = num_existing_blocks * self.block_ntokens
+        if prefix is not None:
+            fetch_prefix = prefix + query[:num_existing_tokens]
+        else:
+            fetch_prefix = query[:num_existing_tokens]
+        fetch_query = query[
+            num_existing_tokens : num_existing_tokens
+            + nblocks * self.block_ntokens
+        ]
+
+        status = self.allocate_for(fetch_prefix, fetch_query)
+        if not status.is_ok():
+            with self._prefetch_lock:
+                self._l2_inflight_prefetch_blocks -= nblocks
+            return
+        mrs: List[MemoryRegion] = list(status.get().memory_regions)
+
+        assert self._event_loop is not None
+        future = asyncio.run_coroutine_threadsafe(
+            propagate(self._l2_cache.get(fetch_prefix, fetch_query, mrs)),
+            self._event_loop,
+        )
+        task = L2PrefetchTask(
+            prefix=prefix,
+            query=query,
+            fetch_prefix=fetch_prefix,
+            fetch_query=fetch_query,
+            mrs=mrs,
+            future=future,
+        )
+        with self._prefetch_lock:
+            duplicated = key in self._l2_inflight_prefetches
+            if not duplicated:
+                self._l2_inflight_prefetches[key] = task
+        if duplicated:
+            # another thread has issued the same prefetch
+            self._detach_l2_prefetch(task)
+
+    def _finish_l2_prefetch(
+        self, task: L2PrefetchTask, commit: bool = False
+    ) -> List[MemoryRegion]:
+        """Finish a prefetch that has been removed from the inflight ones.
+        Args:
+            task: The prefetch task.
+            commit: Whether to put the fetched blocks onto L1Cache.
+        Returns:
+            The fetched memory regions that are neither put onto L1Cache
+            nor released, i.e., staged blocks owned by the caller.
+        """
+        fetched_mrs: List[MemoryRegion] = []
+        if task.future.done() and not task.future.cancelled():
+            if task.future.exception() is None:
+                status = task.future.result()
+                if status.is_ok():
+                    fetched_mrs = task.mrs[: status.get()]
+
+        mrs_to_release = task.mrs[len(fetched_mrs) :]
+        if not commit:
+            mrs_to_release = task.mrs
+            fetched_mrs = []
+        elif len(fetched_mrs) > 0 and self._l1_cache is not None:
+            put_status = self._l1_cache.put(
+                task.fetch_prefix,
+                task.fetch_query[: len(fetched_mrs) * self.block_ntokens],
+                fetched_mrs,
+            )
+            if put_status.is_ok():
+                mrs_to_release += fetched_mrs[put_status.get() :]
+            else:
+                mrs_to_release += fetched_mrs
+            fetched_mrs = []
+
+        self._release(mrs_to_release)
+        with self._prefetch_cv:
+            self._l2_inflight_prefetch_blocks -= len(task.mrs)
+            self._prefetch_cv.notify_all()
+        return fetched_mrs
+
+    def _reap_l2_prefetches(self, nblocks: int = 0) -> None:
+        """Reap completed prefetches.
+
+        If L1Cache is enabled, blocks fetched by completed prefetches are put
+        onto L1Cache. Otherwise, the oldest completed prefetches are discarded
+        until there is enough quota for prefetching the given number of
+        blocks.
+
+        Args:
+            nblocks: The number of blocks to be prefetched.
+        """
+        if not self._l2_inflight_prefetches:
+            return
+
+        tasks: List[L2PrefetchTask] = []
+        with self._prefetch_lock:
+            quota = self._l2_prefetch_quota - self._l2_inflight_prefetch_blocks
+            for key, task in list(self._l2_inflight_prefetches.items()):
+                if self._l1_cache is None and quota >= nblocks:
+                    break
+                if task.future.done():
+                    del self._l2_inflight_prefetches[key]
+                    tasks.append(task)
+                    quota += len(task.mrs)
+
+        for task in tasks:
+            self._finish_l2_prefetch(task, commit=self._l1_cache is not None)
+
+    def _claim_l2_prefetch(
+        self, prefix: KVCacheKeyTypes | None, query: KVCacheKeyTypes
+    ) -> List[MemoryRegion]:
+        """Wait for the inflight prefetch of the given cache key if any.
+
+        If L1Cache is enabled, fetched blocks are put onto L1Cache. Otherwise,
+        fetched blocks are returned and owned by the caller.
+
+        Args:
+            prefix: The prefix tokens/block hashes of the kv cache.
+            query: The query tokens/block hashes of the kv cache.
+        Returns:
+            The staged memory regions.
+        """
+        self._reap_l2_prefetches()
+
+        prefix_len = len(prefix) if prefix is not None else 0
+        key = KVCacheKey(prefix, query)
+        with self._prefetch_lock:
+            task = self._l2_inflight_prefetches.get(key)
+            if task is None:
+                return []
+            task_prefix_len = len(task.prefix) if task.prefix else 0
+            if task_prefix_len != prefix_len:
+                return []
+            del self._l2_inflight_prefetches[key]
+
+        timeout_s = (
+            len(task.fetch_query) * self._l2_cache_per_token_timeout_ms
+        ) / 1000
+        try:
+            task.future.result(timeout=timeout_s)
+        except Exception:
+            # the blocks will be fetched again by the caller
+            self._detach_l2_prefetch(task)
+            return []
+        return self._finish_l2_prefetch(task, commit=True)
+
+    def _cancel_l2_prefetches(
+        self,
+        prefix: KVCacheKeyTypes | None = None,
+        query: KVCacheKeyTypes | None = None,
+    ) -> None:
+        """Cancel inflight prefetches.
+
+        If a cache key is given, only cancel prefetches whose prefix is
+        the given cache key, i.e., prefetches of the following chunk that
+        will not be consumed since the given cache key is not fully hit.
+        Otherwise, cancel all inflight prefetches.
 
+        Args:
+            prefix: The prefix tokens/block hashes of the kv cache.
+            query: The query tokens/block hashes of the kv cache.
+        """
+        if not self._l2_inflight_prefetches:
+            return
+
+        cache_key = None
+        if query is not None:
+            query = query[: round_down(len(query), self.block_ntokens)]
+            cache_key = prefix + query if prefix is not None else query
+
+        tasks: List[L2PrefetchTask] = []
+        with self._prefetch_lock:
+            for key, task in list(self._l2_inflight_prefetches.items()):
+                if cache_key is not None and (
+                    task.prefix is None
+                    or len(task.prefix) != len(cache_key)
+                    or task.prefix != cache_key
+                ):
+                    continue
+                del self._l2_inflight_prefetches[key]
+                tasks.append(task)
+
+        for task in tasks:
+            self._detach_l2_prefetch(task)
+
+    def _detach_l2_prefetch(self, task: L2PrefetchTask) -> None:
+        """Detach a prefetch that has been removed from the inflight ones.
+
+        L2Cache ops run in the executor and cannot be interrupted, so the
+        memory regions are released once the prefetch completes, instead of
+        being released while the backend may still write into them.
+
+        Args:
+            task: The prefetch task.
+        """
+        task.future.add_done_callback(lambda _: self._finish_l2_prefetch(task))
+
+    @trace_span("acquire", "KVCacheManager")
     @nvtx_range("acquire", "KVCacheManager")
     @MeasurableBase.measure(MetricRecorder.OP.ACQUIRE)
     def acquire(self, *args, **kwargs) -> Status[Tuple[int, KVCacheHandle]]:
@@ -1085,6 +1530,12 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             )
 
         status = self._acquire_impl(prefix, query)
+        if not status.is_ok() or (
+            len(status.get()) * self.block_ntokens
+            < round_down(len(query), self.block_ntokens)
+        ):
+            # prefetches of the following chunks are useless
+            self._cancel_l2_prefetches(prefix, query)
         if not status.is_ok():
             return Status(status)
 
@@ -1100,6 +1551,7 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             )
         )
 
+    @trace_span("get", "KVCacheManager")
     @nvtx_range("get", "KVCacheManager")
     @MeasurableBase.measure(MetricRecorder.OP.GET)
     def get(self, *args, **kwargs) -> Status[int]:
@@ -1136,6 +1588,7 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             return Status(status)
         return Status.ok(len(status.get()) * self.block_ntokens)
 
+    @trace_span("exists", "KVCacheManager")
     @MeasurableBase.measure(MetricRecorder.OP.EXISTS)
     def exists(self, *args, **kwargs) -> Status[int]:
         prefix, query, _ = parse_kvcache_api_args(*args, **kwargs)
@@ -1201,10 +1654,14 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
 
         assert self._event_loop is not None
         future = asyncio.run_coroutine_threadsafe(
-            self._l2_cache.exists(prefix_curr, tokens_curr), self._event_loop
+            propagate(self._l2_cache.exists(prefix_curr, tokens_curr)),
+            self._event_loop,
         )
         try:
-            status = future.result(timeout=timeout_s)
+            with trace_section(
+                "KVCacheManager.wait_l2_exists", nblocks=num_missing_blocks
+            ):
+                status = future.result(timeout=timeout_s)
             if not status.is_ok():
                 return status if num_existing_blocks == 0 else l1_status
 
@@ -1272,13 +1729,32 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         if output_mrs is None and self._l2_cache_has_zero_copy():
             return self._l2_acquire_impl(prefix, query)
 
+        # wait for the inflight prefetch instead of fetching it again
+        staged_mrs: List[MemoryRegion] = []
+        if self._l2_inflight_prefetches:
+            staged_mrs = self._claim_l2_prefetch(prefix, query)
+
         fetched_mrs: List[MemoryRegion] = []
         num_fetched_blocks = 0
         num_missing_blocks = num_blocks
         l1_status: Status[Sequence[MemoryRegion]] = Status(
             StatusCodes.NOT_FOUND
         )
-        if self._l1_cache is not None:
+        if len(staged_mrs) > 0:
+            # blocks staged by prefetch, only if L1Cache is not enabled
+            if output_mrs is not None:
+                for i in range(len(staged_mrs)):
+                    output_mrs[i].copy(staged_mrs[i])  # type: ignore
+                self._release(staged_mrs)
+                staged_mrs = list(output_mrs[: len(staged_mrs)])  # type: ignore
+
+            fetched_mrs = staged_mrs
+            num_fetched_blocks = len(fetched_mrs)
+            num_missing_blocks = num_blocks - num_fetched_blocks
+            l1_status = Status.ok(fetched_mrs)
+            if num_missing_blocks == 0:
+                return l1_status
+        elif self._l1_cache is not None:
             l1_status = self._l1_cache.acquire(prefix, query)
 
             fetched_mrs = list(l1_status.get()) if l1_status.is_ok() else []
@@ -1296,8 +1772,11 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
                     return l1_status
 
                 if output_mrs is not None:
-                    for i in range(num_fetched_blocks):
-                        output_mrs[i].copy(fetched_mrs[i])  # type: ignore
+                    with trace_section(
+                        "KVCacheManager.copy", nblocks=num_fetched_blocks
+                    ):
+                        for i in range(num_fetched_blocks):
+                            output_mrs[i].copy(fetched_mrs[i])  # type: ignore
                     l1_status = Status.ok(output_mrs[:num_fetched_blocks])  # type: ignore
                 return l1_status
 
@@ -1329,11 +1808,70 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         tokens_curr = tokens_curr[:ntokens_to_get]
 
         assert self._event_loop is not None
-        future = asyncio.run_coroutine_threadsafe(
-            self._l2_cache.get(prefix_curr, tokens_curr, mrs), self._event_loop
-        )
+        single_flight = output_mrs is None and self._l2_single_flight
+        joined: List[L2InflightFetch] = []
+        joined_mrs: List[MemoryRegion] = []
+        fetches: List[Tuple[KVCacheKey, L2InflightFetch]] = []
+        future: Future | None = None
+        fetch_lock: ContextManager[Any] = contextlib.nullcontext()
+        if single_flight:
+            fetch_lock = self._fetch_lock
+        # join and issue fetches atomically, s.t. concurrent acquires of the
+        # same blocks either join this fetch or get joined by it
+        with fetch_lock:
+            if single_flight:
+                # wait for leading blocks being fetched by other acquires
+                # instead of fetching them again
+                joined = self._join_l2_fetches(prefix_curr, tokens_curr)
+                njoined_tokens = len(joined) * self.block_ntokens
+                prefix_curr = prefix_curr + tokens_curr[:njoined_tokens]
+                tokens_curr = tokens_curr[njoined_tokens:]
+                joined_mrs, mrs = mrs[: len(joined)], mrs[len(joined) :]
+
+            if len(mrs) > 0:
+                future = asyncio.run_coroutine_threadsafe(
+                    propagate(
+                        self._l2_cache.get(prefix_curr, tokens_curr, mrs)
+                    ),
+                    self._event_loop,
+                )
+                if single_flight:
+                    fetches = self._register_l2_fetches(
+                        prefix_curr, tokens_curr, mrs, future
+                    )
+        self._release(joined_mrs)
+
+        if future is None:
+            # all missing blocks are being fetched by other acquires
+            with trace_section(
+                "KVCacheManager.wait_l2_fetches", nblocks=len(joined)
+            ):
+                fetched_mrs += self._wait_l2_fetches(joined, timeout_s)
+            if len(fetched_mrs) == 0:
+                return Status(StatusCodes.NOT_FOUND)
+            l1_status = Status.ok(fetched_mrs)
+            return l1_status
+
         try:
-            get_status = future.result(timeout=timeout_s)
+            with trace_section("KVCacheManager.wait_l2_get", nblocks=len(mrs)):
+                get_status = future.result(timeout=timeout_s)
+            if len(joined) > 0:
+                njoined_blocks = len(joined)
+                with trace_section(
+                    "KVCacheManager.wait_l2_fetches", nblocks=njoined_blocks
+                ):
+                    shared_mrs = self._wait_l2_fetches(joined, timeout_s)
+                fetched_mrs += shared_mrs
+                num_fetched_blocks = len(fetched_mrs)
+                if num_fetched_blocks > 0:
+                    l1_status = Status.ok(fetched_mrs)
+                if len(shared_mrs) < njoined_blocks:
+                    # blocks fetched by this acquire do not follow the hits
+                    return (
+                        Status(StatusCodes.NOT_FOUND)
+                        if num_fetched_blocks == 0
+                        else l1_status
+                    )
             if not get_status.is_ok():
                 return get_status if num_fetched_blocks == 0 else l1_status
 
@@ -1394,9 +1932,125 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
         finally:
             if output_mrs is None:
                 self._release(mrs)
+                self._release([fetch.mr for fetch in joined])
+            if len(fetches) > 0:
+                self._unregister_l2_fetches(fetches)
             if not future.done():
                 future.cancel()
 
+    def _join_l2_fetches(
+        self, prefix: KVCacheKeyTypes, query: KVCacheKeyTypes
+    ) -> List[L2InflightFetch]:
+        """Join the inflight fetches of the leading blocks of the given
+        cache key. The caller must hold `_fetch_lock`.
+
+        Memory regions of the joined blocks are referenced on behalf of the
+        caller, who either keeps them or releases them.
+
+        Args:
+            prefix: The prefix tokens/block hashes of the kv cache.
+            query: The query tokens/block hashes of the kv cache.
+        Returns:
+            The inflight fetches of the leading blocks.
+        """
+        joined: List[L2InflightFetch] = []
+        if not self._l2_inflight_fetches:
+            return joined
+
+        for block_prefix, block_query in L1Cache.cache_block_keys(
+            prefix, query, self.block_ntokens
+        ):
+            fetch = self._l2_inflight_fetches.get(
+                KVCacheKey(block_prefix, block_query)
+            )
+            if fetch is None:
+                break
+            fetch.mr.ref_up()
+            joined.append(fetch)
+        return joined
+
+    def _wait_l2_fetches(
+        self, joined: List[L2InflightFetch], timeout_s: float
+    ) -> List[MemoryRegion]:
+        """Wait for the joined fetches.
+
+        Args:
+            joined: The joined fetches, cleared once they are consumed.
+            timeout_s: The timeout in seconds.
+        Returns:
+            The memory regions of the leading blocks that have been fetched,
+            owned by the caller.
+        """
+        wait({fetch.future for fetch in joined}, timeout=timeout_s)
+
+        shared_mrs: List[MemoryRegion] = []
+        for fetch in joined:
+            future = fetch.future
+            if (
+                not future.done()
+                or future.cancelled()
+                or future.exception() is not None
+            ):
+                break
+            status = future.result()
+            if not status.is_ok() or fetch.index >= status.get():
+                break
+            shared_mrs.append(fetch.mr)
+
+        self._release([fetch.mr for fetch in joined[len(shared_mrs) :]])
+        joined.clear()
+        if self._metrics is not None and self._metrics.l2 is not None:
+            self._metrics.l2.trace_single_flight(0, len(shared_mrs))
+        return shared_mrs
+
+    def _register_l2_fetches(
+        self,
+        prefix: KVCacheKeyTypes,
+        query: KVCacheKeyTypes,
+        mrs: List[MemoryRegion],
+        future: Future,
+    ) -> List[Tuple[KVCacheKey, L2InflightFetch]]:
+        """Register the blocks being fetched, s.t. concurrent acquires of
+        the same blocks can join the fetch. The caller must hold
+        `_fetch_lock`.
+
+        Each registered block holds a reference to its memory region until
+        it is unregistered, so that joiners can reference it even if this
+        acquire has released it.
+
+        Args:
+            prefix: The prefix tokens/block hashes of the blocks.
+            query: The query tokens/block hashes of the blocks.
+            mrs: The memory regions to hold the blocks.
+            future: The future of the L2Cache get operation.
+        Returns:
+            The registered blocks.
+        """
+        fetches: List[Tuple[KVCacheKey, L2InflightFetch]] = []
+        for i, (block_prefix, block_query) in enumerate(
+            L1Cache.cache_block_keys(prefix, query, self.block_ntokens)
+        ):
+            key = KVCacheKey(block_prefix, block_query)
+            if key in self._l2_inflight_fetches:
+                continue
+            mrs[i].ref_up()
+            fetch = L2InflightFetch(index=i, mr=mrs[i], future=future)
+            self._l2_inflight_fetches[key] = fetch
+            fetches.append((key, fetch))
+        if self._metrics is not None and self._metrics.l2 is not None:
+            self._metrics.l2.trace_single_flight(len(mrs), 0)
+        return fetches
+
+    def _unregister_l2_fetches(
+        self, fetches: List[Tuple[KVCacheKey, L2InflightFetch]]
+    ) -> None:
+        """Unregister the blocks registered by `_register_l2_fetches`."""
+        with self._fetch_lock:
+            for key, fetch in fetches:
+                if self._l2_inflight_fetches.get(key) is fetch:
+                    del self._l2_inflight_fetches[key]
+        self._release([fetch.mr for _, fetch in fetches])
+
     def _l2_acquire_impl(
         self,
         prefix: KVCacheKeyTypes | None,
@@ -1420,7 +2074,7 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             * self._l2_cache_per_token_timeout_ms
         ) / 1000
         future = asyncio.run_coroutine_threadsafe(
-            self._l2_cache.acquire(prefix, query),  # type: ignore
+            propagate(self._l2_cache.acquire(prefix, query)),  # type: ignore
             self._event_loop,  # type: ignore
         )
         try:
@@ -1482,6 +2136,7 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             elif isinstance(x, KVCacheHandle):
                 x.release()
 
+    @trace_span("allocate_for", "KVCacheManager")
     @nvtx_range("allocate_for", "KVCacheManager")
     def allocate_for(self, *args, **kwargs) -> Status[KVCacheHandle]:
         prefix, query, _ = parse_kvcache_api_args(*args, **kwargs)
@@ -1491,13 +2146,15 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             return self._l2_allocate_for(prefix, query)
 
         if not MemoryRegion.use_compact_layout():
-            key_pairs = list(
-                L1Cache.cache_block_keys(prefix, query, self.block_ntokens)
-            )
+            with trace_section("KVCacheManager.build_keys"):
+                key_pairs = list(
+                    L1Cache.cache_block_keys(prefix, query, self.block_ntokens)
+                )
             sizes = tuple(
                 ManagedMemoryRegion.calculate_size(
                     self.block_nbytes,
                     len(block_prefix) + len(block_tokens),
+                    len(block_tokens),
                 )
                 for block_prefix, block_tokens in key_pairs
             )
@@ -1505,10 +2162,11 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             nblocks = len(query) // self.block_ntokens
             sizes = tuple(self.block_nbytes for _ in range(nblocks))
 
-        if self._l1_cache is not None:
-            status = self._l1_cache.allocate(sizes)  # type: ignore
-        else:
-            status = self._allocator.alloc(sizes)  # type: ignore
+        with trace_section("KVCacheManager.allocate", nblocks=len(sizes)):
+            if self._l1_cache is not None:
+                status = self._l1_cache.allocate(sizes)  # type: ignore
+            else:
+                status = self._allocator.alloc(sizes)  # type: ignore
 
         if not status.is_ok():
             return Status(status)
@@ -1529,8 +2187,10 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
 
         assert self._event_loop is not None
         future = asyncio.run_coroutine_threadsafe(
-            self._l2_cache.allocate(  # type: ignore
-                prefix=prefix, query=query, sizes=sizes
+            propagate(
+                self._l2_cache.allocate(  # type: ignore
+                    prefix=prefix, query=query, sizes=sizes
+                )
             ),
             self._event_loop,
         )
@@ -1544,6 +2204,7 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             MemoryRegionKVCacheHandle(self.block_dtype, self.block_shape, mrs)
         )
 
+    @trace_span("put", "KVCacheManager")
     @nvtx_range("put", "KVCacheManager")
     @MeasurableBase.measure(MetricRecorder.OP.PUT)
     def put(self, *args, **kwargs) -> Status[int]:
@@ -1639,6 +2300,13 @@ class BaseKVCacheManager(KVCacheManager, MeasurableBase):
             self._l2_cache.flush()  # type: ignore
             return Status.ok()
 
+        if self._l2_write_back_queue is not None:
+            status = self._l2_write_back_queue.flush(
+                timeout_s=self._l2_write_back_flush_timeout_s
+            )
+            if not status.is_ok():
+                return status
+
         if self._infight_cv is None:
             return Status.ok()
 
@@ -1723,6 +2391,15 @@ class GroupAwareKVCacheManager(BaseKVCacheManager):
             device=coll_tensor_device,
         )
 
+        self._acquire_pipeline_depth: int = max(
+            1, envs.AIBRIX_KV_CACHE_OL_GROUP_AWARE_ACQUIRE_PIPELINE_DEPTH
+        )
+        self._coll_vector = torch.empty(
+            (self._acquire_pipeline_depth),
+            dtype=torch.int32,
+            device=coll_tensor_device,
+        )
+
         super().__init__(config)
 
     def __repr__(self) -> str:
@@ -1739,12 +2416,16 @@ class GroupAwareKVCacheManager(BaseKVCacheManager):
     def __str__(self) -> str:
         return self.__repr__()
 
+    @trace_span("acquire", "GroupAwareKVCacheManager")
     @nvtx_range("acquire", "GroupAwareKVCacheManager")
     @MeasurableBase.measure(MetricRecorder.OP.ACQUIRE)
     def acquire(self, *args, **kwargs) -> Status[Tuple[int, KVCacheHandle]]:
         prefix, query, _ = parse_kvcache_api_args(*args, **kwargs)
 
-        status = self._group_aware_acquire_impl(prefix, query)
+        if self._acquire_pipeline_depth > 1:
+            status = self._group_aware_pipelined_acquire_impl(prefix, query)
+        else:
+            status = self._group_aware_acquire_impl(prefix, query)
         if not status.is_ok():
             return Status(status)
         value = status.get()
@@ -1797,6 +2478,9 @@ class GroupAwareKVCacheManager(BaseKVCacheManager):
                 group=self.process_group,
             )
             coll_result = self._coll_tensor[0].item()
+            if coll_result * self.block_ntokens < len(chunk_tokens):
+                # prefetch of the next chunk is useless
+                self._cancel_l2_prefetches(chunk_prefix, chunk_tokens)
             # if any participant encountered an error
             if coll_result <= 0:
                 self._release(value)
@@ -1826,6 +2510,121 @@ class GroupAwareKVCacheManager(BaseKVCacheManager):
             else Status(StatusCodes.NOT_FOUND)
         )
 
+    def _group_aware_pipelined_acquire_impl(
+        self,
+        prefix: KVCacheKeyTypes | None,
+        query: KVCacheKeyTypes,
+    ) -> Status[Tuple[int, Sequence[MemoryRegion]]]:
+        """Get kv tensors / cache handles, acquiring multiple chunks per
+        collective.
+
+        Chunks are processed in windows of `_acquire_pipeline_depth`. Each
+        participant prefetches and acquires all chunks of a window, then the
+        per-chunk hit counts are exchanged in one all_reduce. Memory regions
+        beyond the agreed hit count are released in bulk.
+
+        The acquires of a window still run one after another. What overlaps
+        are the L2Cache prefetches of the window, which are only issued if
+        prefetching is enabled. Otherwise, this only saves collectives.
+
+        Args:
+            prefix: The prefix tokens/block hashes of the kv cache.
+            query: The query tokens/block hashes of the kv cache.
+        Returns:
+            Number of tokens have been fetched from the kv cache service.
+            The memory regions corresponding to the given tokens.
+        """
+        if prefix is not None and len(prefix) % self.block_ntokens != 0:
+            return Status(StatusCodes.INVALID)
+
+        # If it is not a full block, return
+        if len(query) // self.block_ntokens == 0:
+            return Status(StatusCodes.NOT_FOUND)
+
+        start = 0
+        results: List[MemoryRegion] = []
+        for window in batched(
+            self.cache_chunk_keys(prefix, query), self._acquire_pipeline_depth
+        ):
+            # issue prefetches of all chunks in the window first, so that
+            # l2 fetches of later chunks overlap with acquiring earlier ones
+            for chunk_prefix, chunk_tokens, next_tokens, _ in window:
+                if next_tokens:
+                    super().prefetch(chunk_prefix + chunk_tokens, next_tokens)
+
+            values: List[Sequence[MemoryRegion]] = []
+            counts = [self._COLL_STATUS_NOT_FOUND] * len(window)
+            for i, (chunk_prefix, chunk_tokens, _, _) in enumerate(window):
+                status = super()._acquire_impl(chunk_prefix, chunk_tokens)
+                # without output MRs, acquired MRs are always flat
+                values.append(
+                    cast(Sequence[MemoryRegion], status.get(default=[]))
+                )
+                if status.is_ok():
+                    counts[i] = len(status.get())
+                elif not status.is_not_found():
+                    counts[i] = self._COLL_STATUS_ERROR
+                # chunks after a partial hit would be discarded anyway
+                if counts[i] * self.block_ntokens < len(chunk_tokens):
+                    break
+
+            coll_vector = self._coll_vector[: len(window)]
+            coll_vector.copy_(torch.tensor(counts, dtype=torch.int32))
+            dist.all_reduce(
+                coll_vector,
+                op=dist.ReduceOp.MIN,
+                group=self.process_group,
+            )
+            coll_results = coll_vector.tolist()
+
+            stop = len(window)
+            for i, coll_result in enumerate(coll_results):
+                chunk_tokens = window[i][1]
+                if coll_result * self.block_ntokens < len(chunk_tokens):
+                    stop = i
+                    break
+                start += len(chunk_tokens)
+                results.extend(values[i])
+
+            if stop == len(window):
+                continue
+
+            # some participants have got less tokens than others, keep the
+            # agreed blocks and release the rest in bulk
+            coll_result = coll_results[stop]
+            nkeep = max(coll_result, 0)
+            results.extend(values[stop][:nkeep])
+            start += nkeep * self.block_ntokens
+            self._release(
+                [
+                    mr
+                    for i, value in enumerate(values[stop:], start=stop)
+                    for mr in (value[nkeep:] if i == stop else value)
+                ]
+            )
+            # prefetches issued by the chunks from the stopping one on are
+            # useless, including the one the last chunk of the window issued
+            # for the first chunk of the next window
+            for chunk_prefix, chunk_tokens, next_tokens, _ in window[stop:]:
+                if next_tokens:
+                    self._cancel_l2_prefetches(chunk_prefix, chunk_tokens)
+
+            if start > 0:
+                # we have already got some tokens, return success
+                return Status.ok((start, results))
+            elif coll_result == self._COLL_STATUS_NOT_FOUND:
+                return Status(StatusCodes.NOT_FOUND)
+            else:
+                # return error
+                return Status(StatusCodes.ERROR)
+
+        return (
+            Status.ok((start, results))
+            if start > 0
+            else Status(StatusCodes.NOT_FOUND)
+        )
+
+    @trace_span("get", "GroupAwareKVCacheManager")
     @nvtx_range("get", "GroupAwareKVCacheManager")
     @MeasurableBase.measure(MetricRecorder.OP.GET)
     def get(self, *args, **kwargs) -> Status[int]:
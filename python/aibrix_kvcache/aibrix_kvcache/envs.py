@@ -35,6 +35,12 @@ if TYPE_CHECKING:
     # to -1, which means we will use engine's block size.
     AIBRIX_KV_CACHE_OL_BLOCK_SIZE: int = -1
     AIBRIX_KV_CACHE_OL_CHUNK_SIZE: int = 512
+    # Number of chunks GroupAwareKVCacheManager acquires before exchanging
+    # their hit counts in a single collective. Defaults to 1, which means
+    # chunks are acquired serially with one collective per chunk. Acquires
+    # within a window still run one after another; their L2 fetches only
+    # overlap if AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS > 0.
+    AIBRIX_KV_CACHE_OL_GROUP_AWARE_ACQUIRE_PIPELINE_DEPTH: int = 1
     # Maximum sequence length. Defaults to -1, which means no limit.
     # If set, we will ignore tokens beyond this length.
     AIBRIX_KV_CACHE_OL_MAX_SEQ_LEN: int = -1
@@ -46,10 +52,22 @@ if TYPE_CHECKING:
     # If disabled, we will use a tight memory layout for both L1 and L2
     # cache. I.e., we will not pack tokens in the cache entry.
     AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_ENABLED: bool = False
+    # Layout of the tokens packed for validation, either FULL or DIGEST.
+    # FULL packs the prefix and query tokens into every block, DIGEST only
+    # packs the query tokens and a digest of the prefix tokens.
+    AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_LAYOUT: str = "FULL"
+    # Whether to round allocations up to size classes and recycle them
+    # through per-class free lists. Only applies if token validation is
+    # enabled, since blocks are of a fixed size otherwise.
+    AIBRIX_KV_CACHE_OL_SIZE_CLASS_ALLOCATOR_ENABLED: bool = False
 
     AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED: bool = True
     AIBRIX_KV_CACHE_OL_L1_CACHE_EVICTION_POLICY: str = "S3FIFO"
     AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB: float = 10
+    AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_POLICY: str = ""
+    AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SKETCH_WIDTH: int = 0
+    AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SAMPLE_FACTOR: int = 10
+    AIBRIX_KV_CACHE_OL_L1_CACHE_NUM_SHARDS: int = 1
     AIBRIX_KV_CACHE_OL_DEVICE: str = "cpu"
 
     # S3FIFO Env Vars
@@ -58,12 +76,42 @@ if TYPE_CHECKING:
 
     AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND: str = ""
     AIBRIX_KV_CACHE_OL_L2_CACHE_NAMESPACE: str = "aibrix"
+    # Compression codec of L2 values, "ZSTD", "LZ4" or "" (disabled). The
+    # L2 cache fails to open if the backend does not support compression.
     AIBRIX_KV_CACHE_OL_L2_CACHE_COMPRESSION: str = ""
+    # Lossy quantization of L2 values, "INT8", "FP8" or "" (disabled). Blocks
+    # are quantized to 8 bits with a scale per layer, k/v and head if the
+    # granularity is "HEAD" or a scale per block if it is "BLOCK". The L2
+    # cache fails to open if the backend does not support compression.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION: str = ""
+    AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION_GRANULARITY: str = "HEAD"
     AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH: int = 32
+    # How L2 cache exists finds the longest cached prefix. "LINEAR" probes
+    # blocks batch by batch and "BINARY" searches the prefix-closed keys in
+    # O(log n) backend round trips. With "BINARY", set EXISTS_VERIFY to also
+    # probe every block of the found prefix, e.g., if the backend evicts
+    # blocks out of prefix order.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_STRATEGY: str = "LINEAR"
+    AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_VERIFY: bool = False
+    # Expected number of blocks of the local counting Bloom filter that
+    # short-circuits definite L2 misses. 0 disables the filter. The filter is
+    # populated by this node's puts and rebuilt from the backend's keys every
+    # refresh interval and on placement topology changes. The L2 cache fails
+    # to open if the backend cannot scan its keys.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_CAPACITY: int = 0
+    AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_FP_RATE: float = 0.01
+    AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_REFRESH_INTERVAL_S: int = 0
     AIBRIX_KV_CACHE_OL_L2_CACHE_PER_TOKEN_TIMEOUT_MS: int = 20
-    # L2 cache placement policy. Defaults to "SIMPLE".
+    # L2 cache placement policy. Defaults to "SIMPLE". Use "CONSISTENT_HASH"
+    # to minimize key movement on cluster membership changes.
     # Only applicable if using meta service.
     AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_POLICY: str = "SIMPLE"
+    # Number of L2 cache members each block is written to. Gets are served
+    # by the fastest replica and hedged to another replica if they take
+    # longer than the given percentile of recent get latencies.
+    # Only applicable if using meta service.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_REPLICATION_FACTOR: int = 1
+    AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_HEDGE_PERCENTILE: float = 95.0
 
     # L2 cache key builder. Defaults to raw.
     AIBRIX_KV_CACHE_OL_L2_CACHE_KEY_BUILDER: str = "ROLLING_HASH"
@@ -88,6 +136,29 @@ if TYPE_CHECKING:
     # If the number of inflight writes reaches the limit, new writes
     # will be discarded. Set it to zero to use synchronous writes.
     AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS: int = 0
+    # Whether to coalesce asynchronous writes to L2 cache into batches on
+    # a write-back queue. Only applies to asynchronous writes. Instead of
+    # being discarded, writes exceeding the inflight limit wait up to
+    # AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_TIMEOUT_MS for the queue to
+    # drain.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_ENABLED: bool = False
+    # Max number of bytes in a write-back batch. The number of blocks in a
+    # batch is limited by AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_BATCH_MAX_NBYTES: int = 64 * 1024**2
+    # Max number of inflight write-back batches.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_MAX_INFLIGHT_BATCHES: int = 4
+    # How long a write waits for a full write-back queue to drain before
+    # it is discarded. Writes from L1 cache callbacks never wait.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_TIMEOUT_MS: int = 100
+    # How long a flush waits for the write-back queue to drain.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_FLUSH_TIMEOUT_MS: int = 60000
+    # Max number of inflight prefetches from L2 cache in terms of tokens.
+    # Defaults to 0, i.e., prefetching is disabled. If the number of inflight
+    # prefetches reaches the limit, new prefetches will be discarded.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS: int = 0
+    # Whether concurrent acquires of the same blocks share one inflight
+    # fetch from L2 cache instead of fetching them again.
+    AIBRIX_KV_CACHE_OL_L2_CACHE_SINGLE_FLIGHT_ENABLED: bool = True
 
     AIBRIX_KV_CACHE_OL_L2_CACHE_NUM_ASYNC_WORKERS: int = 8
 
@@ -97,6 +168,7 @@ if TYPE_CHECKING:
     AIBRIX_KV_CACHE_OL_MOCK_USE_GDR_PUT: bool = False
     AIBRIX_KV_CACHE_OL_MOCK_USE_GDR_GET: bool = False
     AIBRIX_KV_CACHE_OL_MOCK_USE_NOOP: bool = False
+    AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION: bool = False
 
     # RocksDB Env Vars
     AIBRIX_KV_CACHE_OL_ROCKSDB_ROOT: str = os.path.expanduser(
@@ -144,6 +216,34 @@ if TYPE_CHECKING:
     AIBRIX_KV_CACHE_OL_PROFILING_ENABLED: bool = False
     AIBRIX_KV_CACHE_OL_PROFILING_SERVER_ADDRESS: str = "http://0.0.0.0:4040"
 
+    # Op Recorder Env Vars
+    # Directory to record the ops of the kv cache manager to, for offline
+    # replay. Defaults to "", which disables the recorder. Latencies of the
+    # ops are only recorded if AIBRIX_KV_CACHE_OL_TIME_MEASUREMENT_ENABLED.
+    AIBRIX_KV_CACHE_OL_OP_RECORDER_DIR: str = ""
+    # Number of ops flushed to a chunk file at once.
+    AIBRIX_KV_CACHE_OL_OP_RECORDER_CHUNK_NRECORDS: int = 65536
+    # Number of chunk files kept, older ones are deleted. Defaults to 0,
+    # which means no limit.
+    AIBRIX_KV_CACHE_OL_OP_RECORDER_MAX_CHUNKS: int = 0
+
+    # Tracing Env Vars
+    # Enables per-request spans of the kv cache ops.
+    AIBRIX_KV_CACHE_OL_TRACING_ENABLED: bool = False
+    # Exporter of the spans, JSONL or OTLP. OTLP requires opentelemetry-sdk
+    # and opentelemetry-exporter-otlp-proto-grpc.
+    AIBRIX_KV_CACHE_OL_TRACING_EXPORTER: str = "JSONL"
+    # Directory of the JSONL files, one per process.
+    AIBRIX_KV_CACHE_OL_TRACING_JSONL_DIR: str = "/tmp/aibrix_kvcache_traces"
+    # Endpoint of the OTLP gRPC collector.
+    AIBRIX_KV_CACHE_OL_TRACING_OTLP_ENDPOINT: str = "http://localhost:4317"
+    # Ratio of requests traced. Ops issued outside of a request are sampled
+    # individually.
+    AIBRIX_KV_CACHE_OL_TRACING_SAMPLE_RATIO: float = 0.01
+    # Sampled traces shorter than this are dropped. Defaults to 0, which
+    # keeps all sampled traces.
+    AIBRIX_KV_CACHE_OL_TRACING_MIN_DURATION_MS: float = 0
+
     # EIC Config
     AIBRIX_KV_CACHE_OL_EIC_CONFIG_FILE: str = ""
 
@@ -151,9 +251,34 @@ if TYPE_CHECKING:
     AIBRIX_KV_CACHE_OL_SHFS_ROOT: str = os.path.expanduser(
         os.path.join(os.path.expanduser("~"), ".kv_cache_ol", "shfs")
     )
+    # Whether to fsync each block file before publishing it
+    AIBRIX_KV_CACHE_OL_SHFS_FSYNC: bool = False
+    # Capacity limits of the SHFS store, 0 means unlimited. Once exceeded,
+    # a background thread evicts block files in the order of the eviction
+    # policy ("LRU" or "TTL").
+    AIBRIX_KV_CACHE_OL_SHFS_CAPACITY_GB: float = 0.0
+    AIBRIX_KV_CACHE_OL_SHFS_MAX_FILES: int = 0
+    AIBRIX_KV_CACHE_OL_SHFS_EVICTION_POLICY: str = "LRU"
+    # Block files idle (LRU) or older (TTL) than this are evicted, 0 disables
+    AIBRIX_KV_CACHE_OL_SHFS_TTL_S: int = 0
+    AIBRIX_KV_CACHE_OL_SHFS_EVICTION_INTERVAL_MS: int = 1000
+
+    # Segment Log Env Vars
+    AIBRIX_KV_CACHE_OL_SEGMENT_LOG_ROOT: str = os.path.expanduser(
+        os.path.join(os.path.expanduser("~"), ".kv_cache_ol", "segment_log")
+    )
+    AIBRIX_KV_CACHE_OL_SEGMENT_LOG_SEGMENT_SIZE_MB: int = 256
+    # Once exceeded, the oldest segment is evicted as a whole
+    AIBRIX_KV_CACHE_OL_SEGMENT_LOG_CAPACITY_GB: float = 16.0
 
     # vLLM Integration Env Vars
     VLLM_AIBRIX_SYNC_GRANULARITY: str = "PER_OP"
+    # Whether the Type1 connector saves kv caches off the forward critical
+    # path. Finished requests hold their blocks until the kv caches of their
+    # saves have been copied out.
+    VLLM_AIBRIX_ASYNC_SAVE_ENABLED: bool = False
+    # Saves exceeding this number of inflight tokens are skipped.
+    VLLM_AIBRIX_ASYNC_SAVE_MAX_INFLIGHT_TOKENS: int = 65536
 
 # The begin-* and end* here are used by the documentation generator
 # to extract the used env vars.
@@ -179,6 +304,9 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
     "AIBRIX_KV_CACHE_OL_CHUNK_SIZE": lambda: int(
         os.getenv("AIBRIX_KV_CACHE_OL_CHUNK_SIZE", "512")
     ),
+    "AIBRIX_KV_CACHE_OL_GROUP_AWARE_ACQUIRE_PIPELINE_DEPTH": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_GROUP_AWARE_ACQUIRE_PIPELINE_DEPTH", "1")
+    ),
     "AIBRIX_KV_CACHE_OL_MAX_SEQ_LEN": lambda: int(
         os.getenv("AIBRIX_KV_CACHE_OL_MAX_SEQ_LEN", "-1")
     ),
@@ -200,6 +328,17 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
         .lower()
         in ("1", "true")
     ),
+    "AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_LAYOUT": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_LAYOUT", "FULL")
+        .strip()
+        .upper()
+    ),
+    "AIBRIX_KV_CACHE_OL_SIZE_CLASS_ALLOCATOR_ENABLED": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_SIZE_CLASS_ALLOCATOR_ENABLED", "0")
+        .strip()
+        .lower()
+        in ("1", "true")
+    ),
     # ================== L1Cache Env Vars ==================
     "AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED": lambda: (
         os.getenv("AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED", "1").strip().lower()
@@ -213,6 +352,28 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
     "AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB": lambda: float(
         os.getenv("AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB", "10")
     ),
+    # Admission policy consulted before a new entry evicts a victim,
+    # e.g., TINYLFU. Empty or NONE admits every entry.
+    "AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_POLICY": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_POLICY", "")
+        .strip()
+        .upper()
+    ),
+    # Number of counters per row of the frequency sketch. 0 sizes it
+    # after the number of blocks that fit into L1Cache.
+    "AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SKETCH_WIDTH": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SKETCH_WIDTH", "0")
+    ),
+    # The sketch ages (halves all counters) every sample_factor * capacity
+    # recorded accesses.
+    "AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SAMPLE_FACTOR": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SAMPLE_FACTOR", "10")
+    ),
+    # Number of independently locked eviction policy shards in L1Cache.
+    # Blocks are partitioned by the hash of their keys.
+    "AIBRIX_KV_CACHE_OL_L1_CACHE_NUM_SHARDS": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_L1_CACHE_NUM_SHARDS", "1")
+    ),
     "AIBRIX_KV_CACHE_OL_DEVICE": lambda: (
         os.getenv("AIBRIX_KV_CACHE_OL_DEVICE", "cpu").strip().lower()
     ),
@@ -239,9 +400,41 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
     "AIBRIX_KV_CACHE_OL_L2_CACHE_COMPRESSION": lambda: (
         os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_COMPRESSION", "").strip().upper()
     ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION", "")
+        .strip()
+        .upper()
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION_GRANULARITY": lambda: (
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION_GRANULARITY", "HEAD"
+        )
+        .strip()
+        .upper()
+    ),
     "AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH": lambda: int(
         os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH", "32")
     ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_STRATEGY": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_STRATEGY", "LINEAR")
+        .strip()
+        .upper()
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_VERIFY": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_EXISTS_VERIFY", "0")
+        .strip()
+        .lower()
+        in ("1", "true")
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_CAPACITY": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_CAPACITY", "0")
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_FP_RATE": lambda: float(
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_FP_RATE", "0.01")
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_REFRESH_INTERVAL_S": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_REFRESH_INTERVAL_S", "0")
+    ),
     "AIBRIX_KV_CACHE_OL_L2_CACHE_PER_TOKEN_TIMEOUT_MS": lambda: int(
         os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_PER_TOKEN_TIMEOUT_MS", "20")
     ),
@@ -264,6 +457,16 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
         .strip()
         .upper()
     ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_REPLICATION_FACTOR": lambda: int(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_REPLICATION_FACTOR", "1"
+        )
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_HEDGE_PERCENTILE": lambda: float(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_PLACEMENT_HEDGE_PERCENTILE", "95"
+        )
+    ),
     "AIBRIX_KV_CACHE_OL_L2_CACHE_KEY_BUILDER": lambda: (
         os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_KEY_BUILDER", "ROLLING_HASH")
         .strip()
@@ -279,6 +482,42 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
             "AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS", "0"
         )
     ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_ENABLED": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_ENABLED", "0")
+        .strip()
+        .lower()
+        in ("1", "true")
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_BATCH_MAX_NBYTES": lambda: int(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_BATCH_MAX_NBYTES",
+            str(64 * 1024**2),
+        )
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_MAX_INFLIGHT_BATCHES": lambda: int(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_MAX_INFLIGHT_BATCHES", "4"
+        )
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_TIMEOUT_MS": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_TIMEOUT_MS", "100")
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_FLUSH_TIMEOUT_MS": lambda: int(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_FLUSH_TIMEOUT_MS", "60000"
+        )
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS": lambda: int(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS", "0"
+        )
+    ),
+    "AIBRIX_KV_CACHE_OL_L2_CACHE_SINGLE_FLIGHT_ENABLED": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_SINGLE_FLIGHT_ENABLED", "1")
+        .strip()
+        .lower()
+        in ("1", "true")
+    ),
     "AIBRIX_KV_CACHE_OL_L2_CACHE_NUM_ASYNC_WORKERS": lambda: int(
         os.getenv("AIBRIX_KV_CACHE_OL_L2_CACHE_NUM_ASYNC_WORKERS", "8")
     ),
@@ -303,6 +542,12 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
         os.getenv("AIBRIX_KV_CACHE_OL_MOCK_USE_NOOP", "0").strip().lower()
         in ("1", "true")
     ),
+    "AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION", "0")
+        .strip()
+        .lower()
+        in ("1", "true")
+    ),
     # ================== RocksDB Env Vars ==================
     "AIBRIX_KV_CACHE_OL_ROCKSDB_ROOT": lambda: os.path.expanduser(
         os.getenv(
@@ -441,6 +686,42 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
             "AIBRIX_KV_CACHE_OL_PROFILING_SERVER_ADDRESS", "http://0.0.0.0:4040"
         ).strip()
     ),
+    # ================== Op Recorder Env Vars ==================
+    "AIBRIX_KV_CACHE_OL_OP_RECORDER_DIR": lambda: os.path.expanduser(
+        os.getenv("AIBRIX_KV_CACHE_OL_OP_RECORDER_DIR", "").strip()
+    ),
+    "AIBRIX_KV_CACHE_OL_OP_RECORDER_CHUNK_NRECORDS": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_OP_RECORDER_CHUNK_NRECORDS", "65536")
+    ),
+    "AIBRIX_KV_CACHE_OL_OP_RECORDER_MAX_CHUNKS": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_OP_RECORDER_MAX_CHUNKS", "0")
+    ),
+    # ==================== Tracing Env Vars ====================
+    "AIBRIX_KV_CACHE_OL_TRACING_ENABLED": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_TRACING_ENABLED", "0").strip().lower()
+        in ("1", "true")
+    ),
+    "AIBRIX_KV_CACHE_OL_TRACING_EXPORTER": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_TRACING_EXPORTER", "JSONL")
+        .strip()
+        .upper()
+    ),
+    "AIBRIX_KV_CACHE_OL_TRACING_JSONL_DIR": lambda: os.path.expanduser(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_TRACING_JSONL_DIR", "/tmp/aibrix_kvcache_traces"
+        ).strip()
+    ),
+    "AIBRIX_KV_CACHE_OL_TRACING_OTLP_ENDPOINT": lambda: (
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_TRACING_OTLP_ENDPOINT", "http://localhost:4317"
+        ).strip()
+    ),
+    "AIBRIX_KV_CACHE_OL_TRACING_SAMPLE_RATIO": lambda: float(
+        os.getenv("AIBRIX_KV_CACHE_OL_TRACING_SAMPLE_RATIO", "0.01")
+    ),
+    "AIBRIX_KV_CACHE_OL_TRACING_MIN_DURATION_MS": lambda: float(
+        os.getenv("AIBRIX_KV_CACHE_OL_TRACING_MIN_DURATION_MS", "0")
+    ),
     # ================== EIC Env Vars ==================
     "AIBRIX_KV_CACHE_OL_EIC_CONFIG_FILE": lambda: (
         os.getenv("AIBRIX_KV_CACHE_OL_EIC_CONFIG_FILE", "").strip()
@@ -452,11 +733,54 @@ kv_cache_ol_environment_variables: Dict[str, Callable[[], Any]] = {
             os.path.join(os.path.expanduser("~"), ".kv_cache_ol", "shfs"),
         )
     ),
+    "AIBRIX_KV_CACHE_OL_SHFS_FSYNC": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_SHFS_FSYNC", "0").strip().lower()
+        in ("1", "true")
+    ),
+    "AIBRIX_KV_CACHE_OL_SHFS_CAPACITY_GB": lambda: float(
+        os.getenv("AIBRIX_KV_CACHE_OL_SHFS_CAPACITY_GB", "0")
+    ),
+    "AIBRIX_KV_CACHE_OL_SHFS_MAX_FILES": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_SHFS_MAX_FILES", "0")
+    ),
+    "AIBRIX_KV_CACHE_OL_SHFS_EVICTION_POLICY": lambda: (
+        os.getenv("AIBRIX_KV_CACHE_OL_SHFS_EVICTION_POLICY", "LRU")
+        .strip()
+        .upper()
+    ),
+    "AIBRIX_KV_CACHE_OL_SHFS_TTL_S": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_SHFS_TTL_S", "0")
+    ),
+    "AIBRIX_KV_CACHE_OL_SHFS_EVICTION_INTERVAL_MS": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_SHFS_EVICTION_INTERVAL_MS", "1000")
+    ),
+    # ================== Segment Log Env Vars ==================
+    "AIBRIX_KV_CACHE_OL_SEGMENT_LOG_ROOT": lambda: os.path.expanduser(
+        os.getenv(
+            "AIBRIX_KV_CACHE_OL_SEGMENT_LOG_ROOT",
+            os.path.join(
+                os.path.expanduser("~"), ".kv_cache_ol", "segment_log"
+            ),
+        )
+    ),
+    "AIBRIX_KV_CACHE_OL_SEGMENT_LOG_SEGMENT_SIZE_MB": lambda: int(
+        os.getenv("AIBRIX_KV_CACHE_OL_SEGMENT_LOG_SEGMENT_SIZE_MB", "256")
+    ),
+    "AIBRIX_KV_CACHE_OL_SEGMENT_LOG_CAPACITY_GB": lambda: float(
+        os.getenv("AIBRIX_KV_CACHE_OL_SEGMENT_LOG_CAPACITY_GB", "16")
+    ),
     # Specify the sync granularity used by AIBrix connectors. Please refer to
     # AIBrixOffloadingConnectorSyncGranularity for more details.
     "VLLM_AIBRIX_SYNC_GRANULARITY": lambda: os.environ.get(
         "VLLM_AIBRIX_SYNC_GRANULARITY", "PER_OP"
     ).upper(),
+    "VLLM_AIBRIX_ASYNC_SAVE_ENABLED": lambda: (
+        os.getenv("VLLM_AIBRIX_ASYNC_SAVE_ENABLED", "0").strip().lower()
+        in ("1", "true")
+    ),
+    "VLLM_AIBRIX_ASYNC_SAVE_MAX_INFLIGHT_TOKENS": lambda: int(
+        os.getenv("VLLM_AIBRIX_ASYNC_SAVE_MAX_INFLIGHT_TOKENS", "65536")
+    ),
 }
 
 # end-env-vars-definition
@@ -0,0 +1,316 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import torch
+
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    KVCacheHandle,
+    MemoryRegionKVCacheHandle,
+    TokenListView,
+)
+from aibrix_kvcache.cache_hashable import KVCacheKeyTypes
+from aibrix_kvcache.common.absl_logging import getLogger, log_every_n_seconds
+from aibrix_kvcache.tracing import trace_request, trace_section
+
+logger = getLogger(__name__)
+
+OffloadFn = Callable[[Sequence[torch.Tensor], torch.Tensor], None]
+SentFn = Callable[[int, float], None]
+
+
+@dataclass
+class _SaveJob:
+    req_id: str
+    prefix_len: int
+    prefix: Optional[TokenListView]
+    tokens: TokenListView
+    # chunk prefix, chunk tokens and the handle holding their kv tensors
+    chunks: List[Tuple[KVCacheKeyTypes, KVCacheKeyTypes, KVCacheHandle]]
+    copied: Optional[torch.cuda.Event]
+    on_sent: Optional[SentFn]
+    start: float = field(default_factory=time.perf_counter)
+
+
+class AIBrixOffloadingConnectorAsyncSaver:
+    """Saves kv caches to the kv cache service off the forward critical path.
+
+    `save` snapshots the kv caches of a request into memory regions
+    allocated from the kv cache service, and returns once the copies are
+    issued. On CUDA, the copies run on a side stream that waits for the
+    current stream, and the forward passes that follow do not wait for
+    them. Instead, `get_finished` holds a finished request, and thus its
+    paged blocks, until the copies of its last save have completed.
+    Blocks freed by preemption are not held. Exists-filtering and puts run
+    on a worker thread.
+
+    Args:
+        cache: The kv cache manager, created with multi_threaded=True.
+        offload_fn: Copies the paged kv caches at the given slot mapping
+            into the given block tensors.
+        max_inflight_tokens: Saves exceeding this number of inflight tokens
+            are skipped, unless there is no inflight save.
+        device: The device of the paged kv caches.
+    """
+
+    def __init__(
+        self,
+        cache: BaseKVCacheManager,
+        offload_fn: OffloadFn,
+        *,
+        max_inflight_tokens: int,
+        device: str = "cuda",
+    ) -> None:
+        self.cache = cache
+        self.offload_fn = offload_fn
+        self.max_inflight_tokens = max_inflight_tokens
+        self.block_ntokens = cache.block_size
+
+        self._stream: Optional[torch.cuda.Stream] = (
+            torch.cuda.Stream() if device.startswith("cuda") else None
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="aibrix_async_saver"
+        )
+        self._cond = threading.Condition()
+        self._inflight_tokens: int = 0
+        self._inflight_saves: int = 0
+        self._finished: set[str] = set()
+        # the copy event of the last save of each request, copies on the
+        # side stream complete in order
+        self._copies: dict[str, torch.cuda.Event] = {}
+
+    def __len__(self) -> int:
+        """Return the number of inflight tokens."""
+        with self._cond:
+            return self._inflight_tokens
+
+    def save(
+        self,
+        req_id: str,
+        prefix: Optional[TokenListView],
+        tokens: TokenListView,
+        slot_mapping: torch.Tensor,
+        on_sent: Optional[SentFn] = None,
+    ) -> bool:
+        """Snapshot the kv caches of the given tokens and save them in the
+        background.
+
+        Args:
+            req_id: The request id.
+            prefix: The block-aligned prefix tokens.
+            tokens: The block-aligned tokens to save.
+            slot_mapping: The slot mapping of the whole sequence, indexed
+                by token position.
+            on_sent: Called with the number of tokens sent and the
+                latency in ms once the save completes.
+        Returns:
+            False if the save is skipped.
+        """
+        ntokens = len(tokens)
+        with self._cond:
+            if (
+                self._inflight_tokens > 0
+                and self._inflight_tokens + ntokens > self.max_inflight_tokens
+            ):
+                log_every_n_seconds(
+                    logger,
+                    logging.WARNING,
+                    "Too many inflight saves, skip Request[id=%s]. inflight "
+                    "tokens %d/quota %d",
+                    10,
+                    req_id,
+                    self._inflight_tokens,
+                    self.max_inflight_tokens,
+                )
+                return False
+            self._inflight_tokens += ntokens
+            self._inflight_saves += 1
+
+        job = _SaveJob(
+            req_id=req_id,
+            prefix_len=len(prefix) if prefix is not None else 0,
+            prefix=prefix,
+            tokens=tokens,
+            chunks=[],
+            copied=None,
+            on_sent=on_sent,
+        )
+        if self._stream is not None:
+            # later steps may update the slot mapping while it is in use
+            slot_mapping = slot_mapping[: job.prefix_len + ntokens].clone()
+            slot_mapping.record_stream(self._stream)
+            self._stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(self._stream):
+                self._snapshot(job, slot_mapping)
+                copied = torch.cuda.current_stream().record_event()
+            job.copied = copied
+            with self._cond:
+                self._copies[req_id] = copied
+        else:
+            self._snapshot(job, slot_mapping)
+
+        self._executor.submit(self._run, job)
+        return True
+
+    def _snapshot(self, job: _SaveJob, slot_mapping: torch.Tensor) -> None:
+        for chunk_prefix, chunk_tokens, _, _ in self.cache.cache_chunk_keys(
+            job.prefix, job.tokens
+        ):
+            status = self.cache.allocate_for(chunk_prefix, chunk_tokens)
+            if not status.is_ok():
+                log_every_n_seconds(
+                    logger,
+                    logging.ERROR,
+                    "Failed to allocate : %s",
+                    3,
+                    str(status),
+                )
+                break
+            handle = status.get()
+            tensors = handle.to_tensors()
+            length = len(tensors) * self.block_ntokens
+            offset = len(chunk_prefix)
+            with trace_section(
+                "AIBrixOffloadingConnectorAsyncSaver.offload", ntokens=length
+            ):
+                self.offload_fn(
+                    tensors,  # type: ignore[arg-type]
+                    slot_mapping[offset : offset + length],
+                )
+            job.chunks.append((chunk_prefix, chunk_tokens[:length], handle))
+            if length < len(chunk_tokens):
+                break
+
+    def _run(self, job: _SaveJob) -> None:
+        total_sent = 0
+        try:
+            with trace_request(
+                job.req_id, "AIBrixOffloadingConnectorAsyncSaver.send"
+            ):
+                total_sent = self._send(job)
+        except Exception:
+            logger.exception("Failed to save Request[id=%s]", job.req_id)
+        finally:
+            # release handles that have not been taken over by puts
+            for _, _, handle in job.chunks:
+                handle.release()
+            job.chunks.clear()
+            with self._cond:
+                self._inflight_tokens -= len(job.tokens)
+                self._inflight_saves -= 1
+                self._cond.notify_all()
+
+        if job.on_sent is not None:
+            lat_ms = (time.perf_counter() - job.start) * 1000
+            job.on_sent(total_sent, lat_ms)
+
+    def _send(self, job: _SaveJob) -> int:
+        if job.copied is not None:
+            job.copied.synchronize()
+        if not job.chunks:
+            return 0
+
+        # filter out existing tokens with one exists across all chunks
+        status = self.cache.exists(job.prefix, job.tokens)
+        num_existing_tokens = status.get(default=0)
+        logger.info(
+            "Request[id=%s] send(%d) encounters %d existing tokens",
+            job.req_id,
+            len(job.tokens),
+            num_existing_tokens,
+        )
+
+        total_sent = 0
+        while job.chunks:
+            chunk_prefix, chunk_tokens, handle = job.chunks.pop(0)
+            start = len(chunk_prefix) - job.prefix_len
+            nskip = max(num_existing_tokens - start, 0)
+            if len(chunk_tokens) - nskip < self.block_ntokens:
+                handle.release()
+                continue
+
+            if nskip > 0:
+                # partially exists
+                nskip_blocks = nskip // self.block_ntokens
+                mrs = handle.memory_regions
+                for mr in mrs[:nskip_blocks]:
+                    mr.ref_down()  # type: ignore[union-attr]
+                handle = MemoryRegionKVCacheHandle(
+                    self.cache.block_dtype,
+                    self.cache.block_shape,
+                    mrs[nskip_blocks:],  # type: ignore[arg-type]
+                )
+                chunk_prefix = job.tokens[: start + nskip]
+                if job.prefix is not None:
+                    chunk_prefix = job.prefix + chunk_prefix
+                chunk_tokens = chunk_tokens[nskip:]
+
+            # put takes over the handle
+            status = self.cache.put(chunk_prefix, chunk_tokens, handle)
+            if not status.is_ok():
+                log_every_n_seconds(
+                    logger,
+                    logging.ERROR,
+                    "Failed to put to offloading service: %s",
+                    3,
+                    str(status),
+                )
+                break
+
+            put_ntokens = status.get()
+            total_sent += put_ntokens
+            if put_ntokens != len(chunk_tokens):
+                break
+
+        return total_sent
+
+    def get_finished(self, finished_req_ids: set[str]) -> set[str]:
+        """Return finished requests whose paged blocks can be freed, i.e.,
+        whose snapshot copies have all completed. Their puts may still be
+        inflight.
+
+        Args:
+            finished_req_ids: Requests finished since the last call.
+        Returns:
+            Requests among the given and previously given ones that have
+            no inflight snapshot copy.
+        """
+        with self._cond:
+            self._finished.update(finished_req_ids)
+            done = set()
+            for req_id in self._finished:
+                copied = self._copies.get(req_id)
+                if copied is None or copied.query():
+                    self._copies.pop(req_id, None)
+                    done.add(req_id)
+            self._finished -= done
+        return done
+
+    def flush(self, timeout_s: Optional[float] = None) -> bool:
+        """Wait until all inflight saves complete."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._inflight_saves == 0, timeout=timeout_s
+            )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
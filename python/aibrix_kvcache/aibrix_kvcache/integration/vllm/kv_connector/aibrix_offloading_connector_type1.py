@@ -24,6 +24,7 @@ from typing import (
     Callable,
     ClassVar,
     Optional,
+    Sequence,
     Type,
     TypeVar,
 )
@@ -97,8 +98,11 @@ from aibrix_kvcache.metrics import (
     Metrics,
 )
 from aibrix_kvcache.profiling import tag_wrapper
+from aibrix_kvcache.tracing import trace_request, trace_section
 from aibrix_kvcache.utils import perf_timer
 
+from .aibrix_offloading_async_saver import AIBrixOffloadingConnectorAsyncSaver
+
 if TYPE_CHECKING:
     from vllm.config import VllmConfig
     from vllm.forward_context import ForwardContext
@@ -592,6 +596,9 @@ class AIBrixOffloadingConnectorScheduler:
     def __init__(self, config: "VllmConfig"):
         self.kv_role = config.kv_transfer_config.kv_role
         self.engine_block_ntokens = config.cache_config.block_size
+        # finished requests hold their blocks until get_finished reports
+        # that the snapshot copies of their async saves are done
+        self._async_save = aibrix_kvcache.envs.VLLM_AIBRIX_ASYNC_SAVE_ENABLED
 
         self._scheduler_meta = AIBrixOffloadingConnectorMetadata({})
 
@@ -718,7 +725,7 @@ class AIBrixOffloadingConnectorScheduler:
         logger.debug("SCHEDULER: Request[id=%s] finished", req_id)
 
         self._scheduler_meta.finish_request(req_id)
-        return False, None
+        return self._async_save, None
 
     def _block_ids_to_slot_mapping(self, block_ids: list[int]) -> torch.Tensor:
         block_ids_tensor = torch.tensor(block_ids)
@@ -736,7 +743,19 @@ class AIBrixOffloadingConnectorWorker:
     """AIBrixOffloadingConnectorWorker carries out the data-plane operations."""
 
     def __init__(self, config: "VllmConfig"):
-        self._init_worker(config)
+        envs = aibrix_kvcache.envs
+        async_save = envs.VLLM_AIBRIX_ASYNC_SAVE_ENABLED
+        # saves run on a worker thread of the async saver
+        self._init_worker(config, multi_threaded=async_save)
+        self._saver: AIBrixOffloadingConnectorAsyncSaver | None = None
+        if async_save:
+            self._saver = AIBrixOffloadingConnectorAsyncSaver(
+                self.cache,
+                self._offload,
+                max_inflight_tokens=(
+                    envs.VLLM_AIBRIX_ASYNC_SAVE_MAX_INFLIGHT_TOKENS
+                ),
+            )
 
     def _init_worker(
         self,
@@ -862,6 +881,7 @@ class AIBrixOffloadingConnectorWorker:
         self.v_scales: list[torch.Tensor] | None = None
 
         self._meta_cache: dict[str, AIBrixOffloadingConnectorCachedMeta] = {}
+        self._saver = None
         # metrics
         self._metrics = AIBrixOffloadingConnectorMetrics(self.cache.metrics)
         logger.info(
@@ -872,6 +892,9 @@ class AIBrixOffloadingConnectorWorker:
         )
 
     def __del__(self) -> None:
+        if getattr(self, "_saver", None) is not None:
+            self._saver.close()  # type: ignore[union-attr]
+            self._saver = None
         if getattr(self, "cache", None) is not None:
             self.cache.close()
             self.cache = None  # type: ignore[assignment]
@@ -940,7 +963,10 @@ class AIBrixOffloadingConnectorWorker:
 
         stats = {}
         for seq_request_id, seq_request_meta in metadata.items():
-            num_fetched_tokens = self._recv_kv_sync_impl(seq_request_meta)
+            with trace_request(
+                seq_request_id, "AIBrixOffloadingConnectorV1Type1.recv"
+            ):
+                num_fetched_tokens = self._recv_kv_sync_impl(seq_request_meta)
             stats[seq_request_id] = num_fetched_tokens
 
         if len(stats) > 0 and self.kv_group is not None:
@@ -1059,7 +1085,12 @@ class AIBrixOffloadingConnectorWorker:
                 + length  # type: ignore[index]
             ]
 
-            with perf_timer() as get_kernel_onload_dur_ms:
+            with (
+                trace_section(
+                    "AIBrixOffloadingConnectorV1Type1.onload", ntokens=length
+                ),
+                perf_timer() as get_kernel_onload_dur_ms,
+            ):
                 reshape_and_cache_multi_layer(
                     kv_blocks,
                     self.layers_kv_caches,  # type: ignore[arg-type]
@@ -1127,7 +1158,13 @@ class AIBrixOffloadingConnectorWorker:
         for seq_request_id, seq_request_meta in metadata.items():
             if seq_request_meta.query_len == 0:
                 continue
-            self._send_kv_sync_impl(seq_request_meta)
+            with trace_request(
+                seq_request_id, "AIBrixOffloadingConnectorV1Type1.send"
+            ):
+                if self._saver is not None:
+                    self._send_kv_async_impl(seq_request_meta)
+                else:
+                    self._send_kv_sync_impl(seq_request_meta)
 
         if self._metrics.time_measurement_enabled:
             log_every_n_seconds(
@@ -1137,6 +1174,89 @@ class AIBrixOffloadingConnectorWorker:
                 10,
             )
 
+    def get_finished(
+        self, finished_req_ids: set[str]
+    ) -> tuple[Optional[set[str]], Optional[set[str | tuple[str, int]]]]:
+        if self._saver is None:
+            return None, None
+        return self._saver.get_finished(finished_req_ids) or None, None
+
+    def _offload(
+        self, tensors: Sequence[torch.Tensor], slot_mapping: torch.Tensor
+    ) -> None:
+        reshape_and_offload_multi_layer(
+            list(tensors),
+            self.layers_kv_caches,  # type: ignore[arg-type]
+            slot_mapping,
+            self.engine_block_ntokens,
+            "auto",
+            self.k_scales,  # type: ignore[arg-type]
+            self.v_scales,  # type: ignore[arg-type]
+            self.block_layout.name,
+            self.kv_layout_blocks_first,
+        )
+
+    def _send_kv_async_impl(
+        self,
+        seq_request_meta: AIBrixOffloadingConnectorRequestMetadata,
+    ) -> None:
+        logger.debug("_send_kv_async_impl: %s", seq_request_meta)
+        assert self._saver is not None, "async saver is not enabled"
+        seq_request_id = seq_request_meta.req_id
+        seq_context_len = seq_request_meta.context_len
+        seq_cached_meta = self._meta_cache[seq_request_id]
+        seq_all_tokens = seq_cached_meta.get_context_tokens_view()
+        assert seq_all_tokens is not None, "seq_all_tokens is None"
+        prompt_len = seq_request_meta.prompt_len
+        query_len = seq_request_meta.query_len
+
+        # align to block boundary
+        aligned_context_len = round_down(
+            seq_context_len, self.cache_block_ntokens
+        )
+        actual_query_len = seq_context_len + query_len - aligned_context_len
+        aligned_query_len = round_down(
+            actual_query_len, self.cache_block_ntokens
+        )
+
+        assert prompt_len >= aligned_context_len + aligned_query_len, (
+            f"{prompt_len}<{aligned_context_len}+{aligned_query_len}"
+        )
+
+        if aligned_query_len < self.cache_block_ntokens:
+            return
+
+        prefix = seq_all_tokens[:aligned_context_len]
+        tokens = seq_all_tokens[
+            aligned_context_len : aligned_context_len + aligned_query_len
+        ]
+
+        def on_sent(total_sent: int, lat_ms: float) -> None:
+            log_if(
+                logger,
+                logging.INFO,
+                "Request[id=%s, prompt_len=%d, context_len=%d] sent %d tokens",
+                total_sent > 0,
+                seq_request_id,
+                prompt_len,
+                seq_context_len,
+                total_sent,
+            )
+            if self._metrics.time_measurement_enabled:
+                self._metrics._send_metrics.add(
+                    aligned_context_len, aligned_query_len, total_sent, lat_ms
+                )
+
+        # returns once the kv caches are snapshotted, exists-filtering and
+        # puts are done by the saver in the background
+        self._saver.save(
+            seq_request_id,
+            prefix or None,
+            tokens,
+            seq_cached_meta.context_slot_mapping,  # type: ignore[arg-type]
+            on_sent,
+        )
+
     def wait_for_layer_load(
         self,
         metadata: AIBrixOffloadingConnectorMetadata,
@@ -1277,7 +1397,12 @@ class AIBrixOffloadingConnectorWorker:
                 + length  # type: ignore[index]
             ]
 
-            with perf_timer() as get_kernel_offload_dur_ms:
+            with (
+                trace_section(
+                    "AIBrixOffloadingConnectorV1Type1.offload", ntokens=length
+                ),
+                perf_timer() as get_kernel_offload_dur_ms,
+            ):
                 reshape_and_offload_multi_layer(
                     tensors,
                     self.layers_kv_caches,  # type: ignore[arg-type]
@@ -1492,7 +1617,8 @@ class AIBrixOffloadingConnector(KVConnectorBase_V1):
             The finished saves/sends req ids must belong to a set provided in a
             call to this method (this call or a prior one).
         """
-        return None, None
+        assert self.connector_worker is not None
+        return self.connector_worker.get_finished(finished_req_ids)
 
     # ==============================
     # Scheduler-side methods
@@ -39,6 +39,7 @@ from aibrix_kvcache.common.absl_logging import (
     log_if,
 )
 from aibrix_kvcache.profiling import tag_wrapper
+from aibrix_kvcache.tracing import trace_request
 
 from .aibrix_offloading_connector_type1 import (
     AIBrixOffloadingConnector as AIBrixOffloadingConnectorType1,
@@ -71,6 +72,8 @@ OFFLOADING_CONNECTOR_SUPPORTED_ATTN_BACKENDS = {
 class AIBrixOffloadingConnectorScheduler(Type1Scheduler):
     def __init__(self, config: "VllmConfig"):
         super().__init__(config)
+        # saves are done within wait_for_save
+        self._async_save = False
 
 
 class AIBrixOffloadingConnectorWorker(Type1Worker):
@@ -141,7 +144,10 @@ class AIBrixOffloadingConnectorWorker(Type1Worker):
         stats = {}
         if self.kv_group is not None:
             for seq_request_id, seq_request_meta in metadata.items():
-                num_fetched_tokens = self._recv_kv_impl(seq_request_meta)
+                with trace_request(
+                    seq_request_id, "AIBrixOffloadingConnectorV1Type2.recv"
+                ):
+                    num_fetched_tokens = self._recv_kv_impl(seq_request_meta)
                 if num_fetched_tokens > 0:
                     stats[seq_request_id] = num_fetched_tokens
 
@@ -164,7 +170,10 @@ class AIBrixOffloadingConnectorWorker(Type1Worker):
 
         for seq_request_id, seq_request_meta in metadata.items():
             if self.kv_group is None:
-                num_fetched_tokens = self._recv_kv_impl(seq_request_meta)
+                with trace_request(
+                    seq_request_id, "AIBrixOffloadingConnectorV1Type2.recv"
+                ):
+                    num_fetched_tokens = self._recv_kv_impl(seq_request_meta)
             else:
                 num_fetched_tokens = stats.get(seq_request_id, 0)
 
@@ -497,7 +506,10 @@ class AIBrixOffloadingConnectorWorker(Type1Worker):
             ):
                 continue
             seq_request_meta = metadata[seq_request_id]
-            self._send_kv_impl(seq_request_meta)
+            with trace_request(
+                seq_request_id, "AIBrixOffloadingConnectorV1Type2.send"
+            ):
+                self._send_kv_impl(seq_request_meta)
 
         # release all allocated handles
         self._release_allocated_kvcache_handles()
@@ -76,6 +76,7 @@ from aibrix_kvcache.metrics import (
     Metrics,
 )
 from aibrix_kvcache.profiling import tag_wrapper
+from aibrix_kvcache.tracing import trace_request
 from aibrix_kvcache.utils import perf_timer
 
 if TYPE_CHECKING:
@@ -1152,7 +1153,10 @@ class AIBrixPDReuseConnectorWorker:
 
         stats = {}
         for seq_request_id, seq_request_meta in metadata.items():
-            num_fetched_tokens = self._recv_kv_from_cache_impl(seq_request_meta)
+            with trace_request(seq_request_id, "AIBrixPDReuseConnector.recv"):
+                num_fetched_tokens = self._recv_kv_from_cache_impl(
+                    seq_request_meta
+                )
 
             if not seq_request_meta.do_remote_prefill:
                 # decoder should not update stats
@@ -1378,7 +1382,8 @@ class AIBrixPDReuseConnectorWorker:
                 is_prefiller = True
             if seq_request_meta.query_len == 0:
                 continue
-            self._send_kv_to_cache_impl(seq_request_meta)
+            with trace_request(seq_request_id, "AIBrixPDReuseConnector.send"):
+                self._send_kv_to_cache_impl(seq_request_meta)
 
         if is_prefiller:
             # ensure all async ops are completed
@@ -0,0 +1,78 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from abc import ABC, abstractmethod
+
+from ...cache_hashable import KVCacheHashable
+
+
+class BaseAdmissionPolicy(ABC):
+    """Base class for admission policies.
+
+    An admission policy decides whether a new entry is worth more than
+    the victim it would evict. It only sees keys and is independent of
+    the eviction policy it is attached to.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize the admission policy.
+        Args:
+            name (str): The name of the admission policy.
+        """
+        self._name: str = name
+
+    @staticmethod
+    def create(name: str, *args, **kwargs) -> "BaseAdmissionPolicy | None":
+        """Return the admission policy with the given name or None if
+        every entry should be admitted.
+        """
+        if name in ("", "NONE"):
+            return None
+        elif name == "TINYLFU":
+            from .tinylfu import TinyLFU
+
+            return TinyLFU(*args, **kwargs)
+        else:
+            raise ValueError(f"Unknown admission policy: {name}")
+
+    @property
+    def name(self) -> str:
+        """Return the name of the admission policy."""
+        return self._name
+
+    def __repr__(self) -> str:
+        return f"{self._name}()"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    @abstractmethod
+    def record(self, key: KVCacheHashable) -> None:
+        """Record an access to the key.
+        Args:
+            key (KVCacheHashable): The key of the item.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def admit(
+        self, candidate: KVCacheHashable, victim: KVCacheHashable
+    ) -> bool:
+        """Return True if the candidate should replace the victim.
+        Args:
+            candidate (KVCacheHashable): The key to be inserted.
+            victim (KVCacheHashable): The key to be evicted to make room
+                                      for the candidate.
+        """
+        raise NotImplementedError
@@ -0,0 +1,132 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List
+
+import numpy as np
+
+from ... import envs
+from ...cache_hashable import KVCacheHashable
+from .base_admission_policy import BaseAdmissionPolicy
+
+_MASK64 = 0xFFFF_FFFF_FFFF_FFFF
+_GOLDEN64 = 0x9E37_79B9_7F4A_7C15
+
+
+class TinyLFU(BaseAdmissionPolicy):
+    """TinyLFU admission policy.
+
+    Access frequencies are approximated with a Count-Min sketch of
+    4-bit saturating counters. Once sample_factor * capacity accesses
+    have been recorded, all counters are halved so that the sketch
+    follows shifts in popularity. A candidate is admitted only if it
+    is estimated to be accessed more often than the victim.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(
+        self,
+        capacity: int,
+        width: int | None = None,
+        sample_factor: int | None = None,
+    ) -> None:
+        """Initialize the TinyLFU admission policy.
+        Args:
+            capacity (int): The expected number of entries in the cache.
+            width (int, optional): The number of counters per row, rounded
+                                   up to a power of two. Defaults to the
+                                   capacity.
+            sample_factor (int, optional): The sketch ages every
+                                           sample_factor * capacity
+                                           recorded accesses.
+        """
+        super().__init__(name="TinyLFU")
+        if width is None:
+            width = envs.AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SKETCH_WIDTH
+        if sample_factor is None:
+            sample_factor = (
+                envs.AIBRIX_KV_CACHE_OL_L1_CACHE_ADMISSION_SAMPLE_FACTOR
+            )
+        assert sample_factor > 0, "sample_factor must be positive"
+
+        if width <= 0:
+            width = capacity
+        width = 1 << (max(width, 16) - 1).bit_length()
+
+        self._width: int = width
+        self._mask: int = width - 1
+        self._counters: bytearray = bytearray(self.DEPTH * width)
+        # numpy view over the counters for aging
+        self._view: np.ndarray = np.frombuffer(self._counters, dtype=np.uint8)
+        self._sample_size: int = max(sample_factor * capacity, width)
+        self._additions: int = 0
+
+    @property
+    def width(self) -> int:
+        """Return the number of counters per row."""
+        return self._width
+
+    @property
+    def sample_size(self) -> int:
+        """Return the number of recorded accesses between two agings."""
+        return self._sample_size
+
+    def __repr__(self) -> str:
+        return (
+            f"{self._name}(width={self._width}, "
+            f"sample_size={self._sample_size})"
+        )
+
+    def _indices(self, key: KVCacheHashable) -> List[int]:
+        h = ((hash(key) & _MASK64) * _GOLDEN64) & _MASK64
+        h1 = h >> 32
+        h2 = (h & 0xFFFF_FFFF) | 1
+        return [
+            i * self._width + ((h1 + i * h2) & self._mask)
+            for i in range(self.DEPTH)
+        ]
+
+    def estimate(self, key: KVCacheHashable) -> int:
+        """Return the estimated access frequency of the key."""
+        counters = self._counters
+        return min(counters[i] for i in self._indices(key))
+
+    def record(self, key: KVCacheHashable) -> None:
+        indices = self._indices(key)
+        counters = self._counters
+        count = min(counters[i] for i in indices)
+        if count >= self.MAX_COUNT:
+            return
+
+        # Conservative update: only increment the counters holding the
+        # minimum, which reduces the overestimation caused by collisions.
+        for i in indices:
+            if counters[i] == count:
+                counters[i] = count + 1
+
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self.age()
+
+    def age(self) -> None:
+        """Halve all counters."""
+        self._view >>= 1
+        self._additions //= 2
+
+    def admit(
+        self, candidate: KVCacheHashable, victim: KVCacheHashable
+    ) -> bool:
+        return self.estimate(candidate) > self.estimate(victim)
@@ -12,9 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .array_fifo import ArrayFIFO
+from .array_lru import ArrayLRU
+from .array_s3fifo import ArrayS3FIFO
 from .base_eviction_policy import BaseEvictionPolicy, Functor
 from .fifo import FIFO
 from .lru import LRU
+from .radix_lru import RadixLRU
 from .s3fifo import S3FIFO
 
-__all__ = ["BaseEvictionPolicy", "Functor", "FIFO", "LRU", "S3FIFO"]
+__all__ = [
+    "ArrayFIFO",
+    "ArrayLRU",
+    "ArrayS3FIFO",
+    "BaseEvictionPolicy",
+    "Functor",
+    "FIFO",
+    "LRU",
+    "RadixLRU",
+    "S3FIFO",
+]
@@ -0,0 +1,316 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from ...cache_hashable import KVCacheHashable
+from ...memory import MemoryRegion
+from ..admission_policy import BaseAdmissionPolicy
+from .base_eviction_policy import (
+    BaseEvictionPolicy,
+    BaseEvictionPolicyNode,
+    Functor,
+)
+
+NIL = -1
+# states of the index table entries
+EMPTY = -1
+TOMBSTONE = -2
+
+_HASH_MASK = 0x7FFF_FFFF_FFFF_FFFF
+_MASK64 = 0xFFFF_FFFF_FFFF_FFFF
+_GOLDEN64 = 0x9E37_79B9_7F4A_7C15
+
+
+class ArrayEvictionPolicy(BaseEvictionPolicy[BaseEvictionPolicyNode]):
+    """Base class for eviction policies that keep their entries in
+    preallocated arrays instead of per-entry node objects.
+
+    An entry lives in a slot. The doubly linked lists and the per-entry
+    states are NumPy arrays indexed by slot, and keys are mapped to slots
+    by an open-addressing table with linear probing keyed by the hash of
+    the key. Only keys and values are kept as Python objects. Scalar
+    accesses go through memoryviews of the arrays, which are much cheaper
+    than indexing NumPy arrays.
+
+    This is a memory and GC trade-off, not a speedup: compared to the
+    node-based policies, the array-backed ones use less memory per entry
+    and are far cheaper to scan for the garbage collector, but since the
+    table probing runs in Python their put, get and evict throughput is
+    about half. See benchmarks/bench_eviction_policy.py.
+    """
+
+    INITIAL_SLOTS = 1024
+    MAX_LOAD_FACTOR = 0.7
+
+    def __init__(
+        self,
+        name: str,
+        capacity_nbytes: int,
+        num_lists: int,
+        on_put: Functor | None = None,
+        on_evict: Functor | None = None,
+        on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
+    ) -> None:
+        """Initialize the eviction policy.
+        Args:
+            name (str): The name of the eviction policy.
+            capacity_nbytes (int): The capacity of the eviction policy in bytes.
+            num_lists (int): The number of linked lists.
+            on_put (Functor): The put function to call when putting new items.
+            on_evict (Functor): The evict function to call when evicting items.
+            on_hot_access (Functor): The callback function to call when a cache
+                                     item becomes hot.
+            admission_policy (BaseAdmissionPolicy): The admission policy.
+        """
+        super().__init__(
+            name=name,
+            capacity_nbytes=capacity_nbytes,
+            on_put=on_put,
+            on_evict=on_evict,
+            on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
+        )
+        self._num_entries: int = 0
+        self._num_slots: int = 0
+        self._keys: List[KVCacheHashable | None] = []
+        self._values: List[MemoryRegion | None] = []
+        self._prev_array = np.empty(0, dtype=np.int32)
+        self._next_array = np.empty(0, dtype=np.int32)
+        self._list_array = np.empty(0, dtype=np.int8)
+        self._hotness_array = np.empty(0, dtype=np.int8)
+        self._nbytes_array = np.empty(0, dtype=np.int64)
+        # stack of free slots
+        self._free_array = np.empty(0, dtype=np.int32)
+        self._num_free: int = 0
+        self._grow(self.INITIAL_SLOTS)
+
+        self._heads: List[int] = [NIL] * num_lists
+        self._tails: List[int] = [NIL] * num_lists
+        self._list_lens: List[int] = [0] * num_lists
+        self._list_nbytes: List[int] = [0] * num_lists
+
+        self._num_tombstones: int = 0
+        self._rehash(2 * self.INITIAL_SLOTS)
+
+    def _grow(self, num_slots: int) -> None:
+        old = self._num_slots
+        self._keys.extend([None] * (num_slots - old))
+        self._values.extend([None] * (num_slots - old))
+        self._prev_array = self._resized(self._prev_array, num_slots, NIL)
+        self._next_array = self._resized(self._next_array, num_slots, NIL)
+        self._list_array = self._resized(self._list_array, num_slots, NIL)
+        self._hotness_array = self._resized(self._hotness_array, num_slots, 0)
+        self._nbytes_array = self._resized(self._nbytes_array, num_slots, 0)
+        self._free_array = self._resized(self._free_array, num_slots, NIL)
+        # the lowest slots are popped first
+        self._free_array[self._num_free : self._num_free + num_slots - old] = (
+            np.arange(num_slots - 1, old - 1, -1, dtype=np.int32)
+        )
+        self._num_free += num_slots - old
+        self._num_slots = num_slots
+
+        self._prev = self._prev_array.data
+        self._next = self._next_array.data
+        self._list = self._list_array.data
+        self._hotness = self._hotness_array.data
+        self._nbytes = self._nbytes_array.data
+        self._free = self._free_array.data
+
+    @staticmethod
+    def _resized(array: np.ndarray, size: int, fill: int) -> np.ndarray:
+        resized = np.full(size, fill, dtype=array.dtype)
+        resized[: len(array)] = array
+        return resized
+
+    def _rehash(self, table_size: int) -> None:
+        """Rebuild the index table with the given power-of-two size."""
+        self._table_bits: int = table_size.bit_length() - 1
+        assert table_size == 1 << self._table_bits
+        self._table_hashes_array = np.zeros(table_size, dtype=np.int64)
+        self._table_slots_array = np.full(table_size, EMPTY, dtype=np.int32)
+        self._table_hashes = self._table_hashes_array.data
+        self._table_slots = self._table_slots_array.data
+        self._table_mask: int = table_size - 1
+        self._table_limit: int = int(table_size * self.MAX_LOAD_FACTOR)
+        self._num_tombstones = 0
+        for slot, key in enumerate(self._keys):
+            if key is not None:
+                self._index_insert(self._hash(key), slot)
+
+    @staticmethod
+    def _hash(key: KVCacheHashable) -> int:
+        return hash(key) & _HASH_MASK
+
+    def _bucket(self, h: int) -> int:
+        return ((h * _GOLDEN64) & _MASK64) >> (64 - self._table_bits)
+
+    def _index_find(self, key: KVCacheHashable, h: int) -> Tuple[int, int]:
+        """Return the table position and the slot of the key, or NIL."""
+        table_hashes, table_slots = self._table_hashes, self._table_slots
+        keys, mask = self._keys, self._table_mask
+        i = self._bucket(h)
+        while True:
+            slot = table_slots[i]
+            if slot == EMPTY:
+                return NIL, NIL
+            if slot >= 0 and table_hashes[i] == h and keys[slot] == key:
+                return i, slot
+            i = (i + 1) & mask
+
+    def _index_insert(self, h: int, slot: int) -> None:
+        table_slots, mask = self._table_slots, self._table_mask
+        i = self._bucket(h)
+        while table_slots[i] >= 0:
+            i = (i + 1) & mask
+        if table_slots[i] == TOMBSTONE:
+            self._num_tombstones -= 1
+        table_slots[i] = slot
+        self._table_hashes[i] = h
+
+    def _find(self, key: KVCacheHashable) -> int:
+        """Return the slot of the key or NIL."""
+        return self._index_find(key, self._hash(key))[1]
+
+    def _insert(self, key: KVCacheHashable, value: MemoryRegion | None) -> int:
+        """Put a new key into a free slot and return the slot."""
+        if self._num_free == 0:
+            self._grow(2 * self._num_slots)
+        self._num_free -= 1
+        slot = self._free[self._num_free]
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._hotness[slot] = 0
+        self._num_entries += 1
+
+        if self._num_entries + self._num_tombstones > self._table_limit:
+            table_size = 1 << self._table_bits
+            if 2 * self._num_entries > self._table_limit:
+                table_size *= 2
+            self._rehash(table_size)
+        else:
+            self._index_insert(self._hash(key), slot)
+        return slot
+
+    def _remove(self, slot: int) -> None:
+        """Remove the entry in the slot, which must not be on any list."""
+        key = self._keys[slot]
+        assert key is not None
+        i, found = self._index_find(key, self._hash(key))
+        assert found == slot
+        self._table_slots[i] = TOMBSTONE
+        self._num_tombstones += 1
+        self._keys[slot] = None
+        self._values[slot] = None
+        self._free[self._num_free] = slot
+        self._num_free += 1
+        self._num_entries -= 1
+
+    def _push_head(self, lst: int, slot: int) -> None:
+        head = self._heads[lst]
+        self._next[slot] = head
+        self._prev[slot] = NIL
+        if head != NIL:
+            self._prev[head] = slot
+        self._heads[lst] = slot
+        if self._tails[lst] == NIL:
+            self._tails[lst] = slot
+        self._list[slot] = lst
+        value = self._values[slot]
+        nbytes = len(value) if value else 0
+        self._nbytes[slot] = nbytes
+        self._list_lens[lst] += 1
+        self._list_nbytes[lst] += nbytes
+
+    def _unlink(self, slot: int) -> None:
+        lst = self._list[slot]
+        prev, nxt = self._prev[slot], self._next[slot]
+        if prev != NIL:
+            self._next[prev] = nxt
+        if nxt != NIL:
+            self._prev[nxt] = prev
+        if self._heads[lst] == slot:
+            self._heads[lst] = nxt
+        if self._tails[lst] == slot:
+            self._tails[lst] = prev
+        self._prev[slot] = NIL
+        self._next[slot] = NIL
+        self._list[slot] = NIL
+        self._list_lens[lst] -= 1
+        self._list_nbytes[lst] -= self._nbytes[slot]
+
+    def _pop_tail(self, lst: int) -> int:
+        slot = self._tails[lst]
+        if slot != NIL:
+            self._unlink(slot)
+        return slot
+
+    def _iter_list(self, lst: int) -> Iterator[int]:
+        slot = self._heads[lst]
+        while slot != NIL:
+            yield slot
+            slot = self._next[slot]
+
+    def _live_slots(self) -> Iterator[int]:
+        """Return the slots of the cached entries."""
+        for lst in range(len(self._heads)):
+            yield from self._iter_list(lst)
+
+    def _assert_lists(self) -> None:
+        total = 0
+        for lst in range(len(self._heads)):
+            n = nbytes = 0
+            prev = NIL
+            for slot in self._iter_list(lst):
+                assert self._list[slot] == lst
+                assert self._prev[slot] == prev
+                key = self._keys[slot]
+                assert key is not None and self._find(key) == slot
+                n += 1
+                nbytes += self._nbytes[slot]
+                prev = slot
+            assert prev == self._tails[lst]
+            assert n == self._list_lens[lst], f"{n} != {self._list_lens[lst]}"
+            assert nbytes == self._list_nbytes[lst]
+            total += n
+        assert total == self._num_entries, f"{total} != {self._num_entries}"
+        assert self._num_entries + self._num_free == self._num_slots
+
+    def __del__(self) -> None:
+        for value in self._values:
+            if value is not None:
+                value.ref_down()
+
+    def __contains__(self, key: KVCacheHashable) -> bool:
+        return self._find(key) != NIL
+
+    def __iter__(self) -> Iterator[KVCacheHashable]:
+        return (self._keys[slot] for slot in self._live_slots())  # type: ignore
+
+    def items(self) -> Iterator[Tuple[KVCacheHashable, MemoryRegion]]:
+        return iter(
+            {
+                (self._keys[slot], self._values[slot])  # type: ignore
+                for slot in self._live_slots()
+            }
+        )
+
+    def keys(self) -> Iterator[KVCacheHashable]:
+        return iter(self)
+
+    def values(self) -> Iterator[MemoryRegion]:
+        return iter({value for _, value in self.items()})
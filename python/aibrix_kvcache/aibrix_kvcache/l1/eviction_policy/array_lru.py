@@ -0,0 +1,142 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from ...cache_hashable import KVCacheHashable
+from ...memory import MemoryRegion
+from ...status import Status, StatusCodes
+from ..admission_policy import BaseAdmissionPolicy
+from .array_eviction_policy import NIL, ArrayEvictionPolicy
+from .base_eviction_policy import Functor
+
+
+class ArrayLRU(ArrayEvictionPolicy):
+    """LRU backed by preallocated arrays. Behaves the same as LRU."""
+
+    def __init__(
+        self,
+        capacity_nbytes: int,
+        on_put: Functor | None = None,
+        on_evict: Functor | None = None,
+        on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
+    ) -> None:
+        super().__init__(
+            name="ARRAY_LRU",
+            capacity_nbytes=capacity_nbytes,
+            num_lists=1,
+            on_put=on_put,
+            on_evict=on_evict,
+            on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
+        )
+
+    def put(
+        self,
+        key: KVCacheHashable,
+        value: MemoryRegion,
+    ) -> Status:
+        self._record_access(key)
+        slot = self._find(key)
+        if slot != NIL:
+            old_value = self._values[slot]
+            assert old_value is not None
+            old_value.ref_down()
+            usage = len(value) - len(old_value)
+
+            self._values[slot] = value
+            self._hotness[slot] = 0
+
+            self._unlink(slot)
+            self._push_head(0, slot)
+        else:
+            if not self._admit(key, value):
+                return Status(StatusCodes.DENIED)
+            slot = self._insert(key, value)
+            self._push_head(0, slot)
+            usage = len(value)
+            if self._on_put is not None:
+                value.ref_up()
+                self._on_put(key, value)
+
+        self._used_nbytes += usage
+
+        if len(self) > self._capacity_nbytes:
+            self.evict()
+
+        return Status.ok()
+
+    def get(
+        self,
+        key: KVCacheHashable,
+    ) -> Status[MemoryRegion]:
+        slot = self._find(key)
+        if slot == NIL:
+            return Status(StatusCodes.NOT_FOUND)
+
+        mr = self._values[slot]
+        assert mr is not None
+        self._record_access(key)
+
+        # The item becomes hot after the first access
+        if self._hotness[slot] == 0 and self._on_hot_access:
+            mr.ref_up()
+            self._on_hot_access(key, mr)
+
+        self._unlink(slot)
+        self._push_head(0, slot)
+
+        self._hotness[slot] = 1
+        mr.ref_up()
+        return Status.ok(mr)
+
+    def delete(self, key: KVCacheHashable) -> Status:
+        slot = self._find(key)
+        if slot != NIL:
+            mr = self._values[slot]
+            assert mr is not None
+            self._used_nbytes -= len(mr)
+            self._unlink(slot)
+            self._remove(slot)
+            mr.ref_down()
+
+        return Status.ok()
+
+    def evict(self, nbytes: int = 1) -> Status:
+        target_usage = max(0, min(len(self), self.capacity_nbytes) - nbytes)
+        while len(self) > target_usage:
+            slot = self._tails[0]
+            if slot == NIL:
+                break
+            key = self._keys[slot]
+            assert key is not None
+            if self._on_evict:
+                mr = self._values[slot]
+                assert mr is not None
+                mr.ref_up()
+                self._on_evict(key, mr)
+            self.delete(key)
+
+        return Status.ok()
+
+    def assert_consistency(self) -> None:
+        self._assert_lists()
+
+    def _victim(self) -> KVCacheHashable | None:
+        slot = self._tails[0]
+        return self._keys[slot] if slot != NIL else None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        slot = self._find(victim)
+        self._unlink(slot)
+        self._push_head(0, slot)
@@ -0,0 +1,249 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Iterator
+
+from ... import envs
+from ...cache_hashable import KVCacheHashable
+from ...memory import MemoryRegion
+from ...status import Status, StatusCodes
+from ..admission_policy import BaseAdmissionPolicy
+from .array_eviction_policy import NIL, ArrayEvictionPolicy
+from .base_eviction_policy import Functor
+
+SMALL = 0
+MAIN = 1
+GHOST = 2
+
+
+class ArrayS3FIFO(ArrayEvictionPolicy):
+    """S3FIFO backed by preallocated arrays. Behaves the same as S3FIFO."""
+
+    def __init__(
+        self,
+        capacity_nbytes: int,
+        on_put: Functor | None = None,
+        on_evict: Functor | None = None,
+        on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
+    ) -> None:
+        super().__init__(
+            name="ARRAY_S3FIFO",
+            capacity_nbytes=capacity_nbytes,
+            num_lists=3,
+            on_put=on_put,
+            on_evict=on_evict,
+            on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
+        )
+
+        self._small_to_main_promo_threshold: int = (
+            envs.AIBRIX_KV_CACHE_OL_S3FIFO_SMALL_TO_MAIN_PROMO_THRESHOLD
+        )
+        self._small_fifo_capacity_ratio: float = (
+            envs.AIBRIX_KV_CACHE_OL_S3FIFO_SMALL_FIFO_CAPACITY_RATIO
+        )
+
+        self._small_fifo_capacity_nbytes: int = int(
+            capacity_nbytes * self._small_fifo_capacity_ratio
+        )
+        self._main_fifo_capacity_nbytes: int = (
+            capacity_nbytes - self._small_fifo_capacity_nbytes
+        )
+
+        assert 1 <= self._small_to_main_promo_threshold <= 3, (
+            "AIBRIX_KV_CACHE_OL_S3FIFO_SMALL_TO_MAIN_PROMO_THRESHOLD "
+            "must be in [1, 3]"
+        )
+        assert 0 < self._small_fifo_capacity_ratio < 1, (
+            "AIBRIX_KV_CACHE_OL_S3FIFO_SMALL_FIFO_CAPACITY_RATIO "
+            "must be in (0, 1)"
+        )
+
+    def __len__(self) -> int:
+        """Return the usage in the eviction policy."""
+        return self._list_nbytes[SMALL] + self._list_nbytes[MAIN]
+
+    def __contains__(self, key: KVCacheHashable) -> bool:
+        """Return True if the key is in the eviction policy."""
+        slot = self._find(key)
+        return slot != NIL and self._list[slot] != GHOST
+
+    def _live_slots(self) -> Iterator[int]:
+        # Ghost entries are not cached
+        yield from self._iter_list(SMALL)
+        yield from self._iter_list(MAIN)
+
+    def put(
+        self,
+        key: KVCacheHashable,
+        value: MemoryRegion,
+    ) -> Status:
+        self._record_access(key)
+        slot = self._find(key)
+        if slot != NIL:
+            lst = self._list[slot]
+            if lst == GHOST:
+                # We hit on a ghost entry, let's promote it to main fifo.
+                self._unlink(slot)
+                self._values[slot] = value
+                self._hotness[slot] = 0
+                self._push_head(MAIN, slot)
+
+                if self._on_hot_access:
+                    value.ref_up()
+                    self._on_hot_access(key, value)
+            else:
+                # Hit on small or main fifo
+                self._unlink(slot)
+                old_value = self._values[slot]
+                assert old_value is not None
+                old_value.ref_down()
+
+                self._values[slot] = value
+                self._push_head(lst, slot)
+        else:
+            if not self._admit(key, value):
+                return Status(StatusCodes.DENIED)
+            # New key always goes to small fifo
+            slot = self._insert(key, value)
+            self._push_head(SMALL, slot)
+            if self._on_put is not None:
+                value.ref_up()
+                self._on_put(key, value)
+
+        if len(self) > self._capacity_nbytes:
+            self.evict()
+
+        return Status.ok()
+
+    def get(
+        self,
+        key: KVCacheHashable,
+    ) -> Status[MemoryRegion]:
+        slot = self._find(key)
+        if slot == NIL or self._list[slot] == GHOST:
+            return Status(StatusCodes.NOT_FOUND)
+
+        mr = self._values[slot]
+        assert mr is not None
+        self._record_access(key)
+        hotness = self._hotness[slot]
+        # Invoke on_hot_access callback on the item that will be promoted
+        # to main fifo
+        if (
+            self._list[slot] == SMALL
+            and hotness == self._small_to_main_promo_threshold - 1
+            and self._on_hot_access is not None
+        ):
+            mr.ref_up()
+            self._on_hot_access(key, mr)
+
+        self._hotness[slot] = min(hotness + 1, 3)
+        mr.ref_up()
+        return Status.ok(mr)
+
+    def delete(self, key: KVCacheHashable) -> Status:
+        slot = self._find(key)
+        if slot != NIL:
+            lst = self._list[slot]
+            mr = self._values[slot]
+            self._unlink(slot)
+            self._remove(slot)
+
+            if lst != GHOST:
+                assert mr is not None
+                mr.ref_down()
+
+        return Status.ok()
+
+    def evict(self, nbytes: int = 1) -> Status:
+        target_usage = max(0, min(len(self), self.capacity_nbytes) - nbytes)
+        while len(self) > target_usage:
+            if (
+                self._list_nbytes[SMALL] > self._small_fifo_capacity_nbytes
+                or self._list_lens[MAIN] == 0
+            ):
+                self._evict_one_from_small_fifo()
+            else:
+                self._evict_one_from_main_fifo()
+
+        return Status.ok()
+
+    def assert_consistency(self) -> None:
+        self._assert_lists()
+
+    def _victim(self) -> KVCacheHashable | None:
+        # A new item enters the small fifo and pushes out its tail
+        slot = self._tails[SMALL]
+        if slot == NIL:
+            slot = self._tails[MAIN]
+        return self._keys[slot] if slot != NIL else None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        slot = self._find(victim)
+        lst = self._list[slot]
+        self._unlink(slot)
+        self._push_head(lst, slot)
+
+    def _evict_one_from_small_fifo(self) -> None:
+        slot = self._pop_tail(SMALL)
+        if slot == NIL:
+            return
+
+        if self._hotness[slot] >= self._small_to_main_promo_threshold:
+            # Promote to main fifo
+            self._hotness[slot] = 0
+            self._push_head(MAIN, slot)
+            # Trigger eviction on main fifo if needed
+            while self._list_nbytes[MAIN] > self._main_fifo_capacity_nbytes:
+                self._evict_one_from_main_fifo()
+        else:
+            key, mr = self._keys[slot], self._values[slot]
+            assert key is not None and mr is not None
+            if self._on_evict:
+                self._on_evict(key, mr)
+            else:
+                mr.ref_down()
+            # Insert into ghost fifo
+            self._hotness[slot] = -1
+            self._values[slot] = None
+            self._push_head(GHOST, slot)
+            # Trigger eviction on ghost fifo if needed
+            while self._list_nbytes[GHOST] > self._main_fifo_capacity_nbytes:
+                self._evict_one_from_ghost_fifo()
+
+    def _evict_one_from_main_fifo(self) -> None:
+        slot = self._pop_tail(MAIN)
+        if slot == NIL:
+            return
+
+        if self._hotness[slot] >= 1:
+            self._hotness[slot] -= 1
+            self._push_head(MAIN, slot)
+        else:
+            key, mr = self._keys[slot], self._values[slot]
+            assert key is not None and mr is not None
+            if self._on_evict:
+                self._on_evict(key, mr)
+            else:
+                mr.ref_down()
+            self._remove(slot)
+
+    def _evict_one_from_ghost_fifo(self) -> None:
+        slot = self._pop_tail(GHOST)
+        if slot == NIL:
+            return
+
+        self._remove(slot)
@@ -19,6 +19,7 @@ from ...cache_hashable import KVCacheHashable
 from ...memory import MemoryRegion
 from ...status import Status
 from ...utils import human_readable_bytes
+from ..admission_policy import BaseAdmissionPolicy
 
 N = TypeVar("N", bound="BaseEvictionPolicyNode")
 
@@ -59,6 +60,7 @@ class BaseEvictionPolicy(Generic[N]):
         on_put: Functor | None = None,
         on_evict: Functor | None = None,
         on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
     ) -> None:
         """Initialize the eviction policy.
         Args:
@@ -70,6 +72,10 @@ class BaseEvictionPolicy(Generic[N]):
                                 Defaults to None.
             on_hot_access (Functor): The callback function to call when a cache
                                      item becomes hot. Defaults to None.
+            admission_policy (BaseAdmissionPolicy): The admission policy to
+                                                    consult before a new item
+                                                    evicts a victim. Defaults
+                                                    to None.
         """
 
         self._name: str = name
@@ -78,6 +84,7 @@ class BaseEvictionPolicy(Generic[N]):
         self._on_put: Functor | None = on_put
         self._on_evict: Functor | None = on_evict
         self._on_hot_access: Functor | None = on_hot_access
+        self._admission_policy: BaseAdmissionPolicy | None = admission_policy
 
         self._hashmap: Dict[KVCacheHashable, N] = {}
 
@@ -96,6 +103,22 @@ class BaseEvictionPolicy(Generic[N]):
             from .s3fifo import S3FIFO
 
             return S3FIFO(*args, **kwargs)
+        elif name == "RADIX_LRU":
+            from .radix_lru import RadixLRU
+
+            return RadixLRU(*args, **kwargs)
+        elif name == "ARRAY_LRU":
+            from .array_lru import ArrayLRU
+
+            return ArrayLRU(*args, **kwargs)
+        elif name == "ARRAY_FIFO":
+            from .array_fifo import ArrayFIFO
+
+            return ArrayFIFO(*args, **kwargs)
+        elif name == "ARRAY_S3FIFO":
+            from .array_s3fifo import ArrayS3FIFO
+
+            return ArrayS3FIFO(*args, **kwargs)
         else:
             raise ValueError(f"Unknown eviction policy: {name}")
 
@@ -109,6 +132,18 @@ class BaseEvictionPolicy(Generic[N]):
         """Return the capacity of the eviction policy in bytes."""
         return self._capacity_nbytes
 
+    @property
+    def reachable_nbytes(self) -> int | None:
+        """Return the bytes of the items reachable by prefix lookups, or
+        None if the eviction policy does not index prefixes.
+        """
+        return None
+
+    @property
+    def admission_policy(self) -> BaseAdmissionPolicy | None:
+        """Return the admission policy."""
+        return self._admission_policy
+
     def __del__(self) -> None:
         for _, node in self._hashmap.items():
             if node.value is not None:
@@ -155,6 +190,54 @@ class BaseEvictionPolicy(Generic[N]):
         """
         self._on_hot_access = functor
 
+    def reject(self, key: KVCacheHashable, value: MemoryRegion) -> None:
+        """Pass an item that is not going to be cached through the
+        callbacks as if it was put and evicted right away. The caller
+        keeps its reference to the value.
+        """
+        self._record_access(key)
+        self._pass_through(key, value)
+
+    def _record_access(self, key: KVCacheHashable) -> None:
+        if self._admission_policy is not None:
+            self._admission_policy.record(key)
+
+    def _pass_through(self, key: KVCacheHashable, value: MemoryRegion) -> None:
+        if self._on_put is not None:
+            value.ref_up()
+            self._on_put(key, value)
+        if self._on_evict is not None:
+            value.ref_up()
+            self._on_evict(key, value)
+
+    def _admit(self, key: KVCacheHashable, value: MemoryRegion) -> bool:
+        """Consult the admission policy before putting a new item. An item
+        is always admitted if it fits, otherwise it has to be accessed more
+        often than the victim it would evict. A rejected item is passed
+        through the callbacks.
+        """
+        if self._admission_policy is None:
+            return True
+        if len(self) + len(value) <= self._capacity_nbytes:
+            return True
+        victim = self._victim()
+        if victim is None or self._admission_policy.admit(key, victim):
+            return True
+        self._spare(victim)
+        self._pass_through(key, value)
+        return False
+
+    def _victim(self) -> KVCacheHashable | None:
+        """Return the key of the next item to be evicted."""
+        return None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        """Called when the victim survives a rejected candidate. Moving it
+        away from the eviction end lets the next candidate compete with
+        another victim instead of the cache freezing behind a hot one.
+        """
+        pass
+
     def items(self) -> Iterator[Tuple[KVCacheHashable, MemoryRegion]]:
         """Return an iterator over the key-value pairs in the
         eviction policy.
@@ -187,7 +270,9 @@ class BaseEvictionPolicy(Generic[N]):
             key (KVCacheHashable): The key of the item.
             value: The value of the item.
         Returns:
-            Status: The status of the operation.
+            Status: The status of the operation. DENIED if the item is
+                    rejected by the admission policy, in which case the
+                    eviction policy does not take over the value.
         """
         raise NotImplementedError
 
@@ -15,6 +15,7 @@
 from ...cache_hashable import KVCacheHashable
 from ...memory import MemoryRegion
 from ...status import Status, StatusCodes
+from ..admission_policy import BaseAdmissionPolicy
 from .base_eviction_policy import (
     BaseEvictionPolicy,
     BaseEvictionPolicyNode,
@@ -38,6 +39,7 @@ class FIFO(BaseEvictionPolicy[FIFONode]):
         on_put: Functor | None = None,
         on_evict: Functor | None = None,
         on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
     ) -> None:
         super().__init__(
             name="FIFO",
@@ -45,6 +47,7 @@ class FIFO(BaseEvictionPolicy[FIFONode]):
             on_put=on_put,
             on_evict=on_evict,
             on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
         )
         self._head: FIFONode | None = None
         self._tail: FIFONode | None = None
@@ -54,6 +57,7 @@ class FIFO(BaseEvictionPolicy[FIFONode]):
         key: KVCacheHashable,
         value: MemoryRegion,
     ) -> Status:
+        self._record_access(key)
         if key in self._hashmap:
             node = self._hashmap[key]
 
@@ -64,6 +68,8 @@ class FIFO(BaseEvictionPolicy[FIFONode]):
             node.value = value
             node.hotness = 0
         else:
+            if not self._admit(key, value):
+                return Status(StatusCodes.DENIED)
             node = FIFONode(key, value)
             self._hashmap[key] = node
             self._prepend_to_head(node)
@@ -88,6 +94,7 @@ class FIFO(BaseEvictionPolicy[FIFONode]):
 
         node = self._hashmap[key]
         mr = node.value
+        self._record_access(key)
         # The item becomes hot after the first access
         if node.hotness == 0 and self._on_hot_access:
             mr.ref_up()
@@ -131,6 +138,14 @@ class FIFO(BaseEvictionPolicy[FIFONode]):
             f"{total_in_list} != {len(self._hashmap)}"
         )
 
+    def _victim(self) -> KVCacheHashable | None:
+        return self._tail.key if self._tail is not None else None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        node = self._hashmap[victim]
+        self._remove_from_list(node)
+        self._prepend_to_head(node)
+
     def _prepend_to_head(self, node: FIFONode) -> None:
         node.next = self._head
         node.prev = None
@@ -15,6 +15,7 @@
 from ...cache_hashable import KVCacheHashable
 from ...memory import MemoryRegion
 from ...status import Status, StatusCodes
+from ..admission_policy import BaseAdmissionPolicy
 from .base_eviction_policy import (
     BaseEvictionPolicy,
     BaseEvictionPolicyNode,
@@ -38,6 +39,7 @@ class LRU(BaseEvictionPolicy[LRUNode]):
         on_put: Functor | None = None,
         on_evict: Functor | None = None,
         on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
     ) -> None:
         super().__init__(
             name="LRU",
@@ -45,6 +47,7 @@ class LRU(BaseEvictionPolicy[LRUNode]):
             on_put=on_put,
             on_evict=on_evict,
             on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
         )
         self._head: LRUNode | None = None
         self._tail: LRUNode | None = None
@@ -54,6 +57,7 @@ class LRU(BaseEvictionPolicy[LRUNode]):
         key: KVCacheHashable,
         value: MemoryRegion,
     ) -> Status:
+        self._record_access(key)
         if key in self._hashmap:
             node = self._hashmap[key]
 
@@ -67,6 +71,8 @@ class LRU(BaseEvictionPolicy[LRUNode]):
             self._remove_from_list(node)
             self._prepend_to_head(node)
         else:
+            if not self._admit(key, value):
+                return Status(StatusCodes.DENIED)
             node = LRUNode(key, value)
             self._hashmap[key] = node
             self._prepend_to_head(node)
@@ -91,6 +97,7 @@ class LRU(BaseEvictionPolicy[LRUNode]):
 
         node = self._hashmap[key]
         mr = node.value
+        self._record_access(key)
 
         # The item becomes hot after the first access
         if node.hotness == 0 and self._on_hot_access:
@@ -139,6 +146,14 @@ class LRU(BaseEvictionPolicy[LRUNode]):
             f"{total_in_list} != {len(self._hashmap)}"
         )
 
+    def _victim(self) -> KVCacheHashable | None:
+        return self._tail.key if self._tail is not None else None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        node = self._hashmap[victim]
+        self._remove_from_list(node)
+        self._prepend_to_head(node)
+
     def _prepend_to_head(self, node: LRUNode) -> None:
         node.next = self._head
         node.prev = None
@@ -0,0 +1,327 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+from collections import OrderedDict
+from typing import Dict, List, Set, Tuple
+
+from ...cache_hashable import KVCacheHashable, KVCacheKey
+from ...memory import MemoryRegion
+from ...status import Status, StatusCodes
+from ..admission_policy import BaseAdmissionPolicy
+from .base_eviction_policy import (
+    BaseEvictionPolicy,
+    BaseEvictionPolicyNode,
+    Functor,
+)
+
+
+class RadixLRUNode(BaseEvictionPolicyNode):
+    __slots__ = ("parent", "children", "tick", "reachable")
+
+    def __init__(self, key: KVCacheHashable, value: MemoryRegion):
+        super().__init__(key, value)
+        self.parent: RadixLRUNode | None = None
+        self.children: Set[RadixLRUNode] = set()
+        self.tick: int = 0
+        self.reachable: bool = True
+
+
+class RadixLRU(BaseEvictionPolicy[RadixLRUNode]):
+    """LRU over the leaves of the prefix tree formed by cached blocks.
+
+    A block is only reachable if all blocks of its prefix are cached, as
+    lookups stop at the first miss. Evicting leaves first guarantees that
+    a block never outlives its parent, and each eviction may turn the
+    parent into a leaf, so cold prefix paths are reclaimed bottom-up.
+
+    Blocks whose parent is not cached are kept as unreachable orphans,
+    which are reclaimed before any reachable leaf. They become reachable
+    again if the missing parent is put back. Deleting a block reclaims
+    all its descendants as well.
+    """
+
+    def __init__(
+        self,
+        capacity_nbytes: int,
+        on_put: Functor | None = None,
+        on_evict: Functor | None = None,
+        on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
+    ) -> None:
+        super().__init__(
+            name="RADIX_LRU",
+            capacity_nbytes=capacity_nbytes,
+            on_put=on_put,
+            on_evict=on_evict,
+            on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
+        )
+        self._tick: int = 0
+        self._seq: int = 0
+        # min-heap of (tick, seq, node) with lazy invalidation, an entry is
+        # stale if the node has been accessed again, got a child or has
+        # been removed
+        self._leaves: List[Tuple[int, int, RadixLRUNode]] = []
+        # unreachable subtrees by their roots in insertion order
+        self._orphans: OrderedDict[KVCacheHashable, RadixLRUNode] = (
+            OrderedDict()
+        )
+        # orphan roots waiting for their parents
+        self._waiting: Dict[KVCacheHashable, Set[RadixLRUNode]] = {}
+        self._reachable_nbytes: int = 0
+
+    @property
+    def reachable_nbytes(self) -> int | None:
+        return self._reachable_nbytes
+
+    @staticmethod
+    def _parent_key(key: KVCacheHashable) -> KVCacheHashable | None:
+        if isinstance(key, KVCacheKey):
+            return key.parent()
+        return None
+
+    def put(
+        self,
+        key: KVCacheHashable,
+        value: MemoryRegion,
+    ) -> Status:
+        self._record_access(key)
+        if key in self._hashmap:
+            node = self._hashmap[key]
+
+            node_value_len = len(node.value)
+            node.value.ref_down()
+            usage = len(value) - node_value_len
+
+            node.value = value
+            node.hotness = 0
+            if node.reachable:
+                self._reachable_nbytes += usage
+            self._touch(node)
+        else:
+            if not self._admit(key, value):
+                return Status(StatusCodes.DENIED)
+            node = RadixLRUNode(key, value)
+            self._hashmap[key] = node
+            usage = len(value)
+            self._link(node)
+            self._touch(node)
+            if self._on_put is not None:
+                value.ref_up()
+                self._on_put(key, value)
+
+        self._used_nbytes += usage
+
+        if len(self) > self._capacity_nbytes:
+            self.evict()
+
+        return Status.ok()
+
+    def get(
+        self,
+        key: KVCacheHashable,
+    ) -> Status[MemoryRegion]:
+        if key not in self._hashmap:
+            return Status(StatusCodes.NOT_FOUND)
+
+        node = self._hashmap[key]
+        mr = node.value
+        self._record_access(key)
+
+        # The item becomes hot after the first access
+        if node.hotness == 0 and self._on_hot_access:
+            mr.ref_up()
+            self._on_hot_access(key, mr)
+
+        self._touch(node)
+
+        node.hotness = 1
+        mr.ref_up()
+        return Status.ok(mr)
+
+    def delete(self, key: KVCacheHashable) -> Status:
+        node = self._hashmap.get(key, None)
+        if node:
+            # descendants are unreachable without this node
+            for child in list(node.children):
+                self._reclaim(child)
+            self._remove(node)
+            node.value.ref_down()
+
+        return Status.ok()
+
+    def evict(self, nbytes: int = 1) -> Status:
+        target_usage = max(0, min(len(self), self.capacity_nbytes) - nbytes)
+        while len(self) > target_usage:
+            node = self._next_victim()
+            if node is None:
+                break
+            self._reclaim(node)
+
+        return Status.ok()
+
+    def assert_consistency(self) -> None:
+        used_nbytes = reachable_nbytes = 0
+        for key, node in self._hashmap.items():
+            assert node.key == key
+            used_nbytes += len(node.value)
+            parent_key = self._parent_key(key)
+            if node.parent is not None:
+                assert parent_key is not None
+                assert node in node.parent.children
+                assert self._hashmap.get(parent_key, None) is node.parent
+                assert node.reachable == node.parent.reachable
+            else:
+                assert parent_key not in self._hashmap
+                assert node.reachable == (parent_key is None)
+                assert (key in self._orphans) == (not node.reachable)
+            for child in node.children:
+                assert child.parent is node
+            if node.reachable:
+                reachable_nbytes += len(node.value)
+        assert used_nbytes == self._used_nbytes, (
+            f"{used_nbytes} != {self._used_nbytes}"
+        )
+        assert reachable_nbytes == self._reachable_nbytes, (
+            f"{reachable_nbytes} != {self._reachable_nbytes}"
+        )
+        waiting = {n for nodes in self._waiting.values() for n in nodes}
+        assert waiting == set(self._orphans.values())
+
+    def _victim(self) -> KVCacheHashable | None:
+        node = self._peek_victim()
+        return node.key if node is not None else None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        node = self._hashmap[victim]
+        if not node.reachable:
+            self._orphans.move_to_end(victim)
+        self._touch(node)
+
+    def _link(self, node: RadixLRUNode) -> None:
+        """Attach a new node to its parent and adopt the orphans that
+        have been waiting for it.
+        """
+        parent_key = self._parent_key(node.key)
+        parent = (
+            self._hashmap.get(parent_key, None)
+            if parent_key is not None
+            else None
+        )
+        if parent is not None:
+            node.parent = parent
+            node.reachable = parent.reachable
+            parent.children.add(node)
+        elif parent_key is not None:
+            node.reachable = False
+            self._orphans[node.key] = node
+            self._waiting.setdefault(parent_key, set()).add(node)
+        if node.reachable:
+            self._reachable_nbytes += len(node.value)
+
+        for child in self._waiting.pop(node.key, ()):
+            del self._orphans[child.key]
+            child.parent = node
+            node.children.add(child)
+            if node.reachable:
+                self._set_reachable(child)
+
+    def _set_reachable(self, root: RadixLRUNode) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.reachable = True
+            self._reachable_nbytes += len(node.value)
+            stack.extend(node.children)
+
+    def _touch(self, node: RadixLRUNode) -> None:
+        self._tick += 1
+        node.tick = self._tick
+        if not node.children:
+            self._push_leaf(node)
+
+    def _push_leaf(self, node: RadixLRUNode) -> None:
+        self._seq += 1
+        heapq.heappush(self._leaves, (node.tick, self._seq, node))
+        if len(self._leaves) > 2 * len(self._hashmap) + 64:
+            # drop stale entries
+            self._leaves = [
+                (n.tick, 0, n) for n in self._hashmap.values() if not n.children
+            ]
+            heapq.heapify(self._leaves)
+
+    def _is_leaf_entry(self, tick: int, node: RadixLRUNode) -> bool:
+        return (
+            node.tick == tick
+            and not node.children
+            and self._hashmap.get(node.key, None) is node
+        )
+
+    def _peek_victim(self) -> RadixLRUNode | None:
+        if self._orphans:
+            return next(iter(self._orphans.values()))
+        while self._leaves:
+            tick, _, node = self._leaves[0]
+            if self._is_leaf_entry(tick, node):
+                return node
+            heapq.heappop(self._leaves)
+        return None
+
+    def _next_victim(self) -> RadixLRUNode | None:
+        node = self._peek_victim()
+        if node is not None and node.reachable:
+            heapq.heappop(self._leaves)
+        return node
+
+    def _reclaim(self, root: RadixLRUNode) -> None:
+        """Remove the subtree rooted at the given node, children first."""
+        stack = [root]
+        order = []
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children)
+        for node in reversed(order):
+            if self._on_evict:
+                node.value.ref_up()
+                self._on_evict(node.key, node.value)
+            self._remove(node)
+            node.value.ref_down()
+
+    def _remove(self, node: RadixLRUNode) -> None:
+        """Unlink a node without children from the tree."""
+        assert not node.children
+        del self._hashmap[node.key]
+        self._used_nbytes -= len(node.value)
+        if node.reachable:
+            self._reachable_nbytes -= len(node.value)
+
+        parent = node.parent
+        if parent is not None:
+            parent.children.discard(node)
+            node.parent = None
+            if not parent.children:
+                # the parent becomes a leaf and competes with its
+                # last access
+                self._push_leaf(parent)
+        elif not node.reachable:
+            del self._orphans[node.key]
+            parent_key = self._parent_key(node.key)
+            # only blocks with a prefix can be orphans
+            assert parent_key is not None
+            waiting = self._waiting[parent_key]
+            waiting.discard(node)
+            if not waiting:
+                del self._waiting[parent_key]
@@ -18,6 +18,7 @@ from ... import envs
 from ...cache_hashable import KVCacheHashable
 from ...memory import MemoryRegion
 from ...status import Status, StatusCodes
+from ..admission_policy import BaseAdmissionPolicy
 from .base_eviction_policy import (
     BaseEvictionPolicy,
     BaseEvictionPolicyNode,
@@ -95,6 +96,7 @@ class S3FIFO(BaseEvictionPolicy[S3FIFONode]):
         on_put: Functor | None = None,
         on_evict: Functor | None = None,
         on_hot_access: Functor | None = None,
+        admission_policy: BaseAdmissionPolicy | None = None,
     ) -> None:
         super().__init__(
             name="S3FIFO",
@@ -102,6 +104,7 @@ class S3FIFO(BaseEvictionPolicy[S3FIFONode]):
             on_put=on_put,
             on_evict=on_evict,
             on_hot_access=on_hot_access,
+            admission_policy=admission_policy,
         )
 
         self._small_to_main_promo_threshold: int = (
@@ -190,6 +193,7 @@ class S3FIFO(BaseEvictionPolicy[S3FIFONode]):
         key: KVCacheHashable,
         value: MemoryRegion,
     ) -> Status:
+        self._record_access(key)
         if key in self._hashmap:
             node = self._hashmap[key]
 
@@ -219,6 +223,8 @@ class S3FIFO(BaseEvictionPolicy[S3FIFONode]):
                 node.value = value
                 queue.append(node)  # type: ignore
         else:
+            if not self._admit(key, value):
+                return Status(StatusCodes.DENIED)
             # New key always goes to small fifo
             node = S3FIFONode(key, value)
             self._hashmap[key] = node
@@ -246,6 +252,7 @@ class S3FIFO(BaseEvictionPolicy[S3FIFONode]):
             return Status(StatusCodes.NOT_FOUND)
 
         mr = node.value
+        self._record_access(key)
         # Invoke on_hot_access callback on the item that will be promoted
         # to main fifo
         if all(
@@ -301,6 +308,18 @@ class S3FIFO(BaseEvictionPolicy[S3FIFONode]):
             f"{total_in_list} != {len(self._hashmap)}"
         )
 
+    def _victim(self) -> KVCacheHashable | None:
+        # A new item enters the small fifo and pushes out its tail
+        node = self._small_fifo._tail or self._main_fifo._tail
+        return node.key if node is not None else None
+
+    def _spare(self, victim: KVCacheHashable) -> None:
+        node = self._hashmap[victim]
+        queue = node.queue
+        assert queue is not None
+        queue.erase(node)
+        queue.append(node)
+
     def _evict_one_from_small_fifo(self) -> None:
         node = self._small_fifo.pop()
         if node is None:
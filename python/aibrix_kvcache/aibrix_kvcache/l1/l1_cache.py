@@ -13,7 +13,8 @@
 # limitations under the License.
 
 import logging
-from typing import Iterator, Sequence, Tuple
+from contextlib import closing
+from typing import Generator, Iterable, Iterator, List, Sequence, Tuple
 
 import torch
 
@@ -25,7 +26,9 @@ from ..metrics import L1CacheMetrics, MeasurableBase, MetricRecorder
 from ..profiling import nvtx_range
 from ..spec import KVCacheBlockSpec
 from ..status import Status, StatusCodes
+from ..tracing import trace_section, trace_span
 from ..utils import cpu_perf_timer, human_readable_bytes
+from .admission_policy import BaseAdmissionPolicy
 from .eviction_policy import BaseEvictionPolicy, Functor
 
 logger = getLogger(__name__)
@@ -43,6 +46,8 @@ class L1Cache(MeasurableBase):
         on_hot_access: Functor | None = None,
         metrics: L1CacheMetrics | None = None,
         multi_threaded: bool = False,
+        admission_policy: str = "",
+        num_shards: int = 1,
     ) -> None:
         """Create a cache object.
         Args:
@@ -58,6 +63,13 @@ class L1Cache(MeasurableBase):
                                     cache item becomes hot. Defaults to None.
             metrics (L1CacheMetrics): The metrics of the cache.
             multi_threaded (bool): Whether to use multi-threaded kv cache.
+            admission_policy (str): The name of the admission policy, e.g.,
+                                    TINYLFU. Defaults to admitting every
+                                    block.
+            num_shards (int): The number of eviction policy shards. Blocks
+                              are partitioned by the hash of their keys and
+                              each shard is locked independently with its
+                              own slice of the capacity. Defaults to 1.
         """
         super().__init__(metrics)
         self.capacity_nbytes: int = capacity_nbytes
@@ -68,14 +80,44 @@ class L1Cache(MeasurableBase):
         self.block_ntokens: int = self.block_spec.block_ntokens
         self.block_nbytes: int = self.block_spec.block_nbytes
         self.block_shape_token_dim: int = self.block_spec.block_shape_token_dim
-        self._cond_lock = ConditionalLock(multi_threaded)
-
-        self._eviction_policy: BaseEvictionPolicy = BaseEvictionPolicy.create(
-            eviction_policy,
-            capacity_nbytes,
-            on_put=on_put,
-            on_evict=on_evict,
-            on_hot_access=on_hot_access,
+
+        assert num_shards >= 1, "num_shards must be positive"
+        # A radix tree needs the parent of a block in the same shard
+        assert num_shards == 1 or eviction_policy != "RADIX_LRU", (
+            "RADIX_LRU does not support multiple shards"
+        )
+        self.num_shards: int = num_shards
+        self._locks: List[ConditionalLock] = [
+            ConditionalLock(multi_threaded) for _ in range(num_shards)
+        ]
+        # Serializes evictions on allocation failures. With a single shard
+        # it is the lock of the shard.
+        self._cond_lock = (
+            self._locks[0]
+            if num_shards == 1
+            else ConditionalLock(multi_threaded)
+        )
+
+        self._eviction_policies: List[BaseEvictionPolicy] = []
+        for i in range(num_shards):
+            shard_capacity_nbytes = capacity_nbytes // num_shards + (
+                i < capacity_nbytes % num_shards
+            )
+            self._eviction_policies.append(
+                BaseEvictionPolicy.create(
+                    eviction_policy,
+                    shard_capacity_nbytes,
+                    on_put=on_put,
+                    on_evict=on_evict,
+                    on_hot_access=on_hot_access,
+                    admission_policy=BaseAdmissionPolicy.create(
+                        admission_policy,
+                        shard_capacity_nbytes // self.block_nbytes,
+                    ),
+                )
+            )
+        self._admission_policy: BaseAdmissionPolicy | None = (
+            self._eviction_policies[0].admission_policy
         )
 
         assert self.allocator.capacity_nbytes >= self.capacity_nbytes, (
@@ -87,11 +129,13 @@ class L1Cache(MeasurableBase):
 
     def __len__(self) -> int:
         """Return the usage of the cache in bytes."""
-        return len(self._eviction_policy)
+        return sum(len(policy) for policy in self._eviction_policies)
 
     def __repr__(self) -> str:
         return (
-            f"L1Cache(policy={self._eviction_policy.name}"
+            f"L1Cache(policy={self._eviction_policies[0].name}"
+            f", admission={self._admission_policy}"
+            f", shards={self.num_shards}"
             f", capacity_nbytes={human_readable_bytes(self.capacity_nbytes)}"
             f", size={human_readable_bytes(len(self))})"
         )
@@ -101,15 +145,18 @@ class L1Cache(MeasurableBase):
 
     def set_on_put_callback(self, functor: Functor) -> None:
         """Set the callback function to call when putting new items."""
-        self._eviction_policy.set_on_put_callback(functor)
+        for policy in self._eviction_policies:
+            policy.set_on_put_callback(functor)
 
     def set_on_evict_callback(self, on_evict: Functor) -> None:
         """Set the callback function to call when evicting items."""
-        self._eviction_policy.set_on_evict_callback(on_evict)
+        for policy in self._eviction_policies:
+            policy.set_on_evict_callback(on_evict)
 
     def set_on_hot_access_callback(self, on_hot_access: Functor) -> None:
         """Set the callback function to call when a cache item becomes hot."""
-        self._eviction_policy.set_on_hot_access_callback(on_hot_access)
+        for policy in self._eviction_policies:
+            policy.set_on_hot_access_callback(on_hot_access)
 
     def allocate(
         self,
@@ -130,24 +177,77 @@ class L1Cache(MeasurableBase):
                 )
                 self._recorder.trace_usage(  # type: ignore[attr-defined]
                     MetricRecorder.Resource.L1_EVICTION_POLICY,
-                    len(self._eviction_policy),
+                    len(self),
                 )
+                reachable_nbytes = self.reachable_nbytes
+                if reachable_nbytes is not None:
+                    self._recorder.trace_usage(  # type: ignore[attr-defined]
+                        MetricRecorder.Resource.L1_REACHABLE,
+                        reachable_nbytes,
+                    )
 
         total = sum(sizes)
 
         status = self.allocator.alloc(sizes)
         if status.is_out_of_memory():
             # Only acquire the lock if we need to re-allocate
-            with self._cond_lock:
+            with (
+                trace_section("L1Cache.evict", nbytes=total),
+                self._cond_lock,
+            ):
                 # Another thread might have freed memory, so we try to allocate
                 # again before starting to evict.
                 status = self.allocator.alloc(sizes)
                 while status.is_out_of_memory() and len(self) > 0:
-                    self._eviction_policy.evict(total)
+                    self._evict(total)
                     status = self.allocator.alloc(sizes)
 
         return Status(status)
 
+    @property
+    def reachable_nbytes(self) -> int | None:
+        """The usage reachable by prefix lookups, None if the eviction
+        policy does not track it.
+        """
+        if self._eviction_policies[0].reachable_nbytes is None:
+            return None
+        return sum(
+            policy.reachable_nbytes  # type: ignore[misc]
+            for policy in self._eviction_policies
+        )
+
+    def _evict(self, nbytes: int) -> None:
+        """Evict nbytes from the cache, evenly from all shards."""
+        shard_nbytes = -(-nbytes // self.num_shards)
+        for lock, policy in zip(self._locks, self._eviction_policies):
+            with lock:
+                policy.evict(shard_nbytes)
+
+    def _shard_walk(
+        self, keys: Iterable[KVCacheKey]
+    ) -> Generator[Tuple[KVCacheKey, BaseEvictionPolicy], None, None]:
+        """Walk through the keys along with the eviction policy shards
+        they belong to. The lock of the shard is held while the caller
+        processes a key, and it is only released when the walk moves on
+        to another shard, so that a prefix path only locks the shards it
+        touches, one at a time.
+        """
+        num_shards = self.num_shards
+        held = None
+        try:
+            for key in keys:
+                shard = hash(key) % num_shards if num_shards > 1 else 0
+                if shard != held:
+                    if held is not None:
+                        self._locks[held].release()
+                    self._locks[shard].acquire()
+                    held = shard
+                yield key, self._eviction_policies[shard]
+        finally:
+            if held is not None:
+                self._locks[held].release()
+
+    @trace_span("exists", "L1Cache")
     @nvtx_range("exists", "kv_cache_ol.L1Cache")
     @MeasurableBase.measure(MetricRecorder.OP.EXISTS)
     def exists(
@@ -168,15 +268,15 @@ class L1Cache(MeasurableBase):
             return Status(StatusCodes.INVALID)
 
         total = 0
-        with self._cond_lock:
-            for key in self._cache_block_keys(prefix, query):
-                cache_key = KVCacheKey(*key)
-                if cache_key in self._eviction_policy:
+        with closing(self._shard_walk(self._cache_keys(prefix, query))) as walk:
+            for cache_key, policy in walk:
+                if cache_key in policy:
                     total += 1
                 else:
                     break
         return Status.ok(total) if total > 0 else Status(StatusCodes.NOT_FOUND)
 
+    @trace_span("put", "L1Cache")
     @nvtx_range("put", "kv_cache_ol.L1Cache")
     @MeasurableBase.measure(MetricRecorder.OP.PUT)
     def put(
@@ -263,7 +363,9 @@ class L1Cache(MeasurableBase):
 
         sizes = [
             ManagedMemoryRegion.calculate_size(
-                self.block_nbytes, len(block_prefix) + len(block_query)
+                self.block_nbytes,
+                len(block_prefix) + len(block_query),
+                len(block_query),
             )
             for block_prefix, block_query in self._cache_block_keys(
                 prefix, query
@@ -362,24 +464,38 @@ class L1Cache(MeasurableBase):
         assert len(kv_mrs) == num_blocks
 
         bi = 0
-        with self._cond_lock:
-            for block_prefix, block_query in self._cache_block_keys(
-                prefix, query[: num_blocks * self.block_ntokens]
-            ):
-                if bi >= len(kv_mrs):
+        admitted = True
+        keys = self._cache_keys(
+            prefix, query[: num_blocks * self.block_ntokens]
+        )
+        with closing(self._shard_walk(keys)) as walk:
+            for i, (block_key, policy) in enumerate(walk):
+                if i >= len(kv_mrs):
                     break
-                block_mr = kv_mrs[bi]
+                block_mr = kv_mrs[i]
                 assert isinstance(block_mr, ManagedMemoryRegion)
                 if not MemoryRegion.use_compact_layout():
-                    block_mr.pack_tokens(prefix=block_prefix, query=block_query)
+                    block_mr.pack_tokens(
+                        prefix=block_key.prefix, query=block_key.query
+                    )
                 block_mr.seal()
-                block_key = KVCacheKey(block_prefix, block_query)
-                if not self._eviction_policy.put(block_key, block_mr).is_ok():
+                if not admitted:
+                    # Blocks following a rejected one are unreachable by
+                    # prefix lookups, only pass them through the callbacks
+                    # (e.g., to be ingested into L2Cache).
+                    policy.reject(block_key, block_mr)
+                    continue
+                status = policy.put(block_key, block_mr)
+                if status.is_denied():
+                    admitted = False
+                    continue
+                if not status.is_ok():
                     break
                 bi += 1
 
         return Status.ok(bi)
 
+    @trace_span("acquire", "L1Cache")
     @nvtx_range("acquire", "kv_cache_ol.L1Cache")
     @MeasurableBase.measure(MetricRecorder.OP.ACQUIRE)
     def acquire(
@@ -400,9 +516,9 @@ class L1Cache(MeasurableBase):
             return Status(StatusCodes.INVALID)
 
         mrs = []
-        with self._cond_lock:
-            for key in self._cache_block_keys(prefix, query):
-                status = self._eviction_policy.get(KVCacheKey(*key))
+        with closing(self._shard_walk(self._cache_keys(prefix, query))) as walk:
+            for cache_key, policy in walk:
+                status = policy.get(cache_key)
                 if status.is_ok():
                     mrs.append(status.value)
                 else:
@@ -425,11 +541,18 @@ class L1Cache(MeasurableBase):
         if prefix is not None and len(prefix) % self.block_ntokens != 0:
             return Status(StatusCodes.INVALID)
 
-        with self._cond_lock:
-            for key in self._cache_block_keys(prefix, query):
-                self._eviction_policy.delete(KVCacheKey(*key))
+        with closing(self._shard_walk(self._cache_keys(prefix, query))) as walk:
+            for cache_key, policy in walk:
+                policy.delete(cache_key)
         return Status.ok()
 
+    def _cache_keys(
+        self, prefix: KVCacheKeyTypes | None, query: KVCacheKeyTypes
+    ) -> Iterator[KVCacheKey]:
+        """Get the cache keys of the blocks of the kv tensors."""
+        for key in self._cache_block_keys(prefix, query):
+            yield KVCacheKey(*key)
+
     def _cache_block_keys(
         self, prefix: KVCacheKeyTypes | None, query: KVCacheKeyTypes
     ) -> Iterator[Tuple[KVCacheKeyTypes, KVCacheKeyTypes]]:
@@ -15,10 +15,12 @@
 from .key_builders import KeyBuilder
 from .l2_cache import L2Cache
 from .marshallers import StringSerializer, TensorSerializer, ZstdCompressor
+from .write_back_queue import L2WriteBackQueue
 
 __all__ = [
     "KeyBuilder",
     "L2Cache",
+    "L2WriteBackQueue",
     "StringSerializer",
     "TensorSerializer",
     "ZstdCompressor",
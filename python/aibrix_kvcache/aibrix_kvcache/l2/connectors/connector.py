@@ -15,11 +15,12 @@
 from abc import ABC, abstractmethod
 from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Any, Generic, List, Sequence, Tuple, TypeVar
+from typing import Any, Generic, Iterator, List, Sequence, Tuple, TypeVar
 
 import torch
 
 from ...memory import MemoryRegion
+from ...metrics import L2CacheMetrics
 from ...status import Status
 
 K = TypeVar("K")
@@ -36,6 +37,10 @@ class ConnectorFeature:
         gdr_put: Whether the kv cache connector supports GDR put.
         gdr_get: Whether the kv cache connector supports GDR get.
         zero_copy: Whether the kv cache connector supports zero copy.
+        compression: Whether the kv cache connector supports compressed
+            values, i.e., it stores values of any size and a get fills a
+            prefix of the MR and sets the MR's length to the value's size.
+        scan_keys: Whether the kv cache connector supports scanning all keys.
     """
 
     mput_mget: bool = False
@@ -44,6 +49,8 @@ class ConnectorFeature:
     gdr_put: bool = False
     gdr_get: bool = False
     zero_copy: bool = False
+    compression: bool = False
+    scan_keys: bool = False
 
 
 @dataclass
@@ -134,6 +141,10 @@ class Connector(Generic[K, V]):
             from .shfs import SHFSConnector
 
             return SHFSConnector.from_envs(conn_id, executor, **kwargs)
+        elif backend_name == "SEGMENT_LOG":
+            from .segment_log import SegmentLogConnector
+
+            return SegmentLogConnector.from_envs(conn_id, executor, **kwargs)
         else:
             raise ValueError(f"Unknown connector type: {backend_name}")
 
@@ -167,6 +178,14 @@ class Connector(Generic[K, V]):
         """Close a connection."""
         raise NotImplementedError
 
+    def set_metrics(self, metrics: L2CacheMetrics) -> None:
+        """Set the metrics recorder to report backend-specific metrics, e.g.,
+        usage and evictions.
+        Args:
+            metrics: The metrics recorder.
+        """
+        pass
+
     async def prefetch(self, keys: Sequence[K]) -> None:
         """Prefetch a list of keys.
         Args:
@@ -266,6 +285,16 @@ class Connector(Generic[K, V]):
         """
         raise NotImplementedError
 
+    def scan_keys(self) -> Iterator[K]:
+        """Scan all keys in the store. This function is optional and only
+        connectors have scan_keys feature enabled can implement this function.
+        It is blocking and keys put or deleted during the scan may or may not
+        be returned.
+        Returns:
+            Iterator of keys.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def delete(self, key: K) -> Status:
         """Delete a key.
@@ -15,7 +15,7 @@
 from concurrent.futures import Executor
 from dataclasses import dataclass
 from threading import Lock
-from typing import Any, Dict, List, Sequence, Tuple
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
 
 import torch
 
@@ -33,6 +33,7 @@ class MockConfig:
     use_gdr_put: bool = False
     use_gdr_get: bool = False
     use_noop: bool = False
+    use_compression: bool = False
 
 
 @dataclass
@@ -68,6 +69,7 @@ class MockConnector(Connector[bytes, torch.Tensor], AsyncBase):
             use_gdr_get=envs.AIBRIX_KV_CACHE_OL_MOCK_USE_GDR_GET,
             use_gdr_put=envs.AIBRIX_KV_CACHE_OL_MOCK_USE_GDR_PUT,
             use_noop=envs.AIBRIX_KV_CACHE_OL_MOCK_USE_NOOP,
+            use_compression=envs.AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION,
         )
         return cls(config, executor)
 
@@ -77,7 +79,7 @@ class MockConnector(Connector[bytes, torch.Tensor], AsyncBase):
 
     @property
     def feature(self) -> ConnectorFeature:
-        feature = ConnectorFeature()
+        feature = ConnectorFeature(scan_keys=True)
         if self.config.use_mput_mget:
             feature.mput_mget = True
         if self.config.use_rdma:
@@ -86,6 +88,8 @@ class MockConnector(Connector[bytes, torch.Tensor], AsyncBase):
             feature.gdr_get = True
         if self.config.use_gdr_put:
             feature.gdr_put = True
+        if self.config.use_compression:
+            feature.compression = True
         return feature
 
     def __del__(self) -> None:
@@ -209,6 +213,12 @@ class MockConnector(Connector[bytes, torch.Tensor], AsyncBase):
                 return Status.ok()
         return Status(StatusCodes.NOT_FOUND)
 
+    def scan_keys(self) -> Iterator[bytes]:
+        assert self.store is not None
+        with self.lock:
+            keys = list(self.store.keys())
+        return iter(keys)
+
     @Status.capture_exception
     def _get(
         self,
@@ -252,6 +262,9 @@ class MockConnector(Connector[bytes, torch.Tensor], AsyncBase):
             mr.fill(b"".join(val))
         else:
             assert isinstance(val, bytes)
+            if self.config.use_compression:
+                assert len(val) <= mr.capacity
+                mr.length = len(val)
             mr.fill(val)
         return Status.ok()
 
@@ -14,6 +14,7 @@
 
 import os
 from concurrent.futures import Executor
+from typing import Iterator
 
 import rocksdict
 import torch
@@ -86,7 +87,7 @@ class RocksDBConnector(Connector[bytes, torch.Tensor], AsyncBase):
 
     @property
     def feature(self) -> ConnectorFeature:
-        return ConnectorFeature()
+        return ConnectorFeature(compression=True, scan_keys=True)
 
     def __del__(self) -> None:
         self.close()
@@ -117,6 +118,11 @@ class RocksDBConnector(Connector[bytes, torch.Tensor], AsyncBase):
             return Status.ok()
         return Status(StatusCodes.NOT_FOUND)
 
+    def scan_keys(self) -> Iterator[bytes]:
+        assert self.store is not None
+        # the iterator reads from an implicit snapshot of the db
+        return iter(self.store.keys())  # type: ignore[arg-type]
+
     @Status.capture_exception
     def _get(self, key: bytes, mr: MemoryRegion) -> Status:
         """Get a value."""
@@ -124,6 +130,12 @@ class RocksDBConnector(Connector[bytes, torch.Tensor], AsyncBase):
         val = self.store.get(key)
         if val is None:
             return Status(StatusCodes.NOT_FOUND)
+        if len(val) > mr.capacity:
+            return Status(
+                StatusCodes.ERROR,
+                f"Value size mismatch: {len(val)} > {mr.capacity}",
+            )
+        mr.length = len(val)
         mr.fill(val)
         return Status.ok()
 
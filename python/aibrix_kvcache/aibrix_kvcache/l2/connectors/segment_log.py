@@ -0,0 +1,652 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import torch
+from farmhash import FarmHash64
+
+from ... import envs
+from ...common import AsyncBase
+from ...common.absl_logging import getLogger
+from ...memory import MemoryRegion
+from ...metrics import L2CacheMetrics, MetricRecorder
+from ...status import Status, StatusCodes
+from ...utils import round_up
+from . import Connector, ConnectorFeature
+
+logger = getLogger(__name__)
+
+# Record header: magic, key length, value length
+RECORD_HEADER = struct.Struct("<IIQ")
+RECORD_MAGIC_FIELD = struct.Struct("<I")
+RECORD_MAGIC = 0x4B56534C
+# A tombstone record carries the key of a deleted record and no value
+TOMBSTONE_MAGIC = 0x4B565344
+# A reserved record has its lengths written but is not committed yet. Its
+# magic is flipped to RECORD_MAGIC or TOMBSTONE_MAGIC once the record is
+# copied, and recovery skips it if that never happens.
+RESERVED_MAGIC = 0x4B565352
+RECORD_ALIGNMENT = 64
+# A location packs the segment id and the record offset
+LOC_OFFSET_BITS = 40
+LOC_OFFSET_MASK = (1 << LOC_OFFSET_BITS) - 1
+
+
+class SegmentIndex:
+    """Open-addressing hash table that maps 64-bit key hashes to record
+    locations. Hashes and locations live in two flat uint64 arrays and
+    collisions are resolved by linear probing.
+    """
+
+    EMPTY = 0
+    TOMBSTONE = 1
+    MAX_LOAD_FACTOR = 0.7
+
+    def __init__(self, capacity: int = 1024):
+        assert capacity & (capacity - 1) == 0, "capacity must be power of 2"
+        self._hashes = array("Q", bytes(8 * capacity))
+        self._locs = array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._size = 0
+        # Number of non-empty slots, including tombstones
+        self._used = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def hash(key: bytes) -> int:
+        h = FarmHash64(key)
+        # reserve EMPTY and TOMBSTONE
+        return h if h > SegmentIndex.TOMBSTONE else h + 2
+
+    def _find(self, h: int) -> int:
+        hashes, mask = self._hashes, self._mask
+        i = h & mask
+        while True:
+            v = hashes[i]
+            if v == h:
+                return i
+            if v == self.EMPTY:
+                return -1
+            i = (i + 1) & mask
+
+    def get(self, h: int) -> int:
+        """Get the location of the given hash, or -1 if absent."""
+        i = self._find(h)
+        return -1 if i < 0 else self._locs[i]
+
+    def put(self, h: int, loc: int) -> None:
+        i = self._find(h)
+        if i >= 0:
+            self._locs[i] = loc
+            return
+
+        if self._used + 1 > (self._mask + 1) * self.MAX_LOAD_FACTOR:
+            self._rehash()
+
+        hashes, mask = self._hashes, self._mask
+        i = h & mask
+        while hashes[i] > self.TOMBSTONE:
+            i = (i + 1) & mask
+        if hashes[i] == self.EMPTY:
+            self._used += 1
+        hashes[i] = h
+        self._locs[i] = loc
+        self._size += 1
+
+    def remove(self, h: int) -> int:
+        """Remove the given hash and return its location, or -1 if absent."""
+        i = self._find(h)
+        if i < 0:
+            return -1
+        self._hashes[i] = self.TOMBSTONE
+        self._size -= 1
+        return self._locs[i]
+
+    def remove_segment(self, segment_id: int) -> int:
+        """Remove all entries of a segment.
+
+        Returns:
+            The number of removed entries.
+        """
+        hashes = np.frombuffer(self._hashes, dtype=np.uint64)
+        locs = np.frombuffer(self._locs, dtype=np.uint64)
+        mask = (hashes > self.TOMBSTONE) & (
+            (locs >> np.uint64(LOC_OFFSET_BITS)) == segment_id
+        )
+        num_removed = int(np.count_nonzero(mask))
+        hashes[mask] = self.TOMBSTONE
+        self._size -= num_removed
+        del hashes, locs
+        return num_removed
+
+    def _rehash(self) -> None:
+        capacity = self._mask + 1
+        if self._size + 1 > capacity * self.MAX_LOAD_FACTOR / 2:
+            capacity *= 2
+        old_hashes, old_locs = self._hashes, self._locs
+        self._hashes = array("Q", bytes(8 * capacity))
+        self._locs = array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._size = 0
+        self._used = 0
+        for h, loc in zip(old_hashes, old_locs):
+            if h > self.TOMBSTONE:
+                self.put(h, loc)
+
+
+class Segment:
+    """A preallocated, memory-mapped segment file."""
+
+    def __init__(self, segment_id: int, path: Path, nbytes: int):
+        self.segment_id = segment_id
+        self.path = path
+        self.nbytes = nbytes
+        # Append offset
+        self.write_offset = 0
+        self.num_records = 0
+        # Number of in-flight reads and writes
+        self.pins = 0
+        self.evicted = False
+
+        exists = path.exists()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not exists or os.fstat(self._fd).st_size != nbytes:
+            os.ftruncate(self._fd, nbytes)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self._fd, 0, nbytes)
+        self._mm = mmap.mmap(self._fd, nbytes)
+        self.buf = np.frombuffer(self._mm, dtype=np.uint8)
+
+    def close(self, unlink: bool = False) -> None:
+        del self.buf
+        self._mm.close()
+        os.close(self._fd)
+        if unlink:
+            self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class SegmentLogConfig:
+    """Segment log config.
+    Args:
+        segment_nbytes: The size of a segment file.
+        max_segments: The maximum number of segment files. Once exceeded,
+            the oldest segment is evicted as a whole.
+    """
+
+    segment_nbytes: int = 256 * 1024 * 1024
+    max_segments: int = 64
+
+    def __post_init__(self):
+        if self.max_segments < 2:
+            raise ValueError("max_segments must be at least 2")
+        if self.segment_nbytes > LOC_OFFSET_MASK:
+            raise ValueError(f"segment_nbytes must be <= {LOC_OFFSET_MASK}")
+
+
+@AsyncBase.async_wrap(
+    exists="_exists",
+    get="_get",
+    put="_put",
+    delete="_delete",
+    mget="_mget",
+    mput="_mput",
+)
+class SegmentLogConnector(Connector[bytes, torch.Tensor], AsyncBase):
+    """Segment log connector for KVCache L2 storage.
+
+    This connector appends KVCache blocks to large preallocated segment
+    files and keeps an in-memory index from key hashes to record locations.
+    Each record carries its key, which is validated on reads to rule out
+    hash collisions. Reads and writes copy data directly between the
+    memory-mapped segments and MRs. Deletes append tombstone records. Space
+    is reclaimed by evicting the oldest segment as a whole, and the index
+    is rebuilt from the segment files on `open()`.
+    """
+
+    def __init__(
+        self,
+        root_path: str,
+        executor: Executor,
+        config: SegmentLogConfig | None = None,
+    ):
+        super().__init__(executor)
+        self.root_path = Path(root_path)
+        self.config = config or SegmentLogConfig()
+        self._lock = threading.Lock()
+        self._index = SegmentIndex()
+        self._segments: OrderedDict[int, Segment] = OrderedDict()
+        self._active: Segment | None = None
+        self._metrics: L2CacheMetrics | None = None
+        self.num_evicted_segments = 0
+
+    @classmethod
+    def from_envs(
+        cls, conn_id: str, executor: Executor, **kwargs
+    ) -> "SegmentLogConnector":
+        """Create a connector from environment variables."""
+        root = envs.AIBRIX_KV_CACHE_OL_SEGMENT_LOG_ROOT
+        full_path = os.path.join(os.path.expanduser(root), conn_id)
+        segment_nbytes = envs.AIBRIX_KV_CACHE_OL_SEGMENT_LOG_SEGMENT_SIZE_MB
+        segment_nbytes *= 1024 * 1024
+        capacity_nbytes = int(
+            envs.AIBRIX_KV_CACHE_OL_SEGMENT_LOG_CAPACITY_GB * 1024**3
+        )
+        config = SegmentLogConfig(
+            segment_nbytes=segment_nbytes,
+            max_segments=max(2, capacity_nbytes // segment_nbytes),
+        )
+        return cls(full_path, executor, config)
+
+    @property
+    def name(self) -> str:
+        return "SegmentLog"
+
+    @property
+    def feature(self) -> ConnectorFeature:
+        return ConnectorFeature(mput_mget=True, compression=True)
+
+    @property
+    def num_objs(self) -> int:
+        return len(self._index)
+
+    def set_metrics(self, metrics: L2CacheMetrics) -> None:
+        self._metrics = metrics
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.root_path / f"{segment_id:08d}.seg"
+
+    @Status.capture_exception
+    def open(self) -> Status:
+        """Open the store and rebuild the index from the segment files."""
+        if self._active is not None:
+            return Status.ok()
+        self.root_path.mkdir(parents=True, exist_ok=True)
+        segment_ids = sorted(
+            int(p.stem)
+            for p in self.root_path.glob("*.seg")
+            if p.stem.isdigit()
+        )
+        with self._lock:
+            for segment_id in segment_ids:
+                segment = Segment(
+                    segment_id,
+                    self._segment_path(segment_id),
+                    self.config.segment_nbytes,
+                )
+                self._segments[segment_id] = segment
+                self._recover_segment(segment)
+                self._active = segment
+            self._evict_segments()
+            # always append to a new segment
+            self._roll_segment()
+        logger.info(
+            f"SegmentLog opened: {len(self._segments) - 1} segments and "
+            f"{len(self._index)} records recovered"
+        )
+        return Status.ok()
+
+    @Status.capture_exception
+    def close(self) -> Status:
+        """Close the store."""
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+            self._active = None
+            self._index = SegmentIndex()
+        return Status.ok()
+
+    def _recover_segment(self, segment: Segment) -> None:
+        """Index the records of a segment. Caller must hold the lock."""
+        buf = segment.buf
+        offset = 0
+        while offset + RECORD_HEADER.size <= segment.nbytes:
+            magic, key_len, value_len = RECORD_HEADER.unpack_from(
+                buf.data, offset
+            )
+            record_nbytes = self._record_nbytes(key_len, value_len)
+            if (
+                magic not in (RECORD_MAGIC, TOMBSTONE_MAGIC, RESERVED_MAGIC)
+                or offset + record_nbytes > segment.nbytes
+            ):
+                break
+            if magic == RESERVED_MAGIC:
+                # a failed or interrupted write, later records may have
+                # been committed
+                offset += record_nbytes
+                continue
+            key_offset = offset + RECORD_HEADER.size
+            key = buf[key_offset : key_offset + key_len].tobytes()
+            if magic == TOMBSTONE_MAGIC:
+                # segments are replayed in order, so the tombstone follows
+                # the record it deletes
+                self._index.remove(SegmentIndex.hash(key))
+            else:
+                self._index.put(
+                    SegmentIndex.hash(key),
+                    (segment.segment_id << LOC_OFFSET_BITS) | offset,
+                )
+                segment.num_records += 1
+            offset += record_nbytes
+        segment.write_offset = offset
+
+    @staticmethod
+    def _record_nbytes(key_len: int, value_len: int) -> int:
+        return round_up(
+            RECORD_HEADER.size + key_len + value_len, RECORD_ALIGNMENT
+        )
+
+    def _roll_segment(self) -> None:
+        """Open a new active segment. Caller must hold the lock."""
+        segment_id = 0
+        if len(self._segments) > 0:
+            segment_id = next(reversed(self._segments)) + 1
+        segment = Segment(
+            segment_id,
+            self._segment_path(segment_id),
+            self.config.segment_nbytes,
+        )
+        self._segments[segment_id] = segment
+        self._active = segment
+        self._evict_segments()
+
+    def _evict_segments(self) -> None:
+        """Evict the oldest segments that exceed the limit. Caller must hold
+        the lock.
+        """
+        num_evicted_objs = 0
+        evicted_nbytes = 0
+        while len(self._segments) > self.config.max_segments:
+            _, segment = self._segments.popitem(last=False)
+            num_evicted_objs += self._index.remove_segment(segment.segment_id)
+            evicted_nbytes += segment.write_offset
+            segment.evicted = True
+            if segment.pins == 0:
+                segment.close(unlink=True)
+            self.num_evicted_segments += 1
+
+        if self._metrics is not None:
+            self._metrics.trace_usage(
+                MetricRecorder.Resource.L2_BACKEND,
+                len(self._segments) * self.config.segment_nbytes,
+                self.config.max_segments * self.config.segment_nbytes,
+            )
+            self._metrics.trace_eviction(
+                MetricRecorder.Resource.L2_BACKEND,
+                len(self._index),
+                num_evicted_objs,
+                evicted_nbytes,
+            )
+
+    def _unpin(self, segment: Segment) -> None:
+        """Caller must hold the lock."""
+        segment.pins -= 1
+        if segment.evicted and segment.pins == 0:
+            segment.close(unlink=True)
+
+    def _pin_for_read(self, key: bytes) -> Tuple[Segment, int] | None:
+        """Pin the segment holding the key. Caller must hold the lock."""
+        loc = self._index.get(SegmentIndex.hash(key))
+        if loc < 0:
+            return None
+        segment = self._segments[loc >> LOC_OFFSET_BITS]
+        segment.pins += 1
+        return segment, loc & LOC_OFFSET_MASK
+
+    def _pin_for_write(
+        self, key_len: int, value_len: int
+    ) -> Tuple[Segment, int]:
+        """Reserve space in the active segment and pin it. Caller must hold
+        the lock.
+
+        The reserved record header is written right away, so that recovery
+        can skip the record by its lengths if it is never committed.
+        """
+        assert self._active is not None, "SegmentLog is not opened"
+        record_nbytes = self._record_nbytes(key_len, value_len)
+        if self._active.write_offset + record_nbytes > self._active.nbytes:
+            self._roll_segment()
+        segment = self._active
+        assert segment is not None
+        offset = segment.write_offset
+        RECORD_HEADER.pack_into(
+            segment.buf.data, offset, RESERVED_MAGIC, key_len, value_len
+        )
+        segment.write_offset += record_nbytes
+        segment.pins += 1
+        return segment, offset
+
+    @staticmethod
+    def _mr_view(mr: MemoryRegion) -> np.ndarray:
+        return mr.slab[mr.addr : mr.addr + mr.length].numpy()
+
+    @staticmethod
+    def _single_mr(
+        mr: MemoryRegion | Sequence[MemoryRegion],
+    ) -> MemoryRegion:
+        if isinstance(mr, Sequence):
+            if len(mr) != 1:
+                raise ValueError(
+                    f"Sequence MR with {len(mr)} elements unsupported"
+                )
+            return mr[0]
+        return mr
+
+    def _read_record(
+        self, segment: Segment, offset: int, key: bytes, mr: MemoryRegion
+    ) -> Status:
+        buf = segment.buf
+        magic, key_len, value_len = RECORD_HEADER.unpack_from(buf.data, offset)
+        key_offset = offset + RECORD_HEADER.size
+        value_offset = key_offset + key_len
+        if (
+            magic != RECORD_MAGIC
+            or key_len != len(key)
+            or buf[key_offset:value_offset].tobytes() != key
+        ):
+            # hash collision
+            return Status(StatusCodes.NOT_FOUND)
+        if value_len > mr.capacity:
+            return Status(
+                StatusCodes.ERROR,
+                f"Value size mismatch: {value_len} > {mr.capacity}",
+            )
+        mr.length = value_len
+        np.copyto(
+            self._mr_view(mr), buf[value_offset : value_offset + value_len]
+        )
+        return Status.ok()
+
+    def _write_record(
+        self, segment: Segment, offset: int, key: bytes, mr: MemoryRegion
+    ) -> None:
+        buf = segment.buf
+        key_offset = offset + RECORD_HEADER.size
+        value_offset = key_offset + len(key)
+        buf[key_offset:value_offset] = np.frombuffer(key, dtype=np.uint8)
+        np.copyto(
+            buf[value_offset : value_offset + mr.length], self._mr_view(mr)
+        )
+        # the magic commits the record
+        RECORD_MAGIC_FIELD.pack_into(buf.data, offset, RECORD_MAGIC)
+
+    def _write_tombstone(
+        self, segment: Segment, offset: int, key: bytes
+    ) -> None:
+        buf = segment.buf
+        key_offset = offset + RECORD_HEADER.size
+        buf[key_offset : key_offset + len(key)] = np.frombuffer(
+            key, dtype=np.uint8
+        )
+        RECORD_MAGIC_FIELD.pack_into(buf.data, offset, TOMBSTONE_MAGIC)
+
+    @Status.capture_exception
+    def _exists(self, key: bytes) -> Status:
+        """Check if key is in the store."""
+        with self._lock:
+            if self._index.get(SegmentIndex.hash(key)) >= 0:
+                return Status.ok()
+        return Status(StatusCodes.NOT_FOUND)
+
+    @Status.capture_exception
+    def _get(
+        self, key: bytes, mr: MemoryRegion | Sequence[MemoryRegion]
+    ) -> Status:
+        """Get a value."""
+        return self._mget([key], [mr])[0]
+
+    @Status.capture_exception
+    def _put(
+        self, key: bytes, mr: MemoryRegion | Sequence[MemoryRegion]
+    ) -> Status:
+        """Put a key value pair."""
+        return self._mput([key], [mr])[0]
+
+    @Status.capture_exception
+    def _delete(self, key: bytes) -> Status:
+        """Delete a key and append a tombstone, so that the key is not
+        recovered on `open()`. The space is reclaimed when its segment is
+        evicted.
+        """
+        with self._lock:
+            if self._index.remove(SegmentIndex.hash(key)) < 0:
+                return Status(StatusCodes.NOT_FOUND)
+            segment, offset = self._pin_for_write(len(key), 0)
+        try:
+            self._write_tombstone(segment, offset, key)
+        finally:
+            with self._lock:
+                self._unpin(segment)
+        return Status.ok()
+
+    def get_batches(
+        self,
+        keys: Sequence[bytes],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+        batch_size: int,
+    ) -> Sequence[
+        Sequence[Tuple[bytes, MemoryRegion | Sequence[MemoryRegion]]]
+    ]:
+        lists: List[
+            List[Tuple[bytes, MemoryRegion | Sequence[MemoryRegion]]]
+        ] = []
+        for key, mr in zip(keys, mrs):
+            if len(lists) == 0 or len(lists[-1]) >= batch_size:
+                lists.append([(key, mr)])
+            else:
+                lists[-1].append((key, mr))
+        return lists
+
+    def _mget(
+        self,
+        keys: Sequence[bytes],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+    ) -> Sequence[Status]:
+        """MGet a list of values. Looks up all keys with one lock
+        acquisition and then copies the values without holding the lock.
+        """
+        with self._lock:
+            pinned = [self._pin_for_read(key) for key in keys]
+
+        statuses: List[Status] = []
+        try:
+            for key, mr, pin in zip(keys, mrs, pinned):
+                if pin is None:
+                    statuses.append(Status(StatusCodes.NOT_FOUND))
+                    continue
+                try:
+                    statuses.append(
+                        self._read_record(*pin, key, self._single_mr(mr))
+                    )
+                except Exception as e:
+                    statuses.append(Status(StatusCodes.ERROR, e))
+        finally:
+            with self._lock:
+                for pin in pinned:
+                    if pin is not None:
+                        self._unpin(pin[0])
+        return statuses
+
+    def _mput(
+        self,
+        keys: Sequence[bytes],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+    ) -> Sequence[Status]:
+        """MPut a list of key value pairs. Reserves space for all records
+        with one lock acquisition, copies the values without holding the
+        lock, and then publishes them in the index.
+        """
+        single_mrs = [self._single_mr(mr) for mr in mrs]
+        records_nbytes = [
+            self._record_nbytes(len(key), mr.length)
+            for key, mr in zip(keys, single_mrs)
+        ]
+        if max(records_nbytes, default=0) > self.config.segment_nbytes:
+            return [
+                Status(
+                    StatusCodes.INVALID,
+                    f"Record of {nbytes} bytes does not fit in a segment",
+                )
+                for nbytes in records_nbytes
+            ]
+
+        with self._lock:
+            pinned = [
+                self._pin_for_write(len(key), mr.length)
+                for key, mr in zip(keys, single_mrs)
+            ]
+
+        statuses: List[Status] = []
+        for key, mr, (segment, offset) in zip(keys, single_mrs, pinned):
+            try:
+                self._write_record(segment, offset, key, mr)
+                statuses.append(Status.ok())
+            except Exception as e:
+                statuses.append(Status(StatusCodes.ERROR, e))
+
+        with self._lock:
+            for key, status, (segment, offset) in zip(keys, statuses, pinned):
+                if status.is_ok() and not segment.evicted:
+                    self._index.put(
+                        SegmentIndex.hash(key),
+                        (segment.segment_id << LOC_OFFSET_BITS) | offset,
+                    )
+                    segment.num_records += 1
+                self._unpin(segment)
+        return statuses
+
+    def register_slabs(self, slabs: List[torch.Tensor]) -> Status:
+        """Register slabs with backend-specific register function.
+
+        Segment log copies data between the mapped segments and the slabs
+        directly, so no registration is needed.
+        """
+        return Status.ok()
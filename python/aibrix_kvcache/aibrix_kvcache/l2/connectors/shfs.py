@@ -12,10 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import os
+import threading
+import time
+from collections import OrderedDict
 from concurrent.futures import Executor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Sequence
+from typing import List, Sequence, Tuple
 
 import torch
 
@@ -23,6 +28,7 @@ from ... import envs
 from ...common import AsyncBase
 from ...common.absl_logging import getLogger
 from ...memory import MemoryRegion
+from ...metrics import L2CacheMetrics, MetricRecorder
 from ...status import Status, StatusCodes
 from ...utils import ensure_dir_exist
 from . import Connector, ConnectorFeature
@@ -30,6 +36,37 @@ from . import Connector, ConnectorFeature
 logger = getLogger(__name__)
 
 
+@dataclass
+class SHFSConfig:
+    """SHFS config.
+    Args:
+        fsync: Whether to fsync each block file before publishing it.
+        capacity_nbytes: The capacity in bytes, 0 means unlimited.
+        max_files: The maximum number of block files, 0 means unlimited.
+        eviction_policy: "LRU" or "TTL".
+        ttl_s: Block files idle (LRU) or older (TTL) than this are evicted,
+            0 disables expiration.
+        eviction_interval_s: The interval of the eviction thread.
+    """
+
+    fsync: bool = False
+    capacity_nbytes: int = 0
+    max_files: int = 0
+    eviction_policy: str = "LRU"
+    ttl_s: int = 0
+    eviction_interval_s: float = 1.0
+
+    def __post_init__(self):
+        if self.eviction_policy not in ("LRU", "TTL"):
+            raise ValueError(
+                f"Unknown SHFS eviction policy: {self.eviction_policy}"
+            )
+
+    @property
+    def eviction_enabled(self) -> bool:
+        return self.capacity_nbytes > 0 or self.max_files > 0 or self.ttl_s > 0
+
+
 @AsyncBase.async_wrap(
     exists="_exists", get="_get", put="_put", delete="_delete"
 )
@@ -39,16 +76,38 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
     This connector stores KVCache blocks as files in a shared file system.
     All prefiller and decoder vllm engines can access the same shared
     directory to store and retrieve KVCache blocks.
+
+    If capacity limits or a TTL are configured, a background thread evicts
+    block files in LRU or TTL order. It tracks the block files in an
+    in-memory index, which is lazily rebuilt from the directory after
+    `open()` and then kept up to date by the ops of this connector. Hence,
+    files written by other engines only count once they are accessed
+    through this connector or after a restart.
     """
 
+    # Once a limit is exceeded, evict until usage drops below this ratio
+    EVICTION_LOW_WATERMARK = 0.9
+
     def __init__(
         self,
         root_path: str,
         executor: Executor,
+        config: SHFSConfig | None = None,
     ):
         super().__init__(executor)
         self.root_path = Path(root_path)
+        self.config = config or SHFSConfig()
         self.conn_id: str | None = None  # Will be set in from_envs
+        self._metrics: L2CacheMetrics | None = None
+
+        # Block file index in eviction order, i.e., key -> (nbytes, ts)
+        self._index: OrderedDict[bytes, Tuple[int, float]] = OrderedDict()
+        self._index_lock = threading.Lock()
+        self._used_nbytes = 0
+        self.num_evicted_files = 0
+        self._eviction_thread: threading.Thread | None = None
+        self._eviction_event = threading.Event()
+        self._stop_event = threading.Event()
 
     @classmethod
     def from_envs(
@@ -60,7 +119,19 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         # Create full path: root/conn_id
         full_path = os.path.join(os.path.expanduser(root), conn_id)
 
-        instance = cls(full_path, executor)
+        config = SHFSConfig(
+            fsync=envs.AIBRIX_KV_CACHE_OL_SHFS_FSYNC,
+            capacity_nbytes=int(
+                envs.AIBRIX_KV_CACHE_OL_SHFS_CAPACITY_GB * 1024**3
+            ),
+            max_files=envs.AIBRIX_KV_CACHE_OL_SHFS_MAX_FILES,
+            eviction_policy=envs.AIBRIX_KV_CACHE_OL_SHFS_EVICTION_POLICY,
+            ttl_s=envs.AIBRIX_KV_CACHE_OL_SHFS_TTL_S,
+            eviction_interval_s=(
+                envs.AIBRIX_KV_CACHE_OL_SHFS_EVICTION_INTERVAL_MS / 1000
+            ),
+        )
+        instance = cls(full_path, executor, config)
         instance.conn_id = conn_id
         return instance
 
@@ -74,6 +145,17 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         feature = ConnectorFeature(mput_mget=True)
         return feature
 
+    @property
+    def used_nbytes(self) -> int:
+        return self._used_nbytes
+
+    @property
+    def num_files(self) -> int:
+        return len(self._index)
+
+    def set_metrics(self, metrics: L2CacheMetrics) -> None:
+        self._metrics = metrics
+
     def __del__(self) -> None:
         self.close()
 
@@ -104,6 +186,14 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         """Open a connection by ensuring the root directory exists."""
         try:
             ensure_dir_exist(str(self.root_path))
+            if self.config.eviction_enabled and self._eviction_thread is None:
+                self._stop_event.clear()
+                self._eviction_thread = threading.Thread(
+                    target=self._eviction_loop,
+                    daemon=True,
+                    name="SHFSEvictionThread",
+                )
+                self._eviction_thread.start()
             return Status.ok()
         except Exception as e:
             logger.error(f"SHFS open() failed: {e}")
@@ -114,8 +204,155 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
     @Status.capture_exception
     def close(self) -> Status:
         """Close a connection."""
+        if self._eviction_thread is not None:
+            self._stop_event.set()
+            self._eviction_event.set()
+            self._eviction_thread.join()
+            self._eviction_thread = None
         return Status.ok()
 
+    def _over_limits(self, ratio: float = 1.0) -> bool:
+        """Whether the usage exceeds ratio of the limits. Caller must hold
+        the index lock.
+        """
+        capacity_nbytes = self.config.capacity_nbytes
+        max_files = self.config.max_files
+        return (
+            capacity_nbytes > 0 and self._used_nbytes > capacity_nbytes * ratio
+        ) or (max_files > 0 and len(self._index) > max_files * ratio)
+
+    def _index_put(self, key: bytes, nbytes: int, ts: float) -> None:
+        """Insert or refresh an index entry. Caller must hold the index
+        lock.
+        """
+        old = self._index.pop(key, None)
+        if old is not None:
+            self._used_nbytes -= old[0]
+        self._index[key] = (nbytes, ts)
+        self._used_nbytes += nbytes
+
+    def _index_remove(self, key: bytes) -> None:
+        """Remove an index entry. Caller must hold the index lock."""
+        old = self._index.pop(key, None)
+        if old is not None:
+            self._used_nbytes -= old[0]
+
+    def _on_put(self, key: bytes, nbytes: int) -> None:
+        if not self.config.eviction_enabled:
+            return
+        with self._index_lock:
+            self._index_put(key, nbytes, time.time())
+            if self._over_limits():
+                self._eviction_event.set()
+
+    def _on_get(self, key: bytes, nbytes: int, found: bool) -> None:
+        if not self.config.eviction_enabled:
+            return
+        with self._index_lock:
+            if not found:
+                self._index_remove(key)
+            elif self.config.eviction_policy == "LRU" or key not in self._index:
+                self._index_put(key, nbytes, time.time())
+
+    def _on_delete(self, key: bytes) -> None:
+        if not self.config.eviction_enabled:
+            return
+        with self._index_lock:
+            self._index_remove(key)
+
+    def _eviction_loop(self) -> None:
+        """Background thread that rebuilds the index and evicts block
+        files.
+        """
+        try:
+            self._rebuild_index()
+        except Exception as e:
+            logger.warning(f"SHFS failed to rebuild index: {e}")
+
+        while not self._stop_event.is_set():
+            num_evicted, evicted_nbytes = self._evict()
+            if self._metrics is not None:
+                self._metrics.trace_usage(
+                    MetricRecorder.Resource.L2_BACKEND,
+                    self._used_nbytes,
+                    self.config.capacity_nbytes,
+                )
+                self._metrics.trace_eviction(
+                    MetricRecorder.Resource.L2_BACKEND,
+                    len(self._index),
+                    num_evicted,
+                    evicted_nbytes,
+                )
+            self._eviction_event.wait(self.config.eviction_interval_s)
+            self._eviction_event.clear()
+
+    def _rebuild_index(self) -> None:
+        """Scan the directory and add the files that are not indexed yet in
+        front of the index, ordered by modification time.
+        """
+        entries: List[Tuple[float, bytes, int]] = []
+        for dirpath, _, filenames in os.walk(self.root_path):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                try:
+                    key = bytes.fromhex(filename)
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except (ValueError, FileNotFoundError):
+                    continue
+                entries.append((stat.st_mtime, key, stat.st_size))
+
+        # newest first, s.t. the oldest ends up in front
+        entries.sort(reverse=True)
+        with self._index_lock:
+            for mtime, key, nbytes in entries:
+                if key in self._index:
+                    continue
+                self._index_put(key, nbytes, mtime)
+                self._index.move_to_end(key, last=False)
+        logger.info(
+            f"SHFS index rebuilt: {len(entries)} files found, "
+            f"{len(self._index)} files indexed"
+        )
+
+    def _evict(self) -> Tuple[int, int]:
+        """Evict expired block files and, once the limits are exceeded,
+        block files in eviction order until the usage drops below the low
+        watermark.
+
+        Returns:
+            The number of evicted files and bytes.
+        """
+        victims: List[bytes] = []
+        evicted_nbytes = 0
+        now = time.time()
+        with self._index_lock:
+            over_limits = self._over_limits()
+            while len(self._index) > 0:
+                # entries are ordered by their timestamps
+                key, (nbytes, ts) = next(iter(self._index.items()))
+                ttl_s = self.config.ttl_s
+                expired = ttl_s > 0 and now - ts >= ttl_s
+                if not expired and not (
+                    over_limits
+                    and self._over_limits(self.EVICTION_LOW_WATERMARK)
+                ):
+                    break
+                self._index_remove(key)
+                victims.append(key)
+                evicted_nbytes += nbytes
+            self.num_evicted_files += len(victims)
+
+        for key in victims:
+            try:
+                os.unlink(self._key_to_filepath(key))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"SHFS failed to evict {key.hex()}: {e}")
+
+        return len(victims), evicted_nbytes
+
     def get_batches(
         self,
         keys: Sequence[bytes],
@@ -145,12 +382,12 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         keys: Sequence[bytes],
         mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
     ) -> Sequence[Status]:
-        """MGet a list of values."""
-        statuses = []
+        """MGet a list of values. Gets are fanned out across the executor."""
+        statuses = await asyncio.gather(
+            *(self.get(key, mr) for key, mr in zip(keys, mrs))
+        )
 
-        for i, (key, mr) in enumerate(zip(keys, mrs)):
-            status = await self.get(key, mr)
-            statuses.append(status)
+        for i, status in enumerate(statuses):
             if not status.is_ok() and not status.is_not_found():
                 logger.error(f"SHFS mget[{i}] failed: {status}")
 
@@ -162,24 +399,33 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         keys: Sequence[bytes],
         mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
     ) -> Sequence[Status]:
-        """MPut a list of key value pairs."""
-        statuses = []
+        """MPut a list of key value pairs. Puts are fanned out across the
+        executor.
+        """
+        statuses = await asyncio.gather(
+            *(self.put(key, mr) for key, mr in zip(keys, mrs))
+        )
 
-        for i, (key, mr) in enumerate(zip(keys, mrs)):
-            status = await self.put(key, mr)
-            statuses.append(status)
+        for i, status in enumerate(statuses):
             if not status.is_ok():
                 logger.error(f"SHFS mput[{i}] failed: {status}")
 
         return statuses
 
+    @staticmethod
+    def _mr_view(mr: MemoryRegion) -> memoryview:
+        """Get a writable view of the MR's buffer."""
+        return memoryview(
+            mr.slab[mr.addr : mr.addr + mr.length].numpy()  # type: ignore
+        )
+
     @Status.capture_exception
     def _exists(self, key: bytes) -> Status:
         """Check if key is in the store."""
         filepath = self._key_to_filepath(key)
 
         try:
-            if filepath.exists():
+            if os.path.exists(filepath):
                 return Status.ok()
             else:
                 return Status(StatusCodes.NOT_FOUND)
@@ -210,12 +456,28 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         filepath = self._key_to_filepath(key)
 
         try:
-            if not filepath.exists():
-                return Status(StatusCodes.NOT_FOUND)
-
-            file_size = filepath.stat().st_size
+            fd = os.open(filepath, os.O_RDONLY)
+        except FileNotFoundError:
+            self._on_get(key, mr.length, found=False)
+            return Status(StatusCodes.NOT_FOUND)
+        except Exception as e:
+            logger.error(f"SHFS get failed: {e}")
+            return Status(StatusCodes.ERROR, f"Failed to get value: {e}")
 
-            if file_size != mr.length:
+        try:
+            # Read directly into the MR. The extra byte detects files that
+            # are larger than the MR without an additional stat() call.
+            view = self._mr_view(mr)
+            sentinel = bytearray(1)
+            nread = 0
+            while nread < mr.length:
+                n = os.readv(fd, [view[nread:], sentinel])
+                if n == 0:
+                    break
+                nread += n
+
+            if nread != mr.length:
+                file_size = os.fstat(fd).st_size
                 logger.error(
                     f"SHFS get: file size mismatch: {file_size} != {mr.length}"
                 )
@@ -224,24 +486,14 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
                     f"File size mismatch: {file_size} != {mr.length}",
                 )
 
-            with open(filepath, "rb") as f:
-                data = f.read()
-
-            if len(data) != mr.length:
-                logger.error(
-                    f"SHFS get: data size mismatch: {len(data)} != {mr.length}"
-                )
-                return Status(
-                    StatusCodes.ERROR,
-                    f"Data size mismatch: {len(data)} != {mr.length}",
-                )
-
-            mr.fill(data)
+            self._on_get(key, mr.length, found=True)
             return Status.ok()
 
         except Exception as e:
             logger.error(f"SHFS get failed: {e}")
             return Status(StatusCodes.ERROR, f"Failed to get value: {e}")
+        finally:
+            os.close(fd)
 
     @Status.capture_exception
     def _put(
@@ -264,41 +516,36 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
             mr = mr[0]
 
         filepath = self._key_to_filepath(key)
+        # Write atomically: write to temp file first, then rename. The temp
+        # file is unique per writer since the filesystem may be shared.
+        temp_filepath = filepath.with_name(
+            f"{filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
 
         try:
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-
-            data = mr.tobytes()
-
-            # Write atomically: write to temp file first, then rename
-            temp_filepath = filepath.with_suffix(filepath.suffix + ".tmp")
-
-            with open(temp_filepath, "wb") as f:
-                bytes_written = f.write(data)
-
-            if bytes_written != len(data):
-                msg = f"Incomplete write: {bytes_written} != {len(data)}"
-                logger.error(f"SHFS put: {msg.lower()}")
-                temp_filepath.unlink(missing_ok=True)
-                return Status(StatusCodes.ERROR, msg)
-
-            temp_filepath.replace(filepath)
-
-            if filepath.exists():
-                actual_size = filepath.stat().st_size
-                if actual_size != len(data):
-                    msg = (
-                        f"File size mismatch after write: "
-                        f"{actual_size} != {len(data)}"
-                    )
-                    logger.error(f"SHFS put: {msg.lower()}")
-                    return Status(StatusCodes.ERROR, msg)
-
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            try:
+                fd = os.open(temp_filepath, flags, 0o644)
+            except FileNotFoundError:
+                filepath.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(temp_filepath, flags, 0o644)
+
+            try:
+                view = self._mr_view(mr)
+                nwritten = 0
+                while nwritten < mr.length:
+                    nwritten += os.write(fd, view[nwritten:])
+                if self.config.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            os.replace(temp_filepath, filepath)
+            self._on_put(key, mr.length)
             return Status.ok()
 
         except Exception as e:
             logger.error(f"SHFS put failed: {e}")
-            temp_filepath = filepath.with_suffix(filepath.suffix + ".tmp")
             temp_filepath.unlink(missing_ok=True)
             return Status(StatusCodes.ERROR, f"Failed to put value: {e}")
 
@@ -308,11 +555,12 @@ class SHFSConnector(Connector[bytes, torch.Tensor], AsyncBase):
         filepath = self._key_to_filepath(key)
 
         try:
-            if filepath.exists():
-                filepath.unlink()
-                return Status.ok()
-            else:
-                return Status(StatusCodes.NOT_FOUND)
+            os.unlink(filepath)
+            self._on_delete(key)
+            return Status.ok()
+        except FileNotFoundError:
+            self._on_delete(key)
+            return Status(StatusCodes.NOT_FOUND)
         except Exception as e:
             logger.error(f"SHFS delete failed: {e}")
             return Status(StatusCodes.ERROR, f"Failed to delete key: {e}")
@@ -17,6 +17,7 @@ from .hex_key_builder import HexKeyBuilder
 from .key_builder import KeyBuilder
 from .raw_key_builder import RawKeyBuilder
 from .rolling_hash_key_builder import RollingHashKeyBuilder
+from .rolling_hash_vec_key_builder import RollingHashVecKeyBuilder
 from .simple_hash_key_builder import SimpleHashKeyBuilder
 
 __all__ = [
@@ -27,5 +28,6 @@ __all__ = [
     "HexKeyBuilder",
     "RawKeyBuilder",
     "RollingHashKeyBuilder",
+    "RollingHashVecKeyBuilder",
     "SimpleHashKeyBuilder",
 ]
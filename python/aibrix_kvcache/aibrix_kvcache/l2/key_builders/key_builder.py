@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Sequence, Tuple
 
 from ...cache_hashable import TokenListView
 
@@ -39,6 +39,10 @@ class KeyBuilder(ABC):
             from .rolling_hash_key_builder import RollingHashKeyBuilder
 
             return RollingHashKeyBuilder(FarmHasher(), **kwargs)
+        elif name == "ROLLING_HASH_VEC":
+            from .rolling_hash_vec_key_builder import RollingHashVecKeyBuilder
+
+            return RollingHashVecKeyBuilder(**kwargs)
         elif name == "SIMPLE_HASH":
             from .hasher import FarmHasher
             from .simple_hash_key_builder import SimpleHashKeyBuilder
@@ -64,3 +68,16 @@ class KeyBuilder(ABC):
             A sequence of keys.
         """
         raise NotImplementedError
+
+    def build_keys(
+        self, prefix: TokenListView | None, query: TokenListView
+    ) -> Sequence[bytes]:
+        """Build keys of the blocks of the query tokens, without the
+        corresponding tokens.
+        Args:
+            prefix (TokenListView | None): prefix tokens
+            query (TokenListView): query tokens
+        Returns:
+            A sequence of keys.
+        """
+        return tuple(key for _, key in self.build(prefix, query))
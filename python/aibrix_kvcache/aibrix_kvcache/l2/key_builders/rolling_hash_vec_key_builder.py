@@ -0,0 +1,203 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Tuple
+
+import numpy as np
+from farmhash import FarmHash128
+
+from ...cache_hashable import TokenListView
+from ...utils import hash_combine_128
+from .key_builder import KeyBuilder
+
+KEY_NBYTES = 16
+
+# Constants of FarmHash128, i.e., farmhashcc::CityHash128.
+_K0 = np.uint64(0xC3A5C85C97CB3127)
+_K1 = np.uint64(0xB492B66FBE98F273)
+_K_MUL = np.uint64(0x9DDFEA08EB382D69)
+_SHIFT_47 = np.uint64(47)
+
+
+def _fetch64(blocks: np.ndarray, offset: int) -> np.ndarray:
+    """Fetch a little-endian uint64 at the given byte offset of each block."""
+    return (
+        np.ascontiguousarray(blocks[:, offset : offset + 8])
+        .view("<u8")
+        .reshape(-1)
+        .astype(np.uint64)
+    )
+
+
+def _shift_mix(v: np.ndarray) -> np.ndarray:
+    return v ^ (v >> _SHIFT_47)
+
+
+def _hash_len16(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    a = (u ^ v) * _K_MUL
+    a ^= a >> _SHIFT_47
+    b = (v ^ a) * _K_MUL
+    b ^= b >> _SHIFT_47
+    return b * _K_MUL
+
+
+def farmhash128_batch(blocks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute FarmHash128 of each row of a 2-D uint8 array.
+
+    Only supports rows of 33 to 143 bytes, for which FarmHash128 hashes the
+    first 16 bytes as the seed and runs CityMurmur over the remaining bytes.
+
+    Args:
+        blocks: A (nblocks, nbytes) uint8 array.
+    Returns:
+        The low and high 64 bits of the hashes, s.t. the result of FarmHash128
+        equals (low << 64) | high.
+    """
+    nbytes = blocks.shape[1]
+    assert supports_farmhash128_batch(nbytes), f"unsupported size {nbytes}"
+
+    with np.errstate(over="ignore"):
+        # seed
+        a = _fetch64(blocks, 0)
+        b = _fetch64(blocks, 8) + _K0
+        # CityMurmur over the remaining bytes
+        length = nbytes - 16
+        c = _hash_len16(_fetch64(blocks, nbytes - 8) + _K1, a)
+        d = _hash_len16(
+            b + np.uint64(length), c + _fetch64(blocks, nbytes - 16)
+        )
+        a = a + d
+        offset = 16
+        remaining = length - 16
+        while True:
+            a ^= _shift_mix(_fetch64(blocks, offset) * _K1) * _K1
+            a *= _K1
+            b ^= a
+            c ^= _shift_mix(_fetch64(blocks, offset + 8) * _K1) * _K1
+            c *= _K1
+            d ^= c
+            offset += 16
+            remaining -= 16
+            if remaining <= 0:
+                break
+        a = _hash_len16(a, c)
+        b = _hash_len16(d, b)
+        return a ^ b, _hash_len16(b, a)
+
+
+def supports_farmhash128_batch(nbytes: int) -> bool:
+    return 32 < nbytes < 144
+
+
+class RollingHashVecKeyBuilder(KeyBuilder):
+    """Rolling hash key builder that hashes all blocks in one pass.
+
+    It produces the same keys as RollingHashKeyBuilder with FarmHasher, but
+    hashes all blocks of the underlying token array with vectorized NumPy
+    ops and keeps the keys in a contiguous buffer of 16-byte keys.
+    """
+
+    @property
+    def signature(self) -> str:
+        # keys are identical to RollingHashKeyBuilder's
+        return "ro"
+
+    def build(
+        self, prefix: TokenListView | None, query: TokenListView
+    ) -> Tuple[Tuple[TokenListView, bytes], ...]:
+        keys = self.build_keys(prefix, query)
+        if len(keys) == 0:
+            return tuple()
+
+        if prefix is not None:
+            all = prefix + query
+        else:
+            all = query
+
+        prefix_len = len(prefix) if prefix is not None else 0
+        return tuple(
+            (
+                all[: prefix_len + (i + 1) * self.block_size],
+                keys[i].tobytes(),
+            )
+            for i in range(len(keys))
+        )
+
+    def build_keys(  # type: ignore[override]
+        self, prefix: TokenListView | None, query: TokenListView
+    ) -> np.ndarray:
+        """Build the keys of the blocks of the query tokens.
+        Args:
+            prefix (TokenListView | None): prefix tokens
+            query (TokenListView): query tokens
+        Returns:
+            A (nblocks, 16) uint8 array viewing the cached keys, i.e., slicing
+            it does not copy any keys.
+        """
+        assert prefix is None or len(prefix) % self.block_size == 0
+
+        nblocks = len(query) // self.block_size
+        if prefix is not None:
+            all = prefix + query
+        else:
+            all = query
+
+        keys = self._all_keys(all)
+        start = (len(prefix) if prefix is not None else 0) // self.block_size
+        return keys[start : start + nblocks]
+
+    def _all_keys(self, all: TokenListView) -> np.ndarray:
+        """Get the keys of all blocks of all._data. Keys are cached in
+        all._meta_.
+        """
+        attr_name = f"{self.__class__.__name__}.keys"
+        keys = getattr(all._meta_, attr_name, None)
+        if keys is not None:
+            return keys
+
+        data = np.ascontiguousarray(all._data)
+        nblocks = -(-len(data) // self.block_size)
+        block_nbytes = self.block_size * data.itemsize
+        aligned_nblocks = len(data) // self.block_size
+
+        # hash all full blocks
+        hashes = []
+        if aligned_nblocks > 0:
+            blocks = (
+                data[: aligned_nblocks * self.block_size]
+                .view(np.uint8)
+                .reshape(aligned_nblocks, block_nbytes)
+            )
+            if supports_farmhash128_batch(block_nbytes):
+                low, high = farmhash128_batch(blocks)
+                hashes = [
+                    (lo << 64) | hi
+                    for lo, hi in zip(low.tolist(), high.tolist())
+                ]
+            else:
+                hashes = [int(FarmHash128(block)) for block in blocks]
+        # the trailing partial block
+        if nblocks > aligned_nblocks:
+            tail = data[aligned_nblocks * self.block_size :]
+            hashes.append(int(FarmHash128(tail.data)))
+
+        # roll hashes
+        for i in range(1, len(hashes)):
+            hashes[i] = hash_combine_128(hashes[i - 1], hashes[i])
+
+        keys = np.frombuffer(
+            b"".join(h.to_bytes(KEY_NBYTES) for h in hashes), dtype=np.uint8
+        ).reshape(-1, KEY_NBYTES)
+        setattr(all._meta_, attr_name, keys)
+        return keys
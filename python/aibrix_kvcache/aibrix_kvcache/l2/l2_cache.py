@@ -15,7 +15,16 @@
 import asyncio
 import logging
 from concurrent.futures import Executor
-from typing import Any, Callable, Iterator, List, Sequence, Tuple, cast
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    cast,
+)
 
 import torch
 from more_itertools import batched
@@ -23,13 +32,19 @@ from more_itertools import batched
 from ..cache_handle import KVCacheHandle
 from ..cache_hashable import BlockHashes, KVCacheKeyTypes, TokenListView
 from ..common.absl_logging import getLogger, log_every_n_seconds
-from ..memory import ExternalMemoryRegion, ManagedMemoryRegion, MemoryRegion
+from ..memory import (
+    ExternalMemoryRegion,
+    ManagedMemoryRegion,
+    MemoryRegion,
+    PrefixDigest,
+)
 from ..meta_service import MetaService
 from ..metrics import L2CacheMetrics, MeasurableBase, MetricRecorder
 from ..profiling import nvtx_range
 from ..spec import KVCacheBlockLayout, KVCacheBlockSpec
 from ..status import Status, StatusCodes
-from ..utils import buffer_to_tensor
+from ..tracing import trace_section, trace_span
+from ..utils import buffer_to_tensor, cpu_perf_timer
 from .connectors import (
     Connector,
     ConnectorConfig,
@@ -37,6 +52,8 @@ from .connectors import (
     ConnectorZeroCopyMemoryRegion,
 )
 from .key_builders import KeyBuilder, RawKeyBuilder
+from .marshallers import CompressionPipeline, Compressor, Quantizer
+from .membership_filter import FilteredConnector
 from .placement import Placement, PlacementConfig
 
 logger = getLogger(__name__)
@@ -55,6 +72,16 @@ class L2Cache(MeasurableBase):
         metrics: L2CacheMetrics | None = None,
         meta_service: MetaService | None = None,
         key_builder: KeyBuilder | None = None,
+        replication_factor: int = 1,
+        hedge_percentile: float = 95.0,
+        compression: str = "",
+        quantization: str = "",
+        quantization_granularity: str = "HEAD",
+        exists_strategy: str = "LINEAR",
+        exists_verify: bool = False,
+        filter_capacity: int = 0,
+        filter_fp_rate: float = 0.01,
+        filter_refresh_interval_s: int = 0,
     ) -> None:
         """Create a cache object.
         Args:
@@ -68,6 +95,31 @@ class L2Cache(MeasurableBase):
             metrics (L2CacheMetrics): metrics recorder.
             meta_service (MetaService): meta service.
             key_builder (KeyBuilder): key builder.
+            replication_factor (int): The number of replicas of each block.
+            hedge_percentile (float): The get latency percentile after which
+                a hedged get is sent to another replica.
+            compression (str): The compressor of values, "ZSTD", "LZ4" or ""
+                to disable compression. `open()` fails if the backend does not
+                support compression.
+            quantization (str): The lossy quantization of values, "INT8",
+                "FP8" or "" to disable quantization. `open()` fails if the
+                backend does not support compression.
+            quantization_granularity (str): The scale granularity of
+                quantization, "HEAD" or "BLOCK".
+            exists_strategy (str): How exists finds the longest cached
+                prefix. "LINEAR" probes blocks batch by batch from the start
+                and "BINARY" searches the prefix-closed keys in O(log n)
+                rounds of op_batch concurrent probes.
+            exists_verify (bool): Whether to verify every block of the prefix
+                found by the "BINARY" strategy, which detects holes left by
+                evictions at the cost of probing all blocks.
+            filter_capacity (int): The expected number of blocks of the local
+                filter that short-circuits definite misses, 0 to disable it.
+            filter_fp_rate (float): The target false positive rate of the
+                filter.
+            filter_refresh_interval_s (int): The interval to rebuild the
+                filter from the backend's keys, 0 to rebuild it only when the
+                placement topology changes.
         """
         super().__init__(metrics)
         self.block_spec: KVCacheBlockSpec = block_spec
@@ -81,6 +133,10 @@ class L2Cache(MeasurableBase):
             self.block_ntokens
         )
         self.op_batch: int = op_batch
+        if exists_strategy not in ("LINEAR", "BINARY"):
+            raise ValueError(f"Unknown exists strategy: {exists_strategy}")
+        self.exists_strategy: str = exists_strategy
+        self.exists_verify: bool = exists_verify
         self._executor: Executor = executor
         self._backend: Connector = None  # type: ignore
         self._use_compact_layout: bool = MemoryRegion.use_compact_layout()
@@ -103,7 +159,19 @@ class L2Cache(MeasurableBase):
         partition_id = f"h{cat_head_ids}_l{cat_layer_ids}"
         block_spec_signature = self.block_spec.signature
         key_builder_signature = self.key_builder.signature
-        layout_signature = "c" if self._use_compact_layout else "ex"
+        if self._use_compact_layout:
+            layout_signature = "c"
+        elif MemoryRegion.use_digest_layout():
+            layout_signature = "exd"
+        else:
+            layout_signature = "ex"
+        quantizer = Quantizer.from_spec(
+            quantization, self.block_spec, quantization_granularity
+        )
+        compressor = Compressor.create(compression)
+        for codec in (quantizer, compressor):
+            if codec is not None:
+                layout_signature += codec.signature
         backend_config = ConnectorConfig(
             backend_name=backend_name,
             namespace=namespace,
@@ -124,9 +192,32 @@ class L2Cache(MeasurableBase):
                 conn_config=backend_config,
                 meta_service=meta_service,
                 refresh_interval_s=refresh_interval_s,
+                replication_factor=replication_factor,
+                hedge_percentile=hedge_percentile,
             )
             self._backend = Placement.create(placement_config)
 
+        if filter_capacity > 0:
+            self._backend = FilteredConnector(
+                self._backend,
+                filter_capacity,
+                fp_rate=filter_fp_rate,
+                refresh_interval_s=filter_refresh_interval_s,
+            )
+
+        if metrics is not None:
+            self._backend.set_metrics(metrics)
+
+        self._compression: CompressionPipeline | None = None
+        if compressor is not None or quantizer is not None:
+            self._compression = CompressionPipeline(
+                compressor,
+                self.block_nbytes,
+                num_slots=2 * self.op_batch,
+                metrics=metrics,
+                quantizer=quantizer,
+            )
+
         logger.info(
             "%s is initialized. Using partition_id=%s.", str(self), partition_id
         )
@@ -194,7 +285,21 @@ class L2Cache(MeasurableBase):
                 "please set AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_ENABLED to "
                 "false to use GDR",
             )
-        return self._backend.open()
+        status = self._backend.open()
+        if (
+            status.is_ok()
+            and self._compression is not None
+            and not self._use_compression()
+        ):
+            # the layout signature of the keys claims values are compressed
+            self._backend.close()
+            return Status(
+                StatusCodes.INVALID,
+                f"{self._backend.name} does not support compression, please "
+                "unset AIBRIX_KV_CACHE_OL_L2_CACHE_COMPRESSION and "
+                "AIBRIX_KV_CACHE_OL_L2_CACHE_QUANTIZATION",
+            )
+        return status
 
     def close(self) -> Status:
         """Close the cache."""
@@ -209,9 +314,20 @@ class L2Cache(MeasurableBase):
             return self._backend.close()
         return Status.ok()
 
+    def _use_compression(self) -> bool:
+        feature = self._backend.feature
+        return (
+            self._compression is not None
+            and feature.compression
+            and not feature.gdr_get
+            and not feature.gdr_put
+        )
+
     def register_slabs(self, slabs: List[torch.Tensor]) -> Status:
         if not self._backend.feature.rdma:
             raise NotImplementedError
+        if self._compression is not None:
+            slabs = slabs + self._compression.staging_slabs
         status = self._backend.register_slabs(slabs)
         if not status.is_ok():
             return status
@@ -249,6 +365,7 @@ class L2Cache(MeasurableBase):
         await self._backend.prefetch(cache_key)
         return Status.ok()
 
+    @trace_span("exists", "L2Cache")
     @nvtx_range("exists", "kv_cache_ol.L2Cache")
     @MeasurableBase.measure(MetricRecorder.OP.EXISTS)
     async def exists(
@@ -266,8 +383,35 @@ class L2Cache(MeasurableBase):
         if prefix is not None and len(prefix) % self.block_ntokens != 0:
             return Status(StatusCodes.INVALID)
 
+        if self.exists_strategy == "BINARY":
+            with trace_section("L2Cache.build_keys"):
+                keys = [key for _, key in self._cache_block_keys(prefix, query)]
+            with trace_section("L2Cache.backend_exists"):
+                total = await self._search_prefix(keys)
+                if self.exists_verify and total > 0:
+                    verified = [(None, key) for key in keys[:total]]
+                    total = await self._scan_prefix(
+                        batched(verified, self.op_batch)
+                    )
+        else:
+            # keys are built lazily while scanning
+            with trace_section("L2Cache.backend_exists"):
+                total = await self._scan_prefix(
+                    self._cache_block_key_batches(prefix, query)
+                )
+
+        if total == 0:
+            return Status(StatusCodes.NOT_FOUND)
+
+        return Status.ok(total)
+
+    async def _scan_prefix(self, key_batches: Iterable[Iterable]) -> int:
+        """Probe keys batch by batch and stop at the first missing one.
+        Returns:
+            The number of existing keys before the first missing one.
+        """
         total = 0
-        for key_batch in self._cache_block_key_batches(prefix, query):
+        for key_batch in key_batches:
             tasks = []
             async with asyncio.TaskGroup() as tg:
                 for real_key, key_str in key_batch:
@@ -285,12 +429,40 @@ class L2Cache(MeasurableBase):
 
             if should_break:
                 break
+        return total
+
+    async def _search_prefix(self, keys: Sequence[bytes]) -> int:
+        """Find the longest existing prefix of keys. Keys are prefix-closed,
+        i.e., block i only exists if block i-1 does, so each round probes
+        op_batch evenly spaced keys of the unresolved range concurrently and
+        narrows the range to between the last hit and the first miss. The last
+        key of the range is always probed, so a full hit takes one round.
+        Returns:
+            The number of keys of the longest existing prefix.
+        """
+        # keys[:lo] exist and keys[hi:] are not part of the prefix
+        lo, hi = 0, len(keys)
+        while lo < hi:
+            n = min(max(self.op_batch, 2), hi - lo)
+            probes = sorted(
+                {lo + (hi - lo) * (k + 1) // n - 1 for k in range(n)}
+            )
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(self._backend.exists(keys[i]))
+                    for i in probes
+                ]
 
-        if total == 0:
-            return Status(StatusCodes.NOT_FOUND)
-
-        return Status.ok(total)
+            new_lo, new_hi = lo, hi
+            for i, task in zip(probes, tasks):
+                if not task.result().is_ok():
+                    new_hi = i
+                    break
+                new_lo = i + 1
+            lo, hi = new_lo, new_hi
+        return lo
 
+    @trace_span("put", "L2Cache")
     @nvtx_range("put", "kv_cache_ol.L2Cache")
     @MeasurableBase.measure(MetricRecorder.OP.PUT)
     async def put(
@@ -334,15 +506,82 @@ class L2Cache(MeasurableBase):
                     "kv_tensors must be KVCacheHandle when zero_copy isenabled."
                 )
 
+        status = self._blocks_of(query, kv_tensors)
+        if not status.is_ok():
+            return Status(status)
+
+        with trace_section("L2Cache.build_keys"):
+            keys = tuple(self._cache_block_keys(prefix, query))
+        return await self._put_blocks(keys, status.get())
+
+    async def put_batch(
+        self,
+        entries: Sequence[
+            Tuple[
+                KVCacheKeyTypes | None,
+                KVCacheKeyTypes,
+                MemoryRegion | Sequence[MemoryRegion] | KVCacheHandle,
+            ]
+        ],
+    ) -> Status[int]:
+        """Put kv tensors of many sequences to the cache with as few
+        backend ops as possible.
+        Args:
+            entries: Tuples of prefix tokens, query tokens and kv tensors,
+                     like the arguments of `put`.
+        Returns:
+            The status of the put operation and the number of blocks.
+        """
+        assert not self._backend.feature.zero_copy, (
+            "put_batch does not support zero_copy backends."
+        )
+        keys: List[Tuple[KVCacheKeyTypes, Any]] = []
+        blocks: List[MemoryRegion] = []
+        for prefix, query, kv_tensors in entries:
+            if prefix is not None and len(prefix) % self.block_ntokens != 0:
+                return Status(StatusCodes.INVALID)
+            if len(query) % self.block_ntokens != 0:
+                return Status(StatusCodes.INVALID)
+            if len(query) // self.block_ntokens == 0:
+                continue
+            blocks_status = self._blocks_of(query, kv_tensors)
+            if not blocks_status.is_ok():
+                return Status(blocks_status)
+            keys.extend(self._cache_block_keys(prefix, query))
+            blocks.extend(blocks_status.get())
+
+        if len(blocks) == 0:
+            return Status.ok(0)
+
+        with cpu_perf_timer(self._enable_time_measurement) as get_lat_ms:
+            status = await self._put_blocks(tuple(keys), tuple(blocks))
+        if self._recorder is not None:
+            lat_ms = get_lat_ms()
+            for prefix, query, _ in entries:
+                self._recorder.record(
+                    MetricRecorder.OP.PUT,
+                    0 if prefix is None else len(prefix),
+                    len(query),
+                    status,
+                    lat_ms,
+                )
+        return status
+
+    def _blocks_of(
+        self,
+        query: KVCacheKeyTypes,
+        kv_tensors: MemoryRegion | Sequence[MemoryRegion] | KVCacheHandle,
+    ) -> Status[Tuple[MemoryRegion, ...]]:
+        """Get the MRs of the blocks of kv tensors."""
         if isinstance(kv_tensors, MemoryRegion):
             # `kv_tensors` comes from L1Cache and should be only one block
             assert len(query) // self.block_ntokens == 1, (
                 f"len(query)={len(query)}"
             )
-            blocks = tuple([kv_tensors])
+            return Status.ok(tuple([kv_tensors]))
         elif isinstance(kv_tensors, Sequence):
             assert isinstance(kv_tensors[0], MemoryRegion)
-            blocks = tuple(kv_tensors)
+            return Status.ok(tuple(kv_tensors))
         elif isinstance(kv_tensors, KVCacheHandle):
             if len(query) != len(kv_tensors) * self.block_ntokens:
                 return Status(
@@ -354,11 +593,15 @@ class L2Cache(MeasurableBase):
                     ),
                 )
 
-            blocks = tuple(kv_tensors.memory_regions)  # type: ignore
+            return Status.ok(tuple(kv_tensors.memory_regions))  # type: ignore
         else:
             raise ValueError(f"Unsupported type {type(kv_tensors).__name__}")
 
-        keys = tuple(self._cache_block_keys(prefix, query))
+    async def _put_blocks(
+        self,
+        keys: Sequence[Tuple[KVCacheKeyTypes, Any]],
+        blocks: Sequence[MemoryRegion],
+    ) -> Status[int]:
         # use mget if mput_mget is enabled
         if self._backend.feature.mput_mget:
             block_batches = self._backend.get_batches(
@@ -390,7 +633,11 @@ class L2Cache(MeasurableBase):
                             )
                         mr.seal()
 
-            statuses = await self._backend.mput(cache_keys, mrs)
+            with trace_section("L2Cache.backend_mput", nblocks=len(mrs)):
+                if self._use_compression():
+                    statuses = await self._compressed_mput(cache_keys, mrs)
+                else:
+                    statuses = await self._backend.mput(cache_keys, mrs)
 
             if isinstance(statuses, Sequence) and all(
                 status.is_ok() for status in statuses
@@ -483,8 +730,79 @@ class L2Cache(MeasurableBase):
                     query=real_key[-self.block_ntokens :],
                 )
             mr.seal()
-        return await self._backend.put(cache_key, mr)
+        with trace_section("L2Cache.backend_put"):
+            if self._use_compression():
+                statuses = await self._compressed_mput([cache_key], [mr])
+                return statuses[0]
+            return await self._backend.put(cache_key, mr)
+
+    async def _compressed_mput(
+        self,
+        cache_keys: Sequence[Any],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+    ) -> Sequence[Status]:
+        """Compress MRs and put them to the backend."""
+        assert self._compression is not None
+        # compression is only used without GDR, i.e., with flat MRs
+        flat_mrs = cast(Sequence[MemoryRegion], mrs)
+        loop = asyncio.get_running_loop()
+        stagings = await loop.run_in_executor(
+            self._executor, self._compression.compress, flat_mrs
+        )
+        try:
+            if len(stagings) == 1:
+                return [await self._backend.put(cache_keys[0], stagings[0])]
+            elif self._backend.feature.mput_mget:
+                return await self._backend.mput(cache_keys, stagings)
+            else:
+                return await asyncio.gather(
+                    *(
+                        self._backend.put(key, staging)
+                        for key, staging in zip(cache_keys, stagings)
+                    )
+                )
+        finally:
+            self._compression.release(stagings)
+
+    async def _compressed_mget(
+        self,
+        cache_keys: Sequence[Any],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+    ) -> Sequence[Status]:
+        """Get compressed values from the backend and decompress them into
+        MRs.
+        """
+        assert self._compression is not None
+        # compression is only used without GDR, i.e., with flat MRs
+        flat_mrs = cast(Sequence[MemoryRegion], mrs)
+        stagings = self._compression.alloc(flat_mrs)
+        try:
+            statuses: Sequence[Status]
+            if len(stagings) == 1:
+                statuses = [await self._backend.get(cache_keys[0], stagings[0])]
+            elif self._backend.feature.mput_mget:
+                statuses = await self._backend.mget(cache_keys, stagings)
+            else:
+                statuses = await asyncio.gather(
+                    *(
+                        self._backend.get(key, staging)
+                        for key, staging in zip(cache_keys, stagings)
+                    )
+                )
+            if isinstance(statuses, Status):
+                return statuses  # type: ignore[return-value]
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                self._compression.decompress,
+                stagings,
+                flat_mrs,
+                statuses,
+            )
+        finally:
+            self._compression.release(stagings)
 
+    @trace_span("get", "L2Cache")
     @nvtx_range("get", "kv_cache_ol.L2Cache")
     @MeasurableBase.measure(MetricRecorder.OP.GET)
     async def get(
@@ -507,7 +825,8 @@ class L2Cache(MeasurableBase):
 
         assert len(mrs) == len(query) // self.block_ntokens
 
-        keys = tuple(self._cache_block_keys(prefix, query))
+        with trace_section("L2Cache.build_keys"):
+            keys = tuple(self._cache_block_keys(prefix, query))
         # use mput if mput_mget is enabled
         if self._backend.feature.mput_mget:
             block_batches = tuple(
@@ -558,7 +877,11 @@ class L2Cache(MeasurableBase):
             Number of blocks that are fetched.
         """
         real_keys, cache_keys = zip(*key_pairs)
-        statuses = await self._backend.mget(cache_keys, mrs)
+        with trace_section("L2Cache.backend_mget", nblocks=len(mrs)):
+            if self._use_compression():
+                statuses = await self._compressed_mget(cache_keys, mrs)
+            else:
+                statuses = await self._backend.mget(cache_keys, mrs)
         if isinstance(statuses, Status):
             status = cast(Status, statuses)
             if not status.is_ok():
@@ -573,19 +896,22 @@ class L2Cache(MeasurableBase):
 
         is_managed_mr = isinstance(mrs[0], ManagedMemoryRegion)
         nr: int = 0
-        for i, status in enumerate(statuses):
-            if not status.is_ok():
-                continue
-            # Bypass token validation if MR is using compact layout
-            if is_managed_mr and not self._use_compact_layout:
-                mr = mrs[i]
-                mr.block_nbytes = self.block_nbytes  # type: ignore
-                prefix_in_mr, query_in_mr = mr.unpack_tokens()  # type: ignore
-                if not self._tokens_match(
-                    real_keys[i], prefix_in_mr, query_in_mr
-                ):
-                    continue
-            nr += 1
+        # Bypass token validation if MR is using compact layout
+        if not is_managed_mr or self._use_compact_layout:
+            nr = sum(1 for status in statuses if status.is_ok())
+        else:
+            with trace_section("L2Cache.validate_tokens", nblocks=len(mrs)):
+                for i, status in enumerate(statuses):
+                    if not status.is_ok():
+                        continue
+                    mr = cast(ManagedMemoryRegion, mrs[i])
+                    mr.block_nbytes = self.block_nbytes
+                    prefix_in_mr, query_in_mr = mr.unpack_tokens()
+                    if not self._tokens_match(
+                        real_keys[i], prefix_in_mr, query_in_mr
+                    ):
+                        continue
+                    nr += 1
 
         if nr == 0:
             return Status(StatusCodes.NOT_FOUND)
@@ -657,16 +983,24 @@ class L2Cache(MeasurableBase):
             The status of the get operation.
         """
         real_key, cache_key = key_pair
-        status = await self._backend.get(cache_key, mr)
+        with trace_section("L2Cache.backend_get"):
+            if self._use_compression():
+                status = (await self._compressed_mget([cache_key], [mr]))[0]
+            else:
+                status = await self._backend.get(cache_key, mr)
         if not status.is_ok():
             return status
 
         # Bypass token validation if MR is using compact layout
         if isinstance(mr, ManagedMemoryRegion) and not self._use_compact_layout:
             # check if tokens match
-            mr.block_nbytes = self.block_nbytes
-            prefix_in_mr, query_in_mr = mr.unpack_tokens()
-            if self._tokens_match(real_key, prefix_in_mr, query_in_mr):
+            with trace_section("L2Cache.validate_tokens", nblocks=1):
+                mr.block_nbytes = self.block_nbytes
+                prefix_in_mr, query_in_mr = mr.unpack_tokens()
+                matched = self._tokens_match(
+                    real_key, prefix_in_mr, query_in_mr
+                )
+            if matched:
                 return Status.ok()
             else:
                 return Status(StatusCodes.NOT_FOUND, "tokens mismatch")
@@ -676,13 +1010,14 @@ class L2Cache(MeasurableBase):
     def _tokens_match(
         self,
         real_key: KVCacheKeyTypes,
-        prefix_in_mr: KVCacheKeyTypes | None,
+        prefix_in_mr: KVCacheKeyTypes | PrefixDigest | None,
         query_in_mr: KVCacheKeyTypes | None,
     ) -> bool:
         """Check if the tokens in mr match the real key.
         Args:
             real_key (KVCacheKeyTypes): The real key of the kv tensors.
-            prefix_in_mr (KVCacheKeyTypes | None): The prefix tokens in mr.
+            prefix_in_mr (KVCacheKeyTypes | PrefixDigest | None): The prefix
+                tokens in mr, or their digest with the digest layout.
             query_in_mr (KVCacheKeyTypes | None): The query tokens in mr.
         Returns:
             True if the tokens in mr match the real key, False otherwise.
@@ -690,6 +1025,12 @@ class L2Cache(MeasurableBase):
         try:
             if query_in_mr is None or len(query_in_mr) != self.block_ntokens:
                 return False
+            if isinstance(prefix_in_mr, PrefixDigest):
+                nprefix = len(real_key) - len(query_in_mr)
+                return bool(
+                    real_key[nprefix:] == query_in_mr
+                    and prefix_in_mr.matches(real_key[:nprefix])
+                )
             if prefix_in_mr is not None:
                 all_tokens = prefix_in_mr + query_in_mr
             else:
@@ -702,6 +1043,7 @@ class L2Cache(MeasurableBase):
         except Exception:
             return False
 
+    @trace_span("allocate", "L2Cache")
     @nvtx_range("allocate", "kv_cache_ol.L2Cache")
     @MeasurableBase.measure(MetricRecorder.OP.ALLOCATE)
     async def allocate(
@@ -785,6 +1127,7 @@ class L2Cache(MeasurableBase):
 
         return Status.ok(mrs)
 
+    @trace_span("acquire", "L2Cache")
     @nvtx_range("acquire", "kv_cache_ol.L2Cache")
     @MeasurableBase.measure(MetricRecorder.OP.ACQUIRE)
     async def acquire(
@@ -899,7 +1242,13 @@ class L2Cache(MeasurableBase):
             if prefix is not None:
                 assert isinstance(prefix, TokenListView)
             assert isinstance(query, TokenListView)
-            yield from iter(self.key_builder.build(prefix, query))
+            if self._use_compact_layout:
+                # real keys are only used to validate tokens, which is
+                # bypassed with compact layout
+                for key in self.key_builder.build_keys(prefix, query):
+                    yield None, bytes(key)  # type: ignore
+            else:
+                yield from iter(self.key_builder.build(prefix, query))
 
     def _cache_block_key_batches(
         self, prefix: KVCacheKeyTypes | None, query: KVCacheKeyTypes
@@ -12,14 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .compression_pipeline import CompressionPipeline
+from .compressor import Compressor
 from .marshaller import BaseMarshaller, Marshaller
+from .quantizer import Quantizer, ReconstructionError
 from .string_serializer import StringSerializer
 from .tensor_serializer import TensorSerializer
 from .zstd_compressor import ZstdCompressor
 
 __all__ = [
     "BaseMarshaller",
+    "CompressionPipeline",
+    "Compressor",
     "Marshaller",
+    "Quantizer",
+    "ReconstructionError",
     "StringSerializer",
     "TensorSerializer",
     "ZstdCompressor",
@@ -0,0 +1,241 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import struct
+import threading
+import time
+from typing import List, Sequence, Tuple
+
+import torch
+
+from ...memory import ExternalMemoryRegion, MemoryRegion
+from ...metrics import L2CacheMetrics
+from ...status import Status, StatusCodes
+from ...utils import round_up
+from .compressor import Compressor
+
+# Frame header: raw nbytes, codec flags, where bit i is set if the i-th codec
+# of the pipeline was applied
+FRAME_HEADER = struct.Struct("<II")
+FRAME_STORED = 0
+STAGING_ALIGNMENT = 4096
+
+
+def _view(mr: MemoryRegion) -> memoryview:
+    return mr.slab[mr.addr : mr.addr + mr.length].numpy().data
+
+
+class CompressionPipeline:
+    """Compresses blocks into staging MRs before they are put to a connector
+    and decompresses fetched frames into the destination MRs.
+
+    Each value is stored as a frame of [raw nbytes][codec flags][payload].
+    The codecs, i.e., an optional lossy quantizer followed by an optional
+    compressor, are applied in order. A lossless codec that does not shrink
+    its input is skipped, so incompressible blocks are stored as is.
+    Intermediate results go to per-thread scratch buffers and the last codec
+    writes into the staging MR directly. Staging MRs are slots of one
+    preallocated slab, which can be registered with the connector like the
+    allocator's slabs. Frames that do not fit in a slot or that arrive when
+    all slots are taken use transient buffers.
+    """
+
+    def __init__(
+        self,
+        compressor: Compressor | None,
+        block_nbytes: int,
+        num_slots: int,
+        metrics: L2CacheMetrics | None = None,
+        quantizer: Compressor | None = None,
+    ) -> None:
+        """Create a compression pipeline.
+        Args:
+            compressor: The compressor.
+            block_nbytes: The size of a block, used to size the slots.
+            num_slots: The number of staging slots.
+            metrics: The metrics to report compression ratio and CPU time.
+            quantizer: The lossy quantizer applied before the compressor.
+        """
+        self.codecs: List[Compressor] = [
+            codec for codec in (quantizer, compressor) if codec is not None
+        ]
+        assert len(self.codecs) > 0, "Pipeline requires at least one codec"
+        self.compressor = compressor
+        self.quantizer = quantizer
+        self._local = threading.local()
+        self.slot_nbytes = round_up(
+            self.frame_nbytes(block_nbytes), STAGING_ALIGNMENT
+        )
+        self.slab = torch.empty(num_slots * self.slot_nbytes, dtype=torch.uint8)
+        self._free_slots = list(range(num_slots))
+        self._lock = threading.Lock()
+        self._metrics = metrics
+
+    @property
+    def staging_slabs(self) -> List[torch.Tensor]:
+        return [self.slab]
+
+    def frame_nbytes(self, nbytes: int) -> int:
+        """The worst-case size of the frame of a nbytes value."""
+        max_nbytes = bound = nbytes
+        for codec in self.codecs:
+            bound = codec.max_compressed_nbytes(bound)
+            max_nbytes = max(max_nbytes, bound)
+        return FRAME_HEADER.size + max_nbytes
+
+    def _scratch(self, i: int, nbytes: int) -> memoryview:
+        """Per-thread scratch buffer of the output of the i-th codec."""
+        if not hasattr(self._local, "buffers"):
+            self._local.buffers = [bytearray() for _ in self.codecs]
+        if len(self._local.buffers[i]) < nbytes:
+            self._local.buffers[i] = bytearray(nbytes)
+        return memoryview(self._local.buffers[i])[:nbytes]
+
+    def _alloc(self, nbytes: int) -> MemoryRegion:
+        if nbytes <= self.slot_nbytes:
+            with self._lock:
+                if len(self._free_slots) > 0:
+                    slot = self._free_slots.pop()
+                    return ExternalMemoryRegion(
+                        self.slab,
+                        slot * self.slot_nbytes,
+                        nbytes,
+                        on_release=self._release_slot,
+                    )
+        return ExternalMemoryRegion(
+            torch.empty(nbytes, dtype=torch.uint8), 0, nbytes
+        )
+
+    def _release_slot(self, slab: torch.Tensor, addr: int, _: int) -> None:
+        with self._lock:
+            self._free_slots.append(addr // self.slot_nbytes)
+
+    def alloc(self, mrs: Sequence[MemoryRegion]) -> List[MemoryRegion]:
+        """Allocate staging MRs to fetch the frames of the given MRs."""
+        return [self._alloc(self.frame_nbytes(mr.length)) for mr in mrs]
+
+    @staticmethod
+    def release(stagings: Sequence[MemoryRegion]) -> None:
+        """Release staging MRs. A slot returns to the pool once all
+        references to its MR are dropped.
+        """
+        for staging in stagings:
+            staging.ref_down()
+
+    def compress(self, mrs: Sequence[MemoryRegion]) -> List[MemoryRegion]:
+        """Compress MRs into staging MRs. Caller must release them."""
+        start = time.thread_time()
+        stagings: List[MemoryRegion] = []
+        raw_nbytes = compressed_nbytes = 0
+        try:
+            for mr in mrs:
+                staging = self._alloc(self.frame_nbytes(mr.length))
+                stagings.append(staging)
+                dst = _view(staging)
+                flags, nbytes = self._encode(
+                    _view(mr), dst[FRAME_HEADER.size :]
+                )
+                FRAME_HEADER.pack_into(dst, 0, mr.length, flags)
+                staging.length = FRAME_HEADER.size + nbytes
+                raw_nbytes += mr.length
+                compressed_nbytes += staging.length
+        except Exception:
+            self.release(stagings)
+            raise
+
+        if self._metrics is not None:
+            self._metrics.trace_compression(
+                raw_nbytes, compressed_nbytes, time.thread_time() - start
+            )
+        return stagings
+
+    def _encode(self, src: memoryview, dst: memoryview) -> Tuple[int, int]:
+        cur, in_dst, flags = src, False, FRAME_STORED
+        last = len(self.codecs) - 1
+        for i, codec in enumerate(self.codecs):
+            if i == last:
+                out = dst
+            else:
+                out = self._scratch(i, codec.max_compressed_nbytes(len(cur)))
+            nbytes = codec.compress_into(cur, out)
+            if codec.lossless and nbytes >= len(cur):
+                continue
+            cur, in_dst, flags = out[:nbytes], i == last, flags | (1 << i)
+        if not in_dst:
+            dst[: len(cur)] = cur
+        return flags, len(cur)
+
+    def decompress(
+        self,
+        stagings: Sequence[MemoryRegion],
+        mrs: Sequence[MemoryRegion],
+        statuses: Sequence[Status],
+    ) -> List[Status]:
+        """Decompress the fetched frames into MRs.
+        Args:
+            stagings: Staging MRs holding the frames.
+            mrs: The destination MRs.
+            statuses: Statuses of fetching the frames, frames with non-ok
+                statuses are skipped.
+        Returns:
+            Statuses of decompression.
+        """
+        start = time.thread_time()
+        results = [
+            (self._decompress_one(staging, mr) if status.is_ok() else status)
+            for staging, mr, status in zip(stagings, mrs, statuses)
+        ]
+        if self._metrics is not None:
+            self._metrics.trace_decompression(time.thread_time() - start)
+        return results
+
+    @Status.capture_exception
+    def _decompress_one(
+        self, staging: MemoryRegion, mr: MemoryRegion
+    ) -> Status:
+        if staging.length < FRAME_HEADER.size:
+            return Status(StatusCodes.ERROR, "Truncated frame")
+        src, dst = _view(staging), _view(mr)
+        raw_nbytes, flags = FRAME_HEADER.unpack_from(src, 0)
+        if raw_nbytes != mr.length:
+            return Status(
+                StatusCodes.ERROR,
+                f"Value size mismatch: {raw_nbytes} != {mr.length}",
+            )
+
+        payload = src[FRAME_HEADER.size :]
+        if flags == FRAME_STORED:
+            if len(payload) != raw_nbytes:
+                return Status(StatusCodes.ERROR, "Corrupted frame")
+            dst[:] = payload
+            return Status.ok()
+        elif flags >> len(self.codecs) != 0:
+            return Status(StatusCodes.ERROR, f"Unknown codec flags: {flags}")
+
+        applied = [i for i in range(len(self.codecs)) if flags & (1 << i)]
+        # the input sizes of the applied codecs bound their decoded sizes
+        bounds, bound = [], raw_nbytes
+        for i in applied:
+            bounds.append(bound)
+            bound = self.codecs[i].max_compressed_nbytes(bound)
+
+        cur = payload
+        for k in reversed(range(len(applied))):
+            i = applied[k]
+            out = dst if k == 0 else self._scratch(i, bounds[k])
+            nbytes = self.codecs[i].decompress_into(cur, out)
+            cur = out[:nbytes]
+        if len(cur) != raw_nbytes:
+            return Status(StatusCodes.ERROR, "Corrupted frame")
+        return Status.ok()
@@ -0,0 +1,85 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from abc import abstractmethod
+
+from .marshaller import BaseMarshaller
+
+
+class Compressor(BaseMarshaller[bytes, bytes]):
+    """Compressor is a marshaller that additionally supports compressing into
+    and decompressing into preallocated buffers.
+    """
+
+    @property
+    @abstractmethod
+    def signature(self) -> str:
+        """Signature of the codec. Values compressed by different codecs must
+        not share a namespace.
+        """
+        raise NotImplementedError
+
+    @property
+    def lossless(self) -> bool:
+        """Whether decompression restores the exact input."""
+        return True
+
+    @abstractmethod
+    def max_compressed_nbytes(self, nbytes: int) -> int:
+        """The worst-case size of compressing nbytes."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def compress_into(self, src: memoryview, dst: memoryview) -> int:
+        """Compress src into dst.
+        Args:
+            src: The data to compress.
+            dst: The output buffer of at least
+                `max_compressed_nbytes(len(src))` bytes.
+        Returns:
+            The number of bytes written to dst.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def decompress_into(self, src: memoryview, dst: memoryview) -> int:
+        """Decompress src into dst.
+        Returns:
+            The number of bytes written to dst.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def create(name: str) -> "Compressor | None":
+        """Create a compressor by name. Returns None if name is empty or
+        "NONE".
+        """
+        name = name.strip().upper()
+        if name in ("", "NONE"):
+            return None
+        elif name == "ZSTD":
+            from .zstd_compressor import ZstdCompressor
+
+            return ZstdCompressor()
+        elif name == "LZ4":
+            try:
+                from .lz4_compressor import LZ4Compressor
+            except ImportError as e:
+                raise ValueError(
+                    "LZ4 compression requires the lz4 package"
+                ) from e
+
+            return LZ4Compressor()
+        else:
+            raise ValueError(f"Unknown compressor: {name}")
@@ -0,0 +1,53 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import lz4.block
+
+from . import Marshaller
+from .compressor import Compressor
+
+
+class LZ4Compressor(Compressor):
+    """LZ4 block compressor. Trades compression ratio for speed.
+
+    The lz4 bindings only return new buffers, so compress_into and
+    decompress_into copy the output into dst once.
+    """
+
+    def __init__(self, marshaller: Marshaller | None = None) -> None:
+        super().__init__(marshaller)
+
+    @property
+    def signature(self) -> str:
+        return "l4"
+
+    def max_compressed_nbytes(self, nbytes: int) -> int:
+        # LZ4_COMPRESSBOUND plus the stored size prefix
+        return nbytes + nbytes // 255 + 16 + 4
+
+    def compress_into(self, src: memoryview, dst: memoryview) -> int:
+        data = lz4.block.compress(src, store_size=True)
+        dst[: len(data)] = data
+        return len(data)
+
+    def decompress_into(self, src: memoryview, dst: memoryview) -> int:
+        data = lz4.block.decompress(src)
+        dst[: len(data)] = data
+        return len(data)
+
+    def _marshal(self, data: bytes) -> bytes:
+        return lz4.block.compress(data, store_size=True)
+
+    def _unmarshal(self, data: bytes) -> bytes:
+        return lz4.block.decompress(data)
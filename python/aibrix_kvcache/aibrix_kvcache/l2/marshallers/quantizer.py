@@ -0,0 +1,228 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import torch
+
+from ...spec import KVCacheBlockSpec
+from . import Marshaller
+from .compressor import Compressor
+
+
+@dataclass
+class ReconstructionError:
+    """Reconstruction error of a quantizer.
+    Args:
+        max_abs: The max absolute error.
+        rmse: The root mean squared error.
+        rel_rmse: The rmse relative to the rms of the original values.
+    """
+
+    max_abs: float
+    rmse: float
+    rel_rmse: float
+
+
+class Quantizer(Compressor):
+    """Lossy quantizer of kv cache blocks.
+
+    It quantizes the kv tensors of a block to 8 bits with a scale per
+    (layer, k/v, head) if granularity is "HEAD" or a scale per block if
+    granularity is "BLOCK". The bytes following the kv tensors, e.g., the
+    token footer, are kept as is. A quantized block is laid out as
+    [float32 scales][8-bit values][trailing bytes].
+    """
+
+    INT8_MAX = 127.0
+    FP8_MAX = 448.0
+
+    def __init__(
+        self,
+        block_spec: KVCacheBlockSpec,
+        dtype: str = "INT8",
+        granularity: str = "HEAD",
+        marshaller: Marshaller | None = None,
+    ) -> None:
+        """Create a quantizer.
+        Args:
+            block_spec: The block spec.
+            dtype: The quantized dtype, "INT8" or "FP8".
+            granularity: The scale granularity, "HEAD" or "BLOCK".
+            marshaller: The next marshaller.
+        """
+        super().__init__(marshaller)
+        if not block_spec.block_dtype.is_floating_point:
+            raise ValueError(
+                f"Cannot quantize blocks of {block_spec.block_dtype}"
+            )
+        if dtype not in ("INT8", "FP8"):
+            raise ValueError(f"Unknown quantization dtype: {dtype}")
+        if granularity not in ("HEAD", "BLOCK"):
+            raise ValueError(f"Unknown quantization granularity: {granularity}")
+
+        self.block_spec = block_spec
+        self.dtype = dtype
+        self.granularity = granularity
+        self.block_nbytes = block_spec.block_nbytes
+        self.block_shape = block_spec.block_shape
+        self.numel = self.block_nbytes // block_spec.block_dtype.itemsize
+
+        if granularity == "HEAD":
+            # reduce over tokens and head_size
+            self.reduce_dims: Tuple[int, ...] = (
+                block_spec.block_shape_token_dim,
+                len(self.block_shape) - 1,
+            )
+            scale_shape = list(self.block_shape)
+            for dim in self.reduce_dims:
+                scale_shape[dim] = 1
+        else:
+            self.reduce_dims = tuple(range(len(self.block_shape)))
+            scale_shape = [1] * len(self.block_shape)
+        self.scale_shape: Tuple[int, ...] = tuple(scale_shape)
+        nscales = 1
+        for dim in self.scale_shape:
+            nscales *= dim
+        self.scales_nbytes = nscales * 4
+        self.quantized_nbytes = self.scales_nbytes + self.numel
+
+    @staticmethod
+    def from_spec(
+        name: str, block_spec: KVCacheBlockSpec, granularity: str = "HEAD"
+    ) -> "Quantizer | None":
+        """Create a quantizer by dtype name. Returns None if name is empty or
+        "NONE".
+        """
+        name = name.strip().upper()
+        if name in ("", "NONE"):
+            return None
+        return Quantizer(block_spec, name, granularity.strip().upper())
+
+    @property
+    def lossless(self) -> bool:
+        return False
+
+    @property
+    def signature(self) -> str:
+        dtype = "i8" if self.dtype == "INT8" else "f8"
+        return f"q{dtype}{self.granularity[0].lower()}"
+
+    def max_compressed_nbytes(self, nbytes: int) -> int:
+        assert nbytes >= self.block_nbytes
+        return nbytes - self.block_nbytes + self.quantized_nbytes
+
+    def compress_into(self, src: memoryview, dst: memoryview) -> int:
+        block = (
+            torch.frombuffer(src, dtype=torch.uint8, count=self.block_nbytes)
+            .view(self.block_spec.block_dtype)
+            .view(self.block_shape)
+            .float()
+        )
+        qmax = self.INT8_MAX if self.dtype == "INT8" else self.FP8_MAX
+        scales = block.abs().amax(dim=self.reduce_dims, keepdim=True) / qmax
+        scales[scales == 0] = 1.0
+        # float() of float32 blocks is a view of src, which must not be
+        # modified
+        scaled = block / scales
+
+        scales_out = torch.frombuffer(
+            dst, dtype=torch.float32, count=self.scales_nbytes // 4
+        )
+        scales_out.copy_(scales.view(-1))
+        values_out = torch.frombuffer(
+            dst,
+            dtype=torch.uint8,
+            count=self.numel,
+            offset=self.scales_nbytes,
+        )
+        if self.dtype == "INT8":
+            values_out.view(torch.int8).copy_(
+                scaled.round_().clamp_(-qmax, qmax).view(-1)
+            )
+        else:
+            values_out.view(torch.float8_e4m3fn).copy_(scaled.view(-1))
+
+        trailing = len(src) - self.block_nbytes
+        dst[self.quantized_nbytes : self.quantized_nbytes + trailing] = src[
+            self.block_nbytes :
+        ]
+        return self.quantized_nbytes + trailing
+
+    def decompress_into(self, src: memoryview, dst: memoryview) -> int:
+        scales = torch.frombuffer(
+            src, dtype=torch.float32, count=self.scales_nbytes // 4
+        ).view(self.scale_shape)
+        values = torch.frombuffer(
+            src,
+            dtype=torch.uint8,
+            count=self.numel,
+            offset=self.scales_nbytes,
+        )
+        if self.dtype == "INT8":
+            values = values.view(torch.int8)
+        else:
+            values = values.view(torch.float8_e4m3fn)
+        block = values.float().view(self.block_shape).mul_(scales)
+
+        out = torch.frombuffer(dst, dtype=torch.uint8, count=self.block_nbytes)
+        out.view(self.block_spec.block_dtype).view(self.block_shape).copy_(
+            block
+        )
+
+        trailing = len(src) - self.quantized_nbytes
+        dst[self.block_nbytes : self.block_nbytes + trailing] = src[
+            self.quantized_nbytes :
+        ]
+        return self.block_nbytes + trailing
+
+    def _marshal(self, data: bytes) -> bytes:
+        out = bytearray(self.max_compressed_nbytes(len(data)))
+        src = memoryview(bytearray(data))
+        nbytes = self.compress_into(src, memoryview(out))
+        return bytes(out[:nbytes])
+
+    def _unmarshal(self, data: bytes) -> bytes:
+        out = bytearray(len(data) - self.quantized_nbytes + self.block_nbytes)
+        src = memoryview(bytearray(data))
+        nbytes = self.decompress_into(src, memoryview(out))
+        return bytes(out[:nbytes])
+
+    def reconstruction_error(self, block: torch.Tensor) -> ReconstructionError:
+        """Quantize and dequantize a block and report the error. This is the
+        accuracy harness to check whether a quantizer is acceptable for a
+        model's kv cache.
+        Args:
+            block: A block of the block spec's shape and dtype.
+        Returns:
+            The reconstruction error.
+        """
+        assert block.shape == self.block_shape
+        src = block.detach().cpu().contiguous().view(torch.uint8).view(-1)
+        frame = bytearray(self.max_compressed_nbytes(self.block_nbytes))
+        self.compress_into(src.numpy().data, memoryview(frame))
+        out = torch.empty_like(src)
+        self.decompress_into(memoryview(frame), out.numpy().data)
+
+        expected = block.detach().cpu().float()
+        actual = out.view(block.dtype).view(self.block_shape).float()
+        diff = actual - expected
+        rmse = diff.square().mean().sqrt().item()
+        rms = expected.square().mean().sqrt().item()
+        return ReconstructionError(
+            max_abs=diff.abs().max().item(),
+            rmse=rmse,
+            rel_rmse=rmse / rms if rms > 0 else 0.0,
+        )
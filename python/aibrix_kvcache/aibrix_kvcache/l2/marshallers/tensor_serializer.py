@@ -12,60 +12,89 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import io
 import struct
-from typing import Tuple
+from typing import Sequence, Tuple
 
+import numpy as np
 import torch
 
 from ...cache_hashable import TokenListView
-from ...utils import tensor_to_bytes
 from . import BaseMarshaller, Marshaller
 
+INT_NBYTES = struct.calcsize("i")
+
 
 class TensorSerializer(BaseMarshaller):
+    """Serializes a tensor with optional indices as
+    [num_indices][indices...][tensor bytes]. The tensor bytes are copied once
+    into the output buffer and unmarshalled tensors are views of the input.
+    """
+
     def __init__(self, marshaller: Marshaller | None = None) -> None:
         super().__init__(marshaller)
 
+    @staticmethod
+    def _split(
+        obj: torch.Tensor | Tuple[TokenListView, torch.Tensor],
+    ) -> Tuple[Sequence[int] | TokenListView, torch.Tensor]:
+        if isinstance(obj, torch.Tensor):
+            return (), obj
+        return obj
+
+    def nbytes(
+        self, obj: torch.Tensor | Tuple[TokenListView, torch.Tensor]
+    ) -> int:
+        """The size of the serialized obj."""
+        indices, tensor = self._split(obj)
+        return (
+            INT_NBYTES * (1 + len(indices))
+            + tensor.numel() * tensor.element_size()
+        )
+
+    def marshal_into(
+        self,
+        obj: torch.Tensor | Tuple[TokenListView, torch.Tensor],
+        dst: memoryview,
+    ) -> int:
+        """Serialize obj into a preallocated buffer of at least
+        `nbytes(obj)` bytes.
+        Returns:
+            The number of bytes written to dst.
+        """
+        indices, tensor = self._split(obj)
+        # 0 indicates no indices, non-zero indicates we have indices before
+        # tensor bytes
+        struct.pack_into(f"{1 + len(indices)}i", dst, 0, len(indices), *indices)
+        offset = INT_NBYTES * (1 + len(indices))
+
+        if tensor.is_cuda:
+            tensor = tensor.cpu()
+        src = tensor.contiguous().view(torch.uint8).reshape(-1).numpy()
+        np.copyto(
+            np.frombuffer(dst, dtype=np.uint8, count=src.size, offset=offset),
+            src,
+        )
+        return offset + src.size
+
     def _marshal(
         self, obj: torch.Tensor | Tuple[TokenListView, torch.Tensor]
-    ) -> bytes:
-        buffer = io.BytesIO()
-        if isinstance(obj, torch.Tensor):
-            # 0 indicates no indices
-            buffer.write(struct.pack("i", 0))
-            buffer.write(tensor_to_bytes(obj))
-        else:
-            indices, tensor = obj
-            # non-zero indicates we have indices before tensor bytes
-            buffer.write(struct.pack("i", len(indices)))
-            for index in indices:
-                buffer.write(struct.pack("i", index))
-            buffer.write(tensor_to_bytes(tensor))
-        return buffer.getvalue()
+    ) -> bytearray:
+        buffer = bytearray(self.nbytes(obj))
+        self.marshal_into(obj, memoryview(buffer))
+        return buffer
 
     def _unmarshal(
         self, data: bytes
     ) -> torch.Tensor | Tuple[TokenListView, torch.Tensor]:
-        buffer = io.BytesIO(data)
-        have_indices = struct.unpack("i", buffer.read(4))[0]
+        have_indices = struct.unpack_from("i", data)[0]
+        offset = INT_NBYTES * (1 + have_indices)
+        tensor = torch.frombuffer(data, dtype=torch.uint8, offset=offset)
+        setattr(tensor, "__kv_cache_offloading_data_ref", data)
 
         if have_indices == 0:
-            tensor = torch.frombuffer(
-                buffer.read(),
-                dtype=torch.uint8,
-            )
-            setattr(tensor, "__kv_cache_offloading_data_ref", data)
             return tensor
         else:
-            length_of_indices = have_indices
-            indices = [
-                struct.unpack("i", buffer.read(4))[0]
-                for _ in range(length_of_indices)
-            ]
-            tensor = torch.frombuffer(
-                buffer.read(),
-                dtype=torch.uint8,
+            indices = list(
+                struct.unpack_from(f"{have_indices}i", data, INT_NBYTES)
             )
-            setattr(tensor, "__kv_cache_offloading_data_ref", data)
-            return (indices, tensor)
+            return (indices, tensor)  # type: ignore[return-value]
@@ -12,16 +12,65 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 import zstandard
 
-from . import BaseMarshaller, Marshaller
+from . import Marshaller
+from .compressor import Compressor
 
 
-class ZstdCompressor(BaseMarshaller):
-    def __init__(self, marshaller: Marshaller | None = None) -> None:
+class ZstdCompressor(Compressor):
+    def __init__(
+        self, marshaller: Marshaller | None = None, level: int = 3
+    ) -> None:
         super().__init__(marshaller)
-        self.compressor = zstandard.ZstdCompressor()
-        self.decompressor = zstandard.ZstdDecompressor()
+        self.level = level
+        # zstd contexts must not be shared by concurrent threads
+        self._local = threading.local()
+
+    @property
+    def compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self._local.compressor
+
+    @property
+    def decompressor(self) -> zstandard.ZstdDecompressor:
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor
+
+    @property
+    def signature(self) -> str:
+        return "zs"
+
+    def max_compressed_nbytes(self, nbytes: int) -> int:
+        # ZSTD_COMPRESSBOUND
+        margin = ((128 << 10) - nbytes) >> 11 if nbytes < (128 << 10) else 0
+        return nbytes + (nbytes >> 8) + margin
+
+    def compress_into(self, src: memoryview, dst: memoryview) -> int:
+        # compress directly into dst
+        reader = self.compressor.stream_reader(src, size=len(src))
+        nbytes = 0
+        while nbytes < len(dst):
+            n = reader.readinto(dst[nbytes:])
+            if n == 0:
+                break
+            nbytes += n
+        return nbytes
+
+    def decompress_into(self, src: memoryview, dst: memoryview) -> int:
+        # decompress directly into dst
+        reader = self.decompressor.stream_reader(src)
+        nbytes = 0
+        while nbytes < len(dst):
+            n = reader.readinto(dst[nbytes:])
+            if n == 0:
+                break
+            nbytes += n
+        return nbytes
 
     def _marshal(self, data: bytes) -> bytes:
         return self.compressor.compress(data)
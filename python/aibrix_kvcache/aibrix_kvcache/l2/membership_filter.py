@@ -0,0 +1,412 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import threading
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import torch
+from farmhash import FarmHash64
+
+from ..common.absl_logging import getLogger
+from ..memory import MemoryRegion
+from ..metrics import L2CacheMetrics
+from ..status import Status, StatusCodes
+from .connectors import (
+    Connector,
+    ConnectorFeature,
+    ConnectorZeroCopyMemoryRegion,
+)
+from .placement import BasePlacement
+
+logger = getLogger(__name__)
+
+
+class CountingBloomFilter:
+    """Counting Bloom filter of byte string keys.
+
+    It answers whether a key may be in the set without false negatives, and
+    supports removals with 8-bit saturating counters. The number of counters
+    and hash functions are derived from the expected number of keys and the
+    target false positive rate.
+    """
+
+    MAX_COUNT = 255
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01) -> None:
+        """Create a counting Bloom filter.
+        Args:
+            capacity: The expected number of keys.
+            fp_rate: The target false positive rate at capacity.
+        """
+        assert capacity > 0, "capacity must be positive"
+        assert 0 < fp_rate < 1, "fp_rate must be in (0, 1)"
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_counters = max(
+            64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(
+            1, round(self.num_counters / capacity * math.log(2))
+        )
+        self._counters = np.zeros(self.num_counters, dtype=np.uint8)
+        self._size = 0
+
+    def __len__(self) -> int:
+        """The number of keys added and not removed."""
+        return self._size
+
+    def _indices(self, key: bytes) -> List[int]:
+        # double hashing with the two halves of a 64-bit hash
+        h = FarmHash64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        m = self.num_counters
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key: bytes) -> None:
+        counters = self._counters
+        for i in self._indices(key):
+            if counters[i] < self.MAX_COUNT:
+                counters[i] += 1
+        self._size += 1
+
+    def remove(self, key: bytes) -> bool:
+        """Remove a key that was added before. Removing a key that was never
+        added may introduce false negatives. Keys that share a saturated
+        counter are kept, since their counts are unknown.
+        Returns:
+            False if the key is definitely not in the filter.
+        """
+        indices = self._indices(key)
+        counters = self._counters
+        if any(counters[i] == 0 for i in indices):
+            return False
+        if any(counters[i] == self.MAX_COUNT for i in indices):
+            return True
+        for i in indices:
+            counters[i] -= 1
+        self._size -= 1
+        return True
+
+    def may_contain(self, key: bytes) -> bool:
+        counters = self._counters
+        return all(counters[i] > 0 for i in self._indices(key))
+
+    def clear(self) -> None:
+        self._counters.fill(0)
+        self._size = 0
+
+    @property
+    def expected_fp_rate(self) -> float:
+        """The false positive rate expected at the current number of keys."""
+        k, m = self.num_hashes, self.num_counters
+        return (1 - math.exp(-k * self._size / m)) ** k
+
+
+class FilteredConnector(Connector[bytes, torch.Tensor]):
+    """A connector that short-circuits definite misses with a local counting
+    Bloom filter in front of another connector.
+
+    The filter is populated by this node's puts and rebuilt from the keys
+    scanned from the backend, when the filter is opened, every refresh
+    interval, and whenever the placement topology changes. Until a rebuild
+    succeeds after a topology change, all lookups go to the backend. The
+    backend must support scanning its keys, otherwise the filter would miss
+    keys put by other writers.
+    """
+
+    def __init__(
+        self,
+        conn: Connector,
+        capacity: int,
+        fp_rate: float = 0.01,
+        refresh_interval_s: int = 0,
+    ) -> None:
+        """Create a filtered connector.
+        Args:
+            conn: The backend connector.
+            capacity: The expected number of keys of the filter.
+            fp_rate: The target false positive rate of the filter.
+            refresh_interval_s: The interval to rebuild the filter from the
+                backend's keys, 0 to rebuild only on topology changes.
+        """
+        self.conn = conn
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.refresh_interval_s = refresh_interval_s
+        self.num_rebuilds = 0
+        self._filter = CountingBloomFilter(capacity, fp_rate)
+        # filter being rebuilt, which also receives the concurrent adds but
+        # not the removals, since the scan may not have added the key yet
+        self._building: CountingBloomFilter | None = None
+        self._valid = True
+        self._lock = threading.Lock()
+        self._metrics: L2CacheMetrics | None = None
+        self._refresh_thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._refresh_event = threading.Event()
+
+        if isinstance(conn, BasePlacement):
+            conn.add_members_listener(self.invalidate)
+
+    @classmethod
+    def from_envs(cls, conn_id: str, executor: Executor, **kwargs):
+        """An abstract method of Connector that is discarded"""
+        raise NotImplementedError
+
+    @property
+    def name(self) -> str:
+        return self.conn.name
+
+    @property
+    def feature(self) -> ConnectorFeature:
+        return self.conn.feature
+
+    @property
+    def valid(self) -> bool:
+        """Whether lookups are answered by the filter."""
+        return self._valid
+
+    def open(self) -> Status:
+        status = self.conn.open()
+        if not status.is_ok():
+            return status
+        if not self.conn.feature.scan_keys:
+            self.conn.close()
+            return Status(
+                StatusCodes.INVALID,
+                f"{self.conn.name} does not support scanning keys, please "
+                "unset AIBRIX_KV_CACHE_OL_L2_CACHE_FILTER_CAPACITY",
+            )
+        status = self.rebuild()
+        if not status.is_ok():
+            return status
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._background_refresh,
+            daemon=True,
+            name="FilterRefreshThread",
+        )
+        self._refresh_thread.start()
+        return Status.ok()
+
+    def close(self) -> Status:
+        if self._refresh_thread is not None:
+            self._stop_event.set()
+            self._refresh_event.set()
+            self._refresh_thread.join()
+            self._refresh_thread = None
+        return self.conn.close()
+
+    def _background_refresh(self) -> None:
+        timeout = self.refresh_interval_s or None
+        while not self._stop_event.is_set():
+            self._refresh_event.wait(timeout)
+            self._refresh_event.clear()
+            if self._stop_event.is_set():
+                break
+            status = self.rebuild()
+            if not status.is_ok():
+                logger.warning("Failed to rebuild filter: %s", status)
+
+    def invalidate(self) -> None:
+        """Bypass the filter until it is rebuilt, e.g., after the placement
+        topology changed.
+        """
+        self._valid = False
+        if self._refresh_thread is not None:
+            self._refresh_event.set()
+        else:
+            logger.warning(
+                "%s does not support scanning keys, the filter stays "
+                "disabled after the topology change.",
+                self.conn.name,
+            )
+
+    @Status.capture_exception
+    def rebuild(self) -> Status:
+        """Rebuild the filter from the keys scanned from the backend."""
+        building = CountingBloomFilter(self.capacity, self.fp_rate)
+        with self._lock:
+            self._building = building
+        try:
+            for key in self.conn.scan_keys():
+                with self._lock:
+                    building.add(key)
+        except Exception:
+            with self._lock:
+                self._building = None
+            raise
+
+        with self._lock:
+            self._filter = building
+            self._building = None
+            self._valid = True
+        self.num_rebuilds += 1
+        if len(building) > self.capacity:
+            logger.warning(
+                "Filter holds %d keys over its capacity %d, false positive "
+                "rate is %.4f.",
+                len(building),
+                self.capacity,
+                building.expected_fp_rate,
+            )
+        return Status.ok()
+
+    def _add(self, keys: Iterable[bytes]) -> None:
+        with self._lock:
+            for key in keys:
+                self._filter.add(key)
+                if self._building is not None:
+                    self._building.add(key)
+
+    def _remove(self, key: bytes) -> None:
+        with self._lock:
+            self._filter.remove(key)
+
+    def _may_contain(self, keys: Sequence[bytes]) -> List[bool]:
+        if not self._valid:
+            return [True] * len(keys)
+        with self._lock:
+            return [self._filter.may_contain(key) for key in keys]
+
+    def _trace(self, maybe: Sequence[bool], statuses: Sequence[Status]) -> None:
+        if self._metrics is None or not self._valid:
+            return
+        num_negatives = maybe.count(False)
+        num_false_positives = sum(
+            1
+            for m, status in zip(maybe, statuses)
+            if m and status.is_not_found()
+        )
+        self._metrics.trace_filter(
+            len(maybe), num_negatives, num_false_positives
+        )
+
+    def set_metrics(self, metrics: L2CacheMetrics) -> None:
+        self._metrics = metrics
+        self.conn.set_metrics(metrics)
+
+    async def prefetch(self, keys: Sequence[bytes]) -> None:
+        maybe = self._may_contain(keys)
+        await self.conn.prefetch([k for k, m in zip(keys, maybe) if m])
+
+    async def exists(self, key: bytes) -> Status:
+        maybe = self._may_contain([key])
+        status: Status
+        if not maybe[0]:
+            status = Status(StatusCodes.NOT_FOUND)
+        else:
+            status = await self.conn.exists(key)
+        self._trace(maybe, [status])
+        return status
+
+    async def get(
+        self, key: bytes, mr: MemoryRegion | Sequence[MemoryRegion]
+    ) -> Status:
+        maybe = self._may_contain([key])
+        status: Status
+        if not maybe[0]:
+            status = Status(StatusCodes.NOT_FOUND)
+        else:
+            status = await self.conn.get(key, mr)
+        self._trace(maybe, [status])
+        return status
+
+    async def put(
+        self, key: bytes, mr: MemoryRegion | Sequence[MemoryRegion]
+    ) -> Status:
+        status = await self.conn.put(key, mr)
+        if status.is_ok():
+            self._add([key])
+        return status
+
+    def register_slabs(self, slabs: List[torch.Tensor]) -> Status:
+        return self.conn.register_slabs(slabs)
+
+    def get_batches(
+        self,
+        keys: Sequence[bytes],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+        batch_size: int,
+    ) -> Sequence[
+        Sequence[Tuple[bytes, MemoryRegion | Sequence[MemoryRegion]]]
+    ]:
+        return self.conn.get_batches(keys, mrs, batch_size)
+
+    async def mget(
+        self,
+        keys: Sequence[bytes],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+    ) -> Sequence[Status]:
+        maybe = self._may_contain(keys)
+        statuses: List[Status] = [Status(StatusCodes.NOT_FOUND)] * len(keys)
+        indices = [i for i, m in enumerate(maybe) if m]
+        if len(indices) > 0:
+            results = await self.conn.mget(
+                [keys[i] for i in indices], [mrs[i] for i in indices]
+            )
+            for i, status in zip(indices, results):
+                statuses[i] = status
+        self._trace(maybe, statuses)
+        return statuses
+
+    async def mput(
+        self,
+        keys: Sequence[bytes],
+        mrs: Sequence[MemoryRegion | Sequence[MemoryRegion]],
+    ) -> Sequence[Status]:
+        statuses = await self.conn.mput(keys, mrs)
+        self._add(key for key, s in zip(keys, statuses) if s.is_ok())
+        return statuses
+
+    def scan_keys(self) -> Iterator[bytes]:
+        return self.conn.scan_keys()
+
+    async def delete(self, key: bytes) -> Status:
+        status = await self.conn.delete(key)
+        if status.is_ok():
+            self._remove(key)
+        return status
+
+    async def allocate(
+        self, key: bytes, length: int
+    ) -> Status[ConnectorZeroCopyMemoryRegion]:
+        status = await self.conn.allocate(key, length)
+        if status.is_ok():
+            # the key may be sealed later, false positives are fine
+            self._add([key])
+        return status
+
+    async def seal(self, mr: ConnectorZeroCopyMemoryRegion) -> None:
+        await self.conn.seal(mr)
+
+    async def drop(self, mr: ConnectorZeroCopyMemoryRegion) -> None:
+        await self.conn.drop(mr)
+
+    async def acquire(
+        self, key: bytes
+    ) -> Status[ConnectorZeroCopyMemoryRegion]:
+        maybe = self._may_contain([key])
+        if not maybe[0]:
+            status: Status = Status(StatusCodes.NOT_FOUND)
+        else:
+            status = await self.conn.acquire(key)
+        self._trace(maybe, [status])
+        return status
+
+    async def release(self, mr: ConnectorZeroCopyMemoryRegion) -> None:
+        await self.conn.release(mr)
@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .consistent_hash_placement import ConsistentHashPlacement
 from .placement import BasePlacement, Member, Placement, PlacementConfig
 from .simple_placement import SimplePlacement
 
 __all__ = [
     "BasePlacement",
+    "ConsistentHashPlacement",
     "SimplePlacement",
     "Member",
     "Placement",
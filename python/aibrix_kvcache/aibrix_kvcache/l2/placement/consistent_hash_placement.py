@@ -0,0 +1,129 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+from bisect import bisect_left
+from typing import List, Tuple, TypeVar
+
+from farmhash import FarmHash64
+
+from ...common.absl_logging import getLogger
+from ...status import Status, StatusCodes
+from .placement import BasePlacement, Member, PlacementConfig
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+logger = getLogger(__name__)
+
+HASH_SPACE = 1 << 64
+
+
+class ConsistentHashPlacement(BasePlacement[K, V]):
+    """Placement based on a consistent-hash ring with virtual nodes.
+
+    Each member owns `VNODES_PER_MEMBER` points on a 64-bit ring and a key is
+    routed to the owner of the first point at or after the key's hash. Adding
+    or removing one of N members only remaps about 1/N of the keys, whereas
+    `SimplePlacement` remaps most of them. Slot ranges in the cluster meta are
+    not used for routing.
+    """
+
+    VNODES_PER_MEMBER = 256
+
+    def __init__(self, *, config: PlacementConfig):
+        super().__init__(config=config)
+        self.hash_fn = FarmHash64
+        # Sorted points on the ring and their owners. Membership updates
+        # run on the refresh thread, hence both are published as one tuple
+        # and never mutated, s.t. a reader always sees a consistent pair.
+        self.ring: Tuple[List[int], List[Member]] = ([], [])
+        # Fraction of the key space that moved on the last membership update
+        self.last_moved_fraction: float = 0.0
+
+    def select(self, key: K) -> Status[Member]:
+        """Select a member for the given key"""
+        points, owners = self.ring
+        if len(points) == 0:
+            return Status(StatusCodes.NOT_FOUND, "No members in the cluster")
+        idx = bisect_left(points, self.hash_fn(key))
+        if idx == len(points):
+            idx = 0
+        return Status.ok(owners[idx])
+
+    def select_replicas(self, key: K, n: int) -> Status[List[Member]]:
+        """Select the first n distinct members clockwise from the key's
+        hash.
+        """
+        points, owners = self.ring
+        if len(points) == 0:
+            return Status(StatusCodes.NOT_FOUND, "No members in the cluster")
+        idx = bisect_left(points, self.hash_fn(key))
+        n = min(n, len(points) // self.VNODES_PER_MEMBER)
+        replicas: List[Member] = []
+        for i in range(len(points)):
+            member = owners[(idx + i) % len(points)]
+            if member not in replicas:
+                replicas.append(member)
+                if len(replicas) == n:
+                    break
+        return Status.ok(replicas)
+
+    def _on_members_updated(self, members: List[Member]) -> None:
+        old_points, old_owners = self.ring
+        points, owners = self._build_ring(members)
+        if len(old_points) > 0:
+            self.last_moved_fraction = self._moved_fraction(
+                old_points, old_owners, points, owners
+            )
+            logger.info(
+                "Cluster update remaps %.2f%% of the keys",
+                self.last_moved_fraction * 100,
+            )
+        self.ring = (points, owners)
+
+    def _build_ring(
+        self, members: List[Member]
+    ) -> Tuple[List[int], List[Member]]:
+        ring = []
+        for member in members:
+            name = json.dumps(member.meta, sort_keys=True)
+            for i in range(self.VNODES_PER_MEMBER):
+                ring.append((self.hash_fn(f"{name}#{i}"), member))
+        ring.sort(key=lambda x: x[0])
+        return [p for p, _ in ring], [m for _, m in ring]
+
+    @staticmethod
+    def _moved_fraction(
+        old_points: List[int],
+        old_owners: List[Member],
+        new_points: List[int],
+        new_owners: List[Member],
+    ) -> float:
+        """Fraction of the hash space whose owner differs between two rings."""
+
+        def owner(points: List[int], owners: List[Member], h: int) -> Member:
+            idx = bisect_left(points, h)
+            return owners[idx if idx < len(points) else 0]
+
+        boundaries = sorted(set(old_points) | set(new_points))
+        moved = 0
+        prev = boundaries[-1] - HASH_SPACE
+        for point in boundaries:
+            # all hashes in (prev, point] share the same owners
+            if owner(old_points, old_owners, point) != owner(
+                new_points, new_owners, point
+            ):
+                moved += point - prev
+            prev = point
+        return moved / HASH_SPACE
@@ -11,11 +11,25 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import json
 import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Dict, List, Sequence, Tuple, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import torch
 from sortedcontainers import SortedList
@@ -67,6 +81,11 @@ class PlacementConfig:
     conn_config: ConnectorConfig
     meta_service: MetaService | None = None
     refresh_interval_s: int = 0
+    # Number of members each key is written to
+    replication_factor: int = 1
+    # Percentile of get latencies after which a hedged get is sent to the
+    # next replica
+    hedge_percentile: float = 95.0
 
 
 class Placement(Connector[K, V]):
@@ -77,6 +96,10 @@ class Placement(Connector[K, V]):
             from .simple_placement import SimplePlacement
 
             return SimplePlacement(config=config)
+        elif config.placement_policy == "CONSISTENT_HASH":
+            from .consistent_hash_placement import ConsistentHashPlacement
+
+            return ConsistentHashPlacement(config=config)
         else:
             raise ValueError(
                 f"Unknown placement policy: {config.placement_policy}"
@@ -92,8 +115,36 @@ class Placement(Connector[K, V]):
         """Select a member from the cluster"""
         raise NotImplementedError()
 
+    @abstractmethod
+    def select_replicas(self, key: K, n: int) -> Status[List[Member]]:
+        """Select up to n distinct members from the cluster, the first of
+        which is the one returned by select.
+        """
+        raise NotImplementedError()
+
 
 class BasePlacement(Placement[K, V]):
+    """Base placement that routes each op to the selected member.
+
+    If the replication factor R is greater than 1, put and delete go to R
+    members and exists goes to all of them concurrently, while get goes to
+    the replica with the lowest latency EWMA. A get that takes longer than
+    the hedge percentile of recent get latencies is hedged to the next
+    replica, and the first successful response wins. Connector ops cannot
+    be interrupted once they started writing into the MRs, so the get
+    returns after the losers complete. Zero-copy ops are always routed to
+    a single member.
+    """
+
+    # Smoothing factor of the per-member latency EWMAs
+    LATENCY_EWMA_ALPHA = 0.2
+    # Latency charged to a member whose op failed
+    ERROR_PENALTY_S = 1.0
+    # Number of recent get latencies used to derive the hedge delay
+    HEDGE_WINDOW_SIZE = 1024
+    # Number of samples between two updates of the hedge delay
+    HEDGE_UPDATE_INTERVAL = 64
+
     def __init__(self, *, config: PlacementConfig):
         self.lock: threading.Lock = threading.Lock()
         self.members: List[Member] = []  # List of Member objects
@@ -109,6 +160,16 @@ class BasePlacement(Placement[K, V]):
         self._stop_event = threading.Event()
         self._slabs: List[torch.Tensor] | None = None
 
+        self.replication_factor = max(1, config.replication_factor)
+        self.hedge_percentile = config.hedge_percentile
+        self.num_hedged_gets = 0
+        self._latency_ewma: Dict[Tuple, float] = {}
+        self._get_latencies: Deque[float] = deque(maxlen=self.HEDGE_WINDOW_SIZE)
+        self._hedge_delay_s: float | None = None
+        # Exists ops that are still running after their exists returned
+        self._stragglers: Set[asyncio.Task] = set()
+        self._members_listeners: List[Callable[[], None]] = []
+
     @property
     def name(self) -> str:
         return f"{self.conn_config.backend_name}[{self._name}]"
@@ -276,6 +337,10 @@ class BasePlacement(Placement[K, V]):
                     self.conn_feature = [
                         m.conn for m in temp_members if m.conn
                     ][0].feature
+                    self._on_members_updated(temp_members)
+
+                for listener in self._members_listeners:
+                    listener()
 
                 for member in members_to_close:
                     logger.info("Closing connection to %s", member.meta)
@@ -295,6 +360,38 @@ class BasePlacement(Placement[K, V]):
             )
         return Status.ok()
 
+    def select_replicas(self, key: K, n: int) -> Status[List[Member]]:
+        """Select the member of the key and its successors in the member
+        list.
+        """
+        status = self.select(key)
+        if not status.is_ok():
+            return Status(status)
+        primary = status.get()
+        members = self.members
+        replicas = [primary]
+        if n > 1 and len(members) > 1:
+            start = members.index(primary)
+            for i in range(1, min(n, len(members))):
+                replicas.append(members[(start + i) % len(members)])
+        return Status.ok(replicas)
+
+    def _on_members_updated(self, members: List[Member]) -> None:
+        """Hook invoked with the lock held after the members are updated."""
+        pass
+
+    def add_members_listener(self, listener: Callable[[], None]) -> None:
+        """Add a listener invoked after the members are updated, e.g., to
+        invalidate state derived from the cluster topology.
+        """
+        self._members_listeners.append(listener)
+
+    def scan_keys(self) -> Iterator[K]:
+        with self.lock:
+            conns = [m.conn for m in self.members if m.conn is not None]
+        for conn in conns:
+            yield from conn.scan_keys()
+
     async def _forward(self, method: str, key: K, *args, **kwargs) -> Any:
         """Generic forwarder: select member by key and call connector.method."""
         status = self.select(key)
@@ -318,9 +415,153 @@ class BasePlacement(Placement[K, V]):
             return _wrapper
         raise AttributeError(name)
 
+    def _select_connected_replicas(self, key: K) -> Status[List[Member]]:
+        status = self.select_replicas(key, self.replication_factor)
+        if not status.is_ok():
+            return Status(status)
+        replicas = [m for m in status.get() if m.conn is not None]
+        if len(replicas) == 0:
+            return Status(StatusCodes.ERROR, "Connection not established")
+        return Status.ok(replicas)
+
+    def _sort_by_latency(self, members: List[Member]) -> List[Member]:
+        # members without any sample are tried first to explore them
+        return sorted(
+            members, key=lambda m: self._latency_ewma.get(m.hashable_meta, 0.0)
+        )
+
+    def _record_latency(
+        self, member: Member, method: str, latency_s: float, status: Status
+    ) -> None:
+        if not status.is_ok() and not status.is_not_found():
+            latency_s = max(latency_s, self.ERROR_PENALTY_S)
+        ewma = self._latency_ewma.get(member.hashable_meta)
+        if ewma is None:
+            ewma = latency_s
+        else:
+            alpha = self.LATENCY_EWMA_ALPHA
+            ewma = alpha * latency_s + (1 - alpha) * ewma
+        self._latency_ewma[member.hashable_meta] = ewma
+
+        if method == "get" and status.is_ok():
+            self._get_latencies.append(latency_s)
+            if len(self._get_latencies) % self.HEDGE_UPDATE_INTERVAL == 0:
+                latencies = sorted(self._get_latencies)
+                idx = int(len(latencies) * self.hedge_percentile / 100)
+                self._hedge_delay_s = latencies[min(idx, len(latencies) - 1)]
+
+    async def _timed_call(
+        self, member: Member, method: str, key: K, *args
+    ) -> Status:
+        start = time.perf_counter()
+        try:
+            status = await getattr(member.conn, method)(key, *args)
+        except Exception as e:
+            status = Status(StatusCodes.ERROR, e)
+        latency_s = time.perf_counter() - start
+        self._record_latency(member, method, latency_s, status)
+        return status
+
+    async def _replicated_get(
+        self, key: K, mr: MemoryRegion | Sequence[MemoryRegion]
+    ) -> Status:
+        status = self._select_connected_replicas(key)
+        if not status.is_ok():
+            return Status(status)
+        candidates = iter(self._sort_by_latency(status.get()))
+        num_candidates = len(status.get())
+        pending: Set[asyncio.Task] = set()
+        result: Status = Status(StatusCodes.NOT_FOUND)
+
+        def launch() -> None:
+            nonlocal num_candidates
+            member = next(candidates, None)
+            if member is not None:
+                num_candidates -= 1
+                pending.add(
+                    asyncio.create_task(
+                        self._timed_call(member, "get", key, mr)
+                    )
+                )
+
+        launch()
+        while len(pending) > 0:
+            timeout = self._hedge_delay_s if num_candidates > 0 else None
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if len(done) == 0:
+                # the slowest replicas are stalled, send a hedged request
+                self.num_hedged_gets += 1
+                launch()
+                continue
+
+            for task in done:
+                pending.remove(task)
+                task_status = task.result()
+                if task_status.is_ok():
+                    if len(pending) > 0:
+                        # the losers are still writing into the MRs, which
+                        # must not be handed over to the caller before they
+                        # complete
+                        await asyncio.wait(pending)
+                    return task_status
+                result = task_status
+            # fail over to the next replica
+            launch()
+        return result
+
+    def _detach_stragglers(self, tasks: Set[asyncio.Task]) -> None:
+        """Keep references to ops that are still running after their op
+        returned, so that they are not garbage collected.
+        """
+        for task in tasks:
+            self._stragglers.add(task)
+            task.add_done_callback(self._stragglers.discard)
+
+    async def _replicated_write(self, method: str, key: K, *args) -> Status:
+        status = self._select_connected_replicas(key)
+        if not status.is_ok():
+            return Status(status)
+        statuses = await asyncio.gather(
+            *(
+                self._timed_call(member, method, key, *args)
+                for member in status.get()
+            )
+        )
+        # succeed as long as one replica succeeds
+        for s in statuses:
+            if s.is_ok():
+                return s
+        return statuses[0]
+
     async def exists(self, key: K) -> Status:
         """Check if key is in the store."""
-        return await self._forward("exists", key)
+        if self.replication_factor <= 1:
+            return await self._forward("exists", key)
+
+        status = self._select_connected_replicas(key)
+        if not status.is_ok():
+            return Status(status)
+        pending = {
+            asyncio.create_task(self._timed_call(member, "exists", key))
+            for member in status.get()
+        }
+        result: Status = Status(StatusCodes.NOT_FOUND)
+        while len(pending) > 0:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task_status = task.result()
+                if task_status.is_ok():
+                    # the others only update the latency stats
+                    self._detach_stragglers(pending)
+                    return task_status
+                if result.is_not_found():
+                    # errors take precedence over misses
+                    result = task_status
+        return result
 
     async def get(
         self, key: K, mr: MemoryRegion | Sequence[MemoryRegion]
@@ -332,7 +573,9 @@ class BasePlacement(Placement[K, V]):
         Returns:
             The status of the get operation.
         """
-        return await self._forward("get", key, mr)
+        if self.replication_factor <= 1:
+            return await self._forward("get", key, mr)
+        return await self._replicated_get(key, mr)
 
     async def put(
         self, key: K, mr: MemoryRegion | Sequence[MemoryRegion]
@@ -344,7 +587,9 @@ class BasePlacement(Placement[K, V]):
         Returns:
             The status of the put operation.
         """
-        return await self._forward("put", key, mr)
+        if self.replication_factor <= 1:
+            return await self._forward("put", key, mr)
+        return await self._replicated_write("put", key, mr)
 
     def register_slabs(self, slabs: List[torch.Tensor]) -> Status:
         """Register slabs with backend-specific register function.
@@ -425,4 +670,6 @@ class BasePlacement(Placement[K, V]):
         Returns:
             The status of the delete operation.
         """
-        return await self._forward("delete", key)
+        if self.replication_factor <= 1:
+            return await self._forward("delete", key)
+        return await self._replicated_write("delete", key)
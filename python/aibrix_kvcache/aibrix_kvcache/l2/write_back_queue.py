@@ -0,0 +1,309 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence, Set, Tuple
+
+from ..cache_handle import KVCacheHandle
+from ..cache_hashable import KVCacheKeyTypes
+from ..common.absl_logging import getLogger, log_every_n_seconds
+from ..memory import MemoryRegion
+from ..metrics import WriteBackMetrics
+from ..status import Status, StatusCodes
+from .l2_cache import L2Cache
+
+logger = getLogger(__name__)
+
+KVTensors = MemoryRegion | Sequence[MemoryRegion] | KVCacheHandle
+
+
+@dataclass(order=True)
+class _WriteBackEntry:
+    priority: Tuple[int, int, int]
+    prefix: KVCacheKeyTypes | None = field(compare=False)
+    query: KVCacheKeyTypes = field(compare=False)
+    value: KVTensors = field(compare=False)
+    nblocks: int = field(compare=False)
+    nbytes: int = field(compare=False)
+
+
+class L2WriteBackQueue:
+    """Coalesces L2Cache puts of many callers into batched writes.
+
+    Puts are queued and drained on the L2Cache event loop in batches of up
+    to `max_batch_nblocks` blocks and `max_batch_nbytes` bytes, so blocks
+    of different sequences share backend ops. Hot blocks are drained
+    first, then blocks with shorter prefixes, since they are shared by
+    more sequences and a lookup stops at the first missing block.
+
+    Queued and inflight blocks hold their MRs, so their number is bounded
+    by `capacity_nblocks`. A put to a full queue blocks its caller for up
+    to `timeout_s` seconds for the queue to drain, and is dropped after
+    that. Callers that must not block, e.g., L1 cache callbacks running
+    with a shard lock held, pass a zero timeout to drop right away.
+    """
+
+    def __init__(
+        self,
+        l2_cache: L2Cache,
+        event_loop: asyncio.AbstractEventLoop,
+        *,
+        capacity_nblocks: int,
+        max_batch_nblocks: int,
+        max_batch_nbytes: int,
+        max_inflight_batches: int,
+        timeout_s: float,
+        on_done: Callable[[KVTensors], None],
+        metrics: WriteBackMetrics | None = None,
+    ) -> None:
+        """Create a write-back queue.
+        Args:
+            l2_cache: The L2Cache to write to.
+            event_loop: The event loop carrying out L2Cache ops.
+            capacity_nblocks: The max number of queued and inflight blocks.
+            max_batch_nblocks: The max number of blocks in a batch.
+            max_batch_nbytes: The max number of bytes in a batch.
+            max_inflight_batches: The max number of inflight batches.
+            timeout_s: How long a put waits for a full queue to drain.
+            on_done: The callback to release the kv tensors once written
+                     or dropped.
+            metrics: The write-back metrics.
+        """
+        assert capacity_nblocks > 0, "capacity_nblocks must be positive"
+        assert max_batch_nblocks > 0, "max_batch_nblocks must be positive"
+        assert max_inflight_batches > 0, "max_inflight_batches must be positive"
+        self.capacity_nblocks = capacity_nblocks
+        self.max_batch_nblocks = max_batch_nblocks
+        self.max_batch_nbytes = max_batch_nbytes
+        self.max_inflight_batches = max_inflight_batches
+        self.timeout_s = timeout_s
+        self.block_ntokens = l2_cache.block_ntokens
+
+        self._l2_cache = l2_cache
+        self._event_loop = event_loop
+        self._on_done = on_done
+        self._metrics = metrics
+
+        self._cond = threading.Condition()
+        self._heap: List[_WriteBackEntry] = []
+        self._seq = itertools.count()
+        # queued and inflight blocks
+        self._nblocks = 0
+        self._nbytes = 0
+        self._inflight_batches = 0
+        self._drain_scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        """The number of queued and inflight blocks."""
+        return self._nblocks
+
+    @property
+    def nbytes(self) -> int:
+        """The number of queued and inflight bytes."""
+        return self._nbytes
+
+    def __repr__(self) -> str:
+        return (
+            f"L2WriteBackQueue(capacity_nblocks={self.capacity_nblocks}, "
+            f"max_batch_nblocks={self.max_batch_nblocks}, "
+            f"max_inflight_batches={self.max_inflight_batches})"
+        )
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    @staticmethod
+    def _nbytes_of(value: KVTensors) -> int:
+        if isinstance(value, MemoryRegion):
+            return value.length
+        if isinstance(value, KVCacheHandle):
+            value = value.memory_regions  # type: ignore
+        return sum(mr.length for mr in value)  # type: ignore
+
+    def put(
+        self,
+        prefix: KVCacheKeyTypes | None,
+        query: KVCacheKeyTypes,
+        value: KVTensors,
+        hot: bool = False,
+        timeout_s: float | None = None,
+    ) -> Status[int]:
+        """Queue kv tensors to be written to the L2Cache. The queue owns
+        `value` afterwards and releases it through `on_done`.
+        Args:
+            prefix: The prefix tokens of the kv tensors.
+            query: The query tokens of the kv tensors.
+            value: The kv tensors.
+            hot: Whether the kv tensors are hot.
+            timeout_s: How long to wait for a full queue to drain. Defaults
+                       to the `timeout_s` of the queue.
+        Returns:
+            The status of the put operation and the number of tokens have
+            been queued.
+        """
+        nblocks = len(query) // self.block_ntokens
+        nbytes = self._nbytes_of(value)
+        entry = _WriteBackEntry(
+            priority=(
+                0 if hot else 1,
+                0 if prefix is None else len(prefix),
+                next(self._seq),
+            ),
+            prefix=prefix,
+            query=query,
+            value=value,
+            nblocks=nblocks,
+            nbytes=nbytes,
+        )
+
+        if timeout_s is None:
+            timeout_s = self.timeout_s
+        # never block the event loop, it is the one draining the queue
+        if self._on_event_loop():
+            timeout_s = 0
+        schedule = False
+        with self._cond:
+            # an entry larger than the capacity is admitted to an empty queue
+            admitted = self._cond.wait_for(
+                lambda: self._nblocks == 0
+                or self._nblocks + nblocks <= self.capacity_nblocks,
+                timeout=timeout_s,
+            )
+            if not admitted:
+                if self._metrics is not None:
+                    self._metrics.add_dropped(nblocks, nbytes)
+                log_every_n_seconds(
+                    logger,
+                    logging.WARNING,
+                    "l2_cache write-back queue is full, drop %d blocks. "
+                    "queued %d/capacity %d",
+                    10,
+                    nblocks,
+                    self._nblocks,
+                    self.capacity_nblocks,
+                )
+            else:
+                heapq.heappush(self._heap, entry)
+                self._nblocks += nblocks
+                self._nbytes += nbytes
+                self._update_metrics()
+                schedule = not self._drain_scheduled and (
+                    self._inflight_batches < self.max_inflight_batches
+                )
+                self._drain_scheduled |= schedule
+
+        if not admitted:
+            self._on_done(value)
+            return Status(StatusCodes.DENIED, "Write-back queue is full")
+
+        if schedule:
+            self._event_loop.call_soon_threadsafe(self._drain)
+        return Status.ok(len(query))
+
+    def flush(self, timeout_s: float | None = None) -> Status:
+        """Wait until all queued blocks are written.
+        Args:
+            timeout_s: The max number of seconds to wait.
+        Returns:
+            The status of the flush operation.
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._nblocks == 0, timeout=timeout_s
+            ):
+                return Status(StatusCodes.TIMEOUT)
+        return Status.ok()
+
+    def _on_event_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._event_loop
+        except RuntimeError:
+            return False
+
+    def _update_metrics(self) -> None:
+        if self._metrics is not None:
+            self._metrics.update_queue(self._nblocks, self._nbytes)
+
+    def _next_batch(self) -> List[_WriteBackEntry]:
+        batch: List[_WriteBackEntry] = []
+        nblocks = nbytes = 0
+        while self._heap:
+            entry = self._heap[0]
+            if batch and (
+                nblocks + entry.nblocks > self.max_batch_nblocks
+                or nbytes + entry.nbytes > self.max_batch_nbytes
+            ):
+                break
+            heapq.heappop(self._heap)
+            batch.append(entry)
+            nblocks += entry.nblocks
+            nbytes += entry.nbytes
+        return batch
+
+    def _drain(self) -> None:
+        """Launch batches until reaching the inflight limit. Runs on the
+        event loop.
+        """
+        with self._cond:
+            self._drain_scheduled = False
+            batches = []
+            while (
+                self._heap
+                and self._inflight_batches < self.max_inflight_batches
+            ):
+                batches.append(self._next_batch())
+                self._inflight_batches += 1
+
+        for batch in batches:
+            task = self._event_loop.create_task(self._write(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, batch: List[_WriteBackEntry]) -> None:
+        nblocks = sum(entry.nblocks for entry in batch)
+        nbytes = sum(entry.nbytes for entry in batch)
+        try:
+            status = await self._l2_cache.put_batch(
+                [(entry.prefix, entry.query, entry.value) for entry in batch]
+            )
+        except Exception as e:
+            status = Status(StatusCodes.ERROR, e)
+
+        for entry in batch:
+            self._on_done(entry.value)
+
+        with self._cond:
+            self._inflight_batches -= 1
+            self._nblocks -= nblocks
+            self._nbytes -= nbytes
+            if self._metrics is not None:
+                self._metrics.add_batch(nblocks)
+            self._update_metrics()
+            self._cond.notify_all()
+
+        if not status.is_ok():
+            log_every_n_seconds(
+                logger,
+                logging.WARNING,
+                "Failed to write to l2_cache, error: %s",
+                10,
+                status.value,
+            )
+        self._drain()
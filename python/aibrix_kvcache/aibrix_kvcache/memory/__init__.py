@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .allocator import ManagedMemoryRegion, TensorPoolAllocator
+from .allocator import ManagedMemoryRegion, PrefixDigest, TensorPoolAllocator
 from .external_memory_region import ExternalMemoryRegion
 from .memory_region import MemoryRegion
 from .ref_counted_obj import RefCountedObj
@@ -21,6 +21,7 @@ __all__ = [
     "ExternalMemoryRegion",
     "MemoryRegion",
     "ManagedMemoryRegion",
+    "PrefixDigest",
     "TensorPoolAllocator",
     "RefCountedObj",
 ]
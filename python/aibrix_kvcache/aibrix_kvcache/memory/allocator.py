@@ -13,16 +13,18 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
 from collections import deque
 from dataclasses import dataclass
 from threading import Lock
-from typing import List, Sequence, Tuple
+from typing import ClassVar, Dict, Iterator, List, Sequence, Tuple
 
 import numpy as np
 import torch
 from sortedcontainers import SortedDict, SortedList
 from tqdm.auto import tqdm
 
+from .. import envs
 from ..cache_hashable import KVCacheKeyTypes, TokenListView
 from ..status import Status, StatusCodes
 from ..utils import round_up
@@ -98,12 +100,47 @@ class MemoryRegionFooter:
         return np.dtype(np.int32).itemsize * 2
 
 
+@dataclass(frozen=True)
+class PrefixDigest:
+    """Stands in for the prefix tokens of a block in the digest layout."""
+
+    length: int
+    digest: int
+
+    DIGEST_NBYTES: ClassVar[int] = 16
+
+    def __len__(self) -> int:
+        return self.length
+
+    def matches(self, prefix: KVCacheKeyTypes | None) -> bool:
+        """Check if the prefix tokens have the same length and digest."""
+        if prefix is None or len(prefix) == 0:
+            return self.length == 0
+        # only token prefixes have digests
+        if not isinstance(prefix, TokenListView):
+            return False
+        return len(prefix) == self.length and prefix.digest() == self.digest
+
+    def to_numpy(self) -> np.ndarray:
+        data = self.digest.to_bytes(self.DIGEST_NBYTES, "little")
+        return np.frombuffer(data, dtype=np.uint8).copy()
+
+    @staticmethod
+    def from_numpy(length: int, storage: np.ndarray) -> "PrefixDigest":
+        return PrefixDigest(
+            length=length, digest=int.from_bytes(storage.tobytes(), "little")
+        )
+
+
 class ManagedMemoryRegion(MemoryRegion):
     """A memory region representation used by Allocator.
-    Layout: [cache block, magic, footer, tokens]
+    Layout: [cache block, magic, footer, tokens], or
+    [cache block, magic, footer, prefix digest, query tokens] with the
+    digest layout.
     """
 
     MAGIC: int = 0x3A7F1C42
+    DIGEST_MAGIC: int = 0x3A7F1C43
 
     def __init__(
         self,
@@ -120,7 +157,7 @@ class ManagedMemoryRegion(MemoryRegion):
     def _init_meta(self) -> None:
         self._block_nbytes = -1
         self._is_sealed = False
-        self._prefix: KVCacheKeyTypes | None = None
+        self._prefix: KVCacheKeyTypes | PrefixDigest | None = None
         self._query: KVCacheKeyTypes | None = None
 
     def __repr__(self) -> str:
@@ -157,7 +194,7 @@ class ManagedMemoryRegion(MemoryRegion):
             stop = start + bytes_per_int
             magic = self.slab[start:stop].view(torch.int32).numpy()[0]
 
-            assert magic == ManagedMemoryRegion.MAGIC, (
+            assert magic == self._magic(), (
                 "Magic mismatch, MUST pack tokens before sealing."
             )
 
@@ -167,7 +204,9 @@ class ManagedMemoryRegion(MemoryRegion):
                 self.slab[start:stop].view(torch.int32).numpy()
             )
             ntokens = footer.prefix_length + footer.query_length
-            actual_length = self.calculate_size(self.block_nbytes, ntokens)
+            actual_length = self.calculate_size(
+                self.block_nbytes, ntokens, footer.query_length
+            )
             assert actual_length <= self.length, (
                 f"{actual_length} > {self.length}"
             )
@@ -200,9 +239,14 @@ class ManagedMemoryRegion(MemoryRegion):
             return
 
         bytes_per_token = np.dtype(np.int32).itemsize
+        use_digest_layout = MemoryRegion.use_digest_layout()
+        digest_nbytes = PrefixDigest.DIGEST_NBYTES if use_digest_layout else 0
 
         ntokens_limit = (
-            self.length - self.block_nbytes - MemoryRegionFooter.nbytes()
+            self.length
+            - self.block_nbytes
+            - MemoryRegionFooter.nbytes()
+            - digest_nbytes
         ) // bytes_per_token - 1
         assert ntokens <= ntokens_limit, (
             f"query ({ntokens}) must not exceed the limit ({ntokens_limit})"
@@ -215,9 +259,9 @@ class ManagedMemoryRegion(MemoryRegion):
         start = self.addr + self.block_nbytes
         stop = start + bytes_per_token
         self.slab[start:stop].copy_(
-            torch.from_numpy(
-                np.array([ManagedMemoryRegion.MAGIC], dtype=np.int32)
-            ).view(torch.uint8)
+            torch.from_numpy(np.array([self._magic()], dtype=np.int32)).view(
+                torch.uint8
+            )
         )
         # Write footer
         prefix_length = len(prefix) if prefix is not None else 0
@@ -228,7 +272,18 @@ class ManagedMemoryRegion(MemoryRegion):
             torch.from_numpy(footer.to_numpy()).view(torch.uint8)
         )
         # Pack tokens
-        if prefix is not None:
+        if use_digest_layout:
+            # Only pack the query tokens, the prefix tokens are verified
+            # through their digest
+            prefix_digest = 0
+            if prefix_length > 0:
+                assert isinstance(prefix, TokenListView)
+                prefix_digest = prefix.digest()
+            digest = PrefixDigest(prefix_length, prefix_digest)
+            start = stop
+            stop = start + digest_nbytes
+            self.slab[start:stop].copy_(torch.from_numpy(digest.to_numpy()))
+        if prefix is not None and not use_digest_layout:
             all = prefix + query
         else:
             all = query
@@ -240,10 +295,11 @@ class ManagedMemoryRegion(MemoryRegion):
 
     def unpack_tokens(
         self,
-    ) -> Tuple[KVCacheKeyTypes | None, KVCacheKeyTypes | None]:
+    ) -> Tuple[KVCacheKeyTypes | PrefixDigest | None, KVCacheKeyTypes | None]:
         """Unpack tokens from the MR.
         Returns:
-            The prefix and query tokens.
+            The prefix and query tokens. With the digest layout, the prefix
+            tokens are unpacked as a PrefixDigest.
         """
         if self._query is not None or MemoryRegion.use_compact_layout():
             return self._prefix, self._query
@@ -253,7 +309,7 @@ class ManagedMemoryRegion(MemoryRegion):
         stop = start + bytes_per_token
         magic = self.slab[start:stop].view(torch.int32).numpy()[0]
 
-        if magic != ManagedMemoryRegion.MAGIC:
+        if magic != self._magic():
             # corrupted mr or current mr is not packed with tokens
             return None, None
 
@@ -263,9 +319,15 @@ class ManagedMemoryRegion(MemoryRegion):
             self.slab[start:stop].view(torch.int32).numpy()
         )
 
-        if footer.prefix_length <= 0:
-            prefix = None
-        else:
+        prefix: KVCacheKeyTypes | PrefixDigest | None = None
+        if MemoryRegion.use_digest_layout():
+            start = stop
+            stop = start + PrefixDigest.DIGEST_NBYTES
+            if footer.prefix_length > 0:
+                prefix = PrefixDigest.from_numpy(
+                    footer.prefix_length, self.slab[start:stop].numpy()
+                )
+        elif footer.prefix_length > 0:
             prefix = TokenListView.from_numpy(
                 self.slab[start:stop].view(torch.int32).numpy()
             )
@@ -283,17 +345,41 @@ class ManagedMemoryRegion(MemoryRegion):
         self._query = query
         return self._prefix, self._query
 
+    def _magic(self) -> int:
+        if MemoryRegion.use_digest_layout():
+            return ManagedMemoryRegion.DIGEST_MAGIC
+        return ManagedMemoryRegion.MAGIC
+
     @staticmethod
-    def calculate_size(block_nbytes: int, ntokens: int) -> int:
+    def calculate_size(
+        block_nbytes: int, ntokens: int, query_ntokens: int | None = None
+    ) -> int:
         """Calculate the size of the MR.
         Args:
             block_nbytes: The size of the cache block in bytes.
             ntokens: The number of tokens.
+            query_ntokens: The number of query tokens, only those are packed
+                           with the digest layout. Defaults to ntokens.
         Returns:
             The size of the MR in bytes.
         """
         if MemoryRegion.use_compact_layout():
             return block_nbytes
+        elif MemoryRegion.use_digest_layout():
+            # Layout: [cache block, magic, footer, prefix digest, tokens]
+            magic_nbytes = np.dtype(np.int32).itemsize
+            footer_nbytes = MemoryRegionFooter.nbytes()
+            tokens_nbytes = TokenListView.calculate_size(
+                ntokens if query_ntokens is None else query_ntokens
+            )
+            size = int(
+                block_nbytes
+                + magic_nbytes
+                + footer_nbytes
+                + PrefixDigest.DIGEST_NBYTES
+                + tokens_nbytes
+            )
+            return round_up(size, TensorPoolAllocator.ALLOC_SIZE_ALIGNMENT)
         else:
             # Layout: [cache block, magic, footer, tokens]
             magic_nbytes = np.dtype(np.int32).itemsize
@@ -355,6 +441,12 @@ class TensorPoolAllocator(ABC):
                 device=device,
                 pin_memory=pin_memory,
             )
+        elif envs.AIBRIX_KV_CACHE_OL_SIZE_CLASS_ALLOCATOR_ENABLED:
+            return SizeClassPoolAllocator(
+                capacity_nbytes=capacity_nbytes,
+                device=device,
+                pin_memory=pin_memory,
+            )
         else:
             return CoalescingPoolAllocator(
                 capacity_nbytes=capacity_nbytes,
@@ -412,7 +504,7 @@ class TensorPoolAllocator(ABC):
                     value = status.get()
                     mrs.extend(value)
                     offset += len(value)
-                    self._used_nbytes += sum([mr.length for mr in value])
+                    self._used_nbytes += sum([mr.capacity for mr in value])
                 else:
                     if len(mrs) == 0:
                         return status
@@ -586,6 +678,26 @@ class CoalescingPoolAllocator(TensorPoolAllocator):
         with self._lock:
             return len(self._mr_list)
 
+    @property
+    def fragmentation_ratio(self) -> float:
+        """Return the external fragmentation of the free memory, i.e.,
+        1 - largest free memory region / total free memory.
+        """
+        with self._lock:
+            free_nbytes = self.capacity_nbytes - self._used_nbytes
+            if free_nbytes == 0:
+                return 0.0
+            return 1 - self._largest_free_nbytes_unsafe() / free_nbytes
+
+    def _largest_free_nbytes_unsafe(self) -> int:
+        if len(self._lookup_table) == 0:
+            return 0
+        return self._lookup_table.keys()[-1]
+
+    def _free_nbytes_unsafe(self) -> int:
+        """Return the number of bytes in the free memory regions."""
+        return self.capacity_nbytes - self._used_nbytes
+
     def assert_consistency(self) -> None:
         """Assert that the allocator is consistent. For test purpose."""
         with self._lock:
@@ -617,11 +729,8 @@ class CoalescingPoolAllocator(TensorPoolAllocator):
                             + mr_i_prev.length
                             < mr_i.slab.data_ptr() + mr_i.addr
                         ), f"{mr_i_prev} and {mr_i} are not disjoint"
-            assert (
-                mr_list_total_nbytes == self.capacity_nbytes - self._used_nbytes
-            ), (
-                f"{mr_list_total_nbytes} != {self.capacity_nbytes} - "
-                f"{self._used_nbytes}"
+            assert mr_list_total_nbytes == self._free_nbytes_unsafe(), (
+                f"{mr_list_total_nbytes} != {self._free_nbytes_unsafe()}"
             )
             # 2. check lookup table
             lookup_table_total_nbytes = 0
@@ -745,3 +854,175 @@ class ObjectPoolAllocator(TensorPoolAllocator):
                 f"Free memory ({free_nbytes}) does not match "
                 f"un-used capacity ({expected_free_nbytes})"
             )
+
+
+class SizeClassFreeList:
+    """A stack of free memory regions of one size class, held in an array.
+    Each slot encodes the slab index and the address of a memory region.
+    """
+
+    __slots__ = ("_array", "_slots", "_top")
+
+    ADDR_BITS = 32
+
+    def __init__(self) -> None:
+        self._array = np.empty(64, dtype=np.int64)
+        self._slots = self._array.data
+        self._top = 0
+
+    def __len__(self) -> int:
+        return self._top
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        mask = (1 << self.ADDR_BITS) - 1
+        for i in range(self._top):
+            slot = self._slots[i]
+            yield slot >> self.ADDR_BITS, slot & mask
+
+    def push(self, slab_idx: int, addr: int) -> None:
+        if self._top == len(self._array):
+            array = np.empty(2 * len(self._array), dtype=np.int64)
+            array[: self._top] = self._array
+            self._array = array
+            self._slots = array.data
+        self._slots[self._top] = (slab_idx << self.ADDR_BITS) | addr
+        self._top += 1
+
+    def pop(self) -> Tuple[int, int]:
+        self._top -= 1
+        slot = self._slots[self._top]
+        return slot >> self.ADDR_BITS, slot & ((1 << self.ADDR_BITS) - 1)
+
+    def clear(self) -> None:
+        self._top = 0
+
+
+class SizeClassPoolAllocator(CoalescingPoolAllocator):
+    """A coalescing allocator fronted by size classes.
+
+    Sizes are rounded up to size classes, 2**CLASS_BITS classes per power
+    of two, which bounds the internal fragmentation by 1 / 2**CLASS_BITS.
+    Freed MRs are kept in per-class free lists and handed out again in
+    O(1) to allocations of the same class without splitting or coalescing.
+    Only misses are carved from the coalescing pool, and the free lists
+    are flushed back into it once it runs out of memory.
+    """
+
+    CLASS_BITS = 2
+
+    def __init__(
+        self,
+        *,
+        capacity_nbytes: int,
+        device: str = "cpu",
+        pin_memory: bool = False,
+    ) -> None:
+        self._free_lists: Dict[int, SizeClassFreeList] = {}
+        self._classes: List[int] = []
+        self._slab_index: Dict[int, int] = {}
+        self._cached_nbytes: int = 0
+
+        super().__init__(
+            capacity_nbytes=capacity_nbytes,
+            device=device,
+            pin_memory=pin_memory,
+        )
+
+    def class_nbytes(self, size: int) -> int:
+        """Return the size class of the given size."""
+        size = round_up(size, self.ALLOC_SIZE_ALIGNMENT)
+        shift = (size - 1).bit_length() - 1 - self.CLASS_BITS
+        step = max(self.ALLOC_SIZE_ALIGNMENT, 1 << max(shift, 0))
+        return round_up(size, step)
+
+    def _grow_unsafe(self, slab: torch.Tensor) -> None:
+        assert slab.numel() <= 1 << SizeClassFreeList.ADDR_BITS
+        self._slab_index[slab.data_ptr()] = len(self._slabs) - 1
+        super()._grow_unsafe(slab)
+
+    def _alloc_unsafe(
+        self, sizes: Sequence[int]
+    ) -> Status[Sequence[ManagedMemoryRegion]]:
+        mrs: List[ManagedMemoryRegion] = []
+        for size in sizes:
+            class_nbytes = self.class_nbytes(size)
+            free_list = self._free_lists.get(class_nbytes)
+            if free_list is None or len(free_list) == 0:
+                break
+            slab_idx, addr = free_list.pop()
+            mr = ManagedMemoryRegion(self, self._slabs[slab_idx], addr, size)
+            mr.capacity = class_nbytes
+            self._cached_nbytes -= class_nbytes
+            mrs.append(mr)
+        if len(mrs) > 0:
+            return Status.ok(mrs)
+
+        # Carve the missing classes from the coalescing pool
+        class_sizes = [self.class_nbytes(size) for size in sizes]
+        status = super()._alloc_unsafe(class_sizes)
+        if status.is_out_of_memory() and self._cached_nbytes > 0:
+            # Take the smallest cached MR that fits
+            i = bisect_left(self._classes, class_sizes[0])
+            for class_nbytes in self._classes[i:]:
+                free_list = self._free_lists[class_nbytes]
+                if len(free_list) > 0:
+                    slab_idx, addr = free_list.pop()
+                    mr = ManagedMemoryRegion(
+                        self, self._slabs[slab_idx], addr, sizes[0]
+                    )
+                    mr.capacity = class_nbytes
+                    self._cached_nbytes -= class_nbytes
+                    return Status.ok([mr])
+            self._flush_unsafe()
+            status = super()._alloc_unsafe(class_sizes)
+        if not status.is_ok():
+            return status
+
+        for mr, size in zip(status.get(), sizes):
+            mr.length = size
+        return status
+
+    def _finalize_mr_unsafe(self, mr: ManagedMemoryRegion) -> None:
+        free_list = self._free_lists.get(mr.capacity)
+        if free_list is None:
+            free_list = self._free_lists[mr.capacity] = SizeClassFreeList()
+            insort(self._classes, mr.capacity)
+        free_list.push(self._slab_index[mr.slab.data_ptr()], mr.addr)
+        self._cached_nbytes += mr.capacity
+
+    def _flush_unsafe(self) -> None:
+        """Return the MRs in the free lists to the coalescing pool."""
+        for class_nbytes, free_list in self._free_lists.items():
+            for slab_idx, addr in free_list:
+                self._finalize_slab_slice_unsafe(
+                    self._slabs[slab_idx], addr, class_nbytes
+                )
+            free_list.clear()
+        self._cached_nbytes = 0
+
+    @property
+    def cached_nbytes(self) -> int:
+        """Return the number of bytes held in the per-class free lists."""
+        with self._lock:
+            return self._cached_nbytes
+
+    def _largest_free_nbytes_unsafe(self) -> int:
+        largest = super()._largest_free_nbytes_unsafe()
+        for class_nbytes, free_list in self._free_lists.items():
+            if len(free_list) > 0:
+                largest = max(largest, class_nbytes)
+        return largest
+
+    def _free_nbytes_unsafe(self) -> int:
+        return super()._free_nbytes_unsafe() - self._cached_nbytes
+
+    def assert_consistency(self) -> None:
+        with self._lock:
+            cached_nbytes = sum(
+                class_nbytes * len(free_list)
+                for class_nbytes, free_list in self._free_lists.items()
+            )
+            assert cached_nbytes == self._cached_nbytes, (
+                f"{cached_nbytes} != {self._cached_nbytes}"
+            )
+        super().assert_consistency()
@@ -20,6 +20,9 @@ from .. import envs
 from .ref_counted_obj import RefCountedObj
 
 MR_USE_COMPACT_LAYOUT = not envs.AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_ENABLED
+MR_USE_DIGEST_LAYOUT = (
+    envs.AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_LAYOUT == "DIGEST"
+)
 
 
 class MemoryRegion(RefCountedObj):
@@ -59,6 +62,13 @@ class MemoryRegion(RefCountedObj):
     def use_compact_layout() -> bool:
         return MR_USE_COMPACT_LAYOUT
 
+    @staticmethod
+    def use_digest_layout() -> bool:
+        """Whether blocks only carry their own tokens and a digest of the
+        prefix tokens instead of all the tokens.
+        """
+        return not MR_USE_COMPACT_LAYOUT and MR_USE_DIGEST_LAYOUT
+
     def tobytes(self) -> bytes:
         tensor = self.slab[self.addr : self.addr + self.length]
         if tensor.is_cuda:
@@ -18,12 +18,15 @@ import functools
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
 
 from .cache_args import parse_kvcache_api_args
 from .status import Status
 from .utils import cpu_perf_timer, human_readable_bytes
 
+if TYPE_CHECKING:
+    from .op_recorder import OpRecorder
+
 TOKEN_BUCKETS = [1, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8096]
 MS_BUCKETS = [
     1,
@@ -149,6 +152,11 @@ class MetricRecorder(ABC):
     class Resource(enum.Enum):
         L1_EVICTION_POLICY = enum.auto()
         L1_ALLOCATOR = enum.auto()
+        L1_REACHABLE = enum.auto()
+        L2_BACKEND = enum.auto()
+        L2_FILTER = enum.auto()
+        L2_WRITE_BACK = enum.auto()
+        L2_SINGLE_FLIGHT = enum.auto()
 
     @abstractmethod
     def record(
@@ -476,6 +484,460 @@ class UsageMetricsExporter(BaseMetricsExporter):
         self._export_gauge(self.gauge_capacity, labels, metrics.capacity_nbytes)
 
 
+class EvictionMetrics(Metrics):
+    """Eviction metrics."""
+
+    resource: MetricRecorder.Resource
+    num_objs: int
+    num_evicted_objs: int
+    num_evicted_nbytes: int
+    total_evicted_objs: int
+
+    def __init__(self, resource: MetricRecorder.Resource) -> None:
+        self.resource = resource
+        self.num_objs = 0
+        self.num_evicted_objs = 0
+        self.num_evicted_nbytes = 0
+        self.total_evicted_objs = 0
+
+    def update(
+        self, num_objs: int, num_evicted_objs: int, num_evicted_nbytes: int
+    ) -> None:
+        self.num_objs = num_objs
+        self.num_evicted_objs += num_evicted_objs
+        self.num_evicted_nbytes += num_evicted_nbytes
+        self.total_evicted_objs += num_evicted_objs
+
+    def reset(self) -> None:
+        self.num_evicted_objs = 0
+        self.num_evicted_nbytes = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.resource.name}: Num. of objs: {self.num_objs}, "
+            f"Num. of evicted objs: {self.total_evicted_objs}"
+        )
+
+
+class EvictionMetricsExporter(BaseMetricsExporter):
+    """Eviction metrics exporter."""
+
+    RESOURCE_TYPE_LABELNAME = "resource_type"
+
+    def __init__(
+        self, *, prefix, labelnames, counter_cls, gauge_cls, histogram_cls
+    ) -> None:
+        labelnames = labelnames.copy() or []
+        labelnames.append(self.RESOURCE_TYPE_LABELNAME)
+        super().__init__(
+            prefix=prefix,
+            labelnames=labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+        self._init_exporter_fields()
+
+    def _init_exporter_fields(self) -> None:
+        self.gauge_num_objs = self._gauge_cls(
+            name=f"{self._prefix}num_objs",
+            documentation="Number of stored objects.",
+            labelnames=self._labelnames,
+        )
+        self.counter_num_evicted_objs = self._counter_cls(
+            name=f"{self._prefix}num_evicted_objs",
+            documentation="Cumulative number of evicted objects.",
+            labelnames=self._labelnames,
+        )
+        self.counter_num_evicted_nbytes = self._counter_cls(
+            name=f"{self._prefix}num_evicted_nbytes",
+            documentation="Cumulative number of evicted bytes.",
+            labelnames=self._labelnames,
+        )
+
+    def export(self, labels: Dict[str, str], metrics: Metrics) -> None:
+        assert isinstance(metrics, EvictionMetrics)
+
+        labels = labels.copy()
+        labels[self.RESOURCE_TYPE_LABELNAME] = metrics.resource.name.lower()
+        assert set(labels.keys()) == set(self._labelnames), (
+            f"Labels {set(labels.keys())} do not match {self._labelnames}"
+        )
+
+        self._export_gauge(self.gauge_num_objs, labels, metrics.num_objs)
+        self._export_counter(
+            self.counter_num_evicted_objs, labels, metrics.num_evicted_objs
+        )
+        self._export_counter(
+            self.counter_num_evicted_nbytes, labels, metrics.num_evicted_nbytes
+        )
+
+
+class CompressionMetrics(Metrics):
+    """Compression metrics."""
+
+    resource: MetricRecorder.Resource
+    num_raw_nbytes: int
+    num_compressed_nbytes: int
+    compress_cpu_s: float
+    decompress_cpu_s: float
+    total_raw_nbytes: int
+    total_compressed_nbytes: int
+
+    def __init__(self, resource: MetricRecorder.Resource) -> None:
+        self.resource = resource
+        self.num_raw_nbytes = 0
+        self.num_compressed_nbytes = 0
+        self.compress_cpu_s = 0.0
+        self.decompress_cpu_s = 0.0
+        self.total_raw_nbytes = 0
+        self.total_compressed_nbytes = 0
+
+    @property
+    def ratio(self) -> float:
+        """Compression ratio of all values compressed so far."""
+        if self.total_compressed_nbytes == 0:
+            return 0.0
+        return self.total_raw_nbytes / self.total_compressed_nbytes
+
+    def update_compress(
+        self, raw_nbytes: int, compressed_nbytes: int, cpu_s: float
+    ) -> None:
+        self.num_raw_nbytes += raw_nbytes
+        self.num_compressed_nbytes += compressed_nbytes
+        self.total_raw_nbytes += raw_nbytes
+        self.total_compressed_nbytes += compressed_nbytes
+        self.compress_cpu_s += cpu_s
+
+    def update_decompress(self, cpu_s: float) -> None:
+        self.decompress_cpu_s += cpu_s
+
+    def reset(self) -> None:
+        self.num_raw_nbytes = 0
+        self.num_compressed_nbytes = 0
+        self.compress_cpu_s = 0.0
+        self.decompress_cpu_s = 0.0
+
+    def summary(self) -> str:
+        return f"{self.resource.name}: Compression ratio: {self.ratio:.2f}"
+
+
+class CompressionMetricsExporter(BaseMetricsExporter):
+    """Compression metrics exporter."""
+
+    RESOURCE_TYPE_LABELNAME = "resource_type"
+
+    def __init__(
+        self, *, prefix, labelnames, counter_cls, gauge_cls, histogram_cls
+    ) -> None:
+        labelnames = labelnames.copy() or []
+        labelnames.append(self.RESOURCE_TYPE_LABELNAME)
+        super().__init__(
+            prefix=prefix,
+            labelnames=labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+        self._init_exporter_fields()
+
+    def _init_exporter_fields(self) -> None:
+        self.counter_raw_nbytes = self._counter_cls(
+            name=f"{self._prefix}compression_raw_nbytes",
+            documentation="Cumulative number of bytes before compression.",
+            labelnames=self._labelnames,
+        )
+        self.counter_compressed_nbytes = self._counter_cls(
+            name=f"{self._prefix}compression_compressed_nbytes",
+            documentation="Cumulative number of bytes after compression.",
+            labelnames=self._labelnames,
+        )
+        self.counter_compress_cpu_s = self._counter_cls(
+            name=f"{self._prefix}compression_compress_cpu_seconds",
+            documentation="Cumulative CPU time spent on compression.",
+            labelnames=self._labelnames,
+        )
+        self.counter_decompress_cpu_s = self._counter_cls(
+            name=f"{self._prefix}compression_decompress_cpu_seconds",
+            documentation="Cumulative CPU time spent on decompression.",
+            labelnames=self._labelnames,
+        )
+        self.gauge_ratio = self._gauge_cls(
+            name=f"{self._prefix}compression_ratio",
+            documentation="Compression ratio.",
+            labelnames=self._labelnames,
+        )
+
+    def export(self, labels: Dict[str, str], metrics: Metrics) -> None:
+        assert isinstance(metrics, CompressionMetrics)
+
+        if metrics.total_raw_nbytes == 0:
+            return
+
+        labels = labels.copy()
+        labels[self.RESOURCE_TYPE_LABELNAME] = metrics.resource.name.lower()
+        assert set(labels.keys()) == set(self._labelnames), (
+            f"Labels {set(labels.keys())} do not match {self._labelnames}"
+        )
+
+        self._export_counter(
+            self.counter_raw_nbytes, labels, metrics.num_raw_nbytes
+        )
+        self._export_counter(
+            self.counter_compressed_nbytes,
+            labels,
+            metrics.num_compressed_nbytes,
+        )
+        self._export_counter(
+            self.counter_compress_cpu_s, labels, metrics.compress_cpu_s
+        )
+        self._export_counter(
+            self.counter_decompress_cpu_s, labels, metrics.decompress_cpu_s
+        )
+        self._export_gauge(self.gauge_ratio, labels, metrics.ratio)
+
+
+class FilterMetrics(Metrics):
+    """Negative lookup filter metrics."""
+
+    resource: MetricRecorder.Resource
+    num_lookups: int
+    num_negatives: int
+    num_false_positives: int
+    total_lookups: int
+    total_negatives: int
+    total_false_positives: int
+
+    def __init__(self, resource: MetricRecorder.Resource) -> None:
+        self.resource = resource
+        self.num_lookups = 0
+        self.num_negatives = 0
+        self.num_false_positives = 0
+        self.total_lookups = 0
+        self.total_negatives = 0
+        self.total_false_positives = 0
+
+    @property
+    def negative_rate(self) -> float:
+        """Ratio of lookups answered by the filter without a backend call."""
+        if self.total_lookups == 0:
+            return 0.0
+        return self.total_negatives / self.total_lookups
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Ratio of lookups passed to the backend that turned out missing."""
+        num_positives = self.total_lookups - self.total_negatives
+        if num_positives == 0:
+            return 0.0
+        return self.total_false_positives / num_positives
+
+    def update(
+        self, num_lookups: int, num_negatives: int, num_false_positives: int
+    ) -> None:
+        self.num_lookups += num_lookups
+        self.num_negatives += num_negatives
+        self.num_false_positives += num_false_positives
+        self.total_lookups += num_lookups
+        self.total_negatives += num_negatives
+        self.total_false_positives += num_false_positives
+
+    def reset(self) -> None:
+        self.num_lookups = 0
+        self.num_negatives = 0
+        self.num_false_positives = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.resource.name}: "
+            f"Negative rate: {self.negative_rate * 100:.2f}%, "
+            f"False positive rate: {self.false_positive_rate * 100:.2f}%"
+        )
+
+
+class FilterMetricsExporter(BaseMetricsExporter):
+    """Negative lookup filter metrics exporter."""
+
+    RESOURCE_TYPE_LABELNAME = "resource_type"
+
+    def __init__(
+        self, *, prefix, labelnames, counter_cls, gauge_cls, histogram_cls
+    ) -> None:
+        labelnames = labelnames.copy() or []
+        labelnames.append(self.RESOURCE_TYPE_LABELNAME)
+        super().__init__(
+            prefix=prefix,
+            labelnames=labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+        self._init_exporter_fields()
+
+    def _init_exporter_fields(self) -> None:
+        self.counter_lookups = self._counter_cls(
+            name=f"{self._prefix}filter_lookups",
+            documentation="Cumulative number of filter lookups.",
+            labelnames=self._labelnames,
+        )
+        self.counter_negatives = self._counter_cls(
+            name=f"{self._prefix}filter_negatives",
+            documentation="Cumulative number of lookups answered as misses "
+            "by the filter.",
+            labelnames=self._labelnames,
+        )
+        self.counter_false_positives = self._counter_cls(
+            name=f"{self._prefix}filter_false_positives",
+            documentation="Cumulative number of lookups passed by the filter "
+            "that missed in the backend.",
+            labelnames=self._labelnames,
+        )
+
+    def export(self, labels: Dict[str, str], metrics: Metrics) -> None:
+        assert isinstance(metrics, FilterMetrics)
+
+        if metrics.total_lookups == 0:
+            return
+
+        labels = labels.copy()
+        labels[self.RESOURCE_TYPE_LABELNAME] = metrics.resource.name.lower()
+        assert set(labels.keys()) == set(self._labelnames), (
+            f"Labels {set(labels.keys())} do not match {self._labelnames}"
+        )
+
+        self._export_counter(self.counter_lookups, labels, metrics.num_lookups)
+        self._export_counter(
+            self.counter_negatives, labels, metrics.num_negatives
+        )
+        self._export_counter(
+            self.counter_false_positives, labels, metrics.num_false_positives
+        )
+
+
+class WriteBackMetrics(Metrics):
+    """Write-back queue metrics."""
+
+    resource: MetricRecorder.Resource
+    queue_nblocks: int
+    queue_nbytes: int
+    batch_nblocks: List[int]
+    num_dropped_nblocks: int
+    num_dropped_nbytes: int
+    total_batches: int
+    total_dropped_nbytes: int
+
+    def __init__(self, resource: MetricRecorder.Resource) -> None:
+        self.resource = resource
+        self.queue_nblocks = 0
+        self.queue_nbytes = 0
+        self.batch_nblocks = []
+        self.num_dropped_nblocks = 0
+        self.num_dropped_nbytes = 0
+        self.total_batches = 0
+        self.total_dropped_nbytes = 0
+
+    def update_queue(self, queue_nblocks: int, queue_nbytes: int) -> None:
+        self.queue_nblocks = queue_nblocks
+        self.queue_nbytes = queue_nbytes
+
+    def add_batch(self, nblocks: int) -> None:
+        self.batch_nblocks.append(nblocks)
+        self.total_batches += 1
+
+    def add_dropped(self, nblocks: int, nbytes: int) -> None:
+        self.num_dropped_nblocks += nblocks
+        self.num_dropped_nbytes += nbytes
+        self.total_dropped_nbytes += nbytes
+
+    def reset(self) -> None:
+        self.batch_nblocks = []
+        self.num_dropped_nblocks = 0
+        self.num_dropped_nbytes = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.resource.name}: Queue depth: {self.queue_nblocks} blocks, "
+            f"Num. of batches: {self.total_batches}, "
+            f"Dropped: {human_readable_bytes(self.total_dropped_nbytes)}"
+        )
+
+
+class WriteBackMetricsExporter(BaseMetricsExporter):
+    """Write-back queue metrics exporter."""
+
+    RESOURCE_TYPE_LABELNAME = "resource_type"
+
+    def __init__(
+        self, *, prefix, labelnames, counter_cls, gauge_cls, histogram_cls
+    ) -> None:
+        labelnames = labelnames.copy() or []
+        labelnames.append(self.RESOURCE_TYPE_LABELNAME)
+        super().__init__(
+            prefix=prefix,
+            labelnames=labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+        self._init_exporter_fields()
+
+    def _init_exporter_fields(self) -> None:
+        self.gauge_queue_nblocks = self._gauge_cls(
+            name=f"{self._prefix}write_back_queue_nblocks",
+            documentation="Number of queued and inflight blocks.",
+            labelnames=self._labelnames,
+        )
+        self.gauge_queue_nbytes = self._gauge_cls(
+            name=f"{self._prefix}write_back_queue_nbytes",
+            documentation="Number of queued and inflight bytes.",
+            labelnames=self._labelnames,
+        )
+        self.histogram_batch_nblocks = self._histogram_cls(
+            name=f"{self._prefix}write_back_batch_nblocks",
+            documentation="Histogram of number of blocks per batch.",
+            labelnames=self._labelnames,
+            buckets=TOKEN_BUCKETS,
+        )
+        self.counter_dropped_nblocks = self._counter_cls(
+            name=f"{self._prefix}write_back_dropped_nblocks",
+            documentation="Cumulative number of dropped blocks.",
+            labelnames=self._labelnames,
+        )
+        self.counter_dropped_nbytes = self._counter_cls(
+            name=f"{self._prefix}write_back_dropped_nbytes",
+            documentation="Cumulative number of dropped bytes.",
+            labelnames=self._labelnames,
+        )
+
+    def export(self, labels: Dict[str, str], metrics: Metrics) -> None:
+        assert isinstance(metrics, WriteBackMetrics)
+
+        if metrics.total_batches == 0 and metrics.total_dropped_nbytes == 0:
+            return
+
+        labels = labels.copy()
+        labels[self.RESOURCE_TYPE_LABELNAME] = metrics.resource.name.lower()
+        assert set(labels.keys()) == set(self._labelnames), (
+            f"Labels {set(labels.keys())} do not match {self._labelnames}"
+        )
+
+        self._export_gauge(
+            self.gauge_queue_nblocks, labels, metrics.queue_nblocks
+        )
+        self._export_gauge(
+            self.gauge_queue_nbytes, labels, metrics.queue_nbytes
+        )
+        self._export_histogram(
+            self.histogram_batch_nblocks, labels, metrics.batch_nblocks
+        )
+        self._export_counter(
+            self.counter_dropped_nblocks, labels, metrics.num_dropped_nblocks
+        )
+        self._export_counter(
+            self.counter_dropped_nbytes, labels, metrics.num_dropped_nbytes
+        )
+
+
 class BaseCacheMetrics(Metrics, MetricRecorder):
     """The base metrics of a cache."""
 
@@ -639,6 +1101,101 @@ class BaseCacheMetrics(Metrics, MetricRecorder):
         return summary
 
 
+class SingleFlightMetrics(Metrics):
+    """Single-flight fetch metrics, in terms of blocks."""
+
+    resource: MetricRecorder.Resource
+    num_fetches: int
+    num_coalesced_fetches: int
+    total_fetches: int
+    total_coalesced_fetches: int
+
+    def __init__(self, resource: MetricRecorder.Resource) -> None:
+        self.resource = resource
+        self.num_fetches = 0
+        self.num_coalesced_fetches = 0
+        self.total_fetches = 0
+        self.total_coalesced_fetches = 0
+
+    @property
+    def coalesced_rate(self) -> float:
+        """Ratio of blocks served by fetches issued by other acquires."""
+        total = self.total_fetches + self.total_coalesced_fetches
+        if total == 0:
+            return 0.0
+        return self.total_coalesced_fetches / total
+
+    def update(self, num_fetches: int, num_coalesced_fetches: int) -> None:
+        self.num_fetches += num_fetches
+        self.num_coalesced_fetches += num_coalesced_fetches
+        self.total_fetches += num_fetches
+        self.total_coalesced_fetches += num_coalesced_fetches
+
+    def reset(self) -> None:
+        self.num_fetches = 0
+        self.num_coalesced_fetches = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.resource.name}: "
+            f"Coalesced fetches: {self.total_coalesced_fetches}, "
+            f"Coalesced rate: {self.coalesced_rate * 100:.2f}%"
+        )
+
+
+class SingleFlightMetricsExporter(BaseMetricsExporter):
+    """Single-flight fetch metrics exporter."""
+
+    RESOURCE_TYPE_LABELNAME = "resource_type"
+
+    def __init__(
+        self, *, prefix, labelnames, counter_cls, gauge_cls, histogram_cls
+    ) -> None:
+        labelnames = labelnames.copy() or []
+        labelnames.append(self.RESOURCE_TYPE_LABELNAME)
+        super().__init__(
+            prefix=prefix,
+            labelnames=labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+        self._init_exporter_fields()
+
+    def _init_exporter_fields(self) -> None:
+        self.counter_fetches = self._counter_cls(
+            name=f"{self._prefix}single_flight_fetches",
+            documentation="Cumulative number of blocks fetched on behalf of "
+            "concurrent acquires.",
+            labelnames=self._labelnames,
+        )
+        self.counter_coalesced_fetches = self._counter_cls(
+            name=f"{self._prefix}single_flight_coalesced_fetches",
+            documentation="Cumulative number of blocks served by a fetch "
+            "issued by another acquire.",
+            labelnames=self._labelnames,
+        )
+
+    def export(self, labels: Dict[str, str], metrics: Metrics) -> None:
+        assert isinstance(metrics, SingleFlightMetrics)
+
+        if metrics.total_fetches == 0 and metrics.total_coalesced_fetches == 0:
+            return
+
+        labels = labels.copy()
+        labels[self.RESOURCE_TYPE_LABELNAME] = metrics.resource.name.lower()
+        assert set(labels.keys()) == set(self._labelnames), (
+            f"Labels {set(labels.keys())} do not match {self._labelnames}"
+        )
+
+        self._export_counter(self.counter_fetches, labels, metrics.num_fetches)
+        self._export_counter(
+            self.counter_coalesced_fetches,
+            labels,
+            metrics.num_coalesced_fetches,
+        )
+
+
 class BaseCacheMetricsExporter(BaseMetricsExporter):
     """The base metrics exporter of a cache."""
 
@@ -673,6 +1230,46 @@ class BaseCacheMetricsExporter(BaseMetricsExporter):
             histogram_cls=histogram_cls,
         )
 
+        self.eviction_metrics_exporter = EvictionMetricsExporter(
+            prefix=prefix,
+            labelnames=self._labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+
+        self.compression_metrics_exporter = CompressionMetricsExporter(
+            prefix=prefix,
+            labelnames=self._labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+
+        self.filter_metrics_exporter = FilterMetricsExporter(
+            prefix=prefix,
+            labelnames=self._labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+
+        self.write_back_metrics_exporter = WriteBackMetricsExporter(
+            prefix=prefix,
+            labelnames=self._labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+
+        self.single_flight_metrics_exporter = SingleFlightMetricsExporter(
+            prefix=prefix,
+            labelnames=self._labelnames,
+            counter_cls=counter_cls,
+            gauge_cls=gauge_cls,
+            histogram_cls=histogram_cls,
+        )
+
     def export(self, labels: Dict[str, str], metrics: Metrics) -> None:
         assert isinstance(metrics, BaseCacheMetrics)
         labels = labels.copy()
@@ -684,6 +1281,16 @@ class BaseCacheMetricsExporter(BaseMetricsExporter):
         for m in metrics._get_all_metrics():
             if isinstance(m, OpMetrics):
                 self.op_metrics_exporter.export(labels, m)
+            elif isinstance(m, EvictionMetrics):
+                self.eviction_metrics_exporter.export(labels, m)
+            elif isinstance(m, CompressionMetrics):
+                self.compression_metrics_exporter.export(labels, m)
+            elif isinstance(m, FilterMetrics):
+                self.filter_metrics_exporter.export(labels, m)
+            elif isinstance(m, WriteBackMetrics):
+                self.write_back_metrics_exporter.export(labels, m)
+            elif isinstance(m, SingleFlightMetrics):
+                self.single_flight_metrics_exporter.export(labels, m)
             else:
                 self.usage_metrics_exporter.export(labels, m)
 
@@ -693,6 +1300,8 @@ class L1CacheMetrics(BaseCacheMetrics):
 
     eviction_policy_usage_metrics: UsageMetrics
     allocator_usage_metrics: UsageMetrics
+    # only available if the eviction policy indexes prefixes
+    reachable_usage_metrics: UsageMetrics | None
 
     def __init__(
         self,
@@ -717,27 +1326,48 @@ class L1CacheMetrics(BaseCacheMetrics):
             MetricRecorder.Resource.L1_ALLOCATOR,
             capacity_nbytes,
         )
+        self.reachable_usage_metrics = None
+        self._capacity_nbytes = capacity_nbytes
 
     def _get_all_metrics(self) -> List[Metrics]:
-        return super()._get_all_metrics() + [
+        usage_metrics: List[Metrics] = list(self._usage_metrics())
+        return super()._get_all_metrics() + usage_metrics
+
+    def _usage_metrics(self) -> List[UsageMetrics]:
+        usage_metrics = [
             self.eviction_policy_usage_metrics,
             self.allocator_usage_metrics,
         ]
+        if self.reachable_usage_metrics is not None:
+            usage_metrics.append(self.reachable_usage_metrics)
+        return usage_metrics
+
+    @property
+    def reachable_ratio(self) -> float:
+        """Return the ratio of reachable bytes to resident bytes."""
+        resident = self.eviction_policy_usage_metrics.used_nbytes
+        if self.reachable_usage_metrics is None or resident == 0:
+            return 1.0
+        return self.reachable_usage_metrics.used_nbytes / resident
 
     def trace_usage(self, resource, used_nbytes):
         if resource is MetricRecorder.Resource.L1_EVICTION_POLICY:
             self.eviction_policy_usage_metrics.update(used_nbytes)
         elif resource is MetricRecorder.Resource.L1_ALLOCATOR:
             self.allocator_usage_metrics.update(used_nbytes)
+        elif resource is MetricRecorder.Resource.L1_REACHABLE:
+            if self.reachable_usage_metrics is None:
+                self.reachable_usage_metrics = UsageMetrics(
+                    MetricRecorder.Resource.L1_REACHABLE,
+                    self._capacity_nbytes,
+                )
+            self.reachable_usage_metrics.update(used_nbytes)
         else:
             raise ValueError(f"Unknown resource: {resource}")
 
     def summary(self) -> str:
         summary = super().summary()
-        for r in [
-            self.eviction_policy_usage_metrics,
-            self.allocator_usage_metrics,
-        ]:
+        for r in self._usage_metrics():
             if r.capacity_nbytes > 0:
                 summary += ", " if len(summary) > 0 else ""
                 summary += f"{r.summary()}"
@@ -746,7 +1376,133 @@ class L1CacheMetrics(BaseCacheMetrics):
         return summary
 
 
-L2CacheMetrics = BaseCacheMetrics
+class L2CacheMetrics(BaseCacheMetrics):
+    """The metrics of the l2 cache."""
+
+    backend_usage_metrics: UsageMetrics
+    backend_eviction_metrics: EvictionMetrics
+    compression_metrics: CompressionMetrics
+    filter_metrics: FilterMetrics
+    write_back_metrics: WriteBackMetrics
+    single_flight_metrics: SingleFlightMetrics
+
+    def __init__(
+        self,
+        *,
+        cache_type: str,
+        block_ntokens: int,
+        enable_time_measurement: bool = True,
+        enable_breakdown_measurement: bool = True,
+    ) -> None:
+        super().__init__(
+            cache_type=cache_type,
+            block_ntokens=block_ntokens,
+            enable_time_measurement=enable_time_measurement,
+            enable_breakdown_measurement=enable_breakdown_measurement,
+        )
+        # The capacity is unknown until the backend reports it
+        self.backend_usage_metrics = UsageMetrics(
+            MetricRecorder.Resource.L2_BACKEND, 0
+        )
+        self.backend_eviction_metrics = EvictionMetrics(
+            MetricRecorder.Resource.L2_BACKEND
+        )
+        self.compression_metrics = CompressionMetrics(
+            MetricRecorder.Resource.L2_BACKEND
+        )
+        self.filter_metrics = FilterMetrics(MetricRecorder.Resource.L2_FILTER)
+        self.write_back_metrics = WriteBackMetrics(
+            MetricRecorder.Resource.L2_WRITE_BACK
+        )
+        self.single_flight_metrics = SingleFlightMetrics(
+            MetricRecorder.Resource.L2_SINGLE_FLIGHT
+        )
+
+    def _get_all_metrics(self) -> List[Metrics]:
+        return super()._get_all_metrics() + [
+            self.backend_usage_metrics,
+            self.backend_eviction_metrics,
+            self.compression_metrics,
+            self.filter_metrics,
+            self.write_back_metrics,
+            self.single_flight_metrics,
+        ]
+
+    def reset(self):
+        super().reset()
+        self.backend_eviction_metrics.reset()
+        self.compression_metrics.reset()
+        self.filter_metrics.reset()
+        self.write_back_metrics.reset()
+        self.single_flight_metrics.reset()
+
+    def trace_usage(self, resource, used_nbytes, capacity_nbytes):
+        if resource is MetricRecorder.Resource.L2_BACKEND:
+            self.backend_usage_metrics.capacity_nbytes = capacity_nbytes
+            self.backend_usage_metrics.update(used_nbytes)
+        else:
+            raise ValueError(f"Unknown resource: {resource}")
+
+    def trace_eviction(
+        self, resource, num_objs, num_evicted_objs, num_evicted_nbytes
+    ):
+        if resource is MetricRecorder.Resource.L2_BACKEND:
+            self.backend_eviction_metrics.update(
+                num_objs, num_evicted_objs, num_evicted_nbytes
+            )
+        else:
+            raise ValueError(f"Unknown resource: {resource}")
+
+    def trace_compression(
+        self, raw_nbytes: int, compressed_nbytes: int, cpu_s: float
+    ) -> None:
+        self.compression_metrics.update_compress(
+            raw_nbytes, compressed_nbytes, cpu_s
+        )
+
+    def trace_decompression(self, cpu_s: float) -> None:
+        self.compression_metrics.update_decompress(cpu_s)
+
+    def trace_filter(
+        self, num_lookups: int, num_negatives: int, num_false_positives: int
+    ) -> None:
+        self.filter_metrics.update(
+            num_lookups, num_negatives, num_false_positives
+        )
+
+    def trace_single_flight(
+        self, num_fetches: int, num_coalesced_fetches: int
+    ) -> None:
+        self.single_flight_metrics.update(num_fetches, num_coalesced_fetches)
+
+    def summary(self) -> str:
+        backend_summary = ""
+        if self.backend_usage_metrics.capacity_nbytes > 0:
+            backend_summary += f"{self.backend_usage_metrics.summary()}"
+        if self.backend_eviction_metrics.total_evicted_objs > 0:
+            backend_summary += ", " if len(backend_summary) > 0 else ""
+            backend_summary += f"{self.backend_eviction_metrics.summary()}"
+        if self.compression_metrics.total_raw_nbytes > 0:
+            backend_summary += ", " if len(backend_summary) > 0 else ""
+            backend_summary += f"{self.compression_metrics.summary()}"
+        if self.filter_metrics.total_lookups > 0:
+            backend_summary += ", " if len(backend_summary) > 0 else ""
+            backend_summary += f"{self.filter_metrics.summary()}"
+        if self.write_back_metrics.total_batches > 0:
+            backend_summary += ", " if len(backend_summary) > 0 else ""
+            backend_summary += f"{self.write_back_metrics.summary()}"
+        if self.single_flight_metrics.total_coalesced_fetches > 0:
+            backend_summary += ", " if len(backend_summary) > 0 else ""
+            backend_summary += f"{self.single_flight_metrics.summary()}"
+
+        summary = super().summary()
+        if len(backend_summary) == 0:
+            return summary
+        if len(summary) == 0:
+            return f"{self._cache_type}: {backend_summary}"
+        return f"{summary}, {backend_summary}"
+
+
 CacheMgrMetrics = L1CacheMetrics
 
 
@@ -801,6 +1557,15 @@ class KVCacheMetrics(Metrics):
     def time_measurement_enabled(self) -> bool:
         return self.mgr.time_measurement_enabled
 
+    @property
+    def effective_capacity_gain(self) -> float:
+        """The factor by which compression and quantization multiply the
+        number of blocks the l2 cache is able to hold.
+        """
+        if self.l2 is None:
+            return 1.0
+        return self.l2.compression_metrics.ratio or 1.0
+
     def reset(self):
         if self.l1 is not None:
             self.l1.reset()
@@ -823,6 +1588,12 @@ class KVCacheMetrics(Metrics):
             if len(l2_summary) > 0:
                 summary += "\n" if len(summary) > 0 else ""
                 summary += f"\t{l2_summary}"
+            if self.l2.compression_metrics.total_raw_nbytes > 0:
+                summary += "\n" if len(summary) > 0 else ""
+                summary += (
+                    "\tL2 effective capacity gain: "
+                    f"{self.effective_capacity_gain:.2f}x"
+                )
         return summary
 
 
@@ -851,8 +1622,10 @@ class MeasurableBase:
     def __init__(
         self,
         recorder: BaseCacheMetrics | None,
+        op_recorder: "OpRecorder | None" = None,
     ):
         self._recorder = recorder
+        self._op_recorder = op_recorder
         self._enable_time_measurement = (
             recorder is not None and recorder.time_measurement_enabled
         )
@@ -884,6 +1657,10 @@ class MeasurableBase:
                         status,
                         get_lat_ms(),
                     )
+                if self._op_recorder is not None:
+                    self._op_recorder.record(
+                        op, prefix, query, status, get_lat_ms()
+                    )
                 return status
 
             @functools.wraps(func)
@@ -905,6 +1682,10 @@ class MeasurableBase:
                         status,
                         get_lat_ms(),
                     )
+                if self._op_recorder is not None:
+                    self._op_recorder.record(
+                        op, prefix, query, status, get_lat_ms()
+                    )
                 return status
 
             if asyncio.iscoroutinefunction(func):
@@ -0,0 +1,316 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from farmhash import FarmHash64
+
+from .cache_hashable import KVCacheKeyTypes, TokenListView
+from .common.absl_logging import getLogger
+from .metrics import MetricRecorder
+from .status import Status
+
+logger = getLogger(__name__)
+
+# One record per op, block key hashes of the op are stored in a separate
+# array of the same chunk, at [key_offset, key_offset + nkeys).
+OP_RECORD_DTYPE = np.dtype(
+    [
+        # completion time of the op
+        ("ts_ns", np.int64),
+        ("op", np.uint8),
+        ("status", np.uint8),
+        ("prefix_ntokens", np.uint32),
+        ("query_ntokens", np.uint32),
+        # number of tokens found by a lookup, i.e., exists, acquire or get
+        ("hit_ntokens", np.uint32),
+        # number of tokens stored by a put
+        ("put_ntokens", np.uint32),
+        # 0 if time measurement is disabled, see meta.json
+        ("lat_us", np.float32),
+        ("key_offset", np.uint64),
+        ("nkeys", np.uint32),
+    ]
+)
+OP_RECORDER_VERSION = 2
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def block_key_hashes(
+    prefix: KVCacheKeyTypes | None,
+    query: KVCacheKeyTypes,
+    block_ntokens: int,
+) -> np.ndarray:
+    """Compute a stable 64-bit hash for every full block of the query.
+
+    The hash of a block covers the block and all blocks preceding it, i.e.,
+    two blocks share a hash iff they share a cache key. Token keys are hashed
+    with the rolling digests of the tokens, which are cached by the views,
+    block hashes are hashed as they are since they chain their prefix
+    already.
+    """
+    if isinstance(query, TokenListView):
+        if prefix is not None and len(prefix) > 0:
+            all_tokens = prefix + query
+        else:
+            all_tokens = query
+        digests = all_tokens.block_digests(
+            block_ntokens, len(all_tokens) - len(query)
+        )
+        return np.array(
+            [digest & _UINT64_MASK for digest in digests], dtype=np.uint64
+        )
+
+    hashes = list(query)
+    step = block_ntokens // query.block_ntokens
+    nblocks = len(hashes) // step
+    return np.fromiter(
+        (
+            FarmHash64("".join(hashes[i * step : (i + 1) * step]))
+            for i in range(nblocks)
+        ),
+        dtype=np.uint64,
+        count=nblocks,
+    )
+
+
+class OpRecorder:
+    """Records the ops of a kv cache manager into chunk files for offline
+    replay.
+
+    Records are buffered in a NumPy structured array of chunk_nrecords
+    entries. A full buffer is handed over to a background thread that
+    writes it as one chunk file, i.e., {dir}/chunk-{seq:08d}.npz with the
+    arrays "records" and "keys". If max_chunks is positive, the directory
+    is a ring of the most recent max_chunks chunks.
+
+    Args:
+        root: Root directory. Every recorder writes to its own directory
+              named after the host and the process under root.
+        block_ntokens: Number of tokens in a block.
+        block_nbytes: Number of bytes of a block.
+        chunk_nrecords: Number of records of a chunk file.
+        max_chunks: Number of chunk files kept, 0 means no limit.
+        time_measurement_enabled: Whether the latencies of the ops are
+                                  measured. If not, lat_us of the records
+                                  is 0.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        block_ntokens: int,
+        block_nbytes: int,
+        chunk_nrecords: int = 65536,
+        max_chunks: int = 0,
+        time_measurement_enabled: bool = True,
+    ) -> None:
+        assert chunk_nrecords > 0, "chunk_nrecords must be positive"
+        self.dir: str = os.path.join(
+            root, f"{socket.gethostname()}-{os.getpid()}"
+        )
+        self.block_ntokens: int = block_ntokens
+        self.chunk_nrecords: int = chunk_nrecords
+        self.max_chunks: int = max_chunks
+
+        os.makedirs(self.dir, exist_ok=True)
+        with open(os.path.join(self.dir, "meta.json"), "w") as f:
+            json.dump(
+                {
+                    "version": OP_RECORDER_VERSION,
+                    "block_ntokens": block_ntokens,
+                    "block_nbytes": block_nbytes,
+                    "time_measurement_enabled": time_measurement_enabled,
+                    "ops": {op.value: op.name for op in MetricRecorder.OP},
+                },
+                f,
+            )
+
+        self._lock = threading.Lock()
+        self._seq: int = 0
+        self._nrecords: int = 0
+        self._nkeys: int = 0
+        self._records = np.empty(chunk_nrecords, dtype=OP_RECORD_DTYPE)
+        self._keys = np.empty(chunk_nrecords * 8, dtype=np.uint64)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._write_loop, name="OpRecorder", daemon=True
+        )
+        self._thread.start()
+        self._closed: bool = False
+
+        logger.info("%s is initialized.", str(self))
+
+    def __repr__(self) -> str:
+        return (
+            f"OpRecorder(dir={self.dir}, chunk_nrecords={self.chunk_nrecords}"
+            f", max_chunks={self.max_chunks})"
+        )
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def record(
+        self,
+        op: MetricRecorder.OP,
+        prefix: KVCacheKeyTypes | None,
+        query: KVCacheKeyTypes,
+        status: Status,
+        lat_ms: float,
+    ) -> None:
+        """Record an op.
+
+        Args:
+            op: The op.
+            prefix: The prefix of the op.
+            query: The query of the op.
+            status: The status returned by the op.
+            lat_ms: The latency of the op in milliseconds.
+        """
+        ts_ns = time.time_ns()
+        keys = block_key_hashes(prefix, query, self.block_ntokens)
+        hit_ntokens = 0
+        put_ntokens = 0
+        if status.is_ok():
+            value = status.get()
+            ntokens = value[0] if isinstance(value, tuple) else value
+            if op == MetricRecorder.OP.PUT:
+                put_ntokens = ntokens
+            else:
+                hit_ntokens = ntokens
+        prefix_ntokens = 0 if prefix is None else len(prefix)
+
+        with self._lock:
+            if self._closed:
+                return
+            if self._nkeys + len(keys) > len(self._keys):
+                nkeys = max(2 * len(self._keys), self._nkeys + len(keys))
+                self._keys = np.resize(self._keys, nkeys)
+            self._records[self._nrecords] = (
+                ts_ns,
+                op.value,
+                status.error_code.value,
+                prefix_ntokens,
+                len(query),
+                hit_ntokens,
+                put_ntokens,
+                lat_ms * 1000,
+                self._nkeys,
+                len(keys),
+            )
+            self._keys[self._nkeys : self._nkeys + len(keys)] = keys
+            self._nrecords += 1
+            self._nkeys += len(keys)
+            if self._nrecords == self.chunk_nrecords:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Hand over the buffered records to the writer."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._nrecords == 0:
+            return
+        self._queue.put(
+            (
+                self._seq,
+                self._records[: self._nrecords],
+                self._keys[: self._nkeys],
+            )
+        )
+        self._seq += 1
+        self._nrecords = 0
+        self._nkeys = 0
+        # the writer owns the old buffers
+        self._records = np.empty(self.chunk_nrecords, dtype=OP_RECORD_DTYPE)
+        self._keys = np.empty(len(self._keys), dtype=np.uint64)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            seq, records, keys = item
+            path = os.path.join(self.dir, f"chunk-{seq:08d}.npz")
+            try:
+                np.savez(path, records=records, keys=keys)
+                if self.max_chunks > 0 and seq >= self.max_chunks:
+                    stale = seq - self.max_chunks
+                    stale_path = os.path.join(
+                        self.dir, f"chunk-{stale:08d}.npz"
+                    )
+                    if os.path.exists(stale_path):
+                        os.remove(stale_path)
+            except Exception as e:
+                logger.error("Failed to write %s: %s", path, e)
+
+    def close(self) -> None:
+        """Flush the buffered records and wait for the writer."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+
+def load_op_records(
+    path: str,
+) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+    """Load the records written by an OpRecorder.
+
+    Args:
+        path: The directory of the recorder, i.e., {root}/{host}-{pid}.
+    Returns:
+        The meta data, the records of all chunks in order, and the block key
+        hashes, where key_offset of the records index into the latter.
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("version") != OP_RECORDER_VERSION:
+        raise ValueError(
+            f"Unsupported op recorder version {meta.get('version')} in "
+            f"{path}, expected {OP_RECORDER_VERSION}"
+        )
+
+    all_records = []
+    all_keys = []
+    nkeys = 0
+    for chunk_path in sorted(glob.glob(os.path.join(path, "chunk-*.npz"))):
+        with np.load(chunk_path) as chunk:
+            records, keys = chunk["records"], chunk["keys"]
+        records["key_offset"] += nkeys
+        nkeys += len(keys)
+        all_records.append(records)
+        all_keys.append(keys)
+
+    if len(all_records) == 0:
+        return (
+            meta,
+            np.empty(0, dtype=OP_RECORD_DTYPE),
+            np.empty(0, dtype=np.uint64),
+        )
+    return meta, np.concatenate(all_records), np.concatenate(all_keys)
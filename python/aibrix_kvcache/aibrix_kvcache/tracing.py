@@ -0,0 +1,559 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-request latency breakdown spans of the kv cache ops.
+
+Spans are started by the trace_span decorator on the ops of the cache
+manager, L1Cache and L2Cache, and by trace_section around their sections,
+e.g., key building, allocation, backend IOs and token validation. A
+request span started by the connector with trace_request makes the ops of
+that request its children, otherwise every top-level op is a trace of its
+own.
+
+The sampling decision is made once per trace: requests are sampled by the
+hash of their ids, s.t. all ranks of a request agree, top-level ops are
+sampled at random. Sampled traces shorter than the min duration are
+dropped. Finished spans are exported by a background thread, either as
+JSONL or via OTLP, which requires the opentelemetry packages.
+
+The current span lives in a contextvar, coroutines running on the event
+loop of L2Cache need to be wrapped by propagate() to inherit it.
+"""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Coroutine, Dict, List, Sequence, TypeVar
+
+from farmhash import FarmHash64, FarmHash128
+
+from . import envs
+from .cache_args import parse_kvcache_api_args
+from .common.absl_logging import getLogger
+from .status import Status
+
+logger = getLogger(__name__)
+
+T = TypeVar("T")
+
+_UINT64_MAX = (1 << 64) - 1
+_EXPORT_BATCH_SIZE = 512
+_EXPORT_INTERVAL_S = 1.0
+
+
+class Span:
+    """A finished or ongoing span of a trace."""
+
+    __slots__ = (
+        "trace",
+        "name",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attrs",
+    )
+
+    def __init__(
+        self,
+        trace: "_Trace",
+        name: str,
+        parent_id: int,
+        attrs: Dict[str, Any] | None = None,
+    ) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id: int = random.getrandbits(64) or 1
+        self.parent_id = parent_id
+        self.start_ns: int = time.time_ns()
+        self.end_ns: int = 0
+        self.attrs: Dict[str, Any] = attrs if attrs is not None else {}
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": f"{self.trace.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": (
+                f"{self.parent_id:016x}" if self.parent_id != 0 else None
+            ),
+            "request_id": self.trace.request_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_us": (self.end_ns - self.start_ns) / 1e3,
+            "attrs": self.attrs,
+        }
+
+
+class _Trace:
+    """Spans sharing a root. Spans ended before the root are held back
+    until the root decides whether the trace is kept.
+    """
+
+    __slots__ = ("trace_id", "request_id", "root", "pending", "kept", "lock")
+
+    def __init__(self, trace_id: int, request_id: str | None) -> None:
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.root: Span | None = None
+        self.pending: List[Span] = []
+        self.kept: bool | None = None
+        self.lock = threading.Lock()
+
+
+# Set as the current span of traces that are not sampled, s.t. the ops
+# underneath do not start traces of their own.
+_UNSAMPLED = object()
+
+_current_span: contextvars.ContextVar[Any] = contextvars.ContextVar(
+    "aibrix_kvcache_current_span", default=None
+)
+
+
+class SpanExporter:
+    """Exports batches of finished spans, called by the writer thread of
+    a Tracer only.
+    """
+
+    def export(self, spans: Sequence[Span]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a file.
+
+    Args:
+        path: Path of the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.path = path
+        self._file = open(path, "a")
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self._file.write(
+            "".join(json.dumps(span.to_dict()) + "\n" for span in spans)
+        )
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class OtlpSpanExporter(SpanExporter):
+    """Exports spans to an OTLP collector over gRPC.
+
+    Args:
+        endpoint: Endpoint of the collector.
+    """
+
+    def __init__(self, endpoint: str) -> None:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+
+        self._exporter = OTLPSpanExporter(endpoint=endpoint, insecure=True)
+        self._resource = Resource.create(
+            {
+                "service.name": "aibrix.kvcache",
+                "host.name": socket.gethostname(),
+                "process.pid": os.getpid(),
+            }
+        )
+
+    def export(self, spans: Sequence[Span]) -> None:
+        from opentelemetry.sdk.trace import ReadableSpan
+        from opentelemetry.trace import SpanContext, TraceFlags
+
+        def span_context(trace_id: int, span_id: int) -> SpanContext:
+            return SpanContext(
+                trace_id=trace_id,
+                span_id=span_id,
+                is_remote=False,
+                trace_flags=TraceFlags(TraceFlags.SAMPLED),
+            )
+
+        readable_spans = []
+        for span in spans:
+            trace_id = span.trace.trace_id
+            attrs = {
+                k: v if isinstance(v, (bool, int, float, str)) else str(v)
+                for k, v in span.attrs.items()
+            }
+            if span.trace.request_id is not None:
+                attrs["request_id"] = span.trace.request_id
+            readable_spans.append(
+                ReadableSpan(
+                    name=span.name,
+                    context=span_context(trace_id, span.span_id),
+                    parent=(
+                        span_context(trace_id, span.parent_id)
+                        if span.parent_id != 0
+                        else None
+                    ),
+                    resource=self._resource,
+                    attributes=attrs,
+                    start_time=span.start_ns,
+                    end_time=span.end_ns,
+                )
+            )
+        self._exporter.export(readable_spans)
+
+    def close(self) -> None:
+        self._exporter.shutdown()
+
+
+class Tracer:
+    """Samples traces and hands their finished spans over to the exporter.
+
+    Args:
+        exporter: The exporter.
+        sample_ratio: Ratio of requests, or of top-level ops without a
+            request, that are traced.
+        min_duration_ms: Sampled traces whose root span is shorter than
+            this are dropped.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_ratio: float = 0.01,
+        min_duration_ms: float = 0,
+    ) -> None:
+        assert 0 <= sample_ratio <= 1, "sample_ratio must be in [0, 1]"
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.min_duration_ms = min_duration_ms
+        self._sample_threshold = int(sample_ratio * _UINT64_MAX)
+        self._min_duration_ns = int(min_duration_ms * 1e6)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._export_loop, name="Tracer", daemon=True
+        )
+        self._thread.start()
+        self._closed = False
+
+    def __repr__(self) -> str:
+        return (
+            f"Tracer(exporter={self.exporter.__class__.__name__}, "
+            f"sample_ratio={self.sample_ratio}, "
+            f"min_duration_ms={self.min_duration_ms})"
+        )
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def should_sample(self, request_id: str | None = None) -> bool:
+        if request_id is None:
+            return random.random() < self.sample_ratio
+        return FarmHash64(request_id) < self._sample_threshold
+
+    def start_trace(
+        self, name: str, request_id: str | None = None, **attrs: Any
+    ) -> Span | None:
+        """Start the root span of a trace if it is sampled.
+
+        Args:
+            name: Name of the root span.
+            request_id: Id of the request, requests of the same id share
+                the trace id.
+        Returns:
+            The root span, or None if the trace is not sampled.
+        """
+        if not self.should_sample(request_id):
+            return None
+        if request_id is None:
+            trace_id = random.getrandbits(128) or 1
+        else:
+            trace_id = FarmHash128(request_id) or 1
+        trace = _Trace(trace_id, request_id)
+        trace.root = Span(trace, name, 0, attrs)
+        return trace.root
+
+    def start_span(self, name: str, parent: Span, **attrs: Any) -> Span:
+        return Span(parent.trace, name, parent.span_id, attrs)
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        trace = span.trace
+        with trace.lock:
+            if span is trace.root:
+                trace.kept = (
+                    span.end_ns - span.start_ns >= self._min_duration_ns
+                )
+                spans = trace.pending + [span] if trace.kept else []
+                trace.pending = []
+            elif trace.kept is None:
+                trace.pending.append(span)
+                return
+            else:
+                spans = [span] if trace.kept else []
+        if len(spans) > 0 and not self._closed:
+            self._queue.put(spans)
+
+    def _export_loop(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + _EXPORT_INTERVAL_S
+        while True:
+            try:
+                timeout = max(deadline - time.monotonic(), 0)
+                spans = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                spans = []
+            if spans is None:
+                self._export(batch)
+                return
+            batch.extend(spans)
+            if len(batch) >= _EXPORT_BATCH_SIZE or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + _EXPORT_INTERVAL_S
+
+    def _export(self, batch: List[Span]) -> None:
+        if len(batch) == 0:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.error("Failed to export %d spans: %s", len(batch), e)
+
+    def close(self) -> None:
+        """Export the finished spans and close the exporter."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.exporter.close()
+
+
+class _SpanContext:
+    __slots__ = ("_tracer", "_span", "_token")
+
+    def __init__(self, tracer: Tracer, span: Span | None) -> None:
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self) -> Span | None:
+        if self._span is None:
+            self._token = _current_span.set(_UNSAMPLED)
+        else:
+            self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if self._span is not None:
+            if exc is not None:
+                self._span.set("error", repr(exc))
+            self._tracer.end_span(self._span)
+
+
+_NULL_CONTEXT = nullcontext()
+
+_tracer: Tracer | None = None
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer | None) -> Tracer | None:
+    """Replace the global tracer and return the previous one."""
+    global _tracer
+    prev, _tracer = _tracer, tracer
+    return prev
+
+
+def current_span() -> Span | None:
+    span = _current_span.get()
+    return None if span is _UNSAMPLED else span
+
+
+def trace_request(request_id: str, name: str, **attrs: Any):
+    """Context manager that starts the trace of a request, the spans
+    started inside are attributed to the request.
+
+    Args:
+        request_id: Id of the request.
+        name: Name of the span.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_CONTEXT
+    span = tracer.start_trace(name, request_id, **attrs)
+    return _SpanContext(tracer, span)
+
+
+def trace_section(name: str, **attrs: Any):
+    """Context manager that starts a child span of the current span, it is
+    a no-op outside of a sampled trace.
+
+    Args:
+        name: Name of the span.
+    """
+    tracer = _tracer
+    parent = _current_span.get()
+    if tracer is None or parent is None or parent is _UNSAMPLED:
+        return _NULL_CONTEXT
+    return _SpanContext(tracer, tracer.start_span(name, parent, **attrs))
+
+
+def _enter_op(name: str):
+    tracer = _tracer
+    if tracer is None:
+        return None
+    parent = _current_span.get()
+    if parent is _UNSAMPLED:
+        return None
+    if parent is None:
+        return _SpanContext(tracer, tracer.start_trace(name))
+    return _SpanContext(tracer, tracer.start_span(name, parent))
+
+
+def _annotate(span: Span, args: tuple, kwargs: dict, status: Any) -> None:
+    try:
+        prefix, query, _ = parse_kvcache_api_args(*args, **kwargs)
+        span.set("prefix_ntokens", 0 if prefix is None else len(prefix))
+        span.set("query_ntokens", len(query))  # type: ignore
+    except Exception:
+        pass
+    if isinstance(status, Status):
+        span.set("status", status.error_code.name)
+        if status.is_ok():
+            value = status.get()
+            if isinstance(value, tuple):
+                value = value[0]
+            if isinstance(value, int):
+                span.set("value", value)
+
+
+def trace_span(name: str, domain: str):
+    """
+    Decorator that traces an op of the kv cache with the prefix/query
+    signature. Supports both sync and async functions. It is a no-op if
+    tracing is disabled when the function is decorated.
+
+    Args:
+        name (str): Name of the op.
+        domain (str): Class or module the op belongs to.
+    """
+    span_name = f"{domain}.{name}"
+
+    def decorator(func):
+        if not envs.AIBRIX_KV_CACHE_OL_TRACING_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            ctx = _enter_op(span_name)
+            if ctx is None:
+                return await func(self, *args, **kwargs)
+            with ctx as span:
+                status = await func(self, *args, **kwargs)
+                if span is not None:
+                    _annotate(span, args, kwargs, status)
+                return status
+
+        @functools.wraps(func)
+        def sync_wrapper(self, *args, **kwargs):
+            ctx = _enter_op(span_name)
+            if ctx is None:
+                return func(self, *args, **kwargs)
+            with ctx as span:
+                status = func(self, *args, **kwargs)
+                if span is not None:
+                    _annotate(span, args, kwargs, status)
+                return status
+
+        return (
+            async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+        )
+
+    return decorator
+
+
+async def _run_in_span(span: Any, coro: Coroutine[Any, Any, T]) -> T:
+    _current_span.set(span)
+    return await coro
+
+
+def propagate(coro: Coroutine[Any, Any, T]) -> Coroutine[Any, Any, T]:
+    """Make the coroutine inherit the current span when it runs as a task
+    of another thread's event loop, e.g., via run_coroutine_threadsafe.
+    """
+    span = _current_span.get()
+    if span is None:
+        return coro
+    return _run_in_span(span, coro)
+
+
+def _create_exporter() -> SpanExporter | None:
+    exporter = envs.AIBRIX_KV_CACHE_OL_TRACING_EXPORTER
+    if exporter == "JSONL":
+        return JsonlSpanExporter(
+            os.path.join(
+                envs.AIBRIX_KV_CACHE_OL_TRACING_JSONL_DIR,
+                f"{socket.gethostname()}-{os.getpid()}.jsonl",
+            )
+        )
+    elif exporter == "OTLP":
+        try:
+            return OtlpSpanExporter(
+                envs.AIBRIX_KV_CACHE_OL_TRACING_OTLP_ENDPOINT
+            )
+        except ImportError:
+            logger.warning(
+                "Tracing is disabled, OTLP export requires "
+                "opentelemetry-sdk and opentelemetry-exporter-otlp-proto-grpc"
+            )
+            return None
+    logger.warning("Tracing is disabled, unknown exporter %s", exporter)
+    return None
+
+
+if envs.AIBRIX_KV_CACHE_OL_TRACING_ENABLED:
+    _exporter = _create_exporter()
+    if _exporter is not None:
+        _tracer = Tracer(
+            _exporter,
+            sample_ratio=envs.AIBRIX_KV_CACHE_OL_TRACING_SAMPLE_RATIO,
+            min_duration_ms=envs.AIBRIX_KV_CACHE_OL_TRACING_MIN_DURATION_MS,
+        )
+        atexit.register(_tracer.close)
+        logger.info("%s is initialized.", str(_tracer))
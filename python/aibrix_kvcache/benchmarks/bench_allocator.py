@@ -0,0 +1,162 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Throughput and fragmentation of the tensor pool allocators.
+
+Replays the allocations of an L1Cache at capacity: every request allocates
+one memory region per block, whose size grows with the number of packed
+prefix tokens, and random blocks are freed whenever the pool runs out of
+memory, like evictions would do. Fragmentation is the share of the
+capacity that is not used by live blocks when an allocation fails even
+though that much memory would be enough for it.
+
+Example:
+    python benchmarks/bench_allocator.py --capacity-mib 256
+    python benchmarks/bench_allocator.py --block-nbytes 2097152 \\
+        --max-seq-len 32768
+"""
+
+import argparse
+import os
+import random
+import time
+from typing import List
+
+# Tokens are only packed into memory regions if token validation is on
+os.environ["AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_ENABLED"] = "1"
+
+from aibrix_kvcache.memory import (  # noqa: E402
+    ManagedMemoryRegion,
+    MemoryRegion,
+    TensorPoolAllocator,
+)
+from aibrix_kvcache.memory.allocator import (  # noqa: E402
+    CoalescingPoolAllocator,
+    SizeClassPoolAllocator,
+)
+
+ALLOCATORS = {
+    "COALESCING": CoalescingPoolAllocator,
+    "SIZE_CLASS": SizeClassPoolAllocator,
+}
+
+
+def build_trace(args: argparse.Namespace) -> List[List[int]]:
+    """Return the sizes of the blocks of every request."""
+    rng = random.Random(args.seed)
+    trace = []
+    for _ in range(args.num_requests):
+        seq_len = min(
+            args.max_seq_len, int(rng.lognormvariate(args.mean_log_len, 1.0))
+        )
+        nblocks = max(1, seq_len // args.block_ntokens)
+        trace.append(
+            [
+                ManagedMemoryRegion.calculate_size(
+                    args.block_nbytes, (i + 1) * args.block_ntokens
+                )
+                for i in range(nblocks)
+            ]
+        )
+    return trace
+
+
+def replay(name: str, trace: List[List[int]], capacity_nbytes: int) -> None:
+    allocator = ALLOCATORS[name](capacity_nbytes=capacity_nbytes)
+    rng = random.Random(0)
+    live: List[MemoryRegion] = []
+    live_nbytes = 0
+    num_ops = num_ooms = 0
+    peak_frag = 0.0
+    peak_ext_frag = 0.0
+    sum_frag = 0.0
+
+    start = time.perf_counter()
+    for sizes in trace:
+        mrs: List[MemoryRegion] = []
+        while len(mrs) < len(sizes):
+            status = allocator.alloc(sizes[len(mrs) :])
+            num_ops += 1
+            if status.is_ok():
+                mrs.extend(status.get())
+                continue
+            # memory not used by live blocks, which a perfect allocator
+            # would be able to hand out
+            pending = sum(len(mr) for mr in mrs)
+            free_nbytes = capacity_nbytes - live_nbytes - pending
+            if free_nbytes >= sum(sizes[len(mrs) :]):
+                num_ooms += 1
+                frag = free_nbytes / capacity_nbytes
+                peak_frag = max(peak_frag, frag)
+                sum_frag += frag
+            peak_ext_frag = max(peak_ext_frag, allocator.fragmentation_ratio)
+            if not live:
+                break
+            # evict blocks of the size of the request, the eviction policy
+            # picks blocks of different requests in no particular order
+            evicted_nbytes = 0
+            while live and evicted_nbytes < sum(sizes):
+                i = rng.randrange(len(live))
+                live[i], live[-1] = live[-1], live[i]
+                mr = live.pop()
+                evicted_nbytes += len(mr)
+                mr.ref_down()
+                num_ops += 1
+            live_nbytes -= evicted_nbytes
+        live.extend(mrs)
+        live_nbytes += sum(len(mr) for mr in mrs)
+    elapsed = time.perf_counter() - start
+
+    for mr in live:
+        mr.ref_down()
+    print(
+        f"{name:<12}{num_ops / elapsed:>12.0f}{num_ooms:>8}"
+        f"{sum_frag / max(num_ooms, 1):>12.2%}{peak_frag:>12.2%}"
+        f"{peak_ext_frag:>12.2%}"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    assert not MemoryRegion.use_compact_layout()
+    capacity_nbytes = args.capacity_mib * 1024**2
+    TensorPoolAllocator.SLAB_MAX_NBYTES = capacity_nbytes
+    trace = build_trace(args)
+    print(
+        f"{len(trace)} requests, {sum(len(s) for s in trace)} blocks, "
+        f"{args.capacity_mib} MiB"
+    )
+    print(
+        f"{'allocator':<12}{'ops/s':>12}{'OOMs':>8}"
+        f"{'mean frag':>12}{'peak frag':>12}{'peak ext':>12}"
+    )
+    for name in args.allocators.split(","):
+        replay(name, trace, capacity_nbytes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--allocators", default="COALESCING,SIZE_CLASS")
+    parser.add_argument("--capacity-mib", type=int, default=256)
+    parser.add_argument("--block-nbytes", type=int, default=128 * 1024)
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument("--max-seq-len", type=int, default=8192)
+    parser.add_argument(
+        "--mean-log-len",
+        type=float,
+        default=7.0,
+        help="Mean of the log of the sequence lengths.",
+    )
+    parser.add_argument("--num-requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,142 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time spent saving kv caches within an engine step, sync versus async.
+
+Every step prefills --step-ntokens tokens of a few sequences and saves
+them. SYNC waits for the whole save (snapshot, exists-filtering and put)
+within the step like the Type1 connector does by default, ASYNC only
+waits for the snapshot. Paged kv caches live on the host and puts go to
+the mock L2 backend synchronously, so this runs without GPUs.
+
+Example:
+    python benchmarks/bench_async_save.py --steps 200 --step-ntokens 2048
+"""
+
+import argparse
+import os
+import time
+
+import torch
+
+os.environ["AIBRIX_KV_CACHE_OL_DEVICE"] = "cpu"
+os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "0"
+os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS"] = "0"
+
+from aibrix_kvcache import (  # noqa: E402
+    BaseKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.integration.vllm.kv_connector.aibrix_offloading_async_saver import (  # noqa: E402, E501
+    AIBrixOffloadingConnectorAsyncSaver,
+)
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+
+def run(mode: str, args: argparse.Namespace) -> None:
+    spec = KVCacheBlockSpec(
+        block_ntokens=16,
+        block_dtype=torch.bfloat16,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(
+            heads=list(range(args.heads)),
+            layers=list(range(args.layers)),
+            head_size=128,
+        ),
+    )
+    cache = BaseKVCacheManager(
+        config=KVCacheConfig(
+            block_spec=spec,
+            model_spec=ModelSpec(args.seq_ntokens),
+            multi_threaded=True,
+        )
+    )
+    num_slots = args.seq_ntokens * args.num_seqs
+    paged = torch.randn(
+        (num_slots, *spec.block_shape[1:]), dtype=torch.bfloat16
+    )
+
+    def offload_fn(tensors, slot_mapping):
+        for i, tensor in enumerate(tensors):
+            tensor.copy_(paged[slot_mapping[i * 16 : (i + 1) * 16]])
+
+    saver = AIBrixOffloadingConnectorAsyncSaver(
+        cache,
+        offload_fn,
+        max_inflight_tokens=args.max_inflight_tokens,
+        device="cpu",
+    )
+
+    step_ms = []
+    nsteps_per_seq = args.seq_ntokens // args.step_ntokens
+    for step in range(args.steps):
+        s, i = divmod(step, nsteps_per_seq)
+        base = s * args.seq_ntokens
+        tokens = TokenListView(list(range(base, base + args.seq_ntokens)))
+        slot_mapping = torch.arange(
+            (s % args.num_seqs) * args.seq_ntokens,
+            (s % args.num_seqs + 1) * args.seq_ntokens,
+        )
+        start = time.perf_counter()
+        saver.save(
+            str(s),
+            tokens[: i * args.step_ntokens] or None,
+            tokens[i * args.step_ntokens : (i + 1) * args.step_ntokens],
+            slot_mapping,
+        )
+        if mode == "SYNC":
+            saver.flush()
+        step_ms.append((time.perf_counter() - start) * 1000)
+        # the forward pass of the next step
+        time.sleep(args.forward_ms / 1000)
+
+    saver.flush()
+    step_ms.sort()
+    mean = sum(step_ms) / len(step_ms)
+    p99 = step_ms[int(len(step_ms) * 0.99)]
+    print(f"{mode:<8}{mean:>12.3f}{p99:>12.3f}")
+    saver.close()
+    cache.close()
+
+
+def main(args: argparse.Namespace) -> None:
+    print(
+        f"{args.steps} steps of {args.step_ntokens} tokens, "
+        f"forward={args.forward_ms} ms"
+    )
+    print(f"{'mode':<8}{'save(ms)':>12}{'p99(ms)':>12}")
+    for mode in args.modes.split(","):
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="SYNC,ASYNC")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--step-ntokens", type=int, default=2048)
+    parser.add_argument("--seq-ntokens", type=int, default=8192)
+    parser.add_argument("--num-seqs", type=int, default=4)
+    parser.add_argument("--heads", type=int, default=2)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--forward-ms", type=float, default=20)
+    parser.add_argument("--max-inflight-tokens", type=int, default=65536)
+    main(parser.parse_args())
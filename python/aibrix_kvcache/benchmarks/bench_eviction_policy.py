@@ -0,0 +1,148 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Throughput and memory footprint of L1 eviction policies.
+
+Fills each eviction policy with a given number of entries, then measures
+put, get and evict throughput, the resident memory held by the policy and
+the time of a full garbage collection pass. Every (policy, size) pair runs
+in a fresh process so that RSS numbers do not leak across runs.
+
+Values are a shared dummy block so that only the bookkeeping of the
+policy itself is accounted for.
+
+Example:
+    python benchmarks/bench_eviction_policy.py --sizes 1000000,10000000
+    python benchmarks/bench_eviction_policy.py --sizes 50000000 \\
+        --policies ARRAY_LRU,ARRAY_S3FIFO
+"""
+
+import argparse
+import gc
+import multiprocessing as mp
+import os
+import time
+from typing import Dict, Iterable, cast
+
+from aibrix_kvcache.cache_hashable import KVCacheHashable
+from aibrix_kvcache.l1.eviction_policy import BaseEvictionPolicy
+
+
+class DummyBlock:
+    """Stands in for a MemoryRegion of a fixed size."""
+
+    __slots__ = ("nbytes",)
+
+    def __init__(self, nbytes: int) -> None:
+        self.nbytes = nbytes
+
+    def __len__(self) -> int:
+        return self.nbytes
+
+    def ref_up(self) -> None:
+        pass
+
+    def ref_down(self) -> None:
+        pass
+
+
+def rss_nbytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def keys(start: int, stop: int) -> Iterable[KVCacheHashable]:
+    # plain ints stand in for the keys, which keeps the per-entry overhead
+    # of the policies themselves visible
+    return cast(Iterable[KVCacheHashable], range(start, stop))
+
+
+def run(policy_name: str, size: int, num_ops: int) -> Dict[str, float]:
+    block_nbytes = 1
+    value = DummyBlock(block_nbytes)
+    num_ops = min(num_ops, size)
+
+    base_rss = rss_nbytes()
+    policy = BaseEvictionPolicy.create(policy_name, size * block_nbytes)
+
+    start = time.perf_counter()
+    for key in keys(0, size):
+        policy.put(key, value)  # type: ignore[arg-type]
+    fill_secs = time.perf_counter() - start
+    rss = rss_nbytes() - base_rss
+
+    start = time.perf_counter()
+    gc.collect()
+    gc_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys(size - num_ops, size):
+        policy.get(key)
+    get_secs = time.perf_counter() - start
+
+    # every put of a new key evicts another one
+    start = time.perf_counter()
+    for key in keys(size, size + num_ops):
+        policy.put(key, value)  # type: ignore[arg-type]
+    put_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    policy.evict(num_ops * block_nbytes)
+    evict_secs = time.perf_counter() - start
+
+    return {
+        "fill_ops": size / fill_secs,
+        "get_ops": num_ops / get_secs,
+        "put_ops": num_ops / put_secs,
+        "evict_ops": num_ops / evict_secs,
+        "bytes_per_entry": rss / size,
+        "rss_mib": rss / 2**20,
+        "gc_secs": gc_secs,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    ctx = mp.get_context("spawn")
+    print(
+        f"{'policy':<14}{'entries':>12}{'fill/s':>12}{'get/s':>12}"
+        f"{'put/s':>12}{'evict/s':>12}{'B/entry':>10}{'RSS MiB':>10}"
+        f"{'gc s':>8}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        for policy_name in args.policies.split(","):
+            with ctx.Pool(1) as pool:
+                r = pool.apply(run, (policy_name, size, args.num_ops))
+            print(
+                f"{policy_name:<14}{size:>12}{r['fill_ops']:>12.0f}"
+                f"{r['get_ops']:>12.0f}{r['put_ops']:>12.0f}"
+                f"{r['evict_ops']:>12.0f}{r['bytes_per_entry']:>10.1f}"
+                f"{r['rss_mib']:>10.1f}{r['gc_secs']:>8.2f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000000,10000000,50000000")
+    parser.add_argument(
+        "--policies",
+        default="LRU,ARRAY_LRU,FIFO,ARRAY_FIFO,S3FIFO,ARRAY_S3FIFO",
+    )
+    parser.add_argument(
+        "--num-ops",
+        type=int,
+        default=1000000,
+        help="Number of get, put and evict operations to time.",
+    )
+    main(parser.parse_args())
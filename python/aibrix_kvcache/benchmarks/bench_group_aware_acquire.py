@@ -0,0 +1,150 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency of serial versus pipelined GroupAwareKVCacheManager acquires.
+
+Every rank puts the same sequences onto its L1Cache and then acquires them
+back. Depth 1 is the serial path with one all_reduce per chunk, larger
+depths exchange the hit counts of that many chunks in one all_reduce.
+Collectives run on gloo over localhost, --coll-latency-us adds a simulated
+latency to each of them to mimic a cross-host process group.
+
+Example:
+    python benchmarks/bench_group_aware_acquire.py --depths 1,4,8
+    python benchmarks/bench_group_aware_acquire.py --world-size 4 \\
+        --coll-latency-us 100
+"""
+
+import argparse
+import os
+import time
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from aibrix_kvcache import (
+    GroupAwareKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+
+
+def with_latency(latency_us: float) -> None:
+    """Charge a simulated latency to every all_reduce."""
+    all_reduce = dist.all_reduce
+
+    def slow_all_reduce(*args, **kwargs):
+        deadline = time.perf_counter() + latency_us / 1e6
+        work = all_reduce(*args, **kwargs)
+        while time.perf_counter() < deadline:
+            pass
+        return work
+
+    dist.all_reduce = slow_all_reduce
+
+
+def run(rank: int, depth: int, args: argparse.Namespace) -> None:
+    os.environ["AIBRIX_KV_CACHE_OL_GROUP_AWARE_ACQUIRE_PIPELINE_DEPTH"] = str(
+        depth
+    )
+    spec = KVCacheBlockSpec(
+        block_ntokens=args.block_ntokens,
+        block_dtype=torch.bfloat16,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(
+            heads=[rank], layers=list(range(4)), head_size=64
+        ),
+    )
+    process_group = dist.group.WORLD
+    assert process_group is not None
+    cache = GroupAwareKVCacheManager(
+        config=KVCacheConfig(block_spec=spec, model_spec=ModelSpec(1024)),
+        process_group=process_group,
+    )
+    sequences = [
+        TokenListView(
+            [s * args.seq_ntokens + j for j in range(args.seq_ntokens)]
+        )
+        for s in range(args.num_seqs)
+    ]
+    for tokens in sequences:
+        handle = cache.allocate_for(None, tokens).get()
+        cache.put(None, tokens, handle).raise_if_not_ok()
+
+    latencies = []
+    for _ in range(args.iters):
+        for tokens in sequences:
+            dist.barrier()
+            start = time.perf_counter()
+            status = cache.acquire(None, tokens)
+            latencies.append(time.perf_counter() - start)
+            assert status.get()[0] == len(tokens), status
+            status.get()[1].release()
+
+    if rank == 0:
+        latencies.sort()
+        mean = sum(latencies) / len(latencies)
+        p99 = latencies[int(len(latencies) * 0.99)]
+        nchunks = -(-args.seq_ntokens // cache._chunk_size)
+        print(f"{depth:<8}{nchunks:>8}{mean * 1e3:>12.3f}{p99 * 1e3:>12.3f}")
+    cache.close()
+
+
+def worker(rank: int, args: argparse.Namespace) -> None:
+    os.environ["MASTER_ADDR"] = "localhost"
+    os.environ["MASTER_PORT"] = str(args.port)
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE"] = "cpu"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_PIN_MEMORY"] = "0"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "2"
+    os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = ""
+    os.environ["AIBRIX_KV_CACHE_OL_CHUNK_SIZE"] = str(args.chunk_ntokens)
+    cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+    dist.init_process_group("gloo", rank=rank, world_size=args.world_size)
+    if args.coll_latency_us > 0:
+        with_latency(args.coll_latency_us)
+    for depth in [int(d) for d in args.depths.split(",")]:
+        run(rank, depth, args)
+    dist.barrier()
+    dist.destroy_process_group()
+
+
+def main(args: argparse.Namespace) -> None:
+    print(
+        f"world_size={args.world_size}, {args.seq_ntokens} tokens/seq, "
+        f"chunk={args.chunk_ntokens} tokens, "
+        f"coll_latency={args.coll_latency_us} us"
+    )
+    print(f"{'depth':<8}{'chunks':>8}{'mean(ms)':>12}{'p99(ms)':>12}")
+    mp.spawn(worker, args=(args,), nprocs=args.world_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", default="1,2,4,8")
+    parser.add_argument("--world-size", type=int, default=2)
+    parser.add_argument("--num-seqs", type=int, default=16)
+    parser.add_argument("--seq-ntokens", type=int, default=8192)
+    parser.add_argument("--chunk-ntokens", type=int, default=512)
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument("--iters", type=int, default=10)
+    parser.add_argument("--coll-latency-us", type=float, default=0)
+    parser.add_argument("--port", type=int, default=29511)
+    main(parser.parse_args())
@@ -0,0 +1,210 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Trace-driven hit ratio comparison of L1Cache admission policies.
+
+Replays prefix-sharing traces against L1Cache with every combination of
+eviction and admission policies. Each request acquires its longest cached
+prefix and puts the remaining blocks, like an inference engine would.
+
+Traces are either generated by benchmarks/generator/dataset_generator
+(e.g., synthetic_prefix_sharing_dataset.py) or synthesized in place with
+the same shape: popular shared prefixes with unique suffixes, mixed with
+one-off prompts that scan through the cache.
+
+Example:
+    python benchmarks/bench_l1_admission.py --capacity-blocks 4096
+    python benchmarks/bench_l1_admission.py --dataset output.jsonl \\
+        --tokenizer deepseek-ai/deepseek-llm-7b-chat
+"""
+
+import argparse
+import json
+import random
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+from aibrix_kvcache import TokenListView
+from aibrix_kvcache.l1 import L1Cache
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.spec import (
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheTensorSpec,
+)
+
+
+def load_dataset(path: str, tokenizer: str | None) -> List[List[int]]:
+    """Load prompts from a jsonl file produced by the dataset generator."""
+    prompts: List[str] = []
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line)
+            if "prompt" in entry:
+                prompts.append(entry["prompt"])
+            elif "prompts" in entry:
+                prompts.extend(entry["prompts"])
+            elif "requests" in entry:
+                prompts.extend(r["prompt"] for r in entry["requests"])
+
+    encode: Callable[[str], List[int]]
+    if tokenizer:
+        from transformers import AutoTokenizer
+
+        encode = AutoTokenizer.from_pretrained(tokenizer).encode
+    else:
+        # Word-level pseudo tokens preserve shared prefixes.
+        vocab: Dict[str, int] = {}
+
+        def encode(prompt: str) -> List[int]:
+            return [vocab.setdefault(w, len(vocab)) for w in prompt.split()]
+
+    return [encode(prompt) for prompt in prompts]
+
+
+def synthesize(args: argparse.Namespace) -> List[List[int]]:
+    """Synthesize a prefix-sharing trace with Zipf-distributed prefix
+    popularity and one-off scan prompts.
+    """
+    rng = np.random.default_rng(args.seed)
+    next_token = 0
+
+    def unique_tokens(n: int) -> List[int]:
+        nonlocal next_token
+        next_token += n
+        return list(range(next_token - n, next_token))
+
+    shared_ntokens = int(args.prompt_length * args.shared_proportion)
+    prefixes = [unique_tokens(shared_ntokens) for _ in range(args.num_prefix)]
+    weights = 1.0 / np.arange(1, args.num_prefix + 1) ** args.zipf_alpha
+    weights /= weights.sum()
+
+    trace = []
+    for _ in range(args.num_requests):
+        if rng.random() < args.scan_ratio:
+            trace.append(unique_tokens(args.prompt_length))
+        else:
+            prefix = prefixes[rng.choice(args.num_prefix, p=weights)]
+            trace.append(
+                prefix + unique_tokens(args.prompt_length - shared_ntokens)
+            )
+    return trace
+
+
+def replay(
+    trace: List[List[int]],
+    eviction_policy: str,
+    admission_policy: str,
+    args: argparse.Namespace,
+) -> float:
+    """Replay the trace and return the block hit ratio."""
+    spec = KVCacheBlockSpec(
+        block_ntokens=args.block_ntokens,
+        block_dtype=torch.float16,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(heads=[0], layers=[0], head_size=8),
+    )
+    capacity_nbytes = args.capacity_blocks * spec.block_nbytes
+    max_nblocks = max(len(tokens) for tokens in trace) // spec.block_ntokens
+    cache = L1Cache(
+        eviction_policy=eviction_policy,
+        capacity_nbytes=capacity_nbytes,
+        # leave room for in-flight blocks like KVCacheManager does
+        allocator=TensorPoolAllocator.create(
+            capacity_nbytes=capacity_nbytes
+            + (max_nblocks + 1) * spec.block_nbytes
+        ),
+        block_spec=spec,
+        admission_policy=admission_policy,
+    )
+    shape = list(spec.block_shape)
+
+    hits = total = 0
+    for request in trace:
+        nblocks = len(request) // spec.block_ntokens
+        if nblocks == 0:
+            continue
+        tokens = TokenListView(request[: nblocks * spec.block_ntokens])
+        status = cache.acquire(None, tokens)
+        nhits = len(status.value) if status.is_ok() else 0
+        if status.is_ok():
+            for mr in status.value:
+                mr.ref_down()
+
+        hits += nhits
+        total += nblocks
+        if nhits < nblocks:
+            split = nhits * spec.block_ntokens
+            shape[spec.block_shape_token_dim] = len(tokens) - split
+            cache.put(
+                tokens[:split] if split > 0 else None,
+                tokens[split:],
+                torch.zeros(*shape, dtype=spec.block_dtype),
+            )
+    return hits / max(total, 1)
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.dataset:
+        trace = load_dataset(args.dataset, args.tokenizer)
+    else:
+        trace = synthesize(args)
+    random.seed(args.seed)
+    if args.randomize_order:
+        random.shuffle(trace)
+
+    print(f"{len(trace)} requests, {args.capacity_blocks} blocks in L1Cache")
+    print(f"{'eviction':<10}{'admission':<12}{'hit ratio':>10}")
+    for eviction_policy in args.eviction_policies.split(","):
+        for admission_policy in args.admission_policies.split(","):
+            ratio = replay(trace, eviction_policy, admission_policy, args)
+            print(f"{eviction_policy:<10}{admission_policy:<12}{ratio:>10.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="",
+        help="jsonl produced by the dataset generator. If not set, a "
+        "prefix-sharing trace is synthesized.",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default="",
+        help="Tokenizer for --dataset. Defaults to word-level tokens.",
+    )
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument("--capacity-blocks", type=int, default=2048)
+    parser.add_argument(
+        "--eviction-policies", default="LRU,FIFO,S3FIFO,RADIX_LRU"
+    )
+    parser.add_argument("--admission-policies", default="NONE,TINYLFU")
+    parser.add_argument("--randomize-order", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    # synthetic trace
+    parser.add_argument("--num-requests", type=int, default=4000)
+    parser.add_argument("--num-prefix", type=int, default=64)
+    parser.add_argument("--prompt-length", type=int, default=1024)
+    parser.add_argument("--shared-proportion", type=float, default=0.9)
+    parser.add_argument("--zipf-alpha", type=float, default=1.0)
+    parser.add_argument(
+        "--scan-ratio",
+        type=float,
+        default=0.3,
+        help="Ratio of one-off prompts sharing nothing with others.",
+    )
+    main(parser.parse_args())
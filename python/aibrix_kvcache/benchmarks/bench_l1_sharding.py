@@ -0,0 +1,151 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Multi-threaded throughput of L1Cache with and without sharding.
+
+Every thread replays requests that share prefixes from a common pool:
+it acquires the longest cached prefix, releases it and puts the missing
+blocks, like the offload threads of an inference engine would. The number
+of threads is scaled up to find where the locks of L1Cache saturate.
+
+Example:
+    python benchmarks/bench_l1_sharding.py --shards 1,4,16
+    python benchmarks/bench_l1_sharding.py --threads 1,8,32 \\
+        --block-size 65536
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import List
+
+import torch
+from aibrix_kvcache import TokenListView
+from aibrix_kvcache.l1 import L1Cache
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.spec import (
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheTensorSpec,
+)
+
+
+def build_trace(args: argparse.Namespace, seed: int) -> List[List[int]]:
+    rng = random.Random(seed)
+    prefix_ntokens = args.prefix_blocks * args.block_ntokens
+    suffix_ntokens = args.suffix_blocks * args.block_ntokens
+    trace = []
+    for _ in range(args.requests_per_thread):
+        p = rng.randrange(args.num_prefix)
+        s = rng.randrange(args.num_suffix)
+        prefix = range(p * prefix_ntokens, (p + 1) * prefix_ntokens)
+        # suffixes are shared by requests with the same prefix
+        suffix = range(
+            (1 << 30) + (p * args.num_suffix + s) * suffix_ntokens,
+            (1 << 30) + (p * args.num_suffix + s + 1) * suffix_ntokens,
+        )
+        trace.append(list(prefix) + list(suffix))
+    return trace
+
+
+def run(args: argparse.Namespace, num_shards: int, num_threads: int) -> float:
+    """Run the workload and return the number of blocks per second."""
+    head_size = max(1, args.block_size // (2 * args.block_ntokens * 2))
+    spec = KVCacheBlockSpec(
+        block_ntokens=args.block_ntokens,
+        block_dtype=torch.float16,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(
+            heads=[0], layers=[0], head_size=head_size
+        ),
+    )
+    capacity_nbytes = args.capacity_blocks * spec.block_nbytes
+    max_nblocks = args.prefix_blocks + args.suffix_blocks
+    cache = L1Cache(
+        eviction_policy=args.eviction_policy,
+        capacity_nbytes=capacity_nbytes,
+        # leave room for in-flight blocks of every thread
+        allocator=TensorPoolAllocator.create(
+            capacity_nbytes=capacity_nbytes
+            + num_threads * (max_nblocks + 1) * spec.block_nbytes
+        ),
+        block_spec=spec,
+        multi_threaded=True,
+        num_shards=num_shards,
+    )
+    traces = [build_trace(args, seed) for seed in range(num_threads)]
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(trace: List[List[int]]) -> None:
+        shape = list(spec.block_shape)
+        barrier.wait()
+        for tokens in trace:
+            view = TokenListView(tokens)
+            status = cache.acquire(None, view)
+            nhits = len(status.value) if status.is_ok() else 0
+            if status.is_ok():
+                for mr in status.value:
+                    mr.ref_down()
+            if nhits < max_nblocks:
+                split = nhits * spec.block_ntokens
+                shape[spec.block_shape_token_dim] = len(view) - split
+                cache.put(
+                    view[:split] if split > 0 else None,
+                    view[split:],
+                    torch.zeros(*shape, dtype=spec.block_dtype),
+                )
+
+    threads = [
+        threading.Thread(target=worker, args=(trace,)) for trace in traces
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return num_threads * args.requests_per_thread * max_nblocks / elapsed
+
+
+def main(args: argparse.Namespace) -> None:
+    shards = [int(s) for s in args.shards.split(",")]
+    print(f"{'threads':>8}" + "".join(f"{f'{s} shards':>14}" for s in shards))
+    for num_threads in (int(t) for t in args.threads.split(",")):
+        row = [run(args, num_shards, num_threads) for num_shards in shards]
+        print(f"{num_threads:>8}" + "".join(f"{r:>14.0f}" for r in row))
+    print("(blocks per second)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", default="1,2,4,8,16,32")
+    parser.add_argument("--shards", default="1,4,16")
+    parser.add_argument("--eviction-policy", default="S3FIFO")
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=4096,
+        help="Number of bytes of a block.",
+    )
+    parser.add_argument("--capacity-blocks", type=int, default=8192)
+    parser.add_argument("--requests-per-thread", type=int, default=200)
+    parser.add_argument("--num-prefix", type=int, default=32)
+    parser.add_argument("--num-suffix", type=int, default=8)
+    parser.add_argument("--prefix-blocks", type=int, default=16)
+    parser.add_argument("--suffix-blocks", type=int, default=8)
+    main(parser.parse_args())
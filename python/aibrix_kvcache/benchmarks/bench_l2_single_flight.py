@@ -0,0 +1,157 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Concurrent same-prefix acquires from L2Cache with and without single-flight.
+
+Every round, --concurrency threads acquire the same --prefix-ntokens tokens
+at once, like requests sharing a system prompt that arrive together. The
+mock L2 backend charges --get-delay-ms to every block it serves to mimic a
+remote store. L1Cache is disabled so that every round goes to L2Cache.
+
+Example:
+    python benchmarks/bench_l2_single_flight.py --concurrency 64
+"""
+
+import argparse
+import contextlib
+import os
+import threading
+import time
+from typing import Iterator, List
+from unittest import mock
+
+import torch
+
+os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "0"
+os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS"] = "0"
+
+from aibrix_kvcache import (  # noqa: E402
+    BaseKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.l2.connectors.mock import MockConnector  # noqa: E402
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+
+@contextlib.contextmanager
+def with_delay(delay_ms: float) -> Iterator[List[int]]:
+    """Charge a simulated latency to every block served by the backend."""
+    num_gets = [0]
+    get = MockConnector._get
+
+    def slow_get(self, *args, **kwargs):
+        num_gets[0] += 1
+        time.sleep(delay_ms / 1000)
+        return get(self, *args, **kwargs)
+
+    with mock.patch.object(MockConnector, "_get", slow_get):
+        yield num_gets
+
+
+def run(mode: str, num_gets: list, args: argparse.Namespace) -> None:
+    os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_SINGLE_FLIGHT_ENABLED"] = (
+        "1" if mode == "ON" else "0"
+    )
+    spec = KVCacheBlockSpec(
+        block_ntokens=16,
+        block_dtype=torch.bfloat16,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(
+            heads=[0, 1], layers=list(range(4)), head_size=64
+        ),
+    )
+    cache = BaseKVCacheManager(
+        config=KVCacheConfig(
+            block_spec=spec,
+            model_spec=ModelSpec(args.prefix_ntokens),
+            multi_threaded=True,
+        )
+    )
+    tokens = TokenListView(list(range(args.prefix_ntokens)))
+    handle = cache.allocate_for(None, tokens).get()
+    cache.put(None, tokens, handle).raise_if_not_ok()
+
+    latencies = []
+    round_s = []
+    lock = threading.Lock()
+
+    def acquire(barrier: threading.Barrier) -> None:
+        barrier.wait()
+        start = time.perf_counter()
+        status = cache.acquire(None, tokens)
+        lat = time.perf_counter() - start
+        assert status.get()[0] == len(tokens), status
+        status.get()[1].release()
+        with lock:
+            latencies.append(lat)
+
+    num_gets[0] = 0
+    for _ in range(args.rounds):
+        barrier = threading.Barrier(args.concurrency + 1)
+        threads = [
+            threading.Thread(target=acquire, args=(barrier,))
+            for _ in range(args.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in threads:
+            t.join()
+        round_s.append(time.perf_counter() - start)
+
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    round_ms = sum(round_s) / len(round_s) * 1e3
+    assert cache.metrics.l2 is not None
+    coalesced = cache.metrics.l2.single_flight_metrics.total_coalesced_fetches
+    print(
+        f"{mode:<6}{num_gets[0] // args.rounds:>12}"
+        f"{coalesced // args.rounds:>12}{mean * 1e3:>12.3f}"
+        f"{p99 * 1e3:>12.3f}{round_ms:>12.3f}"
+    )
+    cache.close()
+
+
+def main(args: argparse.Namespace) -> None:
+    print(
+        f"{args.concurrency} concurrent acquires of {args.prefix_ntokens} "
+        f"tokens, get_delay={args.get_delay_ms} ms/block"
+    )
+    print(
+        f"{'mode':<6}{'gets/round':>12}{'coalesced':>12}{'mean(ms)':>12}"
+        f"{'p99(ms)':>12}{'round(ms)':>12}"
+    )
+    with with_delay(args.get_delay_ms) as num_gets:
+        for mode in args.modes.split(","):
+            run(mode, num_gets, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="OFF,ON")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--prefix-ntokens", type=int, default=2048)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--get-delay-ms", type=float, default=1)
+    main(parser.parse_args())
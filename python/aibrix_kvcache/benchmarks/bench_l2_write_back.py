@@ -0,0 +1,220 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Throughput of per-callback L2Cache writes versus the write-back queue.
+
+A producer thread ingests the blocks of many sequences one at a time, like
+the callbacks of L1Cache do. PER_CALL issues one L2Cache put per block and
+drops blocks exceeding the inflight quota, WRITE_BACK coalesces them on
+L2WriteBackQueue. The backend is the mock connector with a simulated
+round-trip time and bandwidth per op.
+
+Example:
+    python benchmarks/bench_l2_write_back.py --rtt-us 200 --gbps 25
+    python benchmarks/bench_l2_write_back.py --num-blocks 50000 \\
+        --block-nbytes 2097152
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Sequence
+from unittest import mock
+
+os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_MPUT_MGET"] = "1"
+
+import torch  # noqa: E402
+from aibrix_kvcache import TokenListView  # noqa: E402
+from aibrix_kvcache.l2 import (  # noqa: E402
+    KeyBuilder,
+    L2Cache,
+    L2WriteBackQueue,
+)
+from aibrix_kvcache.l2.write_back_queue import KVTensors  # noqa: E402
+from aibrix_kvcache.memory import (  # noqa: E402
+    MemoryRegion,
+    TensorPoolAllocator,
+)
+from aibrix_kvcache.metrics import (  # noqa: E402
+    MetricRecorder,
+    WriteBackMetrics,
+)
+from aibrix_kvcache.spec import (  # noqa: E402
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheTensorSpec,
+)
+
+
+@contextlib.contextmanager
+def with_latency(cache: L2Cache, args: argparse.Namespace) -> Iterator[None]:
+    """Charge a round trip and the transfer time to every backend op."""
+    backend = cache._backend
+    mput = backend.mput
+    nbytes_per_s = args.gbps * 1e9 / 8
+
+    async def slow_mput(keys, mrs: Sequence[MemoryRegion]):
+        nbytes = sum(mr.length for mr in mrs)
+        await asyncio.sleep(args.rtt_us / 1e6 + nbytes / nbytes_per_s)
+        return await mput(keys, mrs)
+
+    with mock.patch.object(backend, "mput", slow_mput):
+        yield
+
+
+def release(value: KVTensors) -> None:
+    assert isinstance(value, MemoryRegion)
+    value.ref_down()
+
+
+def run(mode: str, args: argparse.Namespace) -> None:
+    spec = KVCacheBlockSpec(
+        block_ntokens=args.block_ntokens,
+        block_dtype=torch.uint8,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(
+            heads=[0],
+            layers=[0],
+            head_size=args.block_nbytes // (2 * args.block_ntokens),
+        ),
+    )
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    cache = L2Cache(
+        backend_name="MOCK",
+        placement_policy="SIMPLE",
+        namespace="bench",
+        block_spec=spec,
+        executor=ThreadPoolExecutor(max_workers=2),
+        op_batch=args.op_batch,
+        key_builder=KeyBuilder.create(
+            "ROLLING_HASH", block_size=spec.block_ntokens
+        ),
+    )
+    cache.open().raise_if_not_ok()
+    with with_latency(cache, args):
+        TensorPoolAllocator.SLAB_MAX_NBYTES = args.quota * spec.block_nbytes
+        allocator = TensorPoolAllocator.create(
+            capacity_nbytes=args.quota * spec.block_nbytes
+        )
+
+        metrics = WriteBackMetrics(MetricRecorder.Resource.L2_WRITE_BACK)
+        queue = L2WriteBackQueue(
+            cache,
+            loop,
+            capacity_nblocks=args.quota,
+            max_batch_nblocks=args.op_batch,
+            max_batch_nbytes=1 << 30,
+            max_inflight_batches=args.inflight_batches,
+            timeout_s=args.timeout_ms / 1000,
+            on_done=release,
+            metrics=metrics,
+        )
+        cond = threading.Condition()
+        inflight = 0
+        dropped = 0
+
+        def done(mr: MemoryRegion, _) -> None:
+            nonlocal inflight
+            mr.ref_down()
+            with cond:
+                inflight -= 1
+                cond.notify_all()
+
+        nseqs = args.num_blocks // args.seq_blocks
+        tokens = TokenListView(
+            list(range(nseqs * args.seq_blocks * args.block_ntokens))
+        )
+        start = time.perf_counter()
+        for b in range(args.num_blocks):
+            s, i = divmod(b, args.seq_blocks)
+            seq = tokens[
+                s * args.seq_blocks * spec.block_ntokens : (s + 1)
+                * args.seq_blocks
+                * spec.block_ntokens
+            ]
+            prefix = seq[: i * spec.block_ntokens] or None
+            query = seq[i * spec.block_ntokens : (i + 1) * spec.block_ntokens]
+            status = allocator.alloc(spec.block_nbytes)
+            while not status.is_ok():
+                # wait for inflight writes to release their MRs
+                time.sleep(1e-4)
+                status = allocator.alloc(spec.block_nbytes)
+            mr = status.get()[0]
+            if mode == "WRITE_BACK":
+                if not queue.put(prefix, query, mr).is_ok():
+                    dropped += 1
+                continue
+
+            with cond:
+                if inflight >= args.quota:
+                    dropped += 1
+                    mr.ref_down()
+                    continue
+                inflight += 1
+            future = asyncio.run_coroutine_threadsafe(
+                cache.put(prefix, query, mr), loop
+            )
+            future.add_done_callback(functools.partial(done, mr))
+
+        queue.flush()
+        with cond:
+            cond.wait_for(lambda: inflight == 0)
+        elapsed = time.perf_counter() - start
+
+    written = args.num_blocks - dropped
+    gib = written * spec.block_nbytes / 1024**3
+    batches = metrics.total_batches if mode == "WRITE_BACK" else written
+    print(
+        f"{mode:<12}{written / elapsed:>12.0f}{gib / elapsed:>10.2f}"
+        f"{batches:>10}{dropped:>10}"
+    )
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    cache.close()
+
+
+def main(args: argparse.Namespace) -> None:
+    print(
+        f"{args.num_blocks} blocks of {args.block_nbytes} B, "
+        f"rtt={args.rtt_us} us, {args.gbps} Gbps, quota={args.quota} blocks"
+    )
+    print(
+        f"{'mode':<12}{'blocks/s':>12}{'GiB/s':>10}{'ops':>10}{'dropped':>10}"
+    )
+    for mode in args.modes.split(","):
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="PER_CALL,WRITE_BACK")
+    parser.add_argument("--num-blocks", type=int, default=20000)
+    parser.add_argument("--seq-blocks", type=int, default=64)
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument("--block-nbytes", type=int, default=128 * 1024)
+    parser.add_argument("--quota", type=int, default=512)
+    parser.add_argument("--op-batch", type=int, default=32)
+    parser.add_argument("--inflight-batches", type=int, default=4)
+    parser.add_argument("--timeout-ms", type=int, default=100)
+    parser.add_argument("--rtt-us", type=int, default=200)
+    parser.add_argument("--gbps", type=float, default=25)
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Capacity and pack cost of the token validation layouts.
+
+Sizes the memory regions of every block of a single sequence with the FULL
+layout, which packs prefix and query tokens into every block, and with the
+DIGEST layout, which packs the query tokens and a digest of the prefix
+tokens, then packs and unpacks all of them to measure the CPU cost.
+
+Example:
+    python benchmarks/bench_token_layout.py --seq-len 32768
+    python benchmarks/bench_token_layout.py --block-nbytes 2097152
+"""
+
+import argparse
+import os
+import time
+
+# Tokens are only packed into memory regions if token validation is on
+os.environ["AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_ENABLED"] = "1"
+
+import numpy as np  # noqa: E402
+from aibrix_kvcache import TokenListView  # noqa: E402
+from aibrix_kvcache.memory import (  # noqa: E402
+    ManagedMemoryRegion,
+    TensorPoolAllocator,
+    memory_region,
+)
+
+LAYOUTS = ("FULL", "DIGEST")
+
+
+def run(layout: str, args: argparse.Namespace, baseline: int) -> int:
+    """Returns the number of sequences that fit in the capacity."""
+    memory_region.MR_USE_DIGEST_LAYOUT = layout == "DIGEST"
+    nblocks = args.seq_len // args.block_ntokens
+    sizes = [
+        ManagedMemoryRegion.calculate_size(
+            args.block_nbytes,
+            (i + 1) * args.block_ntokens,
+            args.block_ntokens,
+        )
+        for i in range(nblocks)
+    ]
+    total_nbytes = sum(sizes)
+    block_nbytes = nblocks * args.block_nbytes
+    overhead = (total_nbytes - block_nbytes) / block_nbytes
+    capacity_nbytes = args.capacity_gib * 1024**3
+    seqs = capacity_nbytes // total_nbytes
+    baseline = baseline or seqs
+
+    pack_ms = "-"
+    if args.block_nbytes * nblocks + total_nbytes <= 4 * 1024**3:
+        TensorPoolAllocator.SLAB_MAX_NBYTES = total_nbytes
+        allocator = TensorPoolAllocator.create(capacity_nbytes=total_nbytes)
+        status = allocator.alloc(sizes)
+        assert status.is_ok(), status
+        mrs = status.get()
+        tokens = np.random.default_rng(0).integers(
+            0, 128000, args.seq_len, dtype=np.int32
+        )
+        all = TokenListView(tokens)
+        start = time.perf_counter()
+        for i, mr in enumerate(mrs):
+            mr.block_nbytes = args.block_nbytes
+            offset = i * args.block_ntokens
+            mr.pack_tokens(
+                prefix=all[:offset] if offset > 0 else None,
+                query=all[offset : offset + args.block_ntokens],
+            )
+            mr.seal()
+        pack_ms = f"{(time.perf_counter() - start) * 1e3:.1f}"
+        for mr in mrs:
+            mr.ref_down()
+
+    print(
+        f"{layout:<8}{total_nbytes / 1024**2:>12.1f}{overhead:>10.2%}"
+        f"{seqs:>10}{seqs / max(baseline, 1):>9.2f}x"
+        f"{pack_ms:>10}"
+    )
+    return seqs
+
+
+def main(args: argparse.Namespace) -> None:
+    print(
+        f"seq_len={args.seq_len} block_ntokens={args.block_ntokens} "
+        f"block_nbytes={args.block_nbytes} capacity={args.capacity_gib} GiB"
+    )
+    print(
+        f"{'layout':<8}{'MiB/seq':>12}{'overhead':>10}{'seqs':>10}"
+        f"{'gain':>10}{'pack ms':>10}"
+    )
+    baseline = 0
+    for layout in LAYOUTS:
+        seqs = run(layout, args, baseline)
+        baseline = baseline or seqs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seq-len", type=int, default=32768)
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument("--block-nbytes", type=int, default=128 * 1024)
+    parser.add_argument("--capacity-gib", type=int, default=64)
+    main(parser.parse_args())
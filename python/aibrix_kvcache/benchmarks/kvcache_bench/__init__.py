@@ -0,0 +1,21 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""CPU-only microbenchmarks of BaseKVCacheManager.
+
+Drives exists/acquire/get/put of BaseKVCacheManager with synthetic or
+trace-driven workloads across L1Cache, the local L2 backends and the block
+layouts, see __main__.py for the CLI. replay.py replays the ops recorded
+by aibrix_kvcache.op_recorder.
+"""
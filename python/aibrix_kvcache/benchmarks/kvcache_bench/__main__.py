@@ -0,0 +1,144 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""KV cache microbenchmarks across backends, layouts and workloads.
+
+Every request is served like the offloading connector does: exists() on
+the whole sequence, then acquire() (or get()) chunk by chunk until a miss,
+then allocate_for() and put() of the remaining chunks. Every run of the
+matrix starts with an empty cache, L2 backends with a local root use a
+temporary directory.
+
+Example:
+    python -m benchmarks.kvcache_bench --backends L1,MOCK,SHFS,ROCKSDB
+    python -m benchmarks.kvcache_bench --backends L1 \\
+        --sweep L1_CACHE_EVICTION_POLICY=FIFO,LRU,S3FIFO
+    python -m benchmarks.kvcache_bench --output-json baseline.json
+    python -m benchmarks.kvcache_bench --baseline baseline.json
+"""
+
+import argparse
+import sys
+
+from . import report, runner
+from .workloads import WORKLOADS, WorkloadConfig
+
+
+def main(args: argparse.Namespace) -> int:
+    workload_config = WorkloadConfig(
+        num_requests=args.num_requests,
+        seed=args.seed,
+        num_prefixes=args.num_prefixes,
+        prefix_ntokens=args.prefix_ntokens,
+        suffix_ntokens=args.suffix_ntokens,
+        num_sessions=args.num_sessions,
+        turn_ntokens=args.turn_ntokens,
+        max_turns=args.max_turns,
+        trace=args.trace,
+    )
+    runs = list(
+        runner.build_matrix(
+            backends=args.backends.split(","),
+            with_l1=args.with_l1,
+            block_layouts=args.block_layouts.split(","),
+            workloads=args.workloads.split(","),
+            sweeps=args.sweep,
+        )
+    )
+    overrides = runner.parse_envs(args.env)
+    rows, errors = runner.run_matrix(runs, workload_config, overrides, args)
+    if len(rows) > 0:
+        report.print_table(rows)
+    for error in errors:
+        print(f"FAILED {error}", file=sys.stderr)
+
+    if args.output_json:
+        report.write_json(args.output_json, vars(args), rows)
+    if args.output_csv:
+        report.write_csv(args.output_csv, rows)
+
+    if args.baseline:
+        regressions = report.compare(
+            report.load_json(args.baseline), rows, args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if len(regressions) > 0:
+            return 1
+    return 1 if len(errors) > 0 else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backends",
+        default="L1,MOCK,SHFS,ROCKSDB",
+        help=f"Comma separated list of {runner.BACKENDS}",
+    )
+    parser.add_argument(
+        "--with-l1",
+        action="store_true",
+        help="Enable L1Cache in front of L2 backends",
+    )
+    parser.add_argument("--block-layouts", default="NCLD,LCND")
+    parser.add_argument(
+        "--workloads",
+        default="PREFIX_SHARING,MULTI_TURN,UNIFORM",
+        help=f"Comma separated list of {list(WORKLOADS.keys())}",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="append",
+        default=[],
+        metavar="ENV=V1,V2",
+        help="Env var to sweep, AIBRIX_KV_CACHE_OL_ prefix is optional",
+    )
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="ENV=VALUE",
+        help="Env var applied to every run",
+    )
+    parser.add_argument(
+        "--read-op", choices=["acquire", "get"], default="acquire"
+    )
+    parser.add_argument("--block-ntokens", type=int, default=16)
+    parser.add_argument("--heads", type=int, default=1)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--head-size", type=int, default=64)
+    parser.add_argument("--l1-capacity-gb", type=float, default=0.25)
+    parser.add_argument("--num-requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--num-prefixes", type=int, default=16)
+    parser.add_argument("--prefix-ntokens", type=int, default=1024)
+    parser.add_argument("--suffix-ntokens", type=int, default=256)
+    parser.add_argument("--num-sessions", type=int, default=32)
+    parser.add_argument("--turn-ntokens", type=int, default=256)
+    parser.add_argument("--max-turns", type=int, default=8)
+    parser.add_argument("--trace", default="", help="JSONL trace of TRACE")
+    parser.add_argument("--output-json", default="")
+    parser.add_argument("--output-csv", default="")
+    parser.add_argument(
+        "--baseline",
+        default="",
+        help="JSON results to compare against, exits with 1 on regressions",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Relative change accepted by the regression check",
+    )
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,368 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Replays the ops recorded with AIBRIX_KV_CACHE_OL_OP_RECORDER_DIR.
+
+In cache mode, the ops are replayed against fresh BaseKVCacheManagers of
+every backend and --sweep value, with BlockHashes keys built from the
+recorded block key hashes. In sim mode, no cache is created, the block keys
+are fed to every combination of L1 eviction policy, admission policy and
+capacity to estimate their hit ratios. Both modes print the recorded ops as
+the "recorded" rows for comparison, unless the recording has no latencies,
+i.e., AIBRIX_KV_CACHE_OL_TIME_MEASUREMENT_ENABLED was off.
+
+Capacities are given in GB of the recorded blocks, s.t. they hold as many
+blocks as an L1Cache of the same size in production, regardless of the
+block spec used by the replay.
+
+Example:
+    python -m benchmarks.kvcache_bench.replay /tmp/ops/host-1234 \\
+        --mode sim --policies LRU,S3FIFO --admission-policies NONE,TINYLFU \\
+        --capacities-gb 1,4,16
+    python -m benchmarks.kvcache_bench.replay /tmp/ops/host-1234 \\
+        --backends L1,ROCKSDB --l1-capacity-gb 4
+"""
+
+import argparse
+import itertools
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Tuple, cast
+
+import numpy as np
+import torch
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    BlockHashes,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+)
+from aibrix_kvcache.cache_hashable import KVCacheHashable
+from aibrix_kvcache.l1.admission_policy import BaseAdmissionPolicy
+from aibrix_kvcache.l1.eviction_policy import BaseEvictionPolicy
+from aibrix_kvcache.metrics import MetricRecorder
+from aibrix_kvcache.op_recorder import load_op_records
+
+from . import report, runner
+
+OP = MetricRecorder.OP
+REPLAYED_OPS = {
+    OP.EXISTS.value: "exists",
+    OP.ACQUIRE.value: "acquire",
+    OP.GET.value: "get",
+    OP.PUT.value: "put",
+}
+
+
+class DummyBlock:
+    """Stands in for a MemoryRegion of one byte, s.t. the capacity of an
+    eviction policy is counted in blocks.
+    """
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return 1
+
+    def ref_up(self) -> None:
+        pass
+
+    def ref_down(self) -> None:
+        pass
+
+
+def iter_ops(
+    records: np.ndarray, keys: np.ndarray
+) -> Iterator[Tuple[str, int, List[int]]]:
+    """Yield the name, number of query tokens and block keys of every op
+    with at least one full block.
+    """
+    for record in records:
+        name = REPLAYED_OPS.get(int(record["op"]))
+        if name is None or record["nkeys"] == 0:
+            continue
+        offset = int(record["key_offset"])
+        op_keys = keys[offset : offset + int(record["nkeys"])].tolist()
+        yield name, int(record["query_ntokens"]), op_keys
+
+
+def recorded_rows(
+    records: np.ndarray, block_ntokens: int, block_nbytes: int
+) -> List[Dict]:
+    """Summarize the recorded ops like the replayed ones."""
+    stats = {name: runner.OpStats() for name in REPLAYED_OPS.values()}
+    for record in records:
+        name = REPLAYED_OPS.get(int(record["op"]))
+        if name is None:
+            continue
+        # puts count the stored tokens as hits, like the replayed ones
+        ntokens_field = "put_ntokens" if name == "put" else "hit_ntokens"
+        stats[name].trace(
+            float(record["lat_us"]) / 1e6,
+            int(record["query_ntokens"]),
+            int(record[ntokens_field]),
+        )
+    return _rows("recorded", stats, block_nbytes // block_ntokens)
+
+
+def _rows(
+    name: str, stats: Dict[str, runner.OpStats], token_nbytes: int
+) -> List[Dict]:
+    rows = []
+    for op, op_stats in stats.items():
+        if len(op_stats.latencies_s) == 0:
+            continue
+        if op != "exists":
+            op_stats.nbytes = op_stats.hit_ntokens * token_nbytes
+        rows.append({"name": name, "op": op, **op_stats.summary()})
+    return rows
+
+
+def simulate(
+    policy_name: str,
+    admission_policy: str,
+    capacity_nblocks: int,
+    records: np.ndarray,
+    keys: np.ndarray,
+    block_ntokens: int,
+) -> Dict[str, runner.OpStats]:
+    """Feed the block keys to an eviction policy. Lookups hit the leading
+    blocks found in the policy, exists() does not count as an access, put()
+    inserts every block.
+    """
+    if policy_name == "RADIX_LRU":
+        raise ValueError("RADIX_LRU needs the parents of the block keys")
+    policy = BaseEvictionPolicy.create(
+        policy_name,
+        capacity_nblocks,
+        admission_policy=BaseAdmissionPolicy.create(
+            admission_policy, capacity_nblocks
+        ),
+    )
+    block = DummyBlock()
+    stats = {name: runner.OpStats() for name in REPLAYED_OPS.values()}
+    for name, ntokens, hashes in iter_ops(records, keys):
+        # the policies only hash and compare the keys, so the recorded
+        # block key hashes stand in for them
+        op_keys = cast(List[KVCacheHashable], hashes)
+        nhits = 0
+        if name == "put":
+            for key in op_keys:
+                policy.put(key, block)  # type: ignore[arg-type]
+            nhits = len(op_keys)
+        elif name == "exists":
+            while nhits < len(op_keys) and op_keys[nhits] in policy:
+                nhits += 1
+        else:
+            while nhits < len(op_keys) and policy.get(op_keys[nhits]).is_ok():
+                nhits += 1
+        stats[name].trace(0.0, ntokens, min(nhits * block_ntokens, ntokens))
+    return stats
+
+
+def replay(
+    cache: BaseKVCacheManager,
+    records: np.ndarray,
+    keys: np.ndarray,
+    block_ntokens: int,
+) -> Dict[str, runner.OpStats]:
+    """Replay the ops against a cache with BlockHashes keys."""
+    stats = {name: runner.OpStats() for name in REPLAYED_OPS.values()}
+    for name, ntokens, op_keys in iter_ops(records, keys):
+        query = BlockHashes([str(key) for key in op_keys], block_ntokens)
+        nhits = 0
+        if name in ("get", "put"):
+            status = cache.allocate_for(None, query)
+            if not status.is_ok():
+                continue
+            handle = status.get()
+            query = query[: len(handle.memory_regions) * block_ntokens]
+
+        start = time.perf_counter()
+        if name == "exists":
+            status = cache.exists(None, query)
+        elif name == "acquire":
+            status = cache.acquire(None, query)
+        elif name == "get":
+            status = cache.get(None, query, handle)
+        else:
+            status = cache.put(None, query, handle)
+        lat = time.perf_counter() - start
+
+        if status.is_ok():
+            value = status.get()
+            if name == "acquire":
+                nhits = value[0]
+                value[1].release()
+            else:
+                nhits = value
+        if name == "get":
+            handle.release()
+        stats[name].trace(lat, ntokens, nhits)
+    return stats
+
+
+def run_cache_mode(
+    args: argparse.Namespace,
+    meta: Dict,
+    records: np.ndarray,
+    keys: np.ndarray,
+) -> Tuple[List[Dict], List[str]]:
+    block_ntokens = meta["block_ntokens"]
+    spec = KVCacheBlockSpec(
+        block_ntokens=block_ntokens,
+        block_dtype=torch.bfloat16,
+        block_layout=KVCacheBlockLayout[args.block_layout],
+        tensor_spec=KVCacheTensorSpec(
+            heads=list(range(args.heads)),
+            layers=list(range(args.layers)),
+            head_size=args.head_size,
+        ),
+    )
+    # hold as many blocks as the recorded cache of the same capacity
+    l1_capacity_gb = (
+        args.l1_capacity_gb * spec.block_nbytes / meta["block_nbytes"]
+    )
+    max_ntokens = int(records["prefix_ntokens"].max(initial=0)) + int(
+        records["query_ntokens"].max(initial=block_ntokens)
+    )
+
+    rows: List[Dict] = []
+    errors: List[str] = []
+    runs = runner.build_matrix(
+        backends=args.backends.split(","),
+        with_l1=args.with_l1,
+        block_layouts=[args.block_layout],
+        workloads=["TRACE"],
+        sweeps=args.sweep,
+    )
+    overrides = runner.parse_envs(args.env)
+    for run in runs:
+        name = run.name
+        with tempfile.TemporaryDirectory(prefix="kvcache_replay_") as root:
+            envs = runner.run_envs(run, root, l1_capacity_gb)
+            envs.update(overrides)
+            envs.update(run.envs)
+            saved = runner.apply_envs(envs)
+            try:
+                cache = BaseKVCacheManager(
+                    config=KVCacheConfig(
+                        block_spec=spec, model_spec=ModelSpec(max_ntokens)
+                    )
+                )
+                try:
+                    stats = replay(cache, records, keys, block_ntokens)
+                finally:
+                    cache.close()
+                rows += _rows(name, stats, spec.block_nbytes // block_ntokens)
+            except Exception as e:
+                errors.append(f"{name}: {e!r}")
+            finally:
+                runner.restore_envs(saved)
+    return rows, errors
+
+
+def run_sim_mode(
+    args: argparse.Namespace,
+    meta: Dict,
+    records: np.ndarray,
+    keys: np.ndarray,
+) -> Tuple[List[Dict], List[str]]:
+    block_ntokens = meta["block_ntokens"]
+    rows: List[Dict] = []
+    errors: List[str] = []
+    for policy_name, admission_policy, capacity_gb in itertools.product(
+        args.policies.split(","),
+        args.admission_policies.split(","),
+        [float(c) for c in args.capacities_gb.split(",")],
+    ):
+        capacity_nblocks = int(capacity_gb * 1024**3) // meta["block_nbytes"]
+        name = f"{policy_name}/{admission_policy}/{capacity_gb}GB"
+        try:
+            stats = simulate(
+                policy_name,
+                admission_policy,
+                capacity_nblocks,
+                records,
+                keys,
+                block_ntokens,
+            )
+            rows += _rows(name, stats, meta["block_nbytes"] // block_ntokens)
+        except Exception as e:
+            errors.append(f"{name}: {e!r}")
+    return rows, errors
+
+
+def main(args: argparse.Namespace) -> int:
+    meta, records, keys = load_op_records(args.path)
+    if args.max_ops > 0:
+        records = records[: args.max_ops]
+    print(f"Loaded {len(records)} ops from {args.path}")
+
+    rows = []
+    if meta.get("time_measurement_enabled", True):
+        rows += recorded_rows(
+            records, meta["block_ntokens"], meta["block_nbytes"]
+        )
+    if args.mode == "sim":
+        replayed, errors = run_sim_mode(args, meta, records, keys)
+    else:
+        replayed, errors = run_cache_mode(args, meta, records, keys)
+    rows += replayed
+
+    if len(rows) > 0:
+        report.print_table(rows)
+    for error in errors:
+        print(f"FAILED {error}", file=sys.stderr)
+    if args.output_json:
+        report.write_json(args.output_json, vars(args), rows)
+    if args.output_csv:
+        report.write_csv(args.output_csv, rows)
+    return 1 if len(errors) > 0 else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Directory written by an OpRecorder")
+    parser.add_argument("--mode", choices=["cache", "sim"], default="cache")
+    parser.add_argument("--max-ops", type=int, default=0)
+    # cache mode
+    parser.add_argument(
+        "--backends",
+        default="L1",
+        help=f"Comma separated list of {runner.BACKENDS}",
+    )
+    parser.add_argument("--with-l1", action="store_true")
+    parser.add_argument("--block-layout", default="NCLD")
+    parser.add_argument(
+        "--sweep", action="append", default=[], metavar="ENV=V1,V2"
+    )
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="ENV=VALUE"
+    )
+    parser.add_argument("--heads", type=int, default=1)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--head-size", type=int, default=64)
+    parser.add_argument("--l1-capacity-gb", type=float, default=1)
+    # sim mode
+    parser.add_argument("--policies", default="FIFO,LRU,S3FIFO")
+    parser.add_argument("--admission-policies", default="NONE")
+    parser.add_argument("--capacities-gb", default="1")
+    parser.add_argument("--output-json", default="")
+    parser.add_argument("--output-csv", default="")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prints, stores and compares benchmark results."""
+
+import csv
+import json
+from typing import Dict, List
+
+COLUMNS = [
+    "name",
+    "op",
+    "count",
+    "ops_per_s",
+    "p50_ms",
+    "p99_ms",
+    "bytes_per_s",
+    "hit_ratio",
+]
+# metrics that regress when they go up, the others regress when they go down
+LOWER_IS_BETTER = {"p50_ms", "p99_ms"}
+HIGHER_IS_BETTER = {"ops_per_s", "bytes_per_s", "hit_ratio"}
+
+
+def print_table(rows: List[Dict]) -> None:
+    width = max([len(row["name"]) for row in rows] + [len("name")])
+    print(
+        f"{'name':<{width}}{'op':>9}{'count':>8}{'ops/s':>12}"
+        f"{'p50(ms)':>10}{'p99(ms)':>10}{'MB/s':>10}{'hit':>7}"
+    )
+    for row in rows:
+        print(
+            f"{row['name']:<{width}}{row['op']:>9}{row['count']:>8}"
+            f"{row['ops_per_s']:>12.1f}{row['p50_ms']:>10.3f}"
+            f"{row['p99_ms']:>10.3f}{row['bytes_per_s'] / 2**20:>10.1f}"
+            f"{row['hit_ratio']:>7.3f}"
+        )
+
+
+def write_json(path: str, meta: Dict, rows: List[Dict]) -> None:
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": rows}, f, indent=2)
+
+
+def write_csv(path: str, rows: List[Dict]) -> None:
+    fields = list(rows[0].keys()) if len(rows) > 0 else COLUMNS
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    k: json.dumps(v) if isinstance(v, dict) else v
+                    for k, v in row.items()
+                }
+            )
+
+
+def load_json(path: str) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    baseline: List[Dict], rows: List[Dict], tolerance: float
+) -> List[str]:
+    """Compare results against a baseline.
+
+    Args:
+        baseline: Rows of the baseline.
+        rows: Rows of the current run.
+        tolerance: Relative change of a metric that is still accepted.
+    Returns:
+        Regressions, one line per (run, op, metric). Runs or ops missing
+        in either side are skipped.
+    """
+    base = {(row["name"], row["op"]): row for row in baseline}
+    regressions = []
+    for row in rows:
+        key = (row["name"], row["op"])
+        if key not in base:
+            continue
+        for metric in sorted(LOWER_IS_BETTER | HIGHER_IS_BETTER):
+            old, new = base[key][metric], row[metric]
+            if metric in LOWER_IS_BETTER:
+                regressed = new > old * (1 + tolerance)
+            else:
+                regressed = new < old * (1 - tolerance)
+            if regressed:
+                change = (new - old) / old * 100 if old != 0 else float("inf")
+                regressions.append(
+                    f"{row['name']} {row['op']} {metric}: "
+                    f"{old:.4g} -> {new:.4g} ({change:+.1f}%)"
+                )
+    return regressions
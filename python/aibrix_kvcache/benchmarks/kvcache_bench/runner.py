@@ -0,0 +1,365 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs a workload against a BaseKVCacheManager and collects op stats."""
+
+import itertools
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import torch
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.cache_hashable import KVCacheKeyTypes
+from aibrix_kvcache.memory import memory_region
+
+from .workloads import WORKLOADS, WorkloadConfig
+
+ENV_PREFIX = "AIBRIX_KV_CACHE_OL_"
+L2_BACKEND_ROOTS = {
+    "SHFS": "AIBRIX_KV_CACHE_OL_SHFS_ROOT",
+    "ROCKSDB": "AIBRIX_KV_CACHE_OL_ROCKSDB_ROOT",
+    "SEGMENT_LOG": "AIBRIX_KV_CACHE_OL_SEGMENT_LOG_ROOT",
+}
+BACKENDS = ["L1", "MOCK", *L2_BACKEND_ROOTS]
+OPS = ["exists", "acquire", "get", "put"]
+
+# pinned memory and devices are not available on CPU-only hosts
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+
+@dataclass
+class RunConfig:
+    """The config of a single run of the benchmark matrix.
+
+    Args:
+        backend: L1 or the name of an L2 backend.
+        with_l1: Whether to enable L1Cache in front of the L2 backend.
+        block_layout: Layout of the kv cache blocks.
+        workload: Name of the workload.
+        envs: Env vars of this run.
+    """
+
+    backend: str
+    with_l1: bool
+    block_layout: KVCacheBlockLayout
+    workload: str
+    envs: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        backend = self.backend
+        if self.backend != "L1" and self.with_l1:
+            backend = f"L1+{backend}"
+        parts = [backend, self.block_layout.name, self.workload]
+        parts += [
+            f"{k.removeprefix(ENV_PREFIX)}={v}" for k, v in self.envs.items()
+        ]
+        return "/".join(parts)
+
+
+@dataclass
+class OpStats:
+    """Latencies and volumes of an op."""
+
+    latencies_s: List[float] = field(default_factory=list)
+    ntokens: int = 0
+    hit_ntokens: int = 0
+    nbytes: int = 0
+
+    def trace(self, lat_s: float, ntokens: int, hit_ntokens: int) -> None:
+        self.latencies_s.append(lat_s)
+        self.ntokens += ntokens
+        self.hit_ntokens += hit_ntokens
+
+    def summary(self) -> Dict[str, float]:
+        lats = np.asarray(self.latencies_s)
+        total_s = float(lats.sum())
+        return {
+            "count": len(lats),
+            "ops_per_s": len(lats) / total_s if total_s > 0 else 0.0,
+            "p50_ms": float(np.percentile(lats, 50)) * 1e3,
+            "p99_ms": float(np.percentile(lats, 99)) * 1e3,
+            "bytes_per_s": self.nbytes / total_s if total_s > 0 else 0.0,
+            "hit_ratio": (
+                self.hit_ntokens / self.ntokens if self.ntokens > 0 else 0.0
+            ),
+        }
+
+
+def parse_envs(items: List[str]) -> Dict[str, str]:
+    """Parse NAME=VALUE pairs, NAME may omit the AIBRIX_KV_CACHE_OL_ prefix."""
+    envs = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        assert len(sep) > 0, f"invalid env {item}, expected NAME=VALUE"
+        if not name.startswith(ENV_PREFIX):
+            name = ENV_PREFIX + name
+        envs[name] = value
+    return envs
+
+
+def build_matrix(
+    backends: List[str],
+    with_l1: bool,
+    block_layouts: List[str],
+    workloads: List[str],
+    sweeps: List[str],
+) -> Iterator[RunConfig]:
+    """Yield the cartesian product of backends, layouts, workloads and
+    sweeps, where every sweep is NAME=V1,V2,...
+    """
+    swept = parse_envs(sweeps)
+    names = list(swept.keys())
+    values = [swept[name].split(",") for name in names]
+    for backend, layout, workload, combo in itertools.product(
+        backends, block_layouts, workloads, itertools.product(*values)
+    ):
+        assert backend in BACKENDS, f"unknown backend {backend}"
+        assert workload in WORKLOADS, f"unknown workload {workload}"
+        yield RunConfig(
+            backend=backend,
+            with_l1=with_l1,
+            block_layout=KVCacheBlockLayout[layout],
+            workload=workload,
+            envs=dict(zip(names, combo)),
+        )
+
+
+def run_envs(
+    run: RunConfig, root: str, l1_capacity_gb: float
+) -> Dict[str, str]:
+    """Env vars of a CPU-only run, with local L2 roots under root."""
+    envs = {
+        f"{ENV_PREFIX}DEVICE": "cpu",
+        f"{ENV_PREFIX}L1_CACHE_DEVICE": "cpu",
+        f"{ENV_PREFIX}PIN_MEMORY": "0",
+        f"{ENV_PREFIX}L1_CACHE_CAPACITY_GB": str(l1_capacity_gb),
+        # synchronous ingestion, s.t. put latencies include the L2 put
+        f"{ENV_PREFIX}L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS": "0",
+    }
+    if run.backend == "L1":
+        envs[f"{ENV_PREFIX}L1_CACHE_ENABLED"] = "1"
+        envs[f"{ENV_PREFIX}L2_CACHE_BACKEND"] = ""
+    else:
+        envs[f"{ENV_PREFIX}L1_CACHE_ENABLED"] = "1" if run.with_l1 else "0"
+        envs[f"{ENV_PREFIX}L2_CACHE_BACKEND"] = run.backend
+        if run.backend in L2_BACKEND_ROOTS:
+            envs[L2_BACKEND_ROOTS[run.backend]] = root
+    return envs
+
+
+def apply_envs(envs: Dict[str, str]) -> Dict[str, str | None]:
+    """Apply env vars and return the values they replaced."""
+    saved = {name: os.environ.get(name) for name in envs}
+    os.environ.update(envs)
+    # memory regions read the token validation envs at import
+    memory_region.MR_USE_COMPACT_LAYOUT = (
+        not memory_region.envs.AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_ENABLED
+    )
+    memory_region.MR_USE_DIGEST_LAYOUT = (
+        memory_region.envs.AIBRIX_KV_CACHE_OL_TOKEN_VALIDATION_LAYOUT
+        == "DIGEST"
+    )
+    return saved
+
+
+def restore_envs(saved: Dict[str, str | None]) -> None:
+    for name, value in saved.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def _read(
+    cache: BaseKVCacheManager,
+    read_op: str,
+    prefix: KVCacheKeyTypes,
+    query: KVCacheKeyTypes,
+    stats: OpStats,
+) -> int:
+    if read_op == "acquire":
+        start = time.perf_counter()
+        status = cache.acquire(prefix, query)
+        lat = time.perf_counter() - start
+        ntokens = 0
+        if status.is_ok():
+            ntokens, handle = status.get()
+            handle.release()
+    else:
+        handle_status = cache.allocate_for(prefix, query)
+        if not handle_status.is_ok():
+            return 0
+        handle = handle_status.get()
+        query = query[: len(handle.memory_regions) * cache.block_size]
+        start = time.perf_counter()
+        status = cache.get(prefix, query, handle)
+        lat = time.perf_counter() - start
+        handle.release()
+        ntokens = status.get() if status.is_ok() else 0
+    stats.trace(lat, len(query), ntokens)
+    return ntokens
+
+
+def _write(
+    cache: BaseKVCacheManager,
+    prefix: KVCacheKeyTypes,
+    query: KVCacheKeyTypes,
+    stats: OpStats,
+) -> bool:
+    status = cache.allocate_for(prefix, query)
+    if not status.is_ok():
+        return False
+    handle = status.get()
+    # only full blocks are allocated
+    query = query[: len(handle.memory_regions) * cache.block_size]
+    start = time.perf_counter()
+    status = cache.put(prefix, query, handle)
+    lat = time.perf_counter() - start
+    ntokens = status.get() if status.is_ok() else 0
+    stats.trace(lat, len(query), ntokens)
+    return status.is_ok()
+
+
+def _serve(
+    cache: BaseKVCacheManager,
+    tokens: TokenListView,
+    read_op: str,
+    stats: Dict[str, OpStats],
+) -> None:
+    """Serve a request like the offloading connector does: look it up,
+    load the cached chunks and offload the rest.
+    """
+    start = time.perf_counter()
+    status = cache.exists(None, tokens)
+    lat = time.perf_counter() - start
+    exists_ntokens = status.get() if status.is_ok() else 0
+    stats["exists"].trace(lat, len(tokens), exists_ntokens)
+
+    missed = False
+    chunks = cache.cache_chunk_keys(None, tokens)
+    for prefix, query, _, all_tokens in chunks:
+        if not missed:
+            ntokens = _read(cache, read_op, prefix, query, stats[read_op])
+            if len(query) - ntokens < cache.block_size:
+                continue
+            missed = True
+            # offload the missing tail of a partially cached chunk
+            start = len(prefix) + ntokens
+            end = len(prefix) + len(query)
+            prefix, query = all_tokens[:start], all_tokens[start:end]
+        if not _write(cache, prefix, query, stats["put"]):
+            break
+
+
+def run_one(
+    run: RunConfig,
+    workload_config: WorkloadConfig,
+    overrides: Dict[str, str],
+    args,
+) -> List[Dict]:
+    """Run a workload against a fresh cache and return a row per op."""
+    requests = [
+        tokens
+        for tokens in WORKLOADS[run.workload](workload_config)
+        if len(tokens) >= args.block_ntokens
+    ]
+    max_ntokens = max(len(tokens) for tokens in requests)
+
+    with tempfile.TemporaryDirectory(prefix="kvcache_bench_") as root:
+        envs = run_envs(run, root, args.l1_capacity_gb)
+        envs.update(overrides)
+        envs.update(run.envs)
+        saved = apply_envs(envs)
+        try:
+            spec = KVCacheBlockSpec(
+                block_ntokens=args.block_ntokens,
+                block_dtype=torch.bfloat16,
+                block_layout=run.block_layout,
+                tensor_spec=KVCacheTensorSpec(
+                    heads=list(range(args.heads)),
+                    layers=list(range(args.layers)),
+                    head_size=args.head_size,
+                ),
+            )
+            cache = BaseKVCacheManager(
+                config=KVCacheConfig(
+                    block_spec=spec, model_spec=ModelSpec(max_ntokens)
+                )
+            )
+            try:
+                stats = {op: OpStats() for op in OPS}
+                start = time.perf_counter()
+                for tokens in requests:
+                    _serve(cache, TokenListView(tokens), args.read_op, stats)
+                elapsed_s = time.perf_counter() - start
+            finally:
+                cache.close()
+        finally:
+            restore_envs(saved)
+
+    token_nbytes = spec.block_nbytes // spec.block_ntokens
+    rows = []
+    for op, op_stats in stats.items():
+        if len(op_stats.latencies_s) == 0:
+            continue
+        if op != "exists":
+            op_stats.nbytes = op_stats.hit_ntokens * token_nbytes
+        rows.append(
+            {
+                "name": run.name,
+                "backend": run.backend,
+                "with_l1": run.backend == "L1" or run.with_l1,
+                "block_layout": run.block_layout.name,
+                "workload": run.workload,
+                "envs": dict(run.envs),
+                "op": op,
+                "num_requests": len(requests),
+                "elapsed_s": elapsed_s,
+                **op_stats.summary(),
+            }
+        )
+    return rows
+
+
+def run_matrix(
+    runs: List[RunConfig],
+    workload_config: WorkloadConfig,
+    overrides: Dict[str, str],
+    args,
+) -> Tuple[List[Dict], List[str]]:
+    """Run every config, a failed run is reported instead of aborting the
+    whole matrix.
+    """
+    rows: List[Dict] = []
+    errors: List[str] = []
+    for run in runs:
+        try:
+            rows += run_one(run, workload_config, overrides, args)
+        except Exception as e:
+            errors.append(f"{run.name}: {e!r}")
+    return rows, errors
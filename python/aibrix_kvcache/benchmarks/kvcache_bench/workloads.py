@@ -0,0 +1,135 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Workloads yield the token ids of requests in arrival order."""
+
+import json
+import random
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List
+
+VOCAB_SIZE = 32000
+
+
+@dataclass
+class WorkloadConfig:
+    """The config of a workload.
+
+    Args:
+        num_requests: Number of requests.
+        seed: Seed of the random token ids.
+        num_prefixes: Number of shared prefixes of PREFIX_SHARING, or
+            number of distinct sequences of UNIFORM.
+        prefix_ntokens: Number of tokens of a shared prefix.
+        suffix_ntokens: Number of unique tokens following a shared prefix,
+            or number of tokens of a UNIFORM sequence.
+        num_sessions: Number of concurrent sessions of MULTI_TURN.
+        turn_ntokens: Number of tokens appended by every turn of MULTI_TURN.
+        max_turns: Number of turns after which a session restarts.
+        trace: Path of the trace of TRACE.
+    """
+
+    num_requests: int = 1000
+    seed: int = 0
+    num_prefixes: int = 16
+    prefix_ntokens: int = 1024
+    suffix_ntokens: int = 256
+    num_sessions: int = 32
+    turn_ntokens: int = 256
+    max_turns: int = 8
+    trace: str = ""
+
+
+def _random_tokens(rng: random.Random, ntokens: int) -> List[int]:
+    return [rng.randrange(VOCAB_SIZE) for _ in range(ntokens)]
+
+
+def prefix_sharing(config: WorkloadConfig) -> Iterator[List[int]]:
+    """Requests pick one of a few shared prefixes, e.g., system prompts,
+    followed by unique tokens.
+    """
+    rng = random.Random(config.seed)
+    prefixes = [
+        _random_tokens(rng, config.prefix_ntokens)
+        for _ in range(config.num_prefixes)
+    ]
+    for _ in range(config.num_requests):
+        prefix = rng.choice(prefixes)
+        yield prefix + _random_tokens(rng, config.suffix_ntokens)
+
+
+def multi_turn(config: WorkloadConfig) -> Iterator[List[int]]:
+    """Requests continue one of the active sessions, every turn extends the
+    history of its session by a few tokens.
+    """
+    rng = random.Random(config.seed)
+    histories: List[List[int]] = [[] for _ in range(config.num_sessions)]
+    for _ in range(config.num_requests):
+        i = rng.randrange(config.num_sessions)
+        if len(histories[i]) >= config.max_turns * config.turn_ntokens:
+            histories[i] = []
+        histories[i] = histories[i] + _random_tokens(rng, config.turn_ntokens)
+        yield histories[i]
+
+
+def uniform(config: WorkloadConfig) -> Iterator[List[int]]:
+    """Requests pick one of the distinct sequences uniformly at random."""
+    rng = random.Random(config.seed)
+    sequences = [
+        _random_tokens(rng, config.suffix_ntokens)
+        for _ in range(config.num_prefixes)
+    ]
+    for _ in range(config.num_requests):
+        yield rng.choice(sequences)
+
+
+def _hash_words(prompt: str) -> List[int]:
+    # stable pseudo token ids, s.t. prompts sharing a prefix share tokens
+    return [zlib.crc32(word.encode()) % VOCAB_SIZE for word in prompt.split()]
+
+
+def trace(config: WorkloadConfig) -> Iterator[List[int]]:
+    """Requests read from a JSONL trace.
+
+    Every line is either a request with token ids, i.e., {"tokens": [...]},
+    or a batch of requests written by the workload generator in
+    benchmarks/generator, i.e., {"timestamp": ..., "requests": [{"prompt":
+    ...}, ...]}. Prompts are split into words and every word is hashed into
+    a token id, so that prompts sharing a prefix share the same tokens.
+    """
+    assert len(config.trace) > 0, "trace is required"
+    num_requests = 0
+    with open(config.trace) as f:
+        for line in f:
+            if len(line.strip()) == 0:
+                continue
+            row = json.loads(line)
+            requests = row["requests"] if "requests" in row else [row]
+            for request in requests:
+                if "tokens" in request:
+                    yield list(request["tokens"])
+                else:
+                    yield _hash_words(request["prompt"])
+                num_requests += 1
+                if num_requests == config.num_requests:
+                    return
+
+
+WORKLOADS: Dict[str, Callable[[WorkloadConfig], Iterator[List[int]]]] = {
+    "PREFIX_SHARING": prefix_sharing,
+    "MULTI_TURN": multi_turn,
+    "UNIFORM": uniform,
+    "TRACE": trace,
+}
@@ -0,0 +1,168 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from aibrix_kvcache.cache_hashable import TokenCacheKey
+from aibrix_kvcache.l1 import L1Cache
+from aibrix_kvcache.l1.admission_policy import BaseAdmissionPolicy, TinyLFU
+from aibrix_kvcache.l1.eviction_policy import (
+    FIFO,
+    LRU,
+    S3FIFO,
+    ArrayFIFO,
+    ArrayLRU,
+    ArrayS3FIFO,
+    RadixLRU,
+)
+from aibrix_kvcache.memory import ManagedMemoryRegion, TensorPoolAllocator
+
+from .conftest import CACHE_DTYPE, release_mrs
+from .test_eviction_policies import TEST_ALLOC_SIZE, build_cache_value
+
+
+def test_create():
+    assert BaseAdmissionPolicy.create("", 128) is None
+    assert BaseAdmissionPolicy.create("NONE", 128) is None
+    assert isinstance(BaseAdmissionPolicy.create("TINYLFU", 128), TinyLFU)
+    with pytest.raises(ValueError):
+        BaseAdmissionPolicy.create("UNKNOWN", 128)
+
+
+def test_tinylfu_sketch():
+    sketch = TinyLFU(64, width=100, sample_factor=10)
+    assert sketch.width == 128
+    assert sketch.sample_size == 640
+
+    keys = [TokenCacheKey(None, (i,)) for i in range(32)]
+    for i, key in enumerate(keys):
+        for _ in range(i % 8):
+            sketch.record(key)
+    for i, key in enumerate(keys):
+        # count-min sketches never underestimate
+        assert sketch.estimate(key) >= i % 8
+
+    hot, cold = keys[7], TokenCacheKey(None, (1024,))
+    assert sketch.admit(hot, cold)
+    assert not sketch.admit(cold, hot)
+
+    # counters saturate
+    for _ in range(2 * TinyLFU.MAX_COUNT):
+        sketch.record(hot)
+    assert sketch.estimate(hot) == TinyLFU.MAX_COUNT
+
+    sketch.age()
+    assert sketch.estimate(hot) == TinyLFU.MAX_COUNT // 2
+
+
+def test_tinylfu_aging():
+    sketch = TinyLFU(4, width=16, sample_factor=4)
+    key = TokenCacheKey(None, (0,))
+    for _ in range(8):
+        sketch.record(key)
+    assert sketch.estimate(key) == 8
+    # recording other keys eventually halves all counters
+    for i in range(1, sketch.sample_size):
+        sketch.record(TokenCacheKey(None, (i,)))
+    assert sketch.estimate(key) < 8
+
+
+@pytest.mark.parametrize(
+    "policy_cls",
+    [FIFO, LRU, RadixLRU, S3FIFO, ArrayFIFO, ArrayLRU, ArrayS3FIFO],
+)
+def test_admission(policy_cls):
+    evicted = []
+    policy = policy_cls(
+        4 * TEST_ALLOC_SIZE,
+        on_evict=lambda key, mr: evicted.append((key, mr)),
+        admission_policy=TinyLFU(4),
+    )
+    allocator = TensorPoolAllocator.create(capacity_nbytes=16 * TEST_ALLOC_SIZE)
+
+    hot_keys = [TokenCacheKey(None, (i,)) for i in range(4)]
+    for key in hot_keys:
+        assert policy.put(key, build_cache_value(allocator, 64, key)).is_ok()
+        release_mrs([policy.get(key).get()])
+
+    # a one-hit wonder does not evict frequently accessed blocks
+    key = TokenCacheKey(None, (4,))
+    mr = build_cache_value(allocator, 64, key)
+    assert policy.put(key, mr).is_denied()
+    assert key not in policy
+    assert all(key in policy for key in hot_keys)
+    assert evicted == [(key, mr)]
+    assert mr.ref_count == 2
+    policy.assert_consistency()
+
+    # it is admitted once it gets more popular than the victim
+    for _ in range(4):
+        mr = build_cache_value(allocator, 64, key)
+        if policy.put(key, mr).is_denied():
+            mr.ref_down()
+        elif key in policy:
+            break
+    assert key in policy
+    assert len(policy) <= policy.capacity_nbytes
+    policy.assert_consistency()
+
+    for _, evicted_mr in evicted:
+        evicted_mr.ref_down()
+
+
+@pytest.mark.parametrize(
+    "eviction_policy", ["FIFO", "LRU", "RADIX_LRU", "S3FIFO"]
+)
+def test_l1cache_admission(
+    cache_key_fixture, cache_conf_fixture, eviction_policy
+):
+    shape, spec = cache_conf_fixture
+    per_put_nbytes = ManagedMemoryRegion.calculate_size(
+        spec.block_nbytes, 16
+    ) + ManagedMemoryRegion.calculate_size(spec.block_nbytes, 32)
+
+    evicted = []
+    cache = L1Cache(
+        eviction_policy=eviction_policy,
+        capacity_nbytes=per_put_nbytes,
+        allocator=TensorPoolAllocator.create(
+            capacity_nbytes=4 * per_put_nbytes
+        ),
+        block_spec=spec,
+        on_evict=lambda key, mr: evicted.append(mr),
+        admission_policy="TINYLFU",
+    )
+
+    hot_tokens = cache_key_fixture(list(range(32)), spec.block_ntokens)
+    shape[spec.block_shape_token_dim] = len(hot_tokens)
+    kv_tensors = torch.randn(*shape, dtype=CACHE_DTYPE)
+    assert cache.put(None, hot_tokens, kv_tensors).value == 2
+    for _ in range(2):
+        status = cache.acquire(None, hot_tokens)
+        assert status.is_ok() and len(status.value) == 2
+        release_mrs(status.value)
+
+    cold_tokens = cache_key_fixture(list(range(32, 64)), spec.block_ntokens)
+    put_status = cache.put(None, cold_tokens, kv_tensors)
+    assert put_status.is_ok()
+    assert put_status.value == 0
+    # rejected blocks are still passed to the evict callback
+    assert len(evicted) == 2
+    release_mrs(evicted)
+
+    status = cache.acquire(None, hot_tokens)
+    assert status.is_ok() and len(status.value) == 2
+    release_mrs(status.value)
+    assert cache.acquire(None, cold_tokens).is_not_found()
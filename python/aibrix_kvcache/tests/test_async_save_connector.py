@@ -0,0 +1,258 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Wiring of the async save path through the Type1 connector.
+
+vLLM is not importable here, so the few vLLM symbols the connector module
+needs at import time are replaced by stand-ins, and the worker is built
+around a CPU kv cache manager instead of going through `_init_worker`.
+"""
+
+import enum
+import importlib
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+import torch
+
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheConfig,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.integration.vllm.kv_connector.aibrix_offloading_async_saver import (  # noqa: E501
+    AIBrixOffloadingConnectorAsyncSaver,
+)
+from aibrix_kvcache.memory import TensorPoolAllocator
+
+from .conftest import discard_all_aibrix_envs, get_cache_conf
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+TYPE1_MODULE = (
+    "aibrix_kvcache.integration.vllm.kv_connector."
+    "aibrix_offloading_connector_type1"
+)
+NUM_SLOTS = 4096
+
+
+def fake_vllm_modules():
+    class KVConnectorRole(enum.Enum):
+        SCHEDULER = 0
+        WORKER = 1
+
+    class KVConnectorBase_V1:
+        def __init__(self, vllm_config, role, kv_cache_config=None):
+            self._connector_metadata = None
+
+    class KVConnectorMetadata:
+        pass
+
+    def backend(name):
+        return type(name, (), {"get_name": staticmethod(lambda: name)})
+
+    return {
+        "vllm": {},
+        "vllm.distributed": {"get_tp_group": lambda: None},
+        "vllm.distributed.kv_transfer": {},
+        "vllm.distributed.kv_transfer.kv_connector": {},
+        "vllm.distributed.kv_transfer.kv_connector.v1": {},
+        "vllm.distributed.kv_transfer.kv_connector.v1.base": {
+            "KVConnectorBase_V1": KVConnectorBase_V1,
+            "KVConnectorMetadata": KVConnectorMetadata,
+            "KVConnectorRole": KVConnectorRole,
+        },
+        "vllm.utils": {},
+        "vllm.utils.math_utils": {
+            "round_down": lambda x, y: x // y * y,
+            "round_up": lambda x, y: -(-x // y) * y,
+        },
+        "vllm.utils.torch_utils": {
+            "get_kv_cache_torch_dtype": lambda *args: torch.bfloat16
+        },
+        "vllm.v1": {},
+        "vllm.v1.attention": {},
+        "vllm.v1.attention.backend": {"AttentionBackend": object},
+        "vllm.v1.attention.selector": {"get_attn_backend": lambda: None},
+        "vllm.v1.attention.backends": {},
+        "vllm.v1.attention.backends.flash_attn": {
+            "FlashAttentionBackend": backend("FLASH_ATTN")
+        },
+        "vllm.v1.attention.backends.flashinfer": {
+            "FlashInferBackend": backend("FLASHINFER")
+        },
+    }
+
+
+@pytest.fixture
+def type1(monkeypatch):
+    for name, attrs in fake_vllm_modules().items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        monkeypatch.setitem(sys.modules, name, module)
+    sys.modules.pop(TYPE1_MODULE, None)
+    try:
+        yield importlib.import_module(TYPE1_MODULE)
+    finally:
+        sys.modules.pop(TYPE1_MODULE, None)
+
+
+@pytest.fixture
+def worker_fixture(type1, monkeypatch):
+    discard_all_aibrix_envs()
+    os.environ["AIBRIX_KV_CACHE_OL_DEVICE"] = "cpu"
+    os.environ["AIBRIX_KV_CACHE_OL_CHUNK_SIZE"] = "64"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "0.1"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE"] = "cpu"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_PIN_MEMORY"] = "0"
+    os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = ""
+
+    _, spec = get_cache_conf(KVCacheBlockLayout.NCLD)
+    # the paged kv caches, one row per slot
+    paged = torch.randn(
+        (NUM_SLOTS, *spec.block_shape[1:]), dtype=spec.block_dtype
+    )
+
+    def offload(tensors, kv_caches, slot_mapping, block_ntokens, *args):
+        assert kv_caches[0] is paged
+        for i, tensor in enumerate(tensors):
+            slots = slot_mapping[i * block_ntokens : (i + 1) * block_ntokens]
+            tensor.copy_(paged[slots])
+
+    monkeypatch.setattr(type1, "reshape_and_offload_multi_layer", offload)
+
+    cache = None
+    worker = None
+    try:
+        config = KVCacheConfig(
+            block_spec=spec,
+            model_spec=ModelSpec(1024, 512),
+            multi_threaded=True,
+        )
+        TensorPoolAllocator.SLAB_MAX_NBYTES = spec.block_nbytes * 8
+        cache = BaseKVCacheManager(config=config)
+
+        worker = object.__new__(type1.AIBrixOffloadingConnectorWorker)
+        worker.cache = cache
+        worker.cache_block_ntokens = cache.block_size
+        worker.engine_block_ntokens = cache.block_size
+        worker.block_layout = spec.block_layout
+        worker.kv_layout_blocks_first = False
+        worker.layers_kv_caches = [paged]
+        worker.k_scales = None
+        worker.v_scales = None
+        worker._meta_cache = {}
+        worker._metrics = type1.AIBrixOffloadingConnectorMetrics(
+            cache.metrics
+        )
+        worker._saver = AIBrixOffloadingConnectorAsyncSaver(
+            cache,
+            worker._offload,
+            max_inflight_tokens=NUM_SLOTS,
+            device="cpu",
+        )
+
+        connector = object.__new__(type1.AIBrixOffloadingConnector)
+        connector.connector_worker = worker
+        yield connector, worker, paged
+    finally:
+        if worker is not None:
+            # closes the saver and the cache
+            worker.__del__()
+        elif cache is not None:
+            cache.close()
+        discard_all_aibrix_envs()
+
+
+def add_request(type1, worker, req_id, tokens, slot_mapping):
+    # CachedMeta allocates its slot mapping on cuda
+    cached = object.__new__(type1.AIBrixOffloadingConnectorCachedMeta)
+    cached.context_tokens = np.array(tokens, dtype=np.int32)
+    cached.context_tokens_offset = len(tokens)
+    cached.context_tokens_view = None
+    cached.context_slot_mapping = slot_mapping
+    cached.context_slot_mapping_offset = len(tokens)
+    worker._meta_cache[req_id] = cached
+    return type1.AIBrixOffloadingConnectorRequestMetadata(
+        req_id=req_id,
+        prompt_len=len(tokens),
+        context_len=0,
+        query_len=len(tokens),
+    )
+
+
+class FakeEvent:
+    def __init__(self):
+        self.done = False
+
+    def query(self):
+        return self.done
+
+
+def test_scheduler_holds_finished_requests(type1):
+    config = types.SimpleNamespace(
+        kv_transfer_config=types.SimpleNamespace(kv_role="kv_both"),
+        cache_config=types.SimpleNamespace(block_size=16),
+    )
+    request = types.SimpleNamespace(request_id="r0")
+    try:
+        os.environ["VLLM_AIBRIX_ASYNC_SAVE_ENABLED"] = "1"
+        scheduler = type1.AIBrixOffloadingConnectorScheduler(config)
+        assert scheduler.request_finished(request, [0]) == (True, None)
+    finally:
+        os.environ.pop("VLLM_AIBRIX_ASYNC_SAVE_ENABLED")
+    scheduler = type1.AIBrixOffloadingConnectorScheduler(config)
+    assert scheduler.request_finished(request, [0]) == (False, None)
+
+
+def test_async_save(type1, worker_fixture):
+    connector, worker, paged = worker_fixture
+    tokens = list(range(256))
+    slot_mapping = torch.randperm(NUM_SLOTS)[: len(tokens)]
+    meta = type1.AIBrixOffloadingConnectorMetadata(
+        {"r0": add_request(type1, worker, "r0", tokens, slot_mapping)}
+    )
+    connector._connector_metadata = meta
+
+    connector.wait_for_save()
+    # the snapshot is taken, the request can release its blocks right away
+    assert connector.get_finished({"r0"}) == ({"r0"}, None)
+    assert worker._saver.flush(timeout_s=10)
+
+    status = worker.cache.acquire(None, TokenListView(tokens))
+    assert status.is_ok(), f"{status}"
+    assert status.value[0] == len(tokens)
+    handle = status.value[1]
+    block_ntokens = worker.cache_block_ntokens
+    for i, tensor in enumerate(handle.to_tensors()):
+        slots = slot_mapping[i * block_ntokens : (i + 1) * block_ntokens]
+        assert torch.equal(tensor, paged[slots])
+    handle.release()
+
+
+def test_get_finished_waits_for_copies(worker_fixture):
+    connector, worker, _ = worker_fixture
+    copied = FakeEvent()
+    worker._saver._copies["r0"] = copied
+    # blocks are held until the snapshot copies have completed
+    assert connector.get_finished({"r0"}) == (None, None)
+    copied.done = True
+    assert connector.get_finished(set()) == ({"r0"}, None)
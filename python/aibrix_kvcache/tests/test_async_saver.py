@@ -0,0 +1,233 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+import pytest
+import torch
+
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheConfig,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.integration.vllm.kv_connector.aibrix_offloading_async_saver import (  # noqa: E501
+    AIBrixOffloadingConnectorAsyncSaver,
+)
+from aibrix_kvcache.memory import TensorPoolAllocator
+
+from .conftest import discard_all_aibrix_envs, get_cache_conf
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+NUM_SLOTS = 4096
+
+
+@pytest.fixture(params=["l1", "l2_sync"], scope="function")
+def saver_fixture(request):
+    discard_all_aibrix_envs()
+
+    os.environ["AIBRIX_KV_CACHE_OL_DEVICE"] = "cpu"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "1"
+    os.environ["AIBRIX_KV_CACHE_OL_CHUNK_SIZE"] = "64"
+    if request.param == "l1":
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = ""
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE"] = "cpu"
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_PIN_MEMORY"] = "0"
+    else:
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "0"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+        os.environ[
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS"
+        ] = "0"
+
+    _, spec = get_cache_conf(KVCacheBlockLayout.NCLD)
+    # the paged kv caches, one row per slot
+    paged = torch.randn(
+        (NUM_SLOTS, *spec.block_shape[1:]), dtype=spec.block_dtype
+    )
+
+    def offload_fn(tensors, slot_mapping):
+        for i, tensor in enumerate(tensors):
+            slots = slot_mapping[
+                i * spec.block_ntokens : (i + 1) * spec.block_ntokens
+            ]
+            tensor.copy_(paged[slots])
+
+    cache = None
+    saver = None
+    try:
+        # size the pool for steps of 512 tokens, not a single chunk
+        config = KVCacheConfig(
+            block_spec=spec,
+            model_spec=ModelSpec(1024, 512),
+            multi_threaded=True,
+        )
+        TensorPoolAllocator.SLAB_MAX_NBYTES = spec.block_nbytes * 8
+        cache = BaseKVCacheManager(config=config)
+
+        def create_saver(max_inflight_tokens=NUM_SLOTS):
+            nonlocal saver
+            saver = AIBrixOffloadingConnectorAsyncSaver(
+                cache,
+                offload_fn,
+                max_inflight_tokens=max_inflight_tokens,
+                device="cpu",
+            )
+            return saver
+
+        yield spec, cache, paged, create_saver
+    finally:
+        if saver is not None:
+            saver.close()
+        if cache is not None:
+            cache.close()
+        discard_all_aibrix_envs()
+
+
+def block_worker(saver):
+    """Block the worker thread of the saver until the returned event is set."""
+    event = threading.Event()
+    saver._executor.submit(event.wait)
+    return event
+
+
+def check_cache(cache, paged, tokens, slot_mapping, ntokens):
+    status = cache.acquire(None, tokens)
+    assert status.is_ok(), f"{status}"
+    assert status.value[0] == ntokens, f"{status.value[0]} != {ntokens}"
+    handle = status.value[1]
+    block_ntokens = cache.block_size
+    for i, tensor in enumerate(handle.to_tensors()):
+        slots = slot_mapping[i * block_ntokens : (i + 1) * block_ntokens]
+        assert torch.equal(tensor, paged[slots])
+    handle.release()
+
+
+def test_save(saver_fixture):
+    spec, cache, paged, create_saver = saver_fixture
+    saver = create_saver()
+
+    tokens = TokenListView(list(range(256)))
+    slot_mapping = torch.randperm(NUM_SLOTS)[: len(tokens)]
+    results = []
+    unblock = block_worker(saver)
+    # returns once the kv caches are snapshotted
+    assert saver.save(
+        "r0", None, tokens, slot_mapping, lambda n, _: results.append(n)
+    )
+    expected = paged[slot_mapping].clone()
+    # paged blocks can be reused right after save returns
+    paged[slot_mapping] = 0
+    assert len(saver) == len(tokens)
+    # the put is still inflight, but the snapshot no longer needs the
+    # paged blocks
+    assert saver.get_finished({"r0"}) == {"r0"}
+
+    unblock.set()
+    assert saver.flush(timeout_s=10)
+    assert results == [len(tokens)]
+    assert len(saver) == 0
+    assert saver.get_finished(set()) == set()
+
+    paged[slot_mapping] = expected
+    check_cache(cache, paged, tokens, slot_mapping, len(tokens))
+
+
+def test_save_existing(saver_fixture):
+    spec, cache, paged, create_saver = saver_fixture
+    saver = create_saver()
+
+    tokens = TokenListView(list(range(256)))
+    slot_mapping = torch.randperm(NUM_SLOTS)[: len(tokens)]
+    results = []
+    # the first 96 tokens span the first chunk and part of the second one
+    assert saver.save("r0", None, tokens[:96], slot_mapping)
+    assert saver.flush(timeout_s=10)
+
+    assert saver.save(
+        "r0", None, tokens, slot_mapping, lambda n, _: results.append(n)
+    )
+    assert saver.flush(timeout_s=10)
+    # only missing tokens are put
+    assert results == [len(tokens) - 96]
+    assert saver.get_finished({"r0"}) == {"r0"}
+
+    check_cache(cache, paged, tokens, slot_mapping, len(tokens))
+
+
+def test_save_with_prefix(saver_fixture):
+    spec, cache, paged, create_saver = saver_fixture
+    saver = create_saver()
+
+    tokens = TokenListView(list(range(256)))
+    slot_mapping = torch.randperm(NUM_SLOTS)[: len(tokens)]
+    # save the sequence in two steps like chunked prefills
+    assert saver.save("r0", None, tokens[:128], slot_mapping)
+    assert saver.save("r0", tokens[:128], tokens[128:], slot_mapping)
+    assert saver.get_finished({"r0"}) <= {"r0"}
+    assert saver.flush(timeout_s=10)
+
+    check_cache(cache, paged, tokens, slot_mapping, len(tokens))
+
+
+def test_bounded_inflight_tokens(saver_fixture):
+    spec, cache, paged, create_saver = saver_fixture
+    saver = create_saver(max_inflight_tokens=128)
+
+    tokens = TokenListView(list(range(512)))
+    slot_mapping = torch.randperm(NUM_SLOTS)[: len(tokens)]
+    unblock = block_worker(saver)
+    # a save exceeding the quota is admitted if nothing is inflight
+    assert saver.save("r0", None, tokens[:256], slot_mapping)
+    assert not saver.save("r1", tokens[:256], tokens[256:], slot_mapping)
+    assert len(saver) == 256
+    # a skipped save never blocks its request from finishing
+    assert saver.get_finished({"r0", "r1"}) == {"r0", "r1"}
+
+    unblock.set()
+    assert saver.flush(timeout_s=10)
+    assert saver.save("r1", tokens[:256], tokens[256:], slot_mapping)
+    assert saver.flush(timeout_s=10)
+
+    check_cache(cache, paged, tokens, slot_mapping, len(tokens))
+
+
+class FakeEvent:
+    def __init__(self):
+        self.done = False
+
+    def query(self):
+        return self.done
+
+
+def test_get_finished_waits_for_copies(saver_fixture):
+    spec, cache, paged, create_saver = saver_fixture
+    saver = create_saver()
+
+    # copies issued on the side stream that have not completed yet
+    copies = {"r0": FakeEvent(), "r1": FakeEvent()}
+    saver._copies.update(copies)
+    assert saver.get_finished({"r0", "r1", "r2"}) == {"r2"}
+
+    copies["r1"].done = True
+    assert saver.get_finished(set()) == {"r1"}
+    copies["r0"].done = True
+    assert saver.get_finished(set()) == {"r0"}
+    assert len(saver._copies) == 0
@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import copy
 import os
 import random
+import threading
+import time
 
 import pytest
 import torch
@@ -28,6 +31,7 @@ from aibrix_kvcache import (
     KVCacheConfig,
     KVCacheBlockLayout,
     ModelSpec,
+    TokenListView,
     cache_manager,
 )
 from aibrix_kvcache.memory import TensorPoolAllocator
@@ -43,12 +47,23 @@ cache_manager.TESTING_DISABLE_PIN_MEMORY = True
 
 
 @pytest.fixture(
-    params=["l1", "l2_sync", "l2_async", "l1_l2_sync"], scope="function"
+    params=[
+        "l1",
+        "l2_sync",
+        "l2_async",
+        "l1_l2_sync",
+        "l2_write_back_async",
+        "l1_l2_write_back_async",
+    ],
+    scope="function",
 )
 def cache_mgr_fixture(cache_conf_fixture, request):
     discard_all_aibrix_envs()
 
     os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "1"
+    os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS"] = (
+        "1024"
+    )
 
     if request.param == "l1":
         # enable l1 and disable l2
@@ -89,6 +104,35 @@ def cache_mgr_fixture(cache_conf_fixture, request):
         # always use double get
         os.environ["AIBRIX_KV_CACHE_OL_DOUBLE_GET_THRESHOLD"] = "0"
 
+    elif request.param == "l2_write_back_async":
+        # enable l2 with coalesced async writes and disable l1
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "0"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+        os.environ[
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS"
+        ] = "4096"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_ENABLED"] = "1"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH"] = "4"
+
+    elif request.param == "l1_l2_write_back_async":
+        # enable both l1 and l2, evicted blocks are written back to l2
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+
+        # let allocator use host memory
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE"] = "cpu"
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_PIN_MEMORY"] = "0"
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "0.01"
+
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_TYPE"] = "EVICTED"
+        os.environ[
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS"
+        ] = "4096"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_WRITE_BACK_ENABLED"] = "1"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_OP_BATCH"] = "4"
+        # always use double get
+        os.environ["AIBRIX_KV_CACHE_OL_DOUBLE_GET_THRESHOLD"] = "0"
+
     shape, spec = cache_conf_fixture
 
     cache = None
@@ -285,6 +329,168 @@ def test_delete(cache_key_fixture, cache_mgr_fixture):
     assert get_status.is_not_found()
 
 
+def test_prefetch(cache_mgr_fixture):
+    shape, spec, cache_mgr, param = cache_mgr_fixture
+    if "l2" not in param:
+        pytest.skip("prefetch requires l2 cache")
+
+    all_tokens = TokenListView([i for i in range(64)])
+    tokens0 = all_tokens[:32]
+    tokens1 = all_tokens[32:]
+
+    # only put tokens1 onto l2 cache
+    status = cache_mgr.allocate_for(tokens0, tokens1)
+    assert status.is_ok()
+    put_handle = status.value
+    randomize_cache_handle(put_handle)
+    put_tensors = [t.clone() for t in put_handle.to_tensors()]
+    put_status = cache_mgr._l2_put_sync(tokens0, tokens1, put_handle)
+    assert put_status.is_ok()
+
+    cache_mgr.prefetch(tokens0, tokens1)
+    assert len(cache_mgr._l2_inflight_prefetches) == 1
+    # duplicated prefetches are discarded
+    cache_mgr.prefetch(tokens0, tokens1)
+    assert len(cache_mgr._l2_inflight_prefetches) == 1
+
+    get_status = cache_mgr.acquire(tokens0, tokens1)
+    assert get_status.is_ok()
+    assert get_status.value[0] == 32
+    get_handle = get_status.value[1]
+    for pt, gt in zip(put_tensors, get_handle.to_tensors()):
+        assert torch.equal(pt, gt)
+    get_handle.release()
+
+    assert len(cache_mgr._l2_inflight_prefetches) == 0
+    assert cache_mgr._l2_inflight_prefetch_blocks == 0
+    if "l1" in param:
+        exists_status = cache_mgr._l1_cache.exists(tokens0, tokens1)
+        assert exists_status.is_ok()
+        assert exists_status.value == 2
+
+
+def test_prefetch_quota(cache_mgr_fixture):
+    shape, spec, cache_mgr, param = cache_mgr_fixture
+    if "l2" not in param:
+        pytest.skip("prefetch requires l2 cache")
+
+    tokens = TokenListView([i for i in range(32 * spec.block_ntokens)])
+    quota = cache_mgr._l2_prefetch_quota
+    cache_mgr.prefetch(None, tokens[: 16 * spec.block_ntokens])
+    cache_mgr.prefetch(tokens[: 16 * spec.block_ntokens],
+                       tokens[16 * spec.block_ntokens :])
+    assert cache_mgr._l2_inflight_prefetch_blocks <= quota
+
+    cache_mgr._cancel_l2_prefetches()
+    assert len(cache_mgr._l2_inflight_prefetches) == 0
+    with cache_mgr._prefetch_cv:
+        assert cache_mgr._prefetch_cv.wait_for(
+            lambda: cache_mgr._l2_inflight_prefetch_blocks == 0, timeout=10
+        )
+
+
+def test_prefetch_cancellation(cache_mgr_fixture):
+    shape, spec, cache_mgr, param = cache_mgr_fixture
+    if "l2" not in param:
+        pytest.skip("prefetch requires l2 cache")
+
+    all_tokens = TokenListView([i for i in range(64)])
+    tokens0 = all_tokens[:32]
+    tokens1 = all_tokens[32:]
+
+    cache_mgr.prefetch(tokens0, tokens1)
+    assert len(cache_mgr._l2_inflight_prefetches) == 1
+
+    # tokens0 is a miss, the prefetch of tokens1 will not be consumed
+    get_status = cache_mgr.acquire(None, tokens0)
+    assert get_status.is_not_found()
+    assert len(cache_mgr._l2_inflight_prefetches) == 0
+    with cache_mgr._prefetch_cv:
+        assert cache_mgr._prefetch_cv.wait_for(
+            lambda: cache_mgr._l2_inflight_prefetch_blocks == 0, timeout=10
+        )
+
+
+def test_single_flight_acquire(cache_mgr_fixture):
+    shape, spec, cache_mgr, param = cache_mgr_fixture
+    if "l2" not in param:
+        pytest.skip("single-flight requires l2 cache")
+
+    all_tokens = TokenListView([i for i in range(128)])
+    tokens = all_tokens[:64]
+    status = cache_mgr.allocate_for(None, all_tokens)
+    assert status.is_ok()
+    put_handle = status.value
+    randomize_cache_handle(put_handle)
+    put_tensors = [t.clone() for t in put_handle.to_tensors()]
+    put_status = cache_mgr._l2_put_sync(None, all_tokens, put_handle)
+    assert put_status.is_ok()
+
+    # hold L2Cache gets until all followers have joined the first one
+    gate = threading.Event()
+    get_ntokens = []
+    l2_get = cache_mgr._l2_cache.get
+
+    async def gated_get(prefix, query, mrs):
+        get_ntokens.append(len(query))
+        await asyncio.get_running_loop().run_in_executor(None, gate.wait)
+        return await l2_get(prefix, query, mrs)
+
+    joined = threading.Semaphore(0)
+    join_l2_fetches = cache_mgr._join_l2_fetches
+
+    def counted_join(*args, **kwargs):
+        fetches = join_l2_fetches(*args, **kwargs)
+        if len(fetches) > 0:
+            joined.release()
+        return fetches
+
+    cache_mgr._l2_cache.get = gated_get
+    cache_mgr._join_l2_fetches = counted_join
+    cache_mgr._l2_cache_per_token_timeout_ms = 1000
+
+    results = {}
+
+    def acquire(i, query):
+        results[i] = cache_mgr.acquire(None, query)
+
+    leader = threading.Thread(target=acquire, args=(0, tokens))
+    leader.start()
+    while len(cache_mgr._l2_inflight_fetches) < 4:
+        time.sleep(0.01)
+    # the last follower fetches the blocks beyond the leader's by itself
+    followers = [
+        threading.Thread(
+            target=acquire, args=(i, all_tokens if i == 7 else tokens)
+        )
+        for i in range(1, 8)
+    ]
+    for t in followers:
+        t.start()
+    try:
+        for _ in followers:
+            assert joined.acquire(timeout=10)
+    finally:
+        gate.set()
+    for t in [leader] + followers:
+        t.join(timeout=10)
+
+    assert sorted(get_ntokens) == [64, 64]
+    assert len(cache_mgr._l2_inflight_fetches) == 0
+    for i, status in results.items():
+        assert status.is_ok(), f"{status}"
+        ntokens = len(all_tokens) if i == 7 else len(tokens)
+        assert status.value[0] == ntokens
+        get_handle = status.value[1]
+        for pt, gt in zip(put_tensors, get_handle.to_tensors()):
+            assert torch.equal(pt, gt)
+        get_handle.release()
+
+    metrics = cache_mgr.metrics.l2.single_flight_metrics
+    assert metrics.total_fetches == 8
+    assert metrics.total_coalesced_fetches == 28
+
+
 def test_stress_cache(compact_layout_enabled, cache_key_fixture, cache_mgr_fixture):
     shape, spec, cache_mgr, param = cache_mgr_fixture
     test_key = cache_key_fixture([0], spec.block_ntokens)
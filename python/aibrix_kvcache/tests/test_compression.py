@@ -0,0 +1,262 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import torch
+
+from aibrix_kvcache.cache_hashable import TokenListView
+from aibrix_kvcache.l2 import KeyBuilder, L2Cache
+from aibrix_kvcache.l2.marshallers import (
+    CompressionPipeline,
+    Compressor,
+    TensorSerializer,
+)
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.metrics import L2CacheMetrics
+from aibrix_kvcache.status import Status, StatusCodes
+
+from .conftest import release_mrs
+from .test_l2cache import build_get_mrs, build_put_mrs
+
+BLOCK_NBYTES = 64 * 1024
+
+
+@pytest.fixture(params=["ZSTD", "LZ4"])
+def compressor(request):
+    return Compressor.create(request.param)
+
+
+@pytest.fixture
+def allocator():
+    return TensorPoolAllocator.create(capacity_nbytes=16 * BLOCK_NBYTES)
+
+
+def alloc_mrs(allocator, n, nbytes=BLOCK_NBYTES):
+    status = allocator.alloc([nbytes] * n)
+    assert status.is_ok()
+    return status.get()
+
+
+def fill_compressible(mrs):
+    for i, mr in enumerate(mrs):
+        data = mr.slab[mr.addr : mr.addr + mr.length]
+        data.zero_()
+        data[::64] = i + 1
+
+
+def fetch(pipeline, stagings, mrs):
+    """Simulate a connector that fetches the stored frames."""
+    fetched = pipeline.alloc(mrs)
+    for src, dst in zip(stagings, fetched):
+        assert dst.capacity >= src.length
+        dst.length = src.length
+        dst.copy(src)
+    return fetched
+
+
+def test_create():
+    assert Compressor.create("") is None
+    assert Compressor.create("none") is None
+    assert Compressor.create("zstd").signature == "zs"
+    assert Compressor.create("lz4").signature == "l4"
+    with pytest.raises(ValueError):
+        Compressor.create("UNKNOWN")
+
+
+def test_compressor(compressor):
+    data = bytes(range(256)) * 64
+    out = memoryview(bytearray(compressor.max_compressed_nbytes(len(data))))
+    nbytes = compressor.compress_into(memoryview(data), out)
+    assert nbytes < len(data)
+    raw = bytearray(len(data))
+    assert compressor.decompress_into(out[:nbytes], memoryview(raw)) == len(
+        data
+    )
+    assert raw == data
+    assert compressor.unmarshal(compressor.marshal(data)) == data
+
+
+def test_tensor_serializer():
+    serializer = TensorSerializer()
+    tensor = torch.arange(16, dtype=torch.float16)
+    out = serializer.unmarshal(serializer.marshal(tensor))
+    assert torch.equal(out.view(torch.float16), tensor)
+
+    indices, out = serializer.unmarshal(serializer.marshal(([1, 2], tensor)))
+    assert indices == [1, 2]
+    assert torch.equal(out.view(torch.float16), tensor)
+
+    obj = ([3], tensor)
+    buffer = bytearray(serializer.nbytes(obj))
+    assert serializer.marshal_into(obj, memoryview(buffer)) == len(buffer)
+    assert bytes(buffer) == serializer.marshal(obj)
+
+
+def test_pipeline(compressor, allocator):
+    metrics = L2CacheMetrics(cache_type="L2Cache", block_ntokens=16)
+    pipeline = CompressionPipeline(
+        compressor, BLOCK_NBYTES, num_slots=8, metrics=metrics
+    )
+    put_mrs = alloc_mrs(allocator, 4)
+    get_mrs = alloc_mrs(allocator, 4)
+    fill_compressible(put_mrs[:2])
+    # incompressible blocks are stored as is
+    for mr in put_mrs[2:]:
+        mr.slab[mr.addr : mr.addr + mr.length].random_(0, 256)
+
+    stagings = pipeline.compress(put_mrs)
+    assert all(s.length < BLOCK_NBYTES // 4 for s in stagings[:2])
+    assert all(s.length > BLOCK_NBYTES for s in stagings[2:])
+    fetched = fetch(pipeline, stagings, get_mrs)
+    pipeline.release(stagings)
+
+    statuses = pipeline.decompress(
+        fetched, get_mrs, [Status.ok()] * len(fetched)
+    )
+    pipeline.release(fetched)
+    assert all(status.is_ok() for status in statuses)
+    for put_mr, get_mr in zip(put_mrs, get_mrs):
+        assert get_mr.tobytes() == put_mr.tobytes()
+
+    compression_metrics = metrics.compression_metrics
+    assert compression_metrics.total_raw_nbytes == 4 * BLOCK_NBYTES
+    assert compression_metrics.ratio > 1
+    assert "Compression ratio" in metrics.summary()
+    release_mrs(put_mrs + get_mrs)
+
+
+def test_pipeline_errors(allocator):
+    pipeline = CompressionPipeline(
+        Compressor.create("ZSTD"), BLOCK_NBYTES, num_slots=8
+    )
+    put_mrs = alloc_mrs(allocator, 1)
+    get_mrs = alloc_mrs(allocator, 2, BLOCK_NBYTES // 2)
+    fill_compressible(put_mrs)
+    stagings = pipeline.compress(put_mrs)
+
+    fetched = fetch(pipeline, stagings, get_mrs[:1])
+    # size mismatch
+    statuses = pipeline.decompress(fetched, get_mrs[:1], [Status.ok()])
+    assert statuses[0].is_error()
+    # truncated frame
+    fetched[0].length = 4
+    statuses = pipeline.decompress(fetched, get_mrs[:1], [Status.ok()])
+    assert statuses[0].is_error()
+    # fetch failures are passed through
+    not_found = Status(StatusCodes.NOT_FOUND)
+    statuses = pipeline.decompress(fetched, get_mrs[:1], [not_found])
+    assert statuses[0].is_not_found()
+    pipeline.release(stagings + fetched)
+    release_mrs(put_mrs + get_mrs)
+
+
+def test_staging_slots(allocator):
+    pipeline = CompressionPipeline(
+        Compressor.create("ZSTD"), BLOCK_NBYTES, num_slots=2
+    )
+    mrs = alloc_mrs(allocator, 3)
+    fill_compressible(mrs)
+    stagings = pipeline.compress(mrs)
+    # the third one falls back to a transient buffer
+    assert [s.slab is pipeline.slab for s in stagings] == [True, True, False]
+    assert len(pipeline._free_slots) == 0
+
+    # a slot is held until its last reference is dropped
+    stagings[0].ref_up()
+    pipeline.release(stagings)
+    assert len(pipeline._free_slots) == 1
+    stagings[0].ref_down()
+    assert len(pipeline._free_slots) == 2
+    release_mrs(mrs)
+
+
+def test_compress_into_dst(compressor):
+    data = bytes(range(256)) * 64
+    out = bytearray(compressor.max_compressed_nbytes(len(data)) + 64)
+    nbytes = compressor.compress_into(memoryview(data), memoryview(out))
+    # bytes after the frame are left untouched
+    assert out[nbytes:] == bytearray(len(out) - nbytes)
+    assert compressor.unmarshal(bytes(out[:nbytes])) == data
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mputmget", [True, False])
+@pytest.mark.parametrize("compression", ["ZSTD", "LZ4"])
+async def test_l2cache_compression(cache_conf_fixture, mputmget, compression):
+    shape, spec = cache_conf_fixture
+    os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION"] = "1"
+    if mputmget:
+        os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_MPUT_MGET"] = "1"
+    metrics = L2CacheMetrics(
+        cache_type="L2Cache", block_ntokens=spec.block_ntokens
+    )
+    try:
+        l2cache = L2Cache(
+            backend_name="MOCK",
+            placement_policy="SIMPLE",
+            namespace="test",
+            block_spec=spec,
+            executor=ThreadPoolExecutor(max_workers=2),
+            key_builder=KeyBuilder.create(
+                "ROLLING_HASH", block_size=spec.block_ntokens
+            ),
+            metrics=metrics,
+            compression=compression,
+        )
+    finally:
+        os.environ.pop("AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION")
+        os.environ.pop("AIBRIX_KV_CACHE_OL_MOCK_USE_MPUT_MGET", None)
+    assert l2cache.open().is_ok()
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=128 * spec.block_nbytes
+    )
+
+    tokens = TokenListView(list(range(32)))
+    put_mrs = build_put_mrs(
+        allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+    )
+    for mr in put_mrs:
+        # compressible kv tensors
+        mr.slab[mr.addr : mr.addr + spec.block_nbytes].zero_()
+    assert (await l2cache.put(None, tokens, put_mrs)).value == 2
+
+    get_mrs = build_get_mrs(
+        allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+    )
+    assert (await l2cache.get(None, tokens, get_mrs)).value == 2
+    for put_mr, get_mr in zip(put_mrs, get_mrs):
+        assert torch.equal(get_mr.to_tensor(), put_mr.to_tensor())
+
+    compression_metrics = metrics.compression_metrics
+    assert compression_metrics.ratio > 1
+    assert compression_metrics.decompress_cpu_s > 0
+    l2cache.close()
+    release_mrs(put_mrs + get_mrs)
+
+
+def test_l2cache_compression_unsupported(cache_conf_fixture):
+    shape, spec = cache_conf_fixture
+    l2cache = L2Cache(
+        backend_name="MOCK",
+        placement_policy="SIMPLE",
+        namespace="test",
+        block_spec=spec,
+        executor=ThreadPoolExecutor(max_workers=2),
+        compression="ZSTD",
+    )
+    # values must not be stored uncompressed under a compressed layout
+    assert l2cache.open().is_invalid()
@@ -17,8 +17,21 @@ import os
 import pytest
 import torch
 
-from aibrix_kvcache.cache_hashable import TokenCacheKey
-from aibrix_kvcache.l1.eviction_policy import FIFO, LRU, S3FIFO
+from aibrix_kvcache.cache_hashable import (
+    KVCacheKey,
+    TokenCacheKey,
+    TokenListView,
+)
+from aibrix_kvcache.l1 import L1Cache
+from aibrix_kvcache.l1.eviction_policy import (
+    FIFO,
+    LRU,
+    S3FIFO,
+    ArrayFIFO,
+    ArrayLRU,
+    ArrayS3FIFO,
+    RadixLRU,
+)
 from aibrix_kvcache.memory import MemoryRegion, TensorPoolAllocator
 
 from .conftest import randomize_mrs
@@ -81,7 +94,9 @@ def check_ref_count(mr: MemoryRegion, expected_ref_count: int):
     assert mr.ref_count == expected_ref_count
 
 
-@pytest.fixture(params=[FIFO, LRU, S3FIFO])
+@pytest.fixture(
+    params=[FIFO, LRU, RadixLRU, S3FIFO, ArrayFIFO, ArrayLRU, ArrayS3FIFO]
+)
 def policy(request):
     yield request.param(
         100 * TEST_ALLOC_SIZE,
@@ -98,7 +113,9 @@ def policy(request):
     hot_data.clear()
 
 
-@pytest.fixture(params=[FIFO, LRU, S3FIFO])
+@pytest.fixture(
+    params=[FIFO, LRU, RadixLRU, S3FIFO, ArrayFIFO, ArrayLRU, ArrayS3FIFO]
+)
 def small_capacity_policy(request):
     return request.param(
         10 * TEST_ALLOC_SIZE,
@@ -225,7 +242,7 @@ def test_basic(policy):
         mr = build_cache_value(allocator, 64, key)
         ground_truth.append((idx, mr.to_tensor()))
         policy.put(key, mr)
-        if policy.name == "S3FIFO":
+        if policy.name.endswith("S3FIFO"):
             # for S3FIFO, we need to get the data to trigger promotion
             # to main fifo when eviction happens on small fifo
             assert policy.get(key).is_ok()
@@ -295,3 +312,88 @@ def test_on_hot_access_callback(policy):
         ),
     )
     policy.assert_consistency()
+
+
+def build_prefix_keys(tokens, block_ntokens=4):
+    return [
+        KVCacheKey(prefix, query)
+        for prefix, query in L1Cache.cache_block_keys(
+            None, TokenListView(tokens), block_ntokens
+        )
+    ]
+
+
+def test_radix_lru_leaf_first():
+    allocator = TensorPoolAllocator.create(capacity_nbytes=256 * TEST_ALLOC_SIZE)
+    policy = RadixLRU(6 * TEST_ALLOC_SIZE, on_evict=on_evict_callback)
+    # two paths sharing the first two blocks
+    path0 = build_prefix_keys(list(range(16)))
+    path1 = build_prefix_keys(list(range(8)) + list(range(100, 108)))
+    for key in path0 + path1[2:]:
+        assert policy.put(key, build_cache_value(allocator, 64, key)).is_ok()
+    assert policy.reachable_nbytes == len(policy) == 6 * TEST_ALLOC_SIZE
+    policy.assert_consistency()
+
+    # the shared blocks are accessed but never evicted before the leaves
+    for key in path1:
+        policy.get(key).value.ref_down()
+    assert policy.evict(3 * TEST_ALLOC_SIZE).is_ok()
+    assert [key for key, _ in evicted_data] == [path0[3], path0[2], path1[3]]
+    assert all(key in policy for key in path1[:3])
+    assert policy.reachable_nbytes == len(policy)
+    policy.assert_consistency()
+
+    for _, mr in evicted_data:
+        mr.ref_down()
+    evicted_data.clear()
+
+
+def test_radix_lru_orphans():
+    allocator = TensorPoolAllocator.create(capacity_nbytes=256 * TEST_ALLOC_SIZE)
+    policy = RadixLRU(8 * TEST_ALLOC_SIZE, on_evict=on_evict_callback)
+    keys = build_prefix_keys(list(range(16)))
+    # blocks put without their prefix are unreachable
+    for key in keys[2:]:
+        assert policy.put(key, build_cache_value(allocator, 64, key)).is_ok()
+    assert policy.reachable_nbytes == 0
+    policy.assert_consistency()
+
+    # until the missing prefix is put back
+    for key in keys[:2]:
+        assert policy.put(key, build_cache_value(allocator, 64, key)).is_ok()
+        policy.assert_consistency()
+    assert policy.reachable_nbytes == len(policy) == 4 * TEST_ALLOC_SIZE
+
+    # orphans are evicted before any reachable block
+    other = build_prefix_keys(list(range(100, 116)))
+    for key in other[1:]:
+        assert policy.put(key, build_cache_value(allocator, 64, key)).is_ok()
+    assert policy.evict(3 * TEST_ALLOC_SIZE).is_ok()
+    assert {key for key, _ in evicted_data} == set(other[1:])
+    assert policy.reachable_nbytes == len(policy) == 4 * TEST_ALLOC_SIZE
+    policy.assert_consistency()
+
+    for _, mr in evicted_data:
+        mr.ref_down()
+    evicted_data.clear()
+
+
+def test_radix_lru_delete_cascades():
+    allocator = TensorPoolAllocator.create(capacity_nbytes=256 * TEST_ALLOC_SIZE)
+    policy = RadixLRU(8 * TEST_ALLOC_SIZE, on_evict=on_evict_callback)
+    keys = build_prefix_keys(list(range(16)))
+    mrs = [build_cache_value(allocator, 64, key) for key in keys]
+    for key, mr in zip(keys, mrs):
+        assert policy.put(key, mr).is_ok()
+
+    assert policy.delete(keys[1]).is_ok()
+    # descendants of the deleted block are reclaimed as evictions
+    assert [key for key, _ in evicted_data] == [keys[3], keys[2]]
+    assert list(policy.keys()) == [keys[0]]
+    assert policy.reachable_nbytes == len(policy) == TEST_ALLOC_SIZE
+    policy.assert_consistency()
+
+    for _, mr in evicted_data:
+        mr.ref_down()
+    evicted_data.clear()
+    assert all(mr.ref_count == 0 for mr in mrs[1:])
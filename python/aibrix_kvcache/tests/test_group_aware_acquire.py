@@ -0,0 +1,148 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+import torch
+import torch.distributed as dist
+
+from aibrix_kvcache import (
+    GroupAwareKVCacheManager,
+    KVCacheConfig,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.memory import TensorPoolAllocator
+
+from .conftest import discard_all_aibrix_envs, randomize_cache_handle
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+CHUNK_SIZE = 64
+PIPELINE_DEPTH = 4
+
+
+@pytest.fixture(scope="module")
+def process_group(tmp_path_factory):
+    """A single-rank gloo process group."""
+    store = tmp_path_factory.mktemp("dist") / "store"
+    dist.init_process_group(
+        "gloo", init_method=f"file://{store}", rank=0, world_size=1
+    )
+    try:
+        yield dist.group.WORLD
+    finally:
+        dist.destroy_process_group()
+
+
+@pytest.fixture(params=["l1", "l2_sync", "l2_prefetch", "l1_l2_sync"])
+def group_cache_fixture(cache_conf_fixture, process_group, request):
+    discard_all_aibrix_envs()
+
+    os.environ["AIBRIX_KV_CACHE_OL_CHUNK_SIZE"] = str(CHUNK_SIZE)
+    os.environ["AIBRIX_KV_CACHE_OL_GROUP_AWARE_ACQUIRE_PIPELINE_DEPTH"] = str(
+        PIPELINE_DEPTH
+    )
+    # let allocator use host memory
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE"] = "cpu"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_PIN_MEMORY"] = "0"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "0.1"
+    os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_MAX_INFLIGHT_TOKENS"] = (
+        "0"
+    )
+
+    if request.param == "l1":
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = ""
+    elif request.param in ("l2_sync", "l2_prefetch"):
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "0"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+        if request.param == "l2_prefetch":
+            os.environ[
+                "AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS"
+            ] = "4096"
+    elif request.param == "l1_l2_sync":
+        os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = "MOCK"
+        os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_INGESTION_TYPE"] = "ALL"
+        os.environ[
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_PREFETCH_MAX_INFLIGHT_TOKENS"
+        ] = "4096"
+
+    shape, spec = cache_conf_fixture
+
+    cache = None
+    try:
+        config = KVCacheConfig(block_spec=spec, model_spec=ModelSpec(1024))
+        TensorPoolAllocator.SLAB_MAX_NBYTES = spec.block_nbytes * 64
+        cache = GroupAwareKVCacheManager(
+            config=config, process_group=process_group
+        )
+        yield shape, spec, cache, request.param
+    finally:
+        if cache is not None:
+            cache.close()
+
+        discard_all_aibrix_envs()
+
+
+def put_tokens(cache, tokens):
+    status = cache.allocate_for(None, tokens)
+    assert status.is_ok()
+    put_handle = status.value
+    randomize_cache_handle(put_handle)
+    put_tensors = [t.clone() for t in put_handle.to_tensors()]
+    put_status = cache.put(None, tokens, put_handle)
+    assert put_status.is_ok(), f"{put_status}"
+    return put_tensors
+
+
+@pytest.mark.parametrize(
+    "nhits",
+    [
+        # 11 chunks, i.e., three windows with a partial last one
+        11 * CHUNK_SIZE,
+        # partial hit in the first and the second window
+        CHUNK_SIZE + 32,
+        5 * CHUNK_SIZE + 16,
+        # a miss right at the start of the second window
+        4 * CHUNK_SIZE,
+        0,
+    ],
+)
+def test_pipelined_acquire(group_cache_fixture, nhits):
+    shape, spec, cache, _ = group_cache_fixture
+    assert cache._acquire_pipeline_depth == PIPELINE_DEPTH
+    ntokens = 11 * CHUNK_SIZE
+    tokens = TokenListView([nhits * 100000 + i for i in range(ntokens)])
+    put_tensors = put_tokens(cache, tokens)
+    if nhits < ntokens:
+        del_status = cache.delete(tokens[:nhits], tokens[nhits:])
+        assert del_status.is_ok(), f"{del_status}"
+
+    status = cache.acquire(None, tokens)
+    # prefetches of chunks after the first miss are all cancelled
+    assert len(cache._l2_inflight_prefetches) == 0
+    if nhits == 0:
+        assert status.is_not_found(), f"{status}"
+        return
+    assert status.is_ok(), f"{status}"
+    nfetched, handle = status.value
+    assert nfetched == nhits
+    assert len(handle) * spec.block_ntokens == nfetched
+    for pt, gt in zip(put_tensors, handle.to_tensors()):
+        assert torch.equal(pt, gt)
+    handle.release()
@@ -21,7 +21,9 @@ from aibrix_kvcache.l2.key_builders import (
     FarmHasher,
     HexKeyBuilder,
     RawKeyBuilder,
+    KeyBuilder,
     RollingHashKeyBuilder,
+    RollingHashVecKeyBuilder,
     SimpleHashKeyBuilder,
 )
 
@@ -57,12 +59,14 @@ def cache_chunk_keys(
         HexKeyBuilder(BLOCK_SIZE),
         RawKeyBuilder(BLOCK_SIZE),
         RollingHashKeyBuilder(FarmHasher(), BLOCK_SIZE),
+        RollingHashVecKeyBuilder(BLOCK_SIZE),
         SimpleHashKeyBuilder(FarmHasher(), BLOCK_SIZE),
     ],
     ids=[
         "HexKeyBuilder",
         "RawKeyBuilder",
         "RollingHashKeyBuilder",
+        "RollingHashVecKeyBuilder",
         "SimpleHashKeyBuilder",
     ],
 )
@@ -96,3 +100,64 @@ def test_key_builder(benchmark, key_builder, prompt_length):
 
     # Run benchmark
     benchmark(bench_key_builder, key_builder, all)
+
+
+@pytest.mark.parametrize("block_size", [4, 8, 16, 32, 36, 64])
+def test_rolling_hash_vec_key_builder(block_size):
+    random.seed(123)
+    data = [random.randint(0, 99999999) for _ in range(50 * block_size + 3)]
+
+    expected = RollingHashKeyBuilder(FarmHasher(), block_size)
+    builder = KeyBuilder.create("ROLLING_HASH_VEC", block_size=block_size)
+    assert builder.signature == expected.signature
+
+    all = TokenListView(data)
+    expected_all = TokenListView(data)
+    for start, stop in [(0, len(data)), (0, 7 * block_size), (
+        10 * block_size, 11 * block_size
+    ), (20 * block_size, len(data)), (0, block_size - 1)]:
+        prefix = all[:start] if start > 0 else None
+        query = all[start:stop]
+        expected_prefix = expected_all[:start] if start > 0 else None
+        expected_query = expected_all[start:stop]
+
+        results = builder.build(prefix, query)
+        expected_results = expected.build(expected_prefix, expected_query)
+        assert len(results) == len(expected_results)
+        for (tokens, key), (expected_tokens, expected_key) in zip(
+            results, expected_results
+        ):
+            assert tokens == expected_tokens
+            assert key == expected_key
+
+        keys = builder.build_keys(prefix, query)
+        assert len(keys) == len(expected_results)
+        assert keys.tobytes() == b"".join(k for _, k in expected_results)
+
+
+def bench_build_keys(key_builder, all_tokens: TokenListView):
+    for chunk_prefix, chunk_tokens in cache_chunk_keys(
+        None, all_tokens, CHUNK_SIZE, BLOCK_SIZE
+    ):
+        keys = key_builder.build_keys(chunk_prefix, chunk_tokens)
+        assert len(keys) > 0
+
+
+@pytest.mark.parametrize(
+    "key_builder",
+    [
+        RollingHashKeyBuilder(FarmHasher(), BLOCK_SIZE),
+        RollingHashVecKeyBuilder(BLOCK_SIZE),
+    ],
+    ids=["RollingHashKeyBuilder", "RollingHashVecKeyBuilder"],
+)
+def test_build_keys(benchmark, key_builder, prompt_length):
+    random.seed(123)
+
+    data = [random.randint(0, 99999999) for _ in range(prompt_length)]
+
+    def setup():
+        # a new request without any cached hashes
+        return (key_builder, TokenListView(data)), {}
+
+    benchmark.pedantic(bench_build_keys, setup=setup, rounds=20)
@@ -14,6 +14,7 @@
 
 import copy
 import random
+import threading
 from typing import Sequence
 
 import pytest
@@ -25,6 +26,12 @@ from aibrix_kvcache.l1 import L1Cache
 from aibrix_kvcache.memory import (
     ManagedMemoryRegion, MemoryRegion, TensorPoolAllocator
 )
+from aibrix_kvcache.metrics import L1CacheMetrics
+from aibrix_kvcache.spec import (
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheTensorSpec,
+)
 
 from .conftest import CACHE_DTYPE, release_mrs
 
@@ -137,7 +144,18 @@ def test_put_and_get_unaligned(cache_key_fixture, cache_conf_fixture):
     release_mrs(mrs)
 
 
-@pytest.mark.parametrize("eviction_policy", ["FIFO", "LRU", "S3FIFO"])
+@pytest.mark.parametrize(
+    "eviction_policy",
+    [
+        "FIFO",
+        "LRU",
+        "RADIX_LRU",
+        "S3FIFO",
+        "ARRAY_FIFO",
+        "ARRAY_LRU",
+        "ARRAY_S3FIFO",
+    ],
+)
 def test_put_and_get_with_prefix(
     cache_key_fixture, cache_conf_fixture, eviction_policy
 ):
@@ -219,7 +237,18 @@ def test_put_and_get_with_prefix(
     release_mrs(mrs)
 
 
-@pytest.mark.parametrize("eviction_policy", ["FIFO", "LRU", "S3FIFO"])
+@pytest.mark.parametrize(
+    "eviction_policy",
+    [
+        "FIFO",
+        "LRU",
+        "RADIX_LRU",
+        "S3FIFO",
+        "ARRAY_FIFO",
+        "ARRAY_LRU",
+        "ARRAY_S3FIFO",
+    ],
+)
 def test_duplicated_puts(cache_key_fixture, cache_conf_fixture, eviction_policy):
     shape, spec = cache_conf_fixture
     capacity_nbytes = 128 * spec.block_nbytes
@@ -257,7 +286,18 @@ def test_duplicated_puts(cache_key_fixture, cache_conf_fixture, eviction_policy)
         release_mrs(mrs)
 
 
-@pytest.mark.parametrize("eviction_policy", ["FIFO", "LRU", "S3FIFO"])
+@pytest.mark.parametrize(
+    "eviction_policy",
+    [
+        "FIFO",
+        "LRU",
+        "RADIX_LRU",
+        "S3FIFO",
+        "ARRAY_FIFO",
+        "ARRAY_LRU",
+        "ARRAY_S3FIFO",
+    ],
+)
 def test_cache_eviction(cache_key_fixture, cache_conf_fixture, eviction_policy):
     shape, spec = cache_conf_fixture
     capacity_nbytes = 128 * spec.block_nbytes
@@ -304,7 +344,18 @@ def test_cache_eviction(cache_key_fixture, cache_conf_fixture, eviction_policy):
     assert len(cache) == cap
 
 
-@pytest.mark.parametrize("eviction_policy", ["FIFO", "LRU", "S3FIFO"])
+@pytest.mark.parametrize(
+    "eviction_policy",
+    [
+        "FIFO",
+        "LRU",
+        "RADIX_LRU",
+        "S3FIFO",
+        "ARRAY_FIFO",
+        "ARRAY_LRU",
+        "ARRAY_S3FIFO",
+    ],
+)
 def test_stress_cache(cache_key_fixture, cache_conf_fixture, eviction_policy):
     shape, spec = cache_conf_fixture
     capacity_nbytes = 4096 * spec.block_nbytes
@@ -413,3 +464,183 @@ def test_stress_cache(cache_key_fixture, cache_conf_fixture, eviction_policy):
 
     num_oks = sum(results)
     assert num_oks > 250
+
+
+@pytest.mark.parametrize("eviction_policy", ["LRU", "RADIX_LRU"])
+def test_reachable_usage(cache_key_fixture, cache_conf_fixture, eviction_policy):
+    shape, spec = cache_conf_fixture
+    capacity_nbytes = 16 * spec.block_nbytes
+    metrics = L1CacheMetrics(
+        cache_type="L1Cache",
+        block_ntokens=spec.block_ntokens,
+        capacity_nbytes=capacity_nbytes,
+    )
+    cache = L1Cache(
+        eviction_policy=eviction_policy,
+        capacity_nbytes=capacity_nbytes,
+        allocator=TensorPoolAllocator.create(capacity_nbytes=capacity_nbytes),
+        block_spec=spec,
+        metrics=metrics,
+    )
+
+    tokens = cache_key_fixture(list(range(64)), spec.block_ntokens)
+    shape[spec.block_shape_token_dim] = 32
+    kv_tensors = torch.randn(*shape, dtype=CACHE_DTYPE)
+    assert cache.put(None, tokens[:32], kv_tensors).value == 2
+    # the prefix of these blocks is not cached
+    prefix = cache_key_fixture(list(range(100, 132)), spec.block_ntokens)
+    assert cache.put(prefix, tokens[32:], kv_tensors).value == 2
+
+    release_mrs(cache.allocate([spec.block_nbytes]).value)
+    resident = metrics.eviction_policy_usage_metrics.used_nbytes
+    assert resident == len(cache)
+    if eviction_policy == "RADIX_LRU":
+        assert metrics.reachable_usage_metrics.used_nbytes == resident // 2
+        assert metrics.reachable_ratio == 0.5
+        assert "L1_REACHABLE" in metrics.summary()
+    else:
+        assert metrics.reachable_usage_metrics is None
+        assert metrics.reachable_ratio == 1.0
+
+
+@pytest.fixture(params=[4 * 1024, 16 * 1024, 64 * 1024, 128 * 1024])
+def seq_len(request):
+    return request.param
+
+
+def test_acquire_latency(benchmark, seq_len):
+    if not MemoryRegion.use_compact_layout():
+        pytest.skip("tokens are packed into MRs without compact layout")
+
+    # use a tiny block to focus on the cost of cache keys
+    spec = KVCacheBlockSpec(
+        block_ntokens=16,
+        block_dtype=CACHE_DTYPE,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(heads=[0], layers=[0], head_size=8),
+    )
+    nblocks = seq_len // spec.block_ntokens
+    capacity_nbytes = nblocks * spec.block_nbytes
+    cache = L1Cache(
+        eviction_policy="LRU",
+        capacity_nbytes=capacity_nbytes,
+        allocator=TensorPoolAllocator.create(capacity_nbytes=capacity_nbytes),
+        block_spec=spec,
+    )
+
+    random.seed(123)
+    data = [random.randint(0, 99999999) for _ in range(seq_len)]
+    shape = list(spec.block_shape)
+    shape[spec.block_shape_token_dim] = seq_len
+    put_status = cache.put(
+        None, TokenListView(data), torch.randn(*shape, dtype=CACHE_DTYPE)
+    )
+    assert put_status.is_ok()
+    assert put_status.value == nblocks
+
+    def setup():
+        # a new request with the same tokens
+        return (TokenListView(data),), {}
+
+    def acquire(tokens):
+        status = cache.acquire(None, tokens)
+        assert status.is_ok()
+        assert len(status.value) == nblocks
+        release_mrs(status.value)
+
+    benchmark.pedantic(acquire, setup=setup, rounds=5)
+
+
+@pytest.mark.parametrize("eviction_policy", ["LRU", "S3FIFO", "ARRAY_LRU"])
+def test_sharded_put_and_get(
+    cache_key_fixture, cache_conf_fixture, eviction_policy
+):
+    shape, spec = cache_conf_fixture
+    capacity_nbytes = 128 * spec.block_nbytes + 3
+
+    cache = L1Cache(
+        eviction_policy=eviction_policy,
+        capacity_nbytes=capacity_nbytes,
+        allocator=TensorPoolAllocator.create(capacity_nbytes=capacity_nbytes),
+        block_spec=spec,
+        multi_threaded=True,
+        num_shards=4,
+    )
+    assert "shards=4" in str(cache)
+    assert (
+        sum(policy.capacity_nbytes for policy in cache._eviction_policies)
+        == capacity_nbytes
+    )
+
+    tokens = cache_key_fixture(list(range(128)), spec.block_ntokens)
+    shape[spec.block_shape_token_dim] = len(tokens)
+    kv_tensors = torch.randn(*shape, dtype=CACHE_DTYPE)
+    assert cache.put(None, tokens, kv_tensors).value == 8
+    # blocks of a sequence are spread over the shards
+    assert sum(len(policy) > 0 for policy in cache._eviction_policies) > 1
+
+    get_status = cache.acquire(None, tokens)
+    assert get_status.is_ok()
+    mrs = get_status.value
+    assert len(mrs) == 8
+    check_tokens(mrs, None, tokens, spec.block_ntokens)
+    tensors = [mr.to_tensor(spec.block_dtype, spec.block_shape) for mr in mrs]
+    assert torch.equal(
+        torch.cat(tensors, dim=spec.block_shape_token_dim), kv_tensors
+    )
+    release_mrs(mrs)
+    assert cache.exists(None, tokens).value == 8
+
+    assert cache.delete(tokens[:64], tokens[64:]).is_ok()
+    assert cache.exists(None, tokens).value == 4
+    assert cache.delete(None, tokens).is_ok()
+    assert cache.exists(None, tokens).is_not_found()
+    assert len(cache) == 0
+
+
+def test_sharded_multi_threaded(cache_key_fixture, cache_conf_fixture):
+    shape, spec = cache_conf_fixture
+    capacity_nbytes = 64 * spec.block_nbytes
+    num_threads = 8
+
+    cache = L1Cache(
+        eviction_policy="S3FIFO",
+        capacity_nbytes=capacity_nbytes,
+        allocator=TensorPoolAllocator.create(capacity_nbytes=capacity_nbytes),
+        block_spec=spec,
+        multi_threaded=True,
+        num_shards=4,
+    )
+
+    shape[spec.block_shape_token_dim] = 64
+    errors = []
+
+    def worker(tid: int):
+        try:
+            for i in range(20):
+                start = (tid * 20 + i % 10) * 64
+                tokens = cache_key_fixture(
+                    list(range(start, start + 64)), spec.block_ntokens
+                )
+                kv_tensors = torch.randn(*shape, dtype=CACHE_DTYPE)
+                cache.put(None, tokens, kv_tensors)
+                status = cache.acquire(None, tokens)
+                if status.is_ok():
+                    check_tokens(status.value, None, tokens, spec.block_ntokens)
+                    release_mrs(status.value)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=worker, args=(tid,))
+        for tid in range(num_threads)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert 0 < len(cache) <= capacity_nbytes
+    for policy in cache._eviction_policies:
+        policy.assert_consistency()
@@ -27,7 +27,11 @@ from aibrix_kvcache.memory import (
     ManagedMemoryRegion, MemoryRegion, TensorPoolAllocator
 )
 
+from aibrix_kvcache.metrics import L2CacheMetrics
+from aibrix_kvcache.spec import KVCacheBlockLayout
+
 from .conftest import (
+    get_cache_conf,
     randomize_mrs,
     release_mrs,
 )
@@ -105,13 +109,18 @@ def build_put_mrs(
     ]
 
 
-@pytest.fixture(params=[True, False])
+@pytest.fixture(
+    params=[(True, ""), (False, ""), (True, "ZSTD"), (False, "ZSTD")],
+    ids=["mputmget", "putget", "mputmget_zstd", "putget_zstd"],
+)
 def l2cache_fixture(cache_conf_fixture, request, mocker):
     shape, spec = cache_conf_fixture
-    mputmget_enabled = request.param
+    mputmget_enabled, compression = request.param
 
     if mputmget_enabled:
         os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_MPUT_MGET"] = "1"
+    if compression:
+        os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION"] = "1"
 
     cache = None
     try:
@@ -124,6 +133,7 @@ def l2cache_fixture(cache_conf_fixture, request, mocker):
             key_builder=KeyBuilder.create(
                 "ROLLING_HASH", block_size=spec.block_ntokens
             ),
+            compression=compression,
         )
         if mputmget_enabled:
             put_func = mocker.spy(cache, "put")
@@ -137,6 +147,7 @@ def l2cache_fixture(cache_conf_fixture, request, mocker):
             assert mput_func.call_count == put_func.call_count
             assert mget_func.call_count == get_func.call_count
     finally:
+        os.environ.pop("AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION", None)
         if cache is not None:
             cache.close()
             del cache
@@ -464,3 +475,99 @@ async def test_stress_cache(cache_key_fixture, l2cache_fixture):
 
     num_oks = sum(results)
     assert num_oks > 50
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "strategy,verify",
+    [("LINEAR", False), ("BINARY", False), ("BINARY", True)],
+)
+@pytest.mark.parametrize("num_cached", [0, 1, 37, 63, 64])
+async def test_exists_strategy(mocker, strategy, verify, num_cached):
+    _, spec = get_cache_conf(KVCacheBlockLayout.NCLD)
+    l2cache = L2Cache(
+        backend_name="MOCK",
+        placement_policy="SIMPLE",
+        namespace="test",
+        block_spec=spec,
+        executor=ThreadPoolExecutor(max_workers=2),
+        key_builder=KeyBuilder.create(
+            "ROLLING_HASH", block_size=spec.block_ntokens
+        ),
+        op_batch=8,
+        exists_strategy=strategy,
+        exists_verify=verify,
+    )
+    assert l2cache.open().is_ok()
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=128 * spec.block_nbytes
+    )
+
+    num_blocks = 64
+    tokens = TokenListView(list(range(num_blocks * spec.block_ntokens)))
+    put_mrs = build_put_mrs(
+        allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+    )
+    assert (await l2cache.put(None, tokens, put_mrs)).value == num_blocks
+    keys = [key for _, key in l2cache._cache_block_keys(None, tokens)]
+    for key in keys[num_cached:]:
+        assert (await l2cache._backend.delete(key)).is_ok()
+
+    exists_func = mocker.spy(l2cache._backend, "exists")
+    status = await l2cache.exists(None, tokens)
+    if num_cached == 0:
+        assert status.is_not_found()
+    else:
+        assert status.is_ok()
+        assert status.value == num_cached
+    if strategy == "BINARY" and not verify:
+        # at most log_8(64) + 1 rounds of 8 probes
+        assert exists_func.call_count <= 3 * 8
+        if num_cached == num_blocks:
+            assert exists_func.call_count == 8
+
+    if verify and num_cached > 1:
+        # a hole left by an eviction is detected by the verification
+        assert (await l2cache._backend.delete(keys[0])).is_ok()
+        assert (await l2cache.exists(None, tokens)).is_not_found()
+    l2cache.close()
+    release_mrs(put_mrs)
+
+
+@pytest.mark.asyncio
+async def test_negative_filter(mocker):
+    _, spec = get_cache_conf(KVCacheBlockLayout.NCLD)
+    metrics = L2CacheMetrics(cache_type="L2Cache", block_ntokens=16)
+    l2cache = L2Cache(
+        backend_name="MOCK",
+        placement_policy="SIMPLE",
+        namespace="test",
+        block_spec=spec,
+        executor=ThreadPoolExecutor(max_workers=2),
+        key_builder=KeyBuilder.create(
+            "ROLLING_HASH", block_size=spec.block_ntokens
+        ),
+        metrics=metrics,
+        filter_capacity=1024,
+    )
+    assert l2cache.open().is_ok()
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=128 * spec.block_nbytes
+    )
+
+    tokens = TokenListView(list(range(32)))
+    put_mrs = build_put_mrs(
+        allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+    )
+    assert (await l2cache.put(None, tokens, put_mrs)).value == 2
+    assert (await l2cache.exists(None, tokens)).value == 2
+
+    # a cold prompt is answered without any backend call
+    exists_func = mocker.spy(l2cache._backend.conn, "exists")
+    cold_tokens = TokenListView(list(range(100, 132)))
+    assert (await l2cache.exists(None, cold_tokens)).is_not_found()
+    assert exists_func.call_count == 0
+    # both blocks of the batch are answered by the filter
+    assert metrics.filter_metrics.total_negatives == 2
+    l2cache.close()
+    release_mrs(put_mrs)
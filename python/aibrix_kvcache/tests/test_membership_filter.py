@@ -0,0 +1,212 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import copy
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aibrix_kvcache.l2.connectors import ConnectorConfig, ConnectorFeature
+from aibrix_kvcache.l2.connectors.mock import MockConfig, MockConnector
+from aibrix_kvcache.l2.membership_filter import (
+    CountingBloomFilter,
+    FilteredConnector,
+)
+from aibrix_kvcache.l2.placement import Placement, PlacementConfig
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.metrics import L2CacheMetrics
+
+from .conftest import randomize_mrs, release_mrs
+
+BLOCK_NBYTES = 4096
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_counting_bloom_filter():
+    bloom = CountingBloomFilter(capacity=1000, fp_rate=0.01)
+    keys = [f"key_{i}".encode() for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert len(bloom) == 1000
+    assert all(bloom.may_contain(key) for key in keys)
+
+    others = [f"other_{i}".encode() for i in range(10000)]
+    fp_rate = sum(bloom.may_contain(key) for key in others) / len(others)
+    assert fp_rate < 2 * bloom.fp_rate
+    assert bloom.expected_fp_rate == pytest.approx(0.01, rel=0.2)
+
+    # removing a key keeps the others
+    assert bloom.remove(keys[0])
+    assert not bloom.may_contain(keys[0])
+    assert all(bloom.may_contain(key) for key in keys[1:])
+    assert not bloom.remove(keys[0])
+
+    bloom.clear()
+    assert len(bloom) == 0
+    assert not any(bloom.may_contain(key) for key in keys)
+
+
+def test_saturated_counters():
+    bloom = CountingBloomFilter(capacity=1, fp_rate=0.5)
+    assert bloom.num_counters == 64
+    key = b"key"
+    for _ in range(CountingBloomFilter.MAX_COUNT + 1):
+        bloom.add(key)
+    # keys on saturated counters are never removed
+    for _ in range(CountingBloomFilter.MAX_COUNT + 1):
+        assert bloom.remove(key)
+    assert bloom.may_contain(key)
+
+
+def test_removal_during_rebuild(executor):
+    backend = MockConnector(MockConfig(), executor)
+    # a small filter, so that the keys share counters
+    conn = FilteredConnector(backend, capacity=16, fp_rate=0.5)
+    assert conn.open().is_ok()
+    allocator = TensorPoolAllocator.create(capacity_nbytes=2 * BLOCK_NBYTES)
+    status = allocator.alloc([BLOCK_NBYTES])
+    assert status.is_ok()
+    mrs = status.get()
+    keys = [f"key_{i}".encode() for i in range(64)]
+
+    async def run():
+        for key in keys:
+            assert (await conn.put(key, mrs[0])).is_ok()
+
+    asyncio.run(run())
+
+    def scan_keys():
+        yield from keys[1:]
+        # keys[0] is deleted before the scan reaches it
+        assert asyncio.run(conn.delete(keys[0])).is_ok()
+
+    backend.scan_keys = scan_keys
+    assert conn.rebuild().is_ok()
+    # the removal is not applied to the filter that never had the key
+    assert all(conn._may_contain(keys[1:]))
+    conn.close()
+    release_mrs(mrs)
+
+
+def test_backend_without_scan_keys(executor, mocker):
+    backend = MockConnector(MockConfig(), executor)
+    mocker.patch.object(
+        MockConnector,
+        "feature",
+        new_callable=mocker.PropertyMock,
+        return_value=ConnectorFeature(),
+    )
+    conn = FilteredConnector(backend, capacity=1000)
+    assert conn.open().is_invalid()
+
+
+def test_filtered_connector(executor, mocker):
+    backend = MockConnector(MockConfig(use_mput_mget=True), executor)
+    conn = FilteredConnector(backend, capacity=1000)
+    metrics = L2CacheMetrics(cache_type="L2Cache", block_ntokens=16)
+    conn.set_metrics(metrics)
+    assert conn.open().is_ok()
+    allocator = TensorPoolAllocator.create(capacity_nbytes=8 * BLOCK_NBYTES)
+    status = allocator.alloc([BLOCK_NBYTES] * 4)
+    assert status.is_ok()
+    mrs = status.get()
+    randomize_mrs(mrs)
+    keys = [f"key_{i}".encode() for i in range(4)]
+    exists_func = mocker.spy(backend, "exists")
+    mget_func = mocker.spy(backend, "mget")
+
+    async def run():
+        assert (await conn.put(keys[0], mrs[0])).is_ok()
+        statuses = await conn.mput(keys[1:2], mrs[1:2])
+        assert statuses[0].is_ok()
+
+        # definite misses do not reach the backend
+        assert (await conn.exists(keys[2])).is_not_found()
+        assert exists_func.call_count == 0
+        assert (await conn.exists(keys[0])).is_ok()
+        assert exists_func.call_count == 1
+
+        statuses = await conn.mget(keys, mrs)
+        assert [s.is_ok() for s in statuses] == [True, True, False, False]
+        assert mget_func.call_args.args[0] == keys[:2]
+
+        # keys put by other writers are picked up by rebuilds
+        assert (await backend.put(keys[3], mrs[3])).is_ok()
+        assert (await conn.get(keys[3], mrs[3])).is_not_found()
+        assert conn.rebuild().is_ok()
+        assert (await conn.get(keys[3], mrs[3])).is_ok()
+
+        # keys removed by other writers are false positives
+        assert (await backend.delete(keys[3])).is_ok()
+        assert (await conn.exists(keys[3])).is_not_found()
+
+        assert (await conn.delete(keys[0])).is_ok()
+        assert (await conn.exists(keys[0])).is_not_found()
+
+    asyncio.run(run())
+    filter_metrics = metrics.filter_metrics
+    assert filter_metrics.total_lookups == 10
+    assert filter_metrics.total_negatives == 5
+    assert filter_metrics.total_false_positives == 1
+    assert "False positive rate" in metrics.summary()
+    conn.close()
+    release_mrs(mrs)
+
+
+def test_rebuild_on_topology_change():
+    placement = Placement.create(
+        PlacementConfig(
+            placement_policy="SIMPLE",
+            conn_config=ConnectorConfig(
+                backend_name="MOCK",
+                namespace="test_namespace",
+                partition_id="test_partition",
+                executor=None,
+            ),
+        )
+    )
+    conn = FilteredConnector(placement, capacity=1000)
+    assert conn.valid
+
+    cluster = {
+        "nodes": [
+            {
+                "addr": "10.0.0.1",
+                "port": 8000,
+                "slots": [{"start": 0, "end": 9}],
+            }
+        ]
+    }
+    assert placement.construct_cluster(json.dumps(cluster)).is_ok()
+    # lookups go to the backend until the filter is rebuilt
+    assert not conn.valid
+
+    member = placement.members[0]
+    member.conn.store[b"key"] = b"value"
+    assert conn.rebuild().is_ok()
+    assert conn.valid
+    assert conn._may_contain([b"key", b"other"]) == [True, False]
+
+    cluster = copy.deepcopy(cluster)
+    cluster["nodes"][0]["slots"] = [{"start": 0, "end": 19}]
+    assert placement.construct_cluster(json.dumps(cluster)).is_ok()
+    assert not conn.valid
@@ -13,8 +13,13 @@
 # limitations under the License.
 
 
+import aibrix_kvcache
 from aibrix_kvcache import TokenListView
-from aibrix_kvcache.memory import ManagedMemoryRegion, TensorPoolAllocator
+from aibrix_kvcache.memory import (
+    ManagedMemoryRegion,
+    PrefixDigest,
+    TensorPoolAllocator,
+)
 
 from .conftest import randomize_mrs
 
@@ -96,3 +101,78 @@ def test_pack_unpack_max(compact_layout_enabled):
     assert tokens_from_mr == orig_tokens
     # check if data is preserved
     assert mr.to_tensor().equal(orig_tensor)
+
+
+def test_pack_unpack_digest_layout(monkeypatch):
+    mr_module = aibrix_kvcache.memory.memory_region
+    monkeypatch.setattr(mr_module, "MR_USE_COMPACT_LAYOUT", False)
+    monkeypatch.setattr(mr_module, "MR_USE_DIGEST_LAYOUT", True)
+
+    block_nbytes = 16
+    prefix_ntokens = 4096
+    query_ntokens = 16
+    # only query tokens are packed, prefix tokens are replaced by a digest
+    expected_mr_nbytes = 112
+    assert (
+        ManagedMemoryRegion.calculate_size(
+            block_nbytes=block_nbytes,
+            ntokens=prefix_ntokens + query_ntokens,
+            query_ntokens=query_ntokens,
+        )
+        == expected_mr_nbytes
+    )
+
+    allocator = TensorPoolAllocator.create(capacity_nbytes=1024)
+    status = allocator.alloc(expected_mr_nbytes)
+    assert status.is_ok()
+    mr, copy = status.get()[0], None
+    mr.block_nbytes = block_nbytes
+    randomize_mrs([mr])
+    assert mr.unpack_tokens()[0] is None
+    assert mr.unpack_tokens()[1] is None
+    orig_tensor = mr.to_tensor().clone()
+
+    def copy_mr():
+        # simulate fetching the MR from L2
+        nonlocal copy
+        if copy is not None:
+            copy.ref_down()
+        status = allocator.alloc(expected_mr_nbytes)
+        assert status.is_ok()
+        copy = status.get()[0]
+        copy.block_nbytes = block_nbytes
+        copy.slab[copy.addr : copy.addr + copy.length].copy_(
+            mr.slab[mr.addr : mr.addr + mr.length]
+        )
+        return copy
+
+    all = TokenListView(tuple(range(prefix_ntokens + query_ntokens)))
+    orig_prefix = all[:prefix_ntokens]
+    orig_tokens = all[prefix_ntokens:]
+    mr.pack_tokens(prefix=orig_prefix, query=orig_tokens)
+    mr.seal()
+    prefix_from_mr, tokens_from_mr = copy_mr().unpack_tokens()
+    assert isinstance(prefix_from_mr, PrefixDigest)
+    assert len(prefix_from_mr) == prefix_ntokens
+    assert tokens_from_mr == orig_tokens
+    assert copy.to_tensor().equal(orig_tensor)
+
+    # digest matches an identical prefix backed by different data
+    same = TokenListView(tuple(range(prefix_ntokens)))
+    assert prefix_from_mr.matches(same)
+    diff = list(range(prefix_ntokens))
+    diff[1024] = -1
+    assert not prefix_from_mr.matches(TokenListView(tuple(diff)))
+    assert not prefix_from_mr.matches(same[:-1])
+    assert not prefix_from_mr.matches(None)
+
+    # without prefix
+    mr.pack_tokens(query=orig_tokens)
+    mr.seal()
+    prefix_from_mr, tokens_from_mr = copy_mr().unpack_tokens()
+    assert prefix_from_mr is None
+    assert tokens_from_mr == orig_tokens
+
+    # MRs packed with the digest layout are not recognized by the full layout
+    monkeypatch.setattr(mr_module, "MR_USE_DIGEST_LAYOUT", False)
+    assert copy_mr().unpack_tokens() == (None, None)
@@ -0,0 +1,197 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+import torch
+
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    BlockHashes,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+    Status,
+    StatusCodes,
+    TokenListView,
+    cache_manager,
+)
+from aibrix_kvcache.metrics import MetricRecorder
+from aibrix_kvcache.op_recorder import (
+    OpRecorder,
+    block_key_hashes,
+    load_op_records,
+)
+
+from .conftest import discard_all_aibrix_envs
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+
+OP = MetricRecorder.OP
+
+
+def test_block_digests():
+    tokens = TokenListView([random.randint(0, 10000) for _ in range(200)])
+    for block_ntokens, start in [(16, 0), (32, 64), (8, 0), (24, 16)]:
+        expected = [
+            tokens[:end].digest()
+            for end in range(start + block_ntokens, 201, block_ntokens)
+        ]
+        assert tokens.block_digests(block_ntokens, start) == expected
+
+
+def test_block_key_hashes():
+    data = [random.randint(0, 10000) for _ in range(128)]
+    tokens = TokenListView(data)
+    hashes = block_key_hashes(None, tokens, 16)
+    assert hashes.dtype == np.uint64
+    assert len(hashes) == 8
+    assert len(set(hashes.tolist())) == 8
+
+    # keys cover the prefix, regardless of where the query starts
+    assert (block_key_hashes(tokens[:64], tokens[64:], 16) == hashes[4:]).all()
+    # and they are stable across views of different data
+    other = TokenListView(list(data) + [1, 2, 3])
+    assert (block_key_hashes(None, other, 16) == hashes).all()
+    # partial blocks have no key
+    assert len(block_key_hashes(None, tokens[:15], 16)) == 0
+
+    block_hashes = BlockHashes([f"h{i}" for i in range(8)], 4)
+    assert len(block_key_hashes(None, block_hashes, 16)) == 2
+    assert (
+        block_key_hashes(None, block_hashes, 4)
+        == block_key_hashes(None, BlockHashes(list(block_hashes), 4), 4)
+    ).all()
+
+
+def test_record_and_load(tmp_path):
+    recorder = OpRecorder(
+        str(tmp_path),
+        block_ntokens=16,
+        block_nbytes=1024,
+        chunk_nrecords=4,
+        max_chunks=2,
+    )
+    tokens = TokenListView(list(range(160)))
+    for i in range(10):
+        status = (
+            Status.ok(16 * i) if i % 2 == 0 else Status(StatusCodes.NOT_FOUND)
+        )
+        recorder.record(OP.GET, None, tokens[: 16 * (i + 1)], status, 0.5)
+    recorder.close()
+
+    # chunks of [0, 4), [4, 8) and [8, 10), the first one has been dropped
+    assert sorted(os.listdir(recorder.dir)) == [
+        "chunk-00000001.npz",
+        "chunk-00000002.npz",
+        "meta.json",
+    ]
+    meta, records, keys = load_op_records(recorder.dir)
+    assert meta["block_ntokens"] == 16
+    assert meta["block_nbytes"] == 1024
+    assert len(records) == 6
+
+    all_keys = block_key_hashes(None, tokens, 16)
+    for i, record in zip(range(4, 10), records):
+        assert record["op"] == OP.GET.value
+        assert record["query_ntokens"] == 16 * (i + 1)
+        assert record["hit_ntokens"] == (16 * i if i % 2 == 0 else 0)
+        code = StatusCodes.OK if i % 2 == 0 else StatusCodes.NOT_FOUND
+        assert record["status"] == code.value
+        assert abs(record["lat_us"] - 500) < 1e-3
+        offset, nkeys = int(record["key_offset"]), int(record["nkeys"])
+        assert nkeys == i + 1
+        assert (keys[offset : offset + nkeys] == all_keys[:nkeys]).all()
+
+    # closed recorders drop records
+    recorder.record(OP.GET, None, tokens, Status.ok(0), 0.5)
+    assert len(load_op_records(recorder.dir)[1]) == 6
+
+
+def test_load_version_mismatch(tmp_path):
+    recorder = OpRecorder(str(tmp_path), block_ntokens=16, block_nbytes=1024)
+    recorder.close()
+    meta_path = os.path.join(recorder.dir, "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["version"] = 1
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        load_op_records(recorder.dir)
+
+
+@pytest.mark.parametrize("time_measurement", [True, False])
+def test_cache_manager_records_ops(tmp_path, time_measurement):
+    discard_all_aibrix_envs()
+    os.environ["AIBRIX_KV_CACHE_OL_TIME_MEASUREMENT_ENABLED"] = str(
+        int(time_measurement)
+    )
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED"] = "1"
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB"] = "0.01"
+    os.environ["AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND"] = ""
+    os.environ["AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE"] = "cpu"
+    os.environ["AIBRIX_KV_CACHE_OL_OP_RECORDER_DIR"] = str(tmp_path)
+
+    spec = KVCacheBlockSpec(
+        block_ntokens=16,
+        block_dtype=torch.bfloat16,
+        block_layout=KVCacheBlockLayout.NCLD,
+        tensor_spec=KVCacheTensorSpec(
+            heads=[0, 1], layers=list(range(4)), head_size=64
+        ),
+    )
+    cache = BaseKVCacheManager(
+        config=KVCacheConfig(block_spec=spec, model_spec=ModelSpec(1024))
+    )
+    try:
+        tokens = TokenListView([random.randint(0, 10000) for _ in range(136)])
+        handle = cache.allocate_for(None, tokens[:64]).get()
+        assert cache.put(None, tokens[:64], handle).get() == 64
+        status = cache.acquire(None, tokens)
+        assert status.get()[0] == 64
+        status.get()[1].release()
+        assert cache.exists(tokens[:64], tokens[64:]).is_not_found()
+    finally:
+        cache.close()
+        discard_all_aibrix_envs()
+
+    [path] = os.listdir(tmp_path)
+    meta, records, keys = load_op_records(os.path.join(tmp_path, path))
+    assert meta["time_measurement_enabled"] == time_measurement
+    assert records["op"].tolist() == [
+        OP.PUT.value,
+        OP.ACQUIRE.value,
+        OP.EXISTS.value,
+    ]
+    assert records["prefix_ntokens"].tolist() == [0, 0, 64]
+    assert records["query_ntokens"].tolist() == [64, 136, 72]
+    assert records["hit_ntokens"].tolist() == [0, 64, 0]
+    assert records["put_ntokens"].tolist() == [64, 0, 0]
+    # the recorder does not turn on time measurement
+    if time_measurement:
+        assert (records["lat_us"] > 0).all()
+    else:
+        assert (records["lat_us"] == 0).all()
+    assert records["nkeys"].tolist() == [4, 8, 4]
+    # the exists() covers the blocks after the put() of the acquire()
+    put_keys, acquire_keys, exists_keys = np.split(keys, [4, 12])
+    assert (acquire_keys[:4] == put_keys).all()
+    assert (acquire_keys[4:] == exists_keys).all()
@@ -12,13 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import copy
 import json
 import time
 
 import pytest
+import torch
 
 from aibrix_kvcache.l2.connectors import ConnectorConfig
+from aibrix_kvcache.memory import TensorPoolAllocator
 from aibrix_kvcache.l2.placement import Placement, PlacementConfig
 from aibrix_kvcache.meta_service import MetaServiceConfig, RedisMetaService
 
@@ -148,6 +151,178 @@ def test_select(simple_cluster_data):
         assert member.meta["addr"] == expected_addr
 
 
+def _make_cluster_data(num_nodes):
+    return {
+        "nodes": [
+            {
+                "addr": f"10.0.0.{i}",
+                "port": 8000,
+                "slots": [{"start": i, "end": i}],
+            }
+            for i in range(num_nodes)
+        ]
+    }
+
+
+@pytest.mark.parametrize("num_nodes", [4, 8, 16])
+@pytest.mark.parametrize("op", ["add", "remove"])
+def test_consistent_hash_remap_fraction(num_nodes, op):
+    config = copy.deepcopy(PLACEMENT_CONFIG)
+    config.placement_policy = "CONSISTENT_HASH"
+    placement = Placement.create(config=config)
+    status = placement.construct_cluster(
+        json.dumps(_make_cluster_data(num_nodes))
+    )
+    assert status.is_ok()
+
+    keys = [f"key{i}".encode() for i in range(20000)]
+    before = [placement.select(key).get() for key in keys]
+
+    new_num_nodes = num_nodes + 1 if op == "add" else num_nodes - 1
+    status = placement.construct_cluster(
+        json.dumps(_make_cluster_data(new_num_nodes))
+    )
+    assert status.is_ok()
+    after = [placement.select(key).get() for key in keys]
+
+    remap_fraction = sum(a != b for a, b in zip(before, after)) / len(keys)
+    # ideally 1 / max(num_nodes, new_num_nodes)
+    ideal = 1 / max(num_nodes, new_num_nodes)
+    assert remap_fraction <= 1.5 * ideal
+    assert remap_fraction == pytest.approx(
+        placement.last_moved_fraction, abs=0.02
+    )
+    # only keys of the added or removed member move
+    changed = {"10.0.0." + str(min(num_nodes, new_num_nodes))}
+    for a, b in zip(before, after):
+        if a != b:
+            assert a.meta["addr"] in changed or b.meta["addr"] in changed
+
+
+def _create_replicated_placement(num_nodes, replication_factor):
+    config = copy.deepcopy(PLACEMENT_CONFIG)
+    config.replication_factor = replication_factor
+    placement = Placement.create(config=config)
+    status = placement.construct_cluster(
+        json.dumps(_make_cluster_data(num_nodes))
+    )
+    assert status.is_ok()
+    return placement
+
+
+def _alloc_mr(allocator, data=None):
+    status = allocator.alloc(128)
+    assert status.is_ok()
+    mr = status.get()[0]
+    if data is not None:
+        mr.fill(data)
+    return mr
+
+
+def _delay(conn, delay_s):
+    orig_get = conn._get
+
+    def slow_get(*args, **kwargs):
+        time.sleep(delay_s)
+        return orig_get(*args, **kwargs)
+
+    conn._get = slow_get
+
+
+@pytest.mark.asyncio
+async def test_replicated_put_get():
+    placement = _create_replicated_placement(3, 2)
+    allocator = TensorPoolAllocator.create(capacity_nbytes=1024 * 128)
+    data = torch.randint(0, 255, (128,), dtype=torch.uint8).numpy().tobytes()
+    put_mr = _alloc_mr(allocator, data)
+
+    key = b"key"
+    assert (await placement.put(key, put_mr)).is_ok()
+    replicas = placement.select_replicas(key, 2).get()
+    assert len(set(replicas)) == 2
+    for member in placement.members:
+        assert (key in member.conn.store) == (member in replicas)
+
+    assert (await placement.exists(key)).is_ok()
+    get_mr = _alloc_mr(allocator)
+    assert (await placement.get(key, get_mr)).is_ok()
+    assert get_mr.tobytes() == data
+
+    # fails over to the other replica if one replica lost the key
+    replicas[0].conn.store.pop(key)
+    get_mr = _alloc_mr(allocator)
+    assert (await placement.get(key, get_mr)).is_ok()
+    assert get_mr.tobytes() == data
+
+    assert (await placement.delete(key)).is_ok()
+    assert (await placement.exists(key)).is_not_found()
+    assert (await placement.get(key, get_mr)).is_not_found()
+
+
+@pytest.mark.asyncio
+async def test_hedged_get():
+    placement = _create_replicated_placement(3, 2)
+    allocator = TensorPoolAllocator.create(capacity_nbytes=1024 * 128)
+    data = torch.randint(0, 255, (128,), dtype=torch.uint8).numpy().tobytes()
+    put_mr = _alloc_mr(allocator, data)
+    key = b"key"
+    assert (await placement.put(key, put_mr)).is_ok()
+
+    # warm up latency stats
+    get_mr = _alloc_mr(allocator)
+    for _ in range(placement.HEDGE_UPDATE_INTERVAL):
+        assert (await placement.get(key, get_mr)).is_ok()
+    assert placement._hedge_delay_s is not None
+    assert placement.num_hedged_gets == 0
+
+    # stall the replica that gets are routed to
+    replicas = placement.select_replicas(key, 2).get()
+    slow = placement._sort_by_latency(replicas)[0]
+    delay_s = 1.0
+    _delay(slow.conn, delay_s)
+
+    get_mr = _alloc_mr(allocator)
+    start = time.perf_counter()
+    assert (await placement.get(key, get_mr)).is_ok()
+    # the get returns after the loser stopped writing into the MR
+    assert time.perf_counter() - start >= delay_s
+    assert get_mr.tobytes() == data
+    assert placement.num_hedged_gets == 1
+    assert get_mr.ref_count == 1
+    # subsequent gets are served by the fast replica
+    assert placement._sort_by_latency(replicas)[0] != slow
+
+
+@pytest.mark.asyncio
+async def test_replicated_exists():
+    placement = _create_replicated_placement(3, 3)
+    allocator = TensorPoolAllocator.create(capacity_nbytes=1024 * 128)
+    put_mr = _alloc_mr(allocator, b"x" * 128)
+    key = b"key"
+    assert (await placement.put(key, put_mr)).is_ok()
+
+    delay_s = 0.5
+    for member in placement.members:
+        orig_exists = member.conn._exists
+
+        def slow_exists(*args, orig_exists=orig_exists, **kwargs):
+            time.sleep(delay_s)
+            return orig_exists(*args, **kwargs)
+
+        member.conn._exists = slow_exists
+
+    # replicas are checked concurrently
+    start = time.perf_counter()
+    assert (await placement.exists(b"missing")).is_not_found()
+    assert time.perf_counter() - start < 2 * delay_s
+
+    # and the first hit wins
+    placement.members[0].conn.store.pop(key)
+    assert (await placement.exists(key)).is_ok()
+    while len(placement._stragglers) > 0:
+        await asyncio.sleep(0.1)
+
+
 def test_background_refresh(redis_server, redis_client):
     """Test that background refresh works correctly."""
     # Initial test data
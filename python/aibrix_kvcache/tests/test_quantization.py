@@ -0,0 +1,218 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dataclasses
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import torch
+
+from aibrix_kvcache.cache_hashable import TokenListView
+from aibrix_kvcache.l2 import KeyBuilder, L2Cache
+from aibrix_kvcache.l2.marshallers import (
+    CompressionPipeline,
+    Compressor,
+    Quantizer,
+)
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.metrics import KVCacheMetrics
+from aibrix_kvcache.status import Status
+
+from .conftest import release_mrs
+from .test_l2cache import build_get_mrs, build_put_mrs
+
+# (dtype, granularity) -> max relative rmse
+ERROR_BOUNDS = {
+    ("INT8", "HEAD"): 0.01,
+    ("INT8", "BLOCK"): 0.05,
+    ("FP8", "HEAD"): 0.05,
+    ("FP8", "BLOCK"): 0.05,
+}
+
+
+@pytest.fixture(params=list(ERROR_BOUNDS.keys()), ids=lambda p: "_".join(p))
+def quant_conf(request):
+    return request.param
+
+
+def random_block(spec, seed=0):
+    """A block whose heads have different magnitudes, like real kv caches."""
+    generator = torch.Generator().manual_seed(seed)
+    block = torch.randn(spec.block_shape, generator=generator)
+    scale_shape = [1] * len(spec.block_shape)
+    scale_shape[-2] = spec.block_shape[-2]
+    scale_shape[-1] = 1
+    head_scales = torch.logspace(-1, 1, spec.block_shape[-2]).view(scale_shape)
+    return (block * head_scales).to(spec.block_dtype)
+
+
+def block_view(mr, spec):
+    """The kv tensors of an MR, excluding the token footer if any."""
+    return mr.slab[mr.addr : mr.addr + spec.block_nbytes].view(
+        spec.block_dtype
+    )
+
+
+def assert_reconstructed(actual, expected, max_rel_rmse=0.01):
+    actual, expected = actual.float(), expected.float()
+    rmse = (actual - expected).square().mean().sqrt()
+    rms = expected.square().mean().sqrt()
+    assert rmse <= max_rel_rmse * rms
+
+
+def test_create(cache_conf_fixture):
+    _, spec = cache_conf_fixture
+    assert Quantizer.from_spec("", spec) is None
+    assert Quantizer.from_spec("none", spec) is None
+    assert Quantizer.from_spec("int8", spec).signature == "qi8h"
+    assert Quantizer.from_spec("fp8", spec, "block").signature == "qf8b"
+    assert not Quantizer.from_spec("int8", spec).lossless
+    with pytest.raises(ValueError):
+        Quantizer.from_spec("INT4", spec)
+    with pytest.raises(ValueError):
+        Quantizer.from_spec("INT8", spec, "TOKEN")
+
+
+def test_reconstruction_error(cache_conf_fixture, quant_conf):
+    _, spec = cache_conf_fixture
+    dtype, granularity = quant_conf
+    quantizer = Quantizer(spec, dtype, granularity)
+    # half the size of 16-bit blocks plus the scales
+    assert quantizer.quantized_nbytes < spec.block_nbytes // 2 + 1024
+
+    error = quantizer.reconstruction_error(random_block(spec))
+    assert error.rel_rmse < ERROR_BOUNDS[quant_conf]
+    assert error.max_abs > 0
+
+    # all zeros are reconstructed exactly
+    zeros = torch.zeros(spec.block_shape, dtype=spec.block_dtype)
+    assert quantizer.reconstruction_error(zeros).max_abs == 0
+
+
+@pytest.mark.parametrize("dtype", ["INT8", "FP8"])
+def test_float32_source_unchanged(cache_conf_fixture, dtype):
+    _, spec = cache_conf_fixture
+    spec = dataclasses.replace(spec, block_dtype=torch.float32)
+    quantizer = Quantizer(spec, dtype)
+    block = random_block(spec)
+    src = bytearray(block.view(torch.uint8).numpy().tobytes())
+    dst = bytearray(quantizer.max_compressed_nbytes(len(src)))
+    quantizer.compress_into(memoryview(src), memoryview(dst))
+    # the source block is left byte for byte unchanged
+    assert torch.equal(
+        torch.frombuffer(src, dtype=torch.uint8),
+        block.view(-1).view(torch.uint8),
+    )
+
+
+def test_trailing_bytes(cache_conf_fixture):
+    _, spec = cache_conf_fixture
+    quantizer = Quantizer(spec, "INT8")
+    block = random_block(spec).view(torch.uint8).view(-1)
+    footer = bytes(range(64))
+    data = block.numpy().tobytes() + footer
+    frame = quantizer.marshal(data)
+    assert len(frame) == quantizer.quantized_nbytes + len(footer)
+    out = quantizer.unmarshal(frame)
+    assert len(out) == len(data)
+    # the footer is kept as is
+    assert out[spec.block_nbytes :] == footer
+
+
+@pytest.mark.parametrize("compression", ["", "ZSTD"])
+def test_pipeline(cache_conf_fixture, compression):
+    _, spec = cache_conf_fixture
+    quantizer = Quantizer(spec, "INT8")
+    pipeline = CompressionPipeline(
+        Compressor.create(compression),
+        spec.block_nbytes,
+        num_slots=4,
+        quantizer=quantizer,
+    )
+    allocator = TensorPoolAllocator.create(capacity_nbytes=spec.block_nbytes)
+    status = allocator.alloc([spec.block_nbytes] * 4)
+    assert status.is_ok()
+    put_mrs, get_mrs = status.get()[:2], status.get()[2:]
+    for i, mr in enumerate(put_mrs):
+        block_view(mr, spec).copy_(random_block(spec, seed=i).view(-1))
+    # zeros are compressed after quantization
+    block_view(put_mrs[1], spec).zero_()
+
+    stagings = pipeline.compress(put_mrs)
+    assert stagings[0].length < spec.block_nbytes // 2 + 1024
+    if compression != "":
+        assert stagings[1].length < stagings[0].length // 10
+    fetched = pipeline.alloc(get_mrs)
+    for src, dst in zip(stagings, fetched):
+        dst.length = src.length
+        dst.copy(src)
+    statuses = pipeline.decompress(fetched, get_mrs, [Status.ok()] * 2)
+    pipeline.release(stagings + fetched)
+    assert all(status.is_ok() for status in statuses)
+
+    for put_mr, get_mr in zip(put_mrs, get_mrs):
+        assert_reconstructed(block_view(get_mr, spec), block_view(put_mr, spec))
+    release_mrs(put_mrs + get_mrs)
+
+
+@pytest.mark.asyncio
+async def test_l2cache_quantization(cache_conf_fixture):
+    _, spec = cache_conf_fixture
+    os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION"] = "1"
+    metrics = KVCacheMetrics(
+        block_ntokens=spec.block_ntokens,
+        capacity_nbytes=0,
+        enable_l1=False,
+        enable_l2=True,
+    )
+    try:
+        l2cache = L2Cache(
+            backend_name="MOCK",
+            placement_policy="SIMPLE",
+            namespace="test",
+            block_spec=spec,
+            executor=ThreadPoolExecutor(max_workers=2),
+            key_builder=KeyBuilder.create(
+                "ROLLING_HASH", block_size=spec.block_ntokens
+            ),
+            metrics=metrics.l2,
+            quantization="INT8",
+        )
+    finally:
+        os.environ.pop("AIBRIX_KV_CACHE_OL_MOCK_USE_COMPRESSION")
+    assert l2cache.open().is_ok()
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=128 * spec.block_nbytes
+    )
+
+    tokens = TokenListView(list(range(32)))
+    put_mrs = build_put_mrs(
+        allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+    )
+    for i, mr in enumerate(put_mrs):
+        block_view(mr, spec).copy_(random_block(spec, seed=i).view(-1))
+    assert (await l2cache.put(None, tokens, put_mrs)).value == 2
+
+    get_mrs = build_get_mrs(
+        allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+    )
+    assert (await l2cache.get(None, tokens, get_mrs)).value == 2
+    for put_mr, get_mr in zip(put_mrs, get_mrs):
+        assert_reconstructed(block_view(get_mr, spec), block_view(put_mr, spec))
+
+    assert metrics.effective_capacity_gain > 1.9
+    assert "L2 effective capacity gain" in metrics.summary()
+    l2cache.close()
+    release_mrs(put_mrs + get_mrs)
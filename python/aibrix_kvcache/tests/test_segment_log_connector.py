@@ -0,0 +1,276 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from aibrix_kvcache.l2.connectors.segment_log import (
+    SegmentIndex,
+    SegmentLogConfig,
+    SegmentLogConnector,
+)
+from aibrix_kvcache.l2.connectors.shfs import SHFSConnector
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.metrics import L2CacheMetrics
+
+from .conftest import randomize_mrs, release_mrs
+
+BLOCK_NBYTES = 4096
+NUM_BLOCKS = 64
+# a segment holds 7 records of a block and its key
+SEGMENT_NBYTES = 8 * BLOCK_NBYTES
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=8)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def allocator():
+    return TensorPoolAllocator.create(
+        capacity_nbytes=4 * NUM_BLOCKS * BLOCK_NBYTES
+    )
+
+
+def create_conn(root, executor, max_segments=64):
+    conn = SegmentLogConnector(
+        str(root),
+        executor,
+        SegmentLogConfig(
+            segment_nbytes=SEGMENT_NBYTES, max_segments=max_segments
+        ),
+    )
+    assert conn.open().is_ok()
+    return conn
+
+
+def alloc_mrs(allocator, n, nbytes=BLOCK_NBYTES):
+    status = allocator.alloc([nbytes] * n)
+    assert status.is_ok()
+    mrs = status.get()
+    assert len(mrs) == n
+    return mrs
+
+
+def test_segment_index():
+    index = SegmentIndex(capacity=8)
+    hashes = [SegmentIndex.hash(f"key_{i}".encode()) for i in range(100)]
+    for i, h in enumerate(hashes):
+        index.put(h, ((i % 4) << 40) | i)
+    assert len(index) == 100
+    for i, h in enumerate(hashes):
+        assert index.get(h) == ((i % 4) << 40) | i
+
+    assert index.remove(hashes[0]) == 0
+    assert index.remove(hashes[0]) == -1
+    assert index.get(hashes[0]) == -1
+    # entries behind the tombstone are still reachable
+    assert all(index.get(h) >= 0 for h in hashes[1:])
+
+    assert index.remove_segment(1) == 25
+    assert len(index) == 74
+    for i, h in enumerate(hashes[1:], start=1):
+        assert (index.get(h) >= 0) == (i % 4 != 1)
+
+
+def test_put_get(tmp_path, executor, allocator):
+    conn = create_conn(tmp_path, executor)
+    put_mrs = alloc_mrs(allocator, 1)
+    get_mrs = alloc_mrs(allocator, 1)
+    small_mrs = alloc_mrs(allocator, 1, BLOCK_NBYTES // 2)
+    randomize_mrs(put_mrs)
+
+    async def run():
+        key = b"test_key"
+        assert (await conn.get(key, get_mrs[0])).is_not_found()
+        assert (await conn.exists(key)).is_not_found()
+        assert (await conn.put(key, put_mrs[0])).is_ok()
+        assert (await conn.exists(key)).is_ok()
+        assert (await conn.get(key, get_mrs[0])).is_ok()
+        assert get_mrs[0].tobytes() == put_mrs[0].tobytes()
+        assert (await conn.get(key, small_mrs[0])).is_error()
+        # overwrite
+        randomize_mrs(put_mrs)
+        assert (await conn.put(key, put_mrs[0])).is_ok()
+        assert (await conn.get(key, get_mrs[0])).is_ok()
+        assert get_mrs[0].tobytes() == put_mrs[0].tobytes()
+        assert (await conn.delete(key)).is_ok()
+        assert (await conn.delete(key)).is_not_found()
+        assert (await conn.get(key, get_mrs[0])).is_not_found()
+
+    asyncio.run(run())
+    conn.close()
+    release_mrs(put_mrs + get_mrs + small_mrs)
+
+
+def test_mput_mget(tmp_path, executor, allocator):
+    conn = create_conn(tmp_path, executor)
+    put_mrs = alloc_mrs(allocator, NUM_BLOCKS)
+    get_mrs = alloc_mrs(allocator, NUM_BLOCKS)
+    randomize_mrs(put_mrs)
+    keys = [f"key_{i}".encode() for i in range(NUM_BLOCKS)]
+
+    async def run():
+        statuses = await conn.mput(keys[::2], put_mrs[::2])
+        assert all(s.is_ok() for s in statuses)
+        statuses = await conn.mget(keys, get_mrs)
+        for i, status in enumerate(statuses):
+            if i % 2 == 0:
+                assert status.is_ok()
+                assert get_mrs[i].tobytes() == put_mrs[i].tobytes()
+            else:
+                assert status.is_not_found()
+
+    asyncio.run(run())
+    conn.close()
+    release_mrs(put_mrs + get_mrs)
+
+
+def test_segment_eviction(tmp_path, executor, allocator):
+    conn = create_conn(tmp_path, executor, max_segments=2)
+    metrics = L2CacheMetrics(cache_type="L2Cache", block_ntokens=16)
+    conn.set_metrics(metrics)
+    mrs = alloc_mrs(allocator, 1)
+    keys = [f"key_{i}".encode() for i in range(15)]
+
+    async def run():
+        for key in keys:
+            assert (await conn.put(key, mrs[0])).is_ok()
+
+    asyncio.run(run())
+    # the third segment evicts the first one
+    assert conn.num_evicted_segments == 1
+    assert len(list(tmp_path.glob("*.seg"))) == 2
+    assert conn.num_objs == 8
+    for i, key in enumerate(keys):
+        status = asyncio.run(conn.exists(key))
+        assert status.is_ok() == (i >= 7)
+    assert metrics.backend_eviction_metrics.total_evicted_objs == 7
+    conn.close()
+    release_mrs(mrs)
+
+
+def test_recovery(tmp_path, executor, allocator):
+    put_mrs = alloc_mrs(allocator, 10)
+    get_mrs = alloc_mrs(allocator, 10)
+    randomize_mrs(put_mrs)
+    keys = [f"key_{i}".encode() for i in range(10)]
+
+    conn = create_conn(tmp_path, executor)
+    statuses = asyncio.run(conn.mput(keys, put_mrs))
+    assert all(s.is_ok() for s in statuses)
+    conn.close()
+
+    conn = create_conn(tmp_path, executor)
+    assert conn.num_objs == 10
+    statuses = asyncio.run(conn.mget(keys, get_mrs))
+    assert all(s.is_ok() for s in statuses)
+    for put_mr, get_mr in zip(put_mrs, get_mrs):
+        assert get_mr.tobytes() == put_mr.tobytes()
+
+    # deletes survive recovery, unless the key is put again
+    for key in keys[:4]:
+        assert asyncio.run(conn.delete(key)).is_ok()
+    assert asyncio.run(conn.put(keys[0], put_mrs[0])).is_ok()
+    conn.close()
+
+    conn = create_conn(tmp_path, executor)
+    assert conn.num_objs == 7
+    statuses = asyncio.run(conn.mget(keys, get_mrs))
+    assert [s.is_ok() for s in statuses] == [True] + [False] * 3 + [True] * 6
+    assert get_mrs[0].tobytes() == put_mrs[0].tobytes()
+    conn.close()
+    release_mrs(put_mrs + get_mrs)
+
+
+
+def test_recovery_skips_uncommitted_records(tmp_path, executor, allocator):
+    put_mrs = alloc_mrs(allocator, 6)
+    get_mrs = alloc_mrs(allocator, 6)
+    randomize_mrs(put_mrs)
+    keys = [f"key_{i}".encode() for i in range(6)]
+    committed = [True, False, True, False, True, True]
+
+    conn = create_conn(tmp_path, executor)
+    write_record = conn._write_record
+
+    def failing_write_record(segment, offset, key, mr):
+        if key in (keys[1], keys[3]):
+            raise RuntimeError("injected write failure")
+        write_record(segment, offset, key, mr)
+
+    with mock.patch.object(conn, "_write_record", failing_write_record):
+        statuses = asyncio.run(conn.mput(keys, put_mrs))
+    assert [s.is_ok() for s in statuses] == committed
+    conn.close()
+
+    # records committed after the failed ones are recovered
+    conn = create_conn(tmp_path, executor)
+    assert conn.num_objs == 4
+    statuses = asyncio.run(conn.mget(keys, get_mrs))
+    assert [s.is_ok() for s in statuses] == committed
+    for i in (0, 2, 4, 5):
+        assert get_mrs[i].tobytes() == put_mrs[i].tobytes()
+    conn.close()
+    release_mrs(put_mrs + get_mrs)
+
+
+BENCH_BATCH_SIZE = 16
+BENCH_BLOCK_NBYTES = 256 * 1024
+
+
+@pytest.mark.parametrize("backend", ["SEGMENT_LOG", "SHFS", "ROCKSDB"])
+@pytest.mark.parametrize("op", ["mput", "mget"])
+def test_benchmark(benchmark, monkeypatch, tmp_path, executor, backend, op):
+    monkeypatch.setenv(f"AIBRIX_KV_CACHE_OL_{backend}_ROOT", str(tmp_path))
+    if backend == "SEGMENT_LOG":
+        conn_cls = SegmentLogConnector
+    elif backend == "SHFS":
+        conn_cls = SHFSConnector
+    else:
+        pytest.importorskip("rocksdict")
+        from aibrix_kvcache.l2.connectors.rocksdb import RocksDBConnector
+
+        conn_cls = RocksDBConnector
+    conn = conn_cls.from_envs("bench", executor)
+    assert conn.open().is_ok()
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=2 * BENCH_BATCH_SIZE * BENCH_BLOCK_NBYTES
+    )
+    mrs = alloc_mrs(allocator, BENCH_BATCH_SIZE, BENCH_BLOCK_NBYTES)
+    randomize_mrs(mrs)
+    keys = [f"key_{i}".encode() for i in range(BENCH_BATCH_SIZE)]
+
+    async def batch_op(op):
+        if conn.feature.mput_mget:
+            statuses = await getattr(conn, op)(keys, mrs)
+        else:
+            method = getattr(conn, op[1:])
+            statuses = await asyncio.gather(
+                *(method(key, mr) for key, mr in zip(keys, mrs))
+            )
+        assert all(s.is_ok() for s in statuses)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(batch_op("mput"))
+    benchmark(lambda: loop.run_until_complete(batch_op(op)))
+    loop.close()
+    conn.close()
+    release_mrs(mrs)
@@ -0,0 +1,238 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aibrix_kvcache.l2.connectors.shfs import SHFSConfig, SHFSConnector
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.metrics import L2CacheMetrics
+
+from .conftest import randomize_mrs, release_mrs
+
+BLOCK_NBYTES = 4096
+NUM_BLOCKS = 64
+
+
+@pytest.fixture(params=[False, True], ids=["no_fsync", "fsync"])
+def shfs_fixture(tmp_path, request):
+    executor = ThreadPoolExecutor(max_workers=8)
+    conn = SHFSConnector(
+        str(tmp_path), executor, SHFSConfig(fsync=request.param)
+    )
+    assert conn.open().is_ok()
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=4 * NUM_BLOCKS * BLOCK_NBYTES
+    )
+    yield conn, allocator
+    conn.close()
+    executor.shutdown()
+
+
+def alloc_mrs(allocator, n, nbytes=BLOCK_NBYTES):
+    status = allocator.alloc([nbytes] * n)
+    assert status.is_ok()
+    mrs = status.get()
+    assert len(mrs) == n
+    return mrs
+
+
+def test_put_get(shfs_fixture):
+    conn, allocator = shfs_fixture
+    put_mrs = alloc_mrs(allocator, 1)
+    get_mrs = alloc_mrs(allocator, 1)
+    randomize_mrs(put_mrs)
+
+    async def run():
+        key = b"test_key"
+        assert (await conn.get(key, get_mrs[0])).is_not_found()
+        assert (await conn.exists(key)).is_not_found()
+        assert (await conn.put(key, put_mrs[0])).is_ok()
+        assert (await conn.exists(key)).is_ok()
+        assert (await conn.get(key, get_mrs[0])).is_ok()
+        assert get_mrs[0].tobytes() == put_mrs[0].tobytes()
+        # overwrite
+        randomize_mrs(put_mrs)
+        assert (await conn.put(key, put_mrs[0])).is_ok()
+        assert (await conn.get(key, get_mrs[0])).is_ok()
+        assert get_mrs[0].tobytes() == put_mrs[0].tobytes()
+        assert (await conn.delete(key)).is_ok()
+        assert (await conn.delete(key)).is_not_found()
+        assert (await conn.get(key, get_mrs[0])).is_not_found()
+
+    asyncio.run(run())
+    release_mrs(put_mrs + get_mrs)
+
+
+def test_size_mismatch(shfs_fixture):
+    conn, allocator = shfs_fixture
+    put_mrs = alloc_mrs(allocator, 1)
+    small_mrs = alloc_mrs(allocator, 1, BLOCK_NBYTES // 2)
+    large_mrs = alloc_mrs(allocator, 1, BLOCK_NBYTES * 2)
+
+    async def run():
+        key = b"test_key"
+        assert (await conn.put(key, put_mrs[0])).is_ok()
+        assert (await conn.get(key, small_mrs[0])).is_error()
+        assert (await conn.get(key, large_mrs[0])).is_error()
+
+    asyncio.run(run())
+    release_mrs(put_mrs + small_mrs + large_mrs)
+
+
+def test_mput_mget(shfs_fixture):
+    conn, allocator = shfs_fixture
+    put_mrs = alloc_mrs(allocator, NUM_BLOCKS)
+    get_mrs = alloc_mrs(allocator, NUM_BLOCKS)
+    randomize_mrs(put_mrs)
+    keys = [f"key_{i}".encode() for i in range(NUM_BLOCKS)]
+
+    async def run():
+        statuses = await conn.mput(keys[::2], put_mrs[::2])
+        assert all(s.is_ok() for s in statuses)
+        statuses = await conn.mget(keys, get_mrs)
+        for i, status in enumerate(statuses):
+            if i % 2 == 0:
+                assert status.is_ok()
+                assert get_mrs[i].tobytes() == put_mrs[i].tobytes()
+            else:
+                assert status.is_not_found()
+
+    asyncio.run(run())
+    release_mrs(put_mrs + get_mrs)
+
+
+def wait_for(cond, timeout_s=5):
+    start = time.time()
+    while not cond():
+        assert time.time() - start < timeout_s, "Timed out"
+        time.sleep(0.01)
+
+
+def create_conn(root, executor, **kwargs):
+    conn = SHFSConnector(
+        str(root),
+        executor,
+        SHFSConfig(eviction_interval_s=0.01, **kwargs),
+    )
+    assert conn.open().is_ok()
+    return conn
+
+
+@pytest.mark.parametrize("limit", ["max_files", "capacity_nbytes"])
+def test_lru_eviction(tmp_path, limit):
+    executor = ThreadPoolExecutor(max_workers=8)
+    metrics = L2CacheMetrics(cache_type="L2Cache", block_ntokens=16)
+    limits = {"max_files": 8, "capacity_nbytes": 8 * BLOCK_NBYTES}
+    conn = create_conn(tmp_path, executor, **{limit: limits[limit]})
+    conn.set_metrics(metrics)
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=4 * NUM_BLOCKS * BLOCK_NBYTES
+    )
+    mrs = alloc_mrs(allocator, 1)
+    keys = [f"key_{i}".encode() for i in range(10)]
+
+    async def run():
+        for key in keys[:8]:
+            assert (await conn.put(key, mrs[0])).is_ok()
+        # key_0 becomes the most recently used
+        assert (await conn.get(keys[0], mrs[0])).is_ok()
+        for key in keys[8:]:
+            assert (await conn.put(key, mrs[0])).is_ok()
+
+    asyncio.run(run())
+    # evicted down to the low watermark, depending on when the eviction
+    # thread wakes up, it evicts 2 or 3 files
+    wait_for(lambda: conn.num_files <= 8)
+    num_evicted = conn.num_evicted_files
+    assert num_evicted in (2, 3)
+    assert conn.num_files == 10 - num_evicted
+    assert conn.used_nbytes == conn.num_files * BLOCK_NBYTES
+
+    async def check():
+        for i, key in enumerate(keys):
+            status = await conn.exists(key)
+            if 1 <= i <= num_evicted:
+                assert status.is_not_found()
+            else:
+                assert status.is_ok()
+
+    asyncio.run(check())
+    eviction_metrics = metrics.backend_eviction_metrics
+    wait_for(
+        lambda: eviction_metrics.total_evicted_objs == num_evicted
+        and eviction_metrics.num_objs == 10 - num_evicted
+    )
+    conn.close()
+    release_mrs(mrs)
+    executor.shutdown()
+
+
+def test_ttl_eviction(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=8)
+    conn = create_conn(tmp_path, executor, eviction_policy="TTL", ttl_s=1)
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=4 * NUM_BLOCKS * BLOCK_NBYTES
+    )
+    mrs = alloc_mrs(allocator, 1)
+
+    async def put(key):
+        assert (await conn.put(key, mrs[0])).is_ok()
+
+    asyncio.run(put(b"key_0"))
+    time.sleep(0.5)
+    asyncio.run(put(b"key_1"))
+    wait_for(lambda: conn.num_files == 1)
+    assert asyncio.run(conn.exists(b"key_0")).is_not_found()
+    assert asyncio.run(conn.exists(b"key_1")).is_ok()
+    wait_for(lambda: conn.num_files == 0)
+    assert asyncio.run(conn.exists(b"key_1")).is_not_found()
+    conn.close()
+    release_mrs(mrs)
+    executor.shutdown()
+
+
+def test_rebuild_index(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=8)
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=4 * NUM_BLOCKS * BLOCK_NBYTES
+    )
+    mrs = alloc_mrs(allocator, 1)
+    keys = [f"key_{i}".encode() for i in range(10)]
+
+    # populate the directory w/o any limit
+    conn = create_conn(tmp_path, executor)
+
+    async def run():
+        for key in keys:
+            assert (await conn.put(key, mrs[0])).is_ok()
+
+    asyncio.run(run())
+    conn.close()
+    # make mtimes distinct
+    for i, key in enumerate(keys):
+        os.utime(conn._key_to_filepath(key), (i, i))
+
+    # the new connector evicts the oldest files found in the directory
+    conn = create_conn(tmp_path, executor, max_files=5)
+    wait_for(lambda: conn.num_files == 4)
+    for i, key in enumerate(keys):
+        assert conn._key_to_filepath(key).exists() == (i >= 6)
+    conn.close()
+    release_mrs(mrs)
+    executor.shutdown()
@@ -17,7 +17,10 @@ import random
 import pytest
 
 from aibrix_kvcache.memory import TensorPoolAllocator
-from aibrix_kvcache.memory.allocator import CoalescingPoolAllocator
+from aibrix_kvcache.memory.allocator import (
+    CoalescingPoolAllocator,
+    SizeClassPoolAllocator,
+)
 
 
 @pytest.fixture
@@ -193,3 +196,106 @@ def test_stress_allocation(allocator, rseed):
         allocator.assert_consistency()
 
     assert len(allocator) == 0
+
+
+@pytest.fixture
+def size_class_allocator():
+    TensorPoolAllocator.SLAB_MAX_NBYTES = 1024
+    TensorPoolAllocator.ALLOC_SIZE_ALIGNMENT = 8
+    return SizeClassPoolAllocator(capacity_nbytes=64 * 1024)
+
+
+def test_size_classes(size_class_allocator):
+    allocator = size_class_allocator
+    assert allocator.class_nbytes(1) == 8
+    assert allocator.class_nbytes(16) == 16
+    assert allocator.class_nbytes(130) == 160
+    assert allocator.class_nbytes(1000) == 1024
+    assert allocator.class_nbytes(1025) == 1280
+    for size in range(1, 4096):
+        class_nbytes = allocator.class_nbytes(size)
+        assert size <= class_nbytes
+        assert allocator.class_nbytes(class_nbytes) == class_nbytes
+        if size > 64:
+            assert (class_nbytes - size) / size < 1 / 2**allocator.CLASS_BITS
+
+
+def test_size_class_reuse(size_class_allocator):
+    allocator = size_class_allocator
+    mrs = allocator.alloc([100, 130, 500]).value
+    assert [mr.length for mr in mrs] == [100, 130, 500]
+    assert [mr.capacity for mr in mrs] == [112, 160, 512]
+    assert len(allocator) == 112 + 160 + 512
+    addrs = {(mr.slab.data_ptr(), mr.addr) for mr in mrs}
+    [mr.ref_down() for mr in mrs]
+    assert len(allocator) == 0
+    assert allocator.cached_nbytes == 112 + 160 + 512
+    allocator.assert_consistency()
+
+    # sizes of the same classes reuse the freed MRs
+    mrs = allocator.alloc([102, 140, 490]).value
+    assert {(mr.slab.data_ptr(), mr.addr) for mr in mrs} == addrs
+    assert allocator.cached_nbytes == 0
+    allocator.assert_consistency()
+    [mr.ref_down() for mr in mrs]
+    allocator.assert_consistency()
+
+
+def test_size_class_flush(size_class_allocator):
+    allocator = size_class_allocator
+    # fill the pool with a single class and free all of it
+    mrs = allocator.alloc([64] * (allocator.capacity_nbytes // 64)).value
+    assert len(allocator) == allocator.capacity_nbytes
+    [mr.ref_down() for mr in mrs]
+    assert allocator.cached_nbytes == allocator.capacity_nbytes
+    assert allocator.fragmentation_ratio > 0.9
+
+    # another class flushes the free lists back to the coalescing pool
+    status = allocator.alloc([1024] * 4)
+    assert status.is_ok()
+    assert len(status.value) == 4
+    assert allocator.cached_nbytes == 0
+    allocator.assert_consistency()
+    [mr.ref_down() for mr in status.value]
+    allocator.assert_consistency()
+
+
+@pytest.mark.parametrize("rseed", [i * 100 + 43 for i in range(5)])
+def test_size_class_stress(size_class_allocator, rseed):
+    random.seed(rseed)
+    allocator = size_class_allocator
+
+    live = []
+    for _ in range(2000):
+        if live and random.random() < 0.5:
+            live.pop(random.randrange(len(live))).ref_down()
+        else:
+            sizes = [random.randint(8, 512) for _ in range(random.randint(1, 8))]
+            status = allocator.alloc(sizes)
+            if status.is_ok():
+                live.extend(status.value)
+        assert len(allocator) == sum(mr.capacity for mr in live)
+    allocator.assert_consistency()
+
+    for mr in live:
+        mr.ref_down()
+    assert len(allocator) == 0
+    allocator.assert_consistency()
+
+
+def test_size_class_best_fit(size_class_allocator):
+    allocator = size_class_allocator
+    large = allocator.alloc([1024]).value
+    sizes = [64] * ((allocator.capacity_nbytes - 1024) // 64)
+    small = allocator.alloc(sizes).value
+    assert len(allocator) == allocator.capacity_nbytes
+    [mr.ref_down() for mr in large]
+
+    # a smaller class is served by the cached larger MR
+    mrs = allocator.alloc([600]).value
+    assert mrs[0].length == 600
+    assert mrs[0].capacity == 1024
+    assert allocator.cached_nbytes == 0
+    allocator.assert_consistency()
+    [mr.ref_down() for mr in mrs + small]
+    allocator.assert_consistency()
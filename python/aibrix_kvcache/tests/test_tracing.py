@@ -0,0 +1,308 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from aibrix_kvcache import Status, StatusCodes, TokenListView, tracing
+from aibrix_kvcache.tracing import (
+    Span,
+    SpanExporter,
+    Tracer,
+    propagate,
+    trace_request,
+    trace_section,
+    trace_span,
+)
+
+
+class ListSpanExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, spans) -> None:
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exporter():
+    yield ListSpanExporter()
+
+
+@pytest.fixture
+def install_tracer(exporter):
+    tracers = []
+
+    def install(**kwargs) -> Tracer:
+        tracer = Tracer(exporter, **kwargs)
+        tracers.append(tracer)
+        tracing.set_tracer(tracer)
+        return tracer
+
+    yield install
+    tracing.set_tracer(None)
+    for tracer in tracers:
+        tracer.close()
+
+
+@pytest.fixture
+def traced_op_cls(monkeypatch):
+    # decorators only wrap ops if tracing is enabled at decoration time
+    monkeypatch.setenv("AIBRIX_KV_CACHE_OL_TRACING_ENABLED", "1")
+
+    class Op:
+        @trace_span("get", "Op")
+        def get(self, prefix, query) -> Status[int]:
+            with trace_section("Op.build_keys"):
+                pass
+            return Status.ok(len(query))
+
+        @trace_span("exists", "Op")
+        async def exists(self, prefix, query) -> Status[int]:
+            with trace_section("Op.backend_exists"):
+                await asyncio.sleep(0)
+            return Status(StatusCodes.NOT_FOUND)
+
+    return Op
+
+
+def test_sampling(exporter):
+    tracers = [Tracer(exporter, sample_ratio=r) for r in (0.1, 1, 0)]
+    tracer, all_tracer, none_tracer = tracers
+    ids = [f"req-{i}" for i in range(10000)]
+    sampled = [tracer.should_sample(i) for i in ids]
+    # requests are sampled by their ids, consistently across processes
+    assert sampled == [tracer.should_sample(i) for i in ids]
+    assert 800 < sum(sampled) < 1200
+    assert all(all_tracer.should_sample(i) for i in ids)
+    assert not any(none_tracer.should_sample(i) for i in ids)
+    for t in tracers:
+        t.close()
+
+
+def test_request_trace(install_tracer, exporter, traced_op_cls):
+    tracer = install_tracer(sample_ratio=1)
+    op = traced_op_cls()
+    tokens = TokenListView(list(range(64)))
+    with trace_request("req-1", "Connector.recv") as root:
+        assert tracing.current_span() is root
+        assert op.get(tokens[:16], tokens[16:]).get() == 48
+    # ops outside of a request are traces of their own
+    op.get(None, tokens)
+    tracer.close()
+
+    spans: Dict[str, List[Span]] = {}
+    for span in exporter.spans:
+        spans.setdefault(span.name, []).append(span)
+    assert sorted(spans) == ["Connector.recv", "Op.build_keys", "Op.get"]
+    [root] = spans["Connector.recv"]
+    request_get, other_get = spans["Op.get"]
+    request_keys, other_keys = spans["Op.build_keys"]
+
+    assert root.parent_id == 0
+    assert root.trace.request_id == "req-1"
+    assert request_get.parent_id == root.span_id
+    assert request_keys.parent_id == request_get.span_id
+    assert request_get.trace is root.trace
+    assert request_get.attrs == {
+        "prefix_ntokens": 16,
+        "query_ntokens": 48,
+        "status": "OK",
+        "value": 48,
+    }
+    assert all(s.start_ns <= s.end_ns for s in exporter.spans)
+    assert root.start_ns <= request_get.start_ns <= request_get.end_ns
+    assert request_get.end_ns <= root.end_ns
+
+    assert other_get.parent_id == 0
+    assert other_get.trace.request_id is None
+    assert other_get.trace.trace_id != root.trace.trace_id
+    assert other_keys.parent_id == other_get.span_id
+
+    record = root.to_dict()
+    assert record["request_id"] == "req-1"
+    assert record["parent_id"] is None
+    assert len(record["trace_id"]) == 32
+    json.dumps([span.to_dict() for span in exporter.spans])
+
+
+def test_propagate(install_tracer, exporter, traced_op_cls):
+    tracer = install_tracer(sample_ratio=1)
+    op = traced_op_cls()
+    tokens = TokenListView(list(range(32)))
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        with trace_request("req-1", "Connector.recv") as root:
+            future = asyncio.run_coroutine_threadsafe(
+                propagate(op.exists(None, tokens)), loop
+            )
+            assert future.result(timeout=5).is_not_found()
+            # the current span of the caller is intact
+            assert tracing.current_span() is root
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    tracer.close()
+
+    spans = {span.name: span for span in exporter.spans}
+    assert sorted(spans) == [
+        "Connector.recv",
+        "Op.backend_exists",
+        "Op.exists",
+    ]
+    assert spans["Op.exists"].parent_id == root.span_id
+    assert spans["Op.exists"].attrs["status"] == "NOT_FOUND"
+    assert (
+        spans["Op.backend_exists"].parent_id == spans["Op.exists"].span_id
+    )
+
+
+def test_unsampled_request(install_tracer, exporter, traced_op_cls):
+    tracer = install_tracer(sample_ratio=0.5)
+    op = traced_op_cls()
+    tokens = TokenListView(list(range(32)))
+    request_id = next(
+        f"req-{i}"
+        for i in range(1000)
+        if not tracer.should_sample(f"req-{i}")
+    )
+    with trace_request(request_id, "Connector.recv") as root:
+        assert root is None
+        # ops of an unsampled request do not start traces of their own
+        for _ in range(64):
+            op.get(None, tokens)
+    tracer.close()
+    assert exporter.spans == []
+
+
+def test_min_duration(install_tracer, exporter, traced_op_cls):
+    tracer = install_tracer(sample_ratio=1, min_duration_ms=50)
+    op = traced_op_cls()
+    tokens = TokenListView(list(range(32)))
+    with trace_request("fast", "Connector.recv"):
+        op.get(None, tokens)
+    with trace_request("slow", "Connector.recv"):
+        op.get(None, tokens)
+        time.sleep(0.06)
+    tracer.close()
+
+    assert len(exporter.spans) == 3
+    assert {span.trace.request_id for span in exporter.spans} == {"slow"}
+
+
+def test_trace_section_outside_of_trace(install_tracer, exporter):
+    tracer = install_tracer(sample_ratio=1)
+    with trace_section("Op.build_keys") as span:
+        assert span is None
+    tracer.close()
+    assert exporter.spans == []
+
+
+_CACHE_MANAGER_SCRIPT = """
+import torch
+
+from aibrix_kvcache import (
+    BaseKVCacheManager,
+    KVCacheBlockLayout,
+    KVCacheBlockSpec,
+    KVCacheConfig,
+    KVCacheTensorSpec,
+    ModelSpec,
+    TokenListView,
+    cache_manager,
+    tracing,
+)
+
+cache_manager.TESTING_DISABLE_PIN_MEMORY = True
+spec = KVCacheBlockSpec(
+    block_ntokens=16,
+    block_dtype=torch.bfloat16,
+    block_layout=KVCacheBlockLayout.NCLD,
+    tensor_spec=KVCacheTensorSpec(
+        heads=[0, 1], layers=list(range(4)), head_size=64
+    ),
+)
+cache = BaseKVCacheManager(
+    config=KVCacheConfig(block_spec=spec, model_spec=ModelSpec(1024))
+)
+tokens = TokenListView(list(range(128)))
+with tracing.trace_request("req-1", "Connector.send"):
+    handle = cache.allocate_for(None, tokens[:64]).get()
+    assert cache.put(None, tokens[:64], handle).get() == 64
+with tracing.trace_request("req-1", "Connector.recv"):
+    status = cache.acquire(None, tokens)
+    assert status.get()[0] == 64
+    status.get()[1].release()
+cache.close()
+tracing.get_tracer().close()
+"""
+
+
+def test_cache_manager_spans(tmp_path):
+    env = {k: v for k, v in os.environ.items() if not k.startswith("AIBRIX_")}
+    env.update(
+        {
+            "AIBRIX_KV_CACHE_OL_L1_CACHE_ENABLED": "1",
+            "AIBRIX_KV_CACHE_OL_L1_CACHE_CAPACITY_GB": "0.01",
+            "AIBRIX_KV_CACHE_OL_L1_CACHE_DEVICE": "cpu",
+            "AIBRIX_KV_CACHE_OL_L2_CACHE_BACKEND": "",
+            "AIBRIX_KV_CACHE_OL_TRACING_ENABLED": "1",
+            "AIBRIX_KV_CACHE_OL_TRACING_SAMPLE_RATIO": "1",
+            "AIBRIX_KV_CACHE_OL_TRACING_JSONL_DIR": str(tmp_path),
+        }
+    )
+    subprocess.run(
+        [sys.executable, "-c", _CACHE_MANAGER_SCRIPT],
+        env=env,
+        check=True,
+        timeout=300,
+    )
+
+    [path] = os.listdir(tmp_path)
+    with open(os.path.join(tmp_path, path)) as f:
+        records = [json.loads(line) for line in f]
+    assert {r["request_id"] for r in records} == {"req-1"}
+    assert len({r["trace_id"] for r in records}) == 1
+
+    by_id = {r["span_id"]: r for r in records}
+
+    def path_of(record) -> str:
+        names = [record["name"]]
+        while record["parent_id"] is not None:
+            record = by_id[record["parent_id"]]
+            names.append(record["name"])
+        return "/".join(reversed(names))
+
+    paths = {path_of(r) for r in records}
+    assert {
+        "Connector.send/KVCacheManager.allocate_for",
+        "Connector.send/KVCacheManager.allocate_for/KVCacheManager.allocate",
+        "Connector.send/KVCacheManager.put/L1Cache.put",
+        "Connector.recv/KVCacheManager.acquire/L1Cache.acquire",
+    } <= paths
+    [acquire] = [r for r in records if r["name"] == "KVCacheManager.acquire"]
+    assert acquire["attrs"]["query_ntokens"] == 128
+    assert acquire["attrs"]["value"] == 64
@@ -0,0 +1,245 @@
+# Copyright 2024 The Aibrix Team.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aibrix_kvcache.cache_hashable import TokenListView
+from aibrix_kvcache.l2 import KeyBuilder, L2Cache, L2WriteBackQueue
+from aibrix_kvcache.memory import TensorPoolAllocator
+from aibrix_kvcache.metrics import MetricRecorder, WriteBackMetrics
+from aibrix_kvcache.spec import KVCacheBlockLayout
+
+from .conftest import get_cache_conf
+from .test_l2cache import build_get_mrs, build_put_mrs
+
+
+@pytest.fixture
+def write_back_fixture():
+    os.environ["AIBRIX_KV_CACHE_OL_MOCK_USE_MPUT_MGET"] = "1"
+    _, spec = get_cache_conf(KVCacheBlockLayout.NCLD)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    cache = L2Cache(
+        backend_name="MOCK",
+        placement_policy="SIMPLE",
+        namespace="test",
+        block_spec=spec,
+        executor=ThreadPoolExecutor(max_workers=2),
+        key_builder=KeyBuilder.create(
+            "ROLLING_HASH", block_size=spec.block_ntokens
+        ),
+    )
+    cache.open().raise_if_not_ok()
+    TensorPoolAllocator.SLAB_MAX_NBYTES = spec.block_nbytes * 256
+    allocator = TensorPoolAllocator.create(
+        capacity_nbytes=256 * spec.block_nbytes
+    )
+
+    def create_queue(**kwargs):
+        kwargs = {
+            "capacity_nblocks": 64,
+            "max_batch_nblocks": 4,
+            "max_batch_nbytes": 1 << 30,
+            "max_inflight_batches": 2,
+            "timeout_s": 1,
+            "on_done": lambda mrs: [mr.ref_down() for mr in mrs],
+            "metrics": WriteBackMetrics(MetricRecorder.Resource.L2_WRITE_BACK),
+            **kwargs,
+        }
+        return L2WriteBackQueue(cache, loop, **kwargs)
+
+    def put_mrs(prefix, query):
+        return build_put_mrs(
+            allocator, spec.block_nbytes, spec.block_ntokens, prefix, query
+        )
+
+    events = []
+
+    def block_loop():
+        """Block the event loop until the returned event is set."""
+        event = threading.Event()
+        events.append(event)
+        loop.call_soon_threadsafe(event.wait)
+        return event
+
+    try:
+        yield spec, cache, block_loop, allocator, create_queue, put_mrs
+    finally:
+        os.environ.pop("AIBRIX_KV_CACHE_OL_MOCK_USE_MPUT_MGET", None)
+        for event in events:
+            event.set()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        cache.close()
+
+
+def test_coalesced_writes(write_back_fixture):
+    spec, cache, block_loop, allocator, create_queue, put_mrs = write_back_fixture
+    queue = create_queue()
+    metrics = queue._metrics
+
+    # blocks of many sequences, queued one by one like L1Cache callbacks
+    sequences = [
+        TokenListView([i * 1000 + j for j in range(4 * spec.block_ntokens)])
+        for i in range(8)
+    ]
+    unblock = block_loop()
+    for tokens in sequences:
+        for i, mr in enumerate(put_mrs(None, tokens)):
+            prefix = tokens[: i * spec.block_ntokens] or None
+            query = tokens[i * spec.block_ntokens : (i + 1) * spec.block_ntokens]
+            status = queue.put(prefix, query, [mr])
+            assert status.is_ok()
+            assert status.get() == spec.block_ntokens
+    assert len(queue) == 32
+    assert metrics.queue_nblocks == 32
+    unblock.set()
+
+    assert queue.flush(timeout_s=10).is_ok()
+    assert len(queue) == 0
+    assert queue.nbytes == 0
+    # all MRs are released
+    assert len(allocator) == 0
+    assert sum(metrics.batch_nblocks) == 32
+    assert max(metrics.batch_nblocks) == 4
+    assert len(metrics.batch_nblocks) == 8
+
+    for tokens in sequences:
+        get_mrs = build_get_mrs(
+            allocator, spec.block_nbytes, spec.block_ntokens, None, tokens
+        )
+        status = asyncio.run_coroutine_threadsafe(
+            cache.get(None, tokens, get_mrs), queue._event_loop
+        ).result()
+        assert status.is_ok()
+        assert status.get() == 4
+        [mr.ref_down() for mr in get_mrs]
+
+
+def test_batch_nbytes_limit(write_back_fixture):
+    spec, cache, block_loop, allocator, create_queue, put_mrs = write_back_fixture
+    tokens = TokenListView(list(range(8 * spec.block_ntokens)))
+    mrs = put_mrs(None, tokens)
+    queue = create_queue(
+        max_batch_nblocks=8, max_batch_nbytes=2 * mrs[-1].length
+    )
+
+    unblock = block_loop()
+    for i, mr in enumerate(mrs):
+        prefix = tokens[: i * spec.block_ntokens]
+        query = tokens[i * spec.block_ntokens : (i + 1) * spec.block_ntokens]
+        assert queue.put(prefix or None, query, [mr]).is_ok()
+    unblock.set()
+
+    assert queue.flush(timeout_s=10).is_ok()
+    assert queue._metrics.batch_nblocks == [2, 2, 2, 2]
+
+
+def test_priority(write_back_fixture, mocker):
+    spec, cache, block_loop, allocator, create_queue, put_mrs = write_back_fixture
+    queue = create_queue(max_batch_nblocks=1, max_inflight_batches=1)
+    put_batch = mocker.spy(cache, "put_batch")
+
+    tokens = TokenListView(list(range(4 * spec.block_ntokens)))
+    mrs = put_mrs(None, tokens)
+    keys = [
+        (
+            tokens[: i * spec.block_ntokens] or None,
+            tokens[i * spec.block_ntokens : (i + 1) * spec.block_ntokens],
+        )
+        for i in range(4)
+    ]
+
+    unblock = block_loop()
+    # deeper blocks are queued first, the second block is hot
+    for i in (3, 2, 0):
+        assert queue.put(*keys[i], [mrs[i]]).is_ok()
+    assert queue.put(*keys[1], [mrs[1]], hot=True).is_ok()
+    unblock.set()
+
+    assert queue.flush(timeout_s=10).is_ok()
+    order = [call.args[0][0][1] for call in put_batch.call_args_list]
+    assert order == [keys[i][1] for i in (1, 0, 2, 3)]
+
+
+def test_backpressure(write_back_fixture):
+    spec, cache, block_loop, allocator, create_queue, put_mrs = write_back_fixture
+    queue = create_queue(capacity_nblocks=2, timeout_s=0.05)
+    metrics = queue._metrics
+
+    tokens = TokenListView(list(range(4 * spec.block_ntokens)))
+    mrs = put_mrs(None, tokens)
+    keys = [
+        (
+            tokens[: i * spec.block_ntokens] or None,
+            tokens[i * spec.block_ntokens : (i + 1) * spec.block_ntokens],
+        )
+        for i in range(4)
+    ]
+
+    unblock = block_loop()
+    assert queue.put(*keys[0], [mrs[0]]).is_ok()
+    assert queue.put(*keys[1], [mrs[1]]).is_ok()
+    # the queue is full and cannot drain, the put is dropped after timeout
+    status = queue.put(*keys[2], [mrs[2]])
+    assert status.is_denied()
+    assert metrics.num_dropped_nblocks == 1
+    assert metrics.num_dropped_nbytes == mrs[2].length
+    # dropped MRs are released right away
+    assert len(allocator) == sum(mr.length for mr in mrs) - mrs[2].length
+
+    # the put waits for the queue to drain
+    timer = threading.Timer(0.02, unblock.set)
+    timer.start()
+    queue.timeout_s = 10
+    assert queue.put(*keys[3], [mrs[3]]).is_ok()
+    timer.join()
+
+    assert queue.flush(timeout_s=10).is_ok()
+    assert metrics.num_dropped_nblocks == 1
+    assert len(allocator) == 0
+
+
+def test_nonblocking_put(write_back_fixture):
+    spec, cache, block_loop, allocator, create_queue, put_mrs = write_back_fixture
+    queue = create_queue(capacity_nblocks=1, timeout_s=10)
+
+    tokens = TokenListView(list(range(2 * spec.block_ntokens)))
+    mrs = put_mrs(None, tokens)
+    keys = [
+        (
+            tokens[: i * spec.block_ntokens] or None,
+            tokens[i * spec.block_ntokens : (i + 1) * spec.block_ntokens],
+        )
+        for i in range(2)
+    ]
+
+    unblock = block_loop()
+    assert queue.put(*keys[0], [mrs[0]]).is_ok()
+    # a zero timeout drops the put right away instead of waiting
+    start = time.perf_counter()
+    assert queue.put(*keys[1], [mrs[1]], timeout_s=0).is_denied()
+    assert time.perf_counter() - start < 1
+    assert queue._metrics.num_dropped_nblocks == 1
+
+    unblock.set()
+    assert queue.flush(timeout_s=10).is_ok()
+    assert len(allocator) == 0